@@ -0,0 +1,3 @@
+"""
+评测引擎 HTTP 服务（FastAPI）：uvicorn api.main:app --port 8000
+"""
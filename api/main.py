@@ -0,0 +1,185 @@
+"""
+评测引擎 HTTP 服务：simulate / Explore Gate / Validate Gate / 元素贡献 / 变体建议 / 决策结论 / 评测集。
+
+- 运行：uvicorn api.main:app --port 8000（在仓库根目录执行）
+- simulate、元素贡献、决策结论、评测集生成走进程池（API_WORKERS，默认 CPU 核数；0 = 在事件循环线程池内执行）
+- /batch 端点接收数组，逐项并发提交，结果顺序与请求一致
+- /metrics：Prometheus 文本。LLM 调用序列从 SQLite 账本重建（调用发生在 Streamlit 进程，API 本身不调 LLM；
+  LLM_LEDGER=0 时只有本进程数据）；profiling 阶段直方图只含 API 进程内执行的阶段（进程池 worker 里的
+  阶段不回传，需要时用 API_WORKERS=0 在本进程执行）
+  /llm/ledger：SQLite 账本汇总（跨进程，含每变体成本）
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+_ROOT = Path(__file__).resolve().parent.parent
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from fastapi import Body, FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from api import tasks
+from api.schemas import (
+    MAX_BATCH_SIZE,
+    DecisionBoardRequest,
+    DecisionBoardResponse,
+    ElementScoresRequest,
+    EvalSetCard,
+    EvalSetRequest,
+    ExploreGateRequest,
+    SimulateRequest,
+    ValidateGateRequest,
+    VariantSuggestionsRequest,
+)
+import llm_metrics
+import profiling
+from element_scores import ElementScore
+from explore_gate import ExploreGateResult, evaluate_explore_gate
+from simulate_metrics import SimulatedMetrics
+from validate_gate import ValidateGateResult, evaluate_validate_gate
+from variant_suggestions import VariantSuggestion, next_variant_suggestions
+
+T = TypeVar("T")
+
+
+def _worker_count() -> int:
+    raw = os.getenv("API_WORKERS", "").strip()
+    if raw:
+        return max(0, int(raw))
+    return os.cpu_count() or 1
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workers = _worker_count()
+    pool: Executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else ThreadPoolExecutor(max_workers=4)
+    app.state.pool = pool
+    try:
+        yield
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="投放实验决策系统 API", version="0.1.0", lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+
+async def _offload(fn: Callable[..., T], *args: Any) -> T:
+    """在进程池里执行 CPU 密集任务，不阻塞事件循环"""
+    return await asyncio.get_running_loop().run_in_executor(app.state.pool, fn, *args)
+
+
+async def _offload_batch(fn: Callable[..., T], items: list[Any]) -> list[T]:
+    return list(await asyncio.gather(*(_offload(fn, item) for item in items)))
+
+
+def _explore(req: ExploreGateRequest) -> ExploreGateResult:
+    return evaluate_explore_gate(
+        req.variant_metrics,
+        req.baseline_metrics,
+        context=req.context,
+        config=req.config,
+        bucket_info=req.bucket_info,
+    )
+
+
+def _validate(req: ValidateGateRequest) -> ValidateGateResult:
+    return evaluate_validate_gate(req.windowed_metrics, req.light_expansion_metrics, config=req.config)
+
+
+_BatchBody = Body(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+# -------- 端点 --------
+
+
+@app.get("/healthz")
+def healthz() -> dict[str, Any]:
+    return {"status": "ok", "workers": _worker_count()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    body = llm_metrics.ledger_prometheus_text() + profiling.prometheus_text()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/llm/ledger")
+def llm_ledger(since: float | None = None) -> dict[str, Any]:
+    """按用途汇总 LLM 账本；since 为 unix 时间戳"""
+    return llm_metrics.ledger_summary(since=since)
+
+
+@app.post("/simulate", response_model=list[SimulatedMetrics])
+async def simulate(req: SimulateRequest):
+    return await _offload(tasks.run_simulate, req)
+
+
+@app.post("/simulate/batch", response_model=list[list[SimulatedMetrics]])
+async def simulate_batch(reqs: list[SimulateRequest] = _BatchBody):
+    return await _offload_batch(tasks.run_simulate, reqs)
+
+
+@app.post("/explore-gate", response_model=ExploreGateResult)
+def explore_gate(req: ExploreGateRequest):
+    return _explore(req)
+
+
+@app.post("/explore-gate/batch", response_model=list[ExploreGateResult])
+def explore_gate_batch(reqs: list[ExploreGateRequest] = _BatchBody):
+    return [_explore(r) for r in reqs]
+
+
+@app.post("/validate-gate", response_model=ValidateGateResult)
+def validate_gate(req: ValidateGateRequest):
+    return _validate(req)
+
+
+@app.post("/validate-gate/batch", response_model=list[ValidateGateResult])
+def validate_gate_batch(reqs: list[ValidateGateRequest] = _BatchBody):
+    return [_validate(r) for r in reqs]
+
+
+@app.post("/element-scores", response_model=list[ElementScore])
+async def element_scores(req: ElementScoresRequest):
+    return await _offload(tasks.run_element_scores, req)
+
+
+@app.post("/element-scores/batch", response_model=list[list[ElementScore]])
+async def element_scores_batch(reqs: list[ElementScoresRequest] = _BatchBody):
+    return await _offload_batch(tasks.run_element_scores, reqs)
+
+
+@app.post("/variant-suggestions", response_model=list[VariantSuggestion])
+def variant_suggestions(req: VariantSuggestionsRequest):
+    return next_variant_suggestions(
+        req.element_scores,
+        gate_result=req.gate_result,
+        max_suggestions=req.max_suggestions,
+        variants=req.variants,
+        vertical=req.vertical,
+    )
+
+
+@app.post("/decision-summary", response_model=DecisionBoardResponse)
+async def decision_summary(req: DecisionBoardRequest):
+    return await _offload(tasks.run_decision_board, req)
+
+
+@app.post("/decision-summary/batch", response_model=list[DecisionBoardResponse])
+async def decision_summary_batch(reqs: list[DecisionBoardRequest] = _BatchBody):
+    return await _offload_batch(tasks.run_decision_board, reqs)
+
+
+@app.post("/eval-set", response_model=list[EvalSetCard])
+async def eval_set(req: EvalSetRequest):
+    return await _offload(tasks.run_eval_set, req)
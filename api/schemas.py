@@ -0,0 +1,125 @@
+"""
+API 请求 / 响应模型：只做外层包装，字段直接复用业务模块的 pydantic 模型。
+"""
+from __future__ import annotations
+
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field
+
+from element_scores import ElementScore
+from eval_schemas import StrategyCard, Variant
+from explore_gate import ExploreGateConfig, ExploreGateResult
+from simulate_metrics import SimulatedMetrics
+from validate_gate import ValidateGateConfig, ValidateGateResult, WindowMetrics
+from variant_suggestions import VariantSuggestion
+
+MAX_BATCH_SIZE = 1000
+MAX_EVAL_SET_CARDS = 10_000
+
+
+# -------- simulate --------
+
+
+class SimulateRequest(BaseModel):
+    """为一组变体模拟投放指标；baseline_variant_id 为空时 variants[0] 视为 baseline"""
+
+    variants: list[Variant] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    os_list: list[Literal["iOS", "Android"]] = Field(default_factory=lambda: ["iOS", "Android"])
+    baseline_variant_id: str | None = Field(default=None, description="baseline 变体 ID")
+    motivation_bucket: str = Field(default="", description="动机桶")
+    vertical: str = Field(default="casual_game", description="casual_game / ecommerce")
+
+
+# -------- gates --------
+
+
+class ExploreGateRequest(BaseModel):
+    """Explore Gate 单次评测，参数与 evaluate_explore_gate 一致"""
+
+    variant_metrics: list[SimulatedMetrics] = Field(..., max_length=MAX_BATCH_SIZE)
+    baseline_metrics: list[SimulatedMetrics] = Field(..., min_length=1)
+    context: dict[str, Any] = Field(default_factory=dict, description="{country, os, objective, segment, motivation_bucket}")
+    config: ExploreGateConfig | None = None
+    bucket_info: dict[str, dict[str, Any]] | None = None
+
+
+class ValidateGateRequest(BaseModel):
+    """Validate Gate 单次评测，参数与 evaluate_validate_gate 一致"""
+
+    windowed_metrics: list[WindowMetrics] = Field(..., max_length=MAX_BATCH_SIZE)
+    light_expansion_metrics: WindowMetrics | None = None
+    config: ValidateGateConfig | None = None
+
+
+# -------- 元素贡献 / 建议 --------
+
+
+class ElementScoresRequest(BaseModel):
+    """元素贡献：variant_metrics + variants（自动拆解 ElementTag）"""
+
+    variant_metrics: list[SimulatedMetrics] = Field(..., max_length=2 * MAX_BATCH_SIZE)
+    variants: list[Variant] = Field(..., max_length=MAX_BATCH_SIZE)
+    min_sample_size: int = Field(default=2, ge=1)
+
+
+class VariantSuggestionsRequest(BaseModel):
+    """下一轮变体建议"""
+
+    element_scores: list[ElementScore]
+    gate_result: ExploreGateResult | None = None
+    variants: list[Variant] | None = None
+    max_suggestions: int = Field(default=3, ge=1, le=20)
+    vertical: str = Field(default="casual_game")
+
+
+# -------- 决策看板 --------
+
+
+class DecisionBoardRequest(BaseModel):
+    """完整决策链路：variants[0] 视为 baseline；vertical 为空时取 card.vertical"""
+
+    card: StrategyCard
+    variants: list[Variant] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    vertical: str | None = None
+
+
+class DecisionBoardResponse(BaseModel):
+    """决策看板结果（去掉 Streamlit 专用字段）"""
+
+    card_id: str
+    vertical: str
+    metrics: list[SimulatedMetrics]
+    explore_ios: ExploreGateResult
+    explore_android: ExploreGateResult
+    validate_result: ValidateGateResult
+    element_scores: list[ElementScore]
+    suggestions: list[VariantSuggestion]
+    card_score_result: dict[str, Any]
+    decision_summary: dict[str, Any] = Field(
+        ..., description="status, status_text, reason, risk, next_step, insufficient, diagnosis"
+    )
+
+
+# -------- 评测集 --------
+
+
+class EvalSetRequest(BaseModel):
+    """生成评测集；sampled=True 时先做分层抽样再生成"""
+
+    n_cards: int = Field(default=75, ge=1, le=MAX_EVAL_SET_CARDS)
+    variants_per_card: int = Field(default=12, ge=2, le=50)
+    sampled: bool = False
+    seed: str = "evalset"
+
+
+class EvalSetCard(BaseModel):
+    """CardEvalRecord 的可序列化视图"""
+
+    card: StrategyCard
+    card_score: float
+    status: str
+    n_variants: int
+    explore_ios: ExploreGateResult
+    explore_android: ExploreGateResult
+    validate_result: ValidateGateResult | None = None
@@ -0,0 +1,83 @@
+"""
+CPU 密集任务：模块级函数，供 ProcessPoolExecutor 在子进程里执行（参数与返回值均可 pickle）。
+"""
+from __future__ import annotations
+
+from api.schemas import (
+    DecisionBoardRequest,
+    DecisionBoardResponse,
+    ElementScoresRequest,
+    EvalSetCard,
+    EvalSetRequest,
+    SimulateRequest,
+)
+from element_matrix import compute_element_scores_sparse
+from element_scores import ElementScore
+from simulate_metrics import SimulatedMetrics, simulate_metrics
+
+
+def run_simulate(req: SimulateRequest) -> list[SimulatedMetrics]:
+    baseline_id = req.baseline_variant_id or req.variants[0].variant_id
+    return [
+        simulate_metrics(
+            v,
+            os,
+            baseline=v.variant_id == baseline_id,
+            motivation_bucket=req.motivation_bucket,
+            vertical=req.vertical,
+        )
+        for v in req.variants
+        for os in req.os_list
+    ]
+
+
+def run_element_scores(req: ElementScoresRequest) -> list[ElementScore]:
+    return compute_element_scores_sparse(
+        variant_metrics=req.variant_metrics,
+        variants=req.variants,
+        min_sample_size=req.min_sample_size,
+    )
+
+
+def run_decision_board(req: DecisionBoardRequest) -> DecisionBoardResponse:
+    from decision_pipeline import build_decision_board
+
+    vert = req.vertical or req.card.vertical or "casual_game"
+    board = build_decision_board(req.card, req.variants, vertical=vert)
+    return DecisionBoardResponse(
+        card_id=req.card.card_id,
+        vertical=vert,
+        metrics=board["metrics"],
+        explore_ios=board["explore_ios"],
+        explore_android=board["explore_android"],
+        validate_result=board["validate_result"],
+        element_scores=board["element_scores"],
+        suggestions=board["suggestions"],
+        card_score_result=board["card_score_result"],
+        decision_summary=board["decision_summary"],
+    )
+
+
+def run_eval_set(req: EvalSetRequest) -> list[EvalSetCard]:
+    if req.sampled:
+        from eval_set_generator import generate_eval_set_from_cards
+        from evalset_sampler import sample_structure_evalset
+
+        evalset = sample_structure_evalset(N=req.n_cards, seed=req.seed)
+        records = generate_eval_set_from_cards(evalset.cards, variants_per_card=req.variants_per_card)
+    else:
+        from eval_set_generator import generate_eval_set
+
+        records = generate_eval_set(n_cards=req.n_cards, variants_per_card=req.variants_per_card)
+    return [
+        EvalSetCard(
+            card=r.card,
+            card_score=r.card_score,
+            status=r.status,
+            n_variants=len(r.variants),
+            explore_ios=r.explore_ios,
+            explore_android=r.explore_android,
+            validate_result=r.validate_result,
+        )
+        for r in records
+    ]
@@ -13,7 +13,8 @@ try:
 except ImportError:
     pass
 
-from exporters import export_csv, export_markdown
+from exporters import deferred_download, iter_csv, iter_markdown
+from llm_metrics import record_variants
 from openrouter_client import JsonParseError, chat_completion_json
 from prompts import build_experiment_prompt, build_generation_prompt, build_review_prompt
 from schemas import CreativeCard, CreativeVariant, ExperimentSuggestion, ReviewResponse, ReviewResult, VariantWithReview
@@ -51,6 +52,7 @@ def run_generation(card: CreativeCard, n: int) -> list[CreativeVariant]:
             temperature=0.8,
             max_tokens=8192,
             return_raw=True,
+            purpose="generate",
         )
         st.session_state["raw_generation"] = raw
 
@@ -60,6 +62,7 @@ def run_generation(card: CreativeCard, n: int) -> list[CreativeVariant]:
             variants_data = out.get("variants", [])
 
         variants = [CreativeVariant.model_validate(v) for v in variants_data]
+        record_variants("generate", len(variants))
         return variants
 
     except JsonParseError as e:
@@ -83,10 +86,12 @@ def run_review(card: CreativeCard, variants: list[CreativeVariant]) -> list[Revi
             temperature=0.3,
             max_tokens=8192,
             return_raw=True,
+            purpose="review",
         )
         st.session_state["raw_review"] = raw
 
         resp = ReviewResponse.model_validate(out)
+        record_variants("review", len(variants))
         results = resp.results
         if resp.overall_summary:
             st.session_state["review_overall_summary"] = resp.overall_summary
@@ -171,6 +176,7 @@ def run_experiment_suggestion(card: CreativeCard, rows: list[VariantWithReview])
             [{"role": "user", "content": prompt}],
             temperature=0.4,
             max_tokens=2048,
+            purpose="experiment",
         )
         if isinstance(out, dict) and "should_test" in out:
             return ExperimentSuggestion.model_validate(out)
@@ -319,13 +325,11 @@ def main() -> None:
 
             st.divider()
 
-            md = export_markdown(rows)
-            csv_str = export_csv(rows)
             c1, c2, _ = st.columns([1, 1, 2])
             with c1:
-                st.download_button("下载 Markdown", md, file_name="creative_review.md", mime="text/markdown")
+                st.download_button("下载 Markdown", deferred_download(lambda: iter_markdown(rows)), file_name="creative_review.md", mime="text/markdown")
             with c2:
-                st.download_button("下载 CSV", csv_str, file_name="creative_review.csv", mime="text/csv")
+                st.download_button("下载 CSV", deferred_download(lambda: iter_csv(rows)), file_name="creative_review.csv", mime="text/csv")
 
             st.divider()
             with st.expander("查看变体详情"):
@@ -6,17 +6,25 @@
 - 兼容工程结构：repo_root/app_demo.py + repo_root/creative_eval_demo/1/ui
 - 自动探测并注入 sys.path，避免 No module named 'ui' / 'app_demo'
 - samples 目录自动兜底（root/samples 或 creative_eval_demo/samples）
+- 冷启动：模块顶层只导入轻量依赖，计算模块（pydantic 模型、门禁、流水线）在视图里按需导入，
+  入口导入变快，但首次渲染该视图时仍要付出这部分导入成本（首次完整 rerun 耗时见
+  run_benchmarks.py import_time）；首次渲染结束后才启动 warmup，在后台线程导入其余计算模块并编译配置，
+  不与首屏 rerun 争用 GIL，用户切换视图 / 再次操作时模块已就绪
 """
 from __future__ import annotations
 
 import json
 import sys
 import traceback
-from collections import defaultdict
 from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
 
 import streamlit as st
 
+if TYPE_CHECKING:
+    from eval_schemas import StrategyCard, Variant
+    from eval_set_generator import CardEvalRecord
+
 # =========================
 # 0) 路径注入（最关键）
 # =========================
@@ -27,27 +35,18 @@ if str(_THIS_DIR) not in sys.path:
     sys.path.insert(0, str(_THIS_DIR))
 
 # =========================
-# 1) 导入（失败就直接在 UI 打栈）
+# 1) 导入（失败就直接在 UI 打栈）；只导入轻量模块，其余交给后台预热 + 视图内按需导入
 # =========================
 try:
-    from element_scores import ElementScore, compute_element_scores
-    from eval_schemas import StrategyCard, Variant
-    from eval_set_generator import CardEvalRecord, generate_eval_set
-    from explore_gate import evaluate_explore_gate
-    from ofaat_generator import generate_ofaat_variants
-    from scoring_eval import compute_card_score, compute_variant_score
-    from simulate_metrics import SimulatedMetrics, simulate_metrics
-    from vertical_config import (
-        get_corpus,
-        get_why_now_pool,
-        get_why_now_strong_stimulus_penalty,
-        get_why_now_strong_triggers,
-        get_why_you_examples,
+    from pipeline_cache import (
+        cached_decision_board,
+        cached_eval_snapshot,
+        cached_sampled_eval_snapshot,
+        render_recompute_control,
     )
-    from validate_gate import WindowMetrics, evaluate_validate_gate
-    from variant_suggestions import next_variant_suggestions
-    from decision_summary import compute_decision_summary
+    from vertical_config import get_corpus
     from ui.styles import get_global_styles
+    from warmup import WARM_MODULES, start_warmup, warmup_status
 except Exception as e:
     st.error(f"导入失败: {e}")
     st.code(traceback.format_exc(), language="text")
@@ -69,14 +68,26 @@ def _render_health_page():
     rows.append(("Python", f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"))
     rows.append(("Streamlit", st.__version__))
 
+    # 不在这里重新导入计算模块：已加载的直接看 sys.modules，未加载的看后台预热记录的结果
+    from importlib.util import find_spec
+
+    status = warmup_status()
+    errors = status["errors"]
     import_ok = True
-    for name in ["pydantic", "element_scores", "eval_schemas", "decision_summary", "diagnosis"]:
-        try:
-            __import__(name)
-            rows.append((f"import {name}", "✓"))
-        except Exception as e:
-            rows.append((f"import {name}", f"✗ {str(e)[:80]}"))
+    for name in ["pydantic", *WARM_MODULES]:
+        err = errors.get(f"import {name}")
+        if err:
+            rows.append((f"import {name}", f"✗ {err[:80]}"))
+            import_ok = False
+        elif name in sys.modules:
+            ms = status["steps"].get(f"import {name}")
+            rows.append((f"import {name}", "✓" + (f"（预热 {ms:.0f}ms）" if ms is not None else "")))
+        elif find_spec(name) is not None:
+            rows.append((f"import {name}", "○ 未加载（预热中）"))
+        else:
+            rows.append((f"import {name}", "✗ 找不到模块"))
             import_ok = False
+    rows.append(("后台预热", f"{status['state']}" + (f"，{status['total_ms']:.0f}ms" if status["total_ms"] else "")))
 
     for k, v in rows:
         st.write(f"**{k}**: {v}")
@@ -225,22 +236,32 @@ def _queue_item_to_export_row(item: dict) -> dict:
     }
 
 
+QUEUE_EXPORT_FIELDS = [
+    "changed_field", "current_value", "candidate_alternatives", "platforms",
+    "suggested_n", "scale_up_step", "delta_desc", "source",
+]
+
+
 def export_queue_json(queue: list) -> str:
-    out = [dict(item) for item in queue]
-    return json.dumps(out, ensure_ascii=False, indent=2)
+    return "".join(iter_queue_json(queue))
 
 
 def export_queue_csv(queue: list) -> str:
-    import io
-    import csv
+    return "".join(iter_queue_csv(queue))
+
+
+def iter_queue_json(queue: list):
+    """export_queue_json 的流式版本（逐条产出）"""
+    from exporters import iter_json_array
+    return iter_json_array(dict(item) for item in queue)
+
+
+def iter_queue_csv(queue: list):
+    """export_queue_csv 的流式版本；空队列只有表头（沿用 \\n 换行）"""
+    from exporters import iter_dict_csv
     if not queue:
-        return "changed_field,current_value,candidate_alternatives,platforms,suggested_n,scale_up_step,delta_desc,source\n"
-    rows = [_queue_item_to_export_row(item) for item in queue]
-    buf = io.StringIO()
-    w = csv.DictWriter(buf, fieldnames=list(rows[0].keys()))
-    w.writeheader()
-    w.writerows(rows)
-    return buf.getvalue()
+        return iter([",".join(QUEUE_EXPORT_FIELDS) + "\n"])
+    return iter_dict_csv((_queue_item_to_export_row(item) for item in queue), QUEUE_EXPORT_FIELDS)
 
 
 def _render_decision_summary_card(summary: dict):
@@ -317,10 +338,10 @@ def _render_experiment_queue_sidebar():
 
     st.divider()
     st.caption("导出")
-    json_str = export_queue_json(q)
-    csv_str = export_queue_csv(q)
-    st.download_button("⬇ JSON", data=json_str, file_name="experiment_queue.json", mime="application/json", key="dl_json")
-    st.download_button("⬇ CSV", data=csv_str, file_name="experiment_queue.csv", mime="text/csv", key="dl_csv")
+    from exporters import deferred_download
+    snapshot = list(q)
+    st.download_button("⬇ JSON", data=deferred_download(lambda: iter_queue_json(snapshot)), file_name="experiment_queue.json", mime="application/json", key="dl_json")
+    st.download_button("⬇ CSV", data=deferred_download(lambda: iter_queue_csv(snapshot)), file_name="experiment_queue.csv", mime="text/csv", key="dl_csv")
 
 
 def _init_session_state():
@@ -332,7 +353,7 @@ def _init_session_state():
     st.session_state.setdefault("generated_variants", None)
     st.session_state.setdefault("experiment_queue", [])
     st.session_state.setdefault("elem_selected_key", None)
-    st.session_state.setdefault("eval_set_records", [])
+    st.session_state.setdefault("eval_set_snapshot", None)
     st.session_state.setdefault("eval_n_cards", 75)
     st.session_state.setdefault("eval_status_filter", ["未测", "探索中", "进验证", "可放量"])
 
@@ -353,11 +374,12 @@ def load_mock_data(
     if not variant_path.exists():
         variant_path = SAMPLES_DIR / "eval_variants.json"
 
+    from eval_schemas import StrategyCard, Variant
+    from vertical_config import get_sample_strategy_card, get_root_cause_gap
+
     with open(card_path, "r", encoding="utf-8") as f:
         card = StrategyCard.model_validate(json.load(f))
 
-    from vertical_config import get_sample_strategy_card, get_root_cause_gap
-
     sample = get_sample_strategy_card(vert)
     if sample:
         card = card.model_copy(
@@ -399,99 +421,7 @@ def load_mock_data(
             for v in variants
         ]
 
-    mb = getattr(card, "motivation_bucket", "") or ("省钱" if vert == "ecommerce" else "成就感")
-    metrics = []
-    metrics.append(simulate_metrics(variants[0], "iOS", baseline=True, motivation_bucket=mb, vertical=vert))
-    metrics.append(simulate_metrics(variants[0], "Android", baseline=True, motivation_bucket=mb, vertical=vert))
-    for v in variants[1:]:
-        metrics.append(simulate_metrics(v, "iOS", baseline=False, motivation_bucket=mb, vertical=vert))
-        metrics.append(simulate_metrics(v, "Android", baseline=False, motivation_bucket=mb, vertical=vert))
-
-    baseline_list = [m for m in metrics if m.baseline]
-    variant_list = [m for m in metrics if not m.baseline]
-    obj = (card.objective or "").strip() or ("purchase" if vert == "ecommerce" else "install")
-    ctx_base = {"country": "CN", "objective": obj, "segment": card.segment, "motivation_bucket": mb}
-
-    explore_ios = evaluate_explore_gate(variant_list, baseline_list, context={**ctx_base, "os": "iOS"})
-    explore_android = evaluate_explore_gate(variant_list, baseline_list, context={**ctx_base, "os": "Android"})
-
-    element_scores = compute_element_scores(variant_metrics=metrics, variants=variants)
-
-    windowed = [
-        WindowMetrics(window_id="window_1", impressions=50000, clicks=800, installs=2000, spend=6000,
-                      early_events=1200, early_revenue=480, ipm=40.0, cpi=3.0, early_roas=0.08),
-        WindowMetrics(window_id="window_2", impressions=55000, clicks=880, installs=2090, spend=6270,
-                      early_events=1250, early_revenue=500, ipm=38.0, cpi=3.0, early_roas=0.08),
-    ]
-    light_exp = WindowMetrics(window_id="expand_segment", impressions=20000, clicks=288, installs=720, spend=2160,
-                             early_events=430, early_revenue=172, ipm=36.0, cpi=3.0, early_roas=0.08)
-    validate_result = evaluate_validate_gate(windowed, light_exp)
-
-    from diagnosis import diagnose
-    from eval_schemas import decompose_variant_to_element_tags
-
-    diagnosis_result = diagnose(
-        explore_ios=explore_ios,
-        explore_android=explore_android,
-        validate_result=validate_result,
-        metrics=metrics,
-    )
-
-    variant_to_tags = {v.variant_id: decompose_variant_to_element_tags(v) for v in variants}
-    suggestions = next_variant_suggestions(
-        element_scores,
-        gate_result=explore_android,
-        max_suggestions=3,
-        variant_metrics=metrics,
-        variant_to_tags=variant_to_tags,
-        variants=variants,
-        vertical=vert,
-        diagnosis=diagnosis_result,
-    )
-
-    variant_scores_by_row: dict[tuple[str, str], float] = {}
-    for m in metrics:
-        cohort = [x for x in metrics if x.os == m.os]
-        variant_scores_by_row[(m.variant_id, m.os)] = compute_variant_score(m, cohort, os=m.os, vertical=vert)
-
-    by_vid: dict[str, list[float]] = defaultdict(list)
-    for (vid, _), s in variant_scores_by_row.items():
-        by_vid[vid].append(s)
-    variant_scores_agg = {vid: sum(s) / len(s) for vid, s in by_vid.items()}
-
-    eligible_all = list(dict.fromkeys((explore_ios.eligible_variants or []) + (explore_android.eligible_variants or [])))
-    stab_penalty = 5.0 if validate_result.validate_status == "FAIL" else 0.0
-
-    why_now_penalty = 0.0
-    strong_triggers = get_why_now_strong_triggers(vert)
-    wn_trigger = getattr(card, "why_now_trigger", "") or ""
-    if wn_trigger in strong_triggers:
-        why_now_penalty = get_why_now_strong_stimulus_penalty(vert)
-    elif any(("why now" in n.lower() or "虚高" in n or "强刺激" in n) for n in validate_result.risk_notes):
-        why_now_penalty = get_why_now_strong_stimulus_penalty(vert) * 0.5
-
-    card_score_result = compute_card_score(
-        eligible_variants=eligible_all,
-        variant_scores=variant_scores_agg,
-        top_k=5,
-        stability_penalty=stab_penalty,
-        why_now_strong_stimulus_penalty=why_now_penalty,
-    )
-
-    return {
-        "card": card,
-        "vertical": vert,
-        "variants": variants,
-        "metrics": metrics,
-        "explore_ios": explore_ios,
-        "explore_android": explore_android,
-        "element_scores": element_scores,
-        "suggestions": suggestions,
-        "validate_result": validate_result,
-        "variant_scores_by_row": variant_scores_by_row,
-        "card_score_result": card_score_result,
-        "diagnosis": diagnosis_result,
-    }
+    return cached_decision_board(card, variants, vertical=vert)
 
 
 def render_eval_set_view():
@@ -503,8 +433,18 @@ def render_eval_set_view():
         if st.button("生成 / 重新生成评测集", type="primary", key="eval_gen_btn"):
             try:
                 with st.spinner("生成评测集中..."):
-                    records = generate_eval_set(n_cards=n_cards, variants_per_card=12)
-                    st.session_state["eval_set_records"] = records
+                    st.session_state["eval_set_snapshot"] = cached_eval_snapshot(n_cards, variants_per_card=12)
+                    st.session_state.pop("eval_set_error", None)
+                st.rerun()
+            except Exception as e:
+                st.session_state["eval_set_error"] = str(e)
+                st.session_state["eval_set_trace"] = traceback.format_exc()
+                st.rerun()
+
+        if st.button("分层抽样生成(N=80)", key="eval_sampler_btn"):
+            try:
+                with st.spinner("分层抽样生成评测集中..."):
+                    st.session_state["eval_set_snapshot"] = cached_sampled_eval_snapshot(80, variants_per_card=12)
                     st.session_state.pop("eval_set_error", None)
                 st.rerun()
             except Exception as e:
@@ -512,25 +452,7 @@ def render_eval_set_view():
                 st.session_state["eval_set_trace"] = traceback.format_exc()
                 st.rerun()
 
-        try:
-            from evalset_sampler import sample_structure_evalset
-            from eval_set_generator import generate_eval_set_from_cards
-            if st.button("分层抽样生成(N=80)", key="eval_sampler_btn"):
-                try:
-                    with st.spinner("分层抽样生成评测集中..."):
-                        evalset = sample_structure_evalset(N=80)
-                        records = generate_eval_set_from_cards(evalset.cards, variants_per_card=12)
-                        st.session_state["eval_set_records"] = records
-                        st.session_state.pop("eval_set_error", None)
-                    st.rerun()
-                except Exception as e:
-                    st.session_state["eval_set_error"] = str(e)
-                    st.session_state["eval_set_trace"] = traceback.format_exc()
-                    st.rerun()
-        except ImportError:
-            pass
-
-    records: list[CardEvalRecord] = st.session_state.get("eval_set_records", [])
+    snapshot_id = st.session_state.get("eval_set_snapshot")
     if st.session_state.get("eval_set_error"):
         st.error(f"生成评测集时出错：{st.session_state['eval_set_error']}")
         with st.expander("错误详情", expanded=False):
@@ -540,67 +462,150 @@ def render_eval_set_view():
             st.rerun()
         return
 
+    records = _open_eval_snapshot(snapshot_id) if snapshot_id else None
     if not records:
         st.info("暂无数据，请点击「生成 / 重新生成评测集」或「分层抽样生成(N=80)」")
         return
 
+    cols = records.columns
     tab1, tab2, tab3 = st.tabs(["结构评测集 (Structure Eval Set)", "探索评测集 (Explore Eval Set)", "验证评测集 (Validate Eval Set)"])
 
     with tab1:
         st.subheader("结构评测集：卡片列表")
-        st.session_state.setdefault("eval_status_filter", ["未测", "探索中", "进验证", "可放量"])
-        status_filter = st.multiselect("筛选状态", ["未测", "探索中", "进验证", "可放量"], key="eval_status_filter", placeholder="选择状态")
-        filtered = [r for r in records if r.status in status_filter] if status_filter else records
-        rows = [{
-            "卡片ID": r.card.card_id,
-            "分数": f"{r.card_score:.1f}",
-            "状态": r.status,
-            "动机桶": r.card.motivation_bucket,
-            "行业": "休闲游戏" if r.card.vertical == "casual_game" else "电商",
-            "人群": (r.card.segment[:20] + "…" if len(r.card.segment) > 20 else r.card.segment),
-        } for r in filtered]
-        st.dataframe(rows, width="stretch", hide_index=True)
+        _render_eval_table(
+            records, cols, key="eval_struct",
+            columns=["卡片ID", "分数", "状态", "iOS 门禁", "Android 门禁", "Validate", "动机桶", "行业", "人群"],
+            detail=_render_explore_detail,
+        )
 
     with tab2:
         st.subheader("探索评测集：Explore 结果汇总")
-        rows = []
-        for r in records:
-            e_ios, e_android = r.explore_ios, r.explore_android
-            rows.append({
-                "卡片 (card_id)": r.card.card_id,
-                "状态 (status)": r.status,
-                "变体数": len(r.variants),
-                "iOS 通过数": len(e_ios.eligible_variants or []),
-                "Android 通过数": len(e_android.eligible_variants or []),
-                "iOS 门禁": "✓" if e_ios.gate_status == "PASS" else "✗",
-                "Android 门禁": "✓" if e_android.gate_status == "PASS" else "✗",
-            })
-        st.dataframe(rows, width="stretch", hide_index=True)
+        _render_eval_table(
+            records, cols, key="eval_explore",
+            columns=["卡片ID", "状态", "变体数", "iOS 通过数", "Android 通过数", "iOS 门禁", "Android 门禁"],
+            detail=_render_explore_detail,
+        )
 
     with tab3:
         st.subheader("验证评测集：Validate 明细")
-        validate_records = [r for r in records if r.status in ("进验证", "可放量") and r.validate_result]
-        if not validate_records:
-            st.info("暂无进入验证阶段的卡片")
-        else:
-            for r in validate_records[:20]:
-                with st.expander(f"{r.card.card_id} | 状态:{r.status} | Validate:{r.validate_result.validate_status}"):
-                    if r.validate_result.detail_rows:
-                        detail_data = [{
-                            "窗口": WINDOW_LABELS.get(row.window_id, row.window_id),
-                            "千次展示安装(IPM)": f"{row.ipm:.2f}",
-                            "单次安装成本(CPI)": f"{row.cpi:.2f}",
-                            "早期回报率(early_ROAS)": f"{row.early_roas:.2%}",
-                        } for row in r.validate_result.detail_rows]
-                        st.dataframe(detail_data, width="stretch", hide_index=True)
-                    sm = getattr(r.validate_result, "stability_metrics", None)
-                    if sm:
-                        st.caption(
-                            f"波动(ipm_cv)={sm.ipm_cv:.2%} | {IPM_DROP_TOOLTIP}: {sm.ipm_drop_pct:.1f}% | "
-                            f"CPI涨幅={sm.cpi_increase_pct:.1f}% | 学习反复={sm.learning_iterations}"
-                        )
-                    for n in r.validate_result.risk_notes:
-                        st.caption(f"• {n}")
+        _render_eval_table(
+            records, cols, key="eval_validate",
+            columns=["卡片ID", "分数", "状态", "Validate"],
+            detail=_render_validate_detail,
+            status_options=["进验证", "可放量"],
+            require_validate=True,
+        )
+
+
+def _open_eval_snapshot(snapshot_id: str):
+    """session 里只存 snapshot_id；快照在进程内只打开一次，所有 session 共用（快照被清理时返回 None）"""
+    from eval_snapshots import open_snapshot
+
+    try:
+        return open_snapshot(snapshot_id)
+    except KeyError:
+        st.session_state["eval_set_snapshot"] = None
+        return None
+
+
+def _render_eval_table(
+    records: Sequence[CardEvalRecord],
+    cols,
+    *,
+    key: str,
+    columns: list[str],
+    detail,
+    status_options: list[str] | None = None,
+    require_validate: bool = False,
+):
+    """服务端筛选 / 排序 / 分页：只把当前页的行交给前端，选中行后再渲染明细"""
+    from eval_set_table import (
+        DEFAULT_PAGE_SIZE,
+        GATE_STATUS_ORDER,
+        PAGE_SIZE_OPTIONS,
+        SORT_COLUMNS,
+        STATUS_ORDER,
+        EvalSetQuery,
+        query_eval_set,
+    )
+
+    status_options = status_options or list(STATUS_ORDER)
+    st.session_state.setdefault(f"{key}_status", status_options)
+    f1, f2, f3 = st.columns([2, 1.5, 1.5])
+    with f1:
+        status_filter = st.multiselect("筛选状态", status_options, key=f"{key}_status", placeholder="选择状态")
+    with f2:
+        gate_filter = st.multiselect(
+            "Explore 门禁", [g for g in GATE_STATUS_ORDER if g], key=f"{key}_gate", placeholder="全部"
+        )
+    with f3:
+        search = st.text_input("搜索卡片ID/人群", key=f"{key}_search")
+
+    s1, s2, s3, s4 = st.columns([1.5, 0.8, 0.8, 1])
+    with s1:
+        sort_by = st.selectbox("排序", list(SORT_COLUMNS), format_func=SORT_COLUMNS.get, key=f"{key}_sort")
+    with s2:
+        descending = st.toggle("降序", key=f"{key}_desc")
+    with s3:
+        page_size = st.selectbox(
+            "每页", PAGE_SIZE_OPTIONS, index=PAGE_SIZE_OPTIONS.index(DEFAULT_PAGE_SIZE), key=f"{key}_page_size"
+        )
+
+    query = EvalSetQuery(
+        status_filter=tuple(status_filter or status_options),
+        gate_filter=tuple(gate_filter),
+        search=search,
+        sort_by=sort_by,
+        descending=descending,
+        validate_only=require_validate,
+        page=st.session_state.get(f"{key}_page", 1),
+        page_size=page_size,
+    )
+    page = query_eval_set(cols, query)
+    st.session_state[f"{key}_page"] = page.page  # 筛选后页数变少时夹回有效页
+    with s4:
+        st.number_input(f"页码 / {page.n_pages}", min_value=1, max_value=page.n_pages, key=f"{key}_page")
+
+    if not page.rows:
+        st.info("暂无符合条件的卡片")
+        return
+    st.caption(f"共 {page.total} 张卡片，第 {page.page}/{page.n_pages} 页")
+    st.dataframe([{c: row[c] for c in columns} for row in page.rows], width="stretch", hide_index=True)
+
+    by_id = {cols.card_id[i]: i for i in page.indices}
+    picked = st.selectbox("查看明细", ["—"] + list(by_id), key=f"{key}_detail")
+    if picked != "—":
+        detail(records[by_id[picked]])
+
+
+def _render_explore_detail(r: CardEvalRecord):
+    for label, e in (("iOS", r.explore_ios), ("Android", r.explore_android)):
+        st.markdown(f"**{label} 门禁：{e.gate_status}** | 通过变体：{', '.join(e.eligible_variants or []) or '无'}")
+        for reason in e.reasons:
+            st.caption(f"• {reason}")
+
+
+def _render_validate_detail(r: CardEvalRecord):
+    if not r.validate_result:
+        st.info("该卡片未进入验证阶段")
+        return
+    st.markdown(f"**{r.card.card_id} | 状态:{r.status} | Validate:{r.validate_result.validate_status}**")
+    if r.validate_result.detail_rows:
+        detail_data = [{
+            "窗口": WINDOW_LABELS.get(row.window_id, row.window_id),
+            "千次展示安装(IPM)": f"{row.ipm:.2f}",
+            "单次安装成本(CPI)": f"{row.cpi:.2f}",
+            "早期回报率(early_ROAS)": f"{row.early_roas:.2%}",
+        } for row in r.validate_result.detail_rows]
+        st.dataframe(detail_data, width="stretch", hide_index=True)
+    sm = getattr(r.validate_result, "stability_metrics", None)
+    if sm:
+        st.caption(
+            f"波动(ipm_cv)={sm.ipm_cv:.2%} | {IPM_DROP_TOOLTIP}: {sm.ipm_drop_pct:.1f}% | "
+            f"CPI涨幅={sm.cpi_increase_pct:.1f}% | 学习反复={sm.learning_iterations}"
+        )
+    for n in r.validate_result.risk_notes:
+        st.caption(f"• {n}")
 
 
 def _multiselect_safe(label: str, options: list[str], key: str, default_all: bool = True):
@@ -628,7 +633,40 @@ def _multiselect_safe(label: str, options: list[str], key: str, default_all: boo
     return selected
 
 
+def _render_profiling_panel(timings) -> None:
+    """侧边栏「阶段耗时」：开启后下一次 rerun 起统计本 session 每次 rerun 的各阶段耗时"""
+    with st.sidebar:
+        st.divider()
+        st.toggle("⏱ 阶段耗时", key="profile_panel", help="统计本次 rerun 中模拟/门禁/评分/元素/建议/诊断等阶段的耗时")
+        if timings is None:
+            return
+        rows = timings.rows()
+        st.caption(f"本次 rerun 共 {timings.wall_ms:.0f}ms" + ("" if rows else "，未命中任何计时阶段（结果来自缓存）"))
+        if rows:
+            st.dataframe(
+                [
+                    {"阶段": r["stage"], "次数": r["calls"], "自身(ms)": r["self_ms"], "含子阶段(ms)": r["total_ms"], "最大(ms)": r["max_ms"]}
+                    for r in rows
+                ],
+                hide_index=True,
+            )
+
+
 def main():
+    if not st.session_state.get("profile_panel"):
+        _render_app()
+        _render_profiling_panel(None)
+    else:
+        from profiling import capture
+
+        with capture() as timings:
+            _render_app()
+        _render_profiling_panel(timings)
+    # 首次渲染完成后再启动后台预热（幂等），避免与首屏 rerun 争用 GIL
+    start_warmup()
+
+
+def _render_app():
     _init_session_state()
 
     # 每次 rerun 注入样式
@@ -718,6 +756,8 @@ def main():
             st.markdown(f'<a href="#{sid}" class="elevator-link">{label}</a>', unsafe_allow_html=True)
         st.divider()
         _render_experiment_queue_sidebar()
+        st.divider()
+        render_recompute_control()
 
     if view == "评测集":
         render_eval_set_view()
@@ -748,8 +788,18 @@ def main():
     vert = data.get("vertical", getattr(card, "vertical", "casual_game") or "casual_game")
 
     st.markdown('<span id="sec-0"></span>', unsafe_allow_html=True)
-    summary = compute_decision_summary(data)
+    summary = data.get("decision_summary")
+    if not summary:
+        from decision_summary import compute_decision_summary
+
+        summary = compute_decision_summary(data)
     _render_decision_summary_card(summary)
+    report = data.get("pipeline_report")
+    if report and report.get("skipped"):
+        st.caption(
+            f"增量计算：重算 {len(report['recomputed'])} 个阶段，跳过 {', '.join(report['skipped'])}；"
+            f"重新模拟 {len(report['resimulated'])} 行"
+        )
 
     st.caption("筛选与生成")
     who_scenario_opts = corp.get("who_scenario_need") or []
@@ -796,6 +846,9 @@ def main():
                     suffix = " | " + "、".join(who_scenario)
                     sell_points_for_gen = [s + suffix for s in sells]
 
+                from eval_schemas import StrategyCard
+                from ofaat_generator import generate_ofaat_variants
+
                 card_path = SAMPLES_DIR / f"eval_strategy_card_{vertical_choice}.json"
                 if not card_path.exists():
                     card_path = SAMPLES_DIR / "eval_strategy_card.json"
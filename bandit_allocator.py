@@ -0,0 +1,418 @@
+"""
+多臂老虎机预算分配：在 Explore Gate 之前/之上按轮次把预算从落后变体挪给领先变体。
+
+- IPM：每次曝光安装率 p ~ Beta(α0 + installs, β0 + impressions - installs)，IPM = 1000·p
+- CPI：每美元安装数 λ ~ Gamma(a0 + installs, b0 + spend)，CPI = 1/λ
+- 目标（objective）：ipm / cpi / composite（log IPM - log CPI，同时要曝光效率与成本）
+- 分配：Top-Two Thompson Sampling，每个预算块以 β 概率给采样领先者，否则给「挑战者」
+- 停止：Monte Carlo 估计 P(最优) ≥ stop_prob，或预算用尽
+
+反馈是 SimulatedMetrics 形状（impressions / installs / spend），可直接接真实投放回传。
+MetricsEnvironment + run_bandit_simulation 基于 simulate_metrics 模拟，并与
+「每个变体固定 min_spend 后跑 Explore Gate」的现行做法比较花费与选对率。
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy 随 streamlit 安装
+    np = None
+
+from pydantic import BaseModel, Field
+
+from explore_gate import ExploreGateConfig, evaluate_explore_gate
+from simulate_metrics import SimulatedMetrics, simulate_metrics
+
+OBJECTIVES = ("ipm", "cpi", "composite")
+
+
+# -------- 配置 --------
+
+
+@dataclass
+class BanditConfig:
+    """分配器配置"""
+
+    objective: str = "composite"
+    top_two_beta: float = 0.5
+    round_budget: float = 1000.0
+    chunk: float = 50.0
+    burn_in_spend: float = 100.0  # 首轮每个变体的起步预算（不超过 本轮预算 / 变体数）
+    max_budget: float | None = None  # None 时 = 变体数 × ExploreGateConfig.min_spend
+    stop_prob: float = 0.95
+    n_draws: int = 1000
+    prior_install_rate: tuple[float, float] = (1.0, 50.0)  # Beta(α0, β0)，先验 IPM≈20
+    prior_installs_per_dollar: tuple[float, float] = (1.0, 2.0)  # Gamma(a0, b0)，先验 CPI≈2
+    seed: int = 0
+
+
+# -------- 输出 --------
+
+
+class ArmSummary(BaseModel):
+    """单个变体的后验摘要"""
+
+    variant_id: str
+    spend: float
+    impressions: int
+    installs: int
+    ipm_mean: float = Field(..., description="后验 IPM 均值")
+    cpi_mean: float = Field(..., description="后验 CPI 均值（1/λ 的均值）")
+    p_best: float = Field(..., description="在 objective 上为最优的后验概率")
+    p_beat_baseline: float | None = Field(default=None, description="优于 baseline 的后验概率")
+
+
+class BanditRound(BaseModel):
+    round: int
+    allocations: dict[str, float]
+    leader: str
+    leader_p_best: float
+
+
+class BanditResult(BaseModel):
+    """一次分配过程的结果"""
+
+    os: str
+    objective: str
+    winner: str
+    winner_p_best: float
+    total_spend: float
+    stopped_early: bool
+    stop_reason: str
+    rounds: list[BanditRound] = Field(default_factory=list)
+    arms: list[ArmSummary] = Field(default_factory=list)
+
+
+# -------- 后验 --------
+
+
+@dataclass
+class ArmPosterior:
+    """一个变体的累计观测"""
+
+    variant_id: str
+    impressions: int = 0
+    clicks: int = 0
+    installs: int = 0
+    spend: float = 0.0
+
+    def update(self, m: SimulatedMetrics) -> None:
+        self.impressions += int(m.impressions)
+        self.clicks += int(m.clicks)
+        self.installs += int(m.installs)
+        self.spend += float(m.spend)
+
+    def beta_params(self, cfg: BanditConfig) -> tuple[float, float]:
+        a0, b0 = cfg.prior_install_rate
+        return a0 + self.installs, b0 + max(0, self.impressions - self.installs)
+
+    def gamma_params(self, cfg: BanditConfig) -> tuple[float, float]:
+        a0, b0 = cfg.prior_installs_per_dollar
+        return a0 + self.installs, b0 + self.spend
+
+
+def _objective_value(objective: str, install_rate: Any, per_dollar: Any) -> Any:
+    """越大越好：ipm → 安装率，cpi → 每美元安装数，composite → 两者对数和"""
+    if objective == "ipm":
+        return install_rate
+    if objective == "cpi":
+        return per_dollar
+    return np.log(install_rate) + np.log(per_dollar)
+
+
+def _metrics_objective(objective: str, m: SimulatedMetrics) -> float:
+    rate = max(m.installs, 1e-9) / max(m.impressions, 1)
+    per_dollar = max(m.installs, 1e-9) / max(m.spend, 1e-9)
+    if objective == "ipm":
+        return rate
+    if objective == "cpi":
+        return per_dollar
+    return math.log(rate) + math.log(per_dollar)
+
+
+class BanditAllocator:
+    """
+    Top-Two Thompson 预算分配器。用法：
+        alloc = BanditAllocator(variant_ids, baseline=baseline_metrics)
+        while not alloc.should_stop()[0]:
+            plan = alloc.allocate()          # {variant_id: spend}
+            alloc.update(投放回传的 SimulatedMetrics 列表)
+    """
+
+    def __init__(
+        self,
+        variant_ids: Iterable[str],
+        *,
+        baseline: SimulatedMetrics | dict | None = None,
+        config: BanditConfig | None = None,
+    ) -> None:
+        if np is None:
+            raise RuntimeError("BanditAllocator 需要 numpy")
+        self.config = config or BanditConfig()
+        if self.config.objective not in OBJECTIVES:
+            raise ValueError(f"未知 objective：{self.config.objective}，可选 {', '.join(OBJECTIVES)}")
+        self.arms = {vid: ArmPosterior(vid) for vid in dict.fromkeys(variant_ids)}
+        if not self.arms:
+            raise ValueError("至少需要一个变体")
+        self.baseline = SimulatedMetrics.model_validate(baseline) if isinstance(baseline, dict) else baseline
+        self.rng = np.random.default_rng(self.config.seed)
+        self.rounds: list[BanditRound] = []
+
+    @property
+    def total_spend(self) -> float:
+        return sum(a.spend for a in self.arms.values())
+
+    def _sample(self, size: int | None = None) -> Any:
+        """每个臂一组（或 size 组）后验采样，返回 [n_arms] 或 [n_arms, size]"""
+        cfg = self.config
+        rates, per_dollar = [], []
+        for a in self.arms.values():
+            alpha, beta = a.beta_params(cfg)
+            shape, rate = a.gamma_params(cfg)
+            rates.append(self.rng.beta(alpha, beta, size))
+            per_dollar.append(self.rng.gamma(shape, 1.0 / rate, size))
+        return _objective_value(cfg.objective, np.array(rates), np.array(per_dollar))
+
+    def _top_two(self) -> str:
+        ids = list(self.arms)
+        draw = self._sample()
+        leader = int(np.argmax(draw))
+        if len(ids) == 1 or self.rng.random() < self.config.top_two_beta:
+            return ids[leader]
+        # 挑战者：重采样直到领先者易主（最多 100 次，否则取本次采样的第二名）
+        for _ in range(100):
+            draw = self._sample()
+            j = int(np.argmax(draw))
+            if j != leader:
+                return ids[j]
+        return ids[int(np.argsort(draw)[-2])]
+
+    def p_best(self) -> dict[str, float]:
+        draws = self._sample(self.config.n_draws)
+        wins = np.bincount(np.argmax(draws, axis=0), minlength=len(self.arms))
+        return {vid: float(w) / self.config.n_draws for vid, w in zip(self.arms, wins)}
+
+    def p_beat_baseline(self) -> dict[str, float]:
+        if self.baseline is None:
+            return {}
+        ref = _metrics_objective(self.config.objective, self.baseline)
+        draws = self._sample(self.config.n_draws)
+        return {vid: float((draws[i] > ref).mean()) for i, vid in enumerate(self.arms)}
+
+    def allocate(self, budget: float | None = None) -> dict[str, float]:
+        """给出下一轮的花费计划；首轮先给每个变体 burn_in_spend（按本轮预算均分封顶，总额不超预算）"""
+        cfg = self.config
+        budget = cfg.round_budget if budget is None else budget
+        if self.arms and all(a.spend == 0 for a in self.arms.values()) and cfg.burn_in_spend > 0:
+            per_arm = min(cfg.burn_in_spend, budget / len(self.arms))
+            return {vid: per_arm for vid in self.arms}
+        plan: dict[str, float] = {}
+        remaining = budget
+        while remaining > 1e-9:
+            amt = min(cfg.chunk, remaining)
+            vid = self._top_two()
+            plan[vid] = plan.get(vid, 0.0) + amt
+            remaining -= amt
+        return plan
+
+    def update(self, feedback: Iterable[SimulatedMetrics | dict]) -> None:
+        for m in feedback:
+            obj = SimulatedMetrics.model_validate(m) if isinstance(m, dict) else m
+            arm = self.arms.get(obj.variant_id)
+            if arm is not None:
+                arm.update(obj)
+
+    def record_round(self, plan: dict[str, float]) -> BanditRound:
+        pb = self.p_best()
+        leader = max(pb, key=pb.get)
+        r = BanditRound(round=len(self.rounds) + 1, allocations=plan, leader=leader, leader_p_best=pb[leader])
+        self.rounds.append(r)
+        return r
+
+    def should_stop(self, max_budget: float | None = None) -> tuple[bool, str]:
+        if self.rounds and self.rounds[-1].leader_p_best >= self.config.stop_prob:
+            r = self.rounds[-1]
+            return True, f"{r.leader} 为最优的后验概率 {r.leader_p_best:.1%} ≥ {self.config.stop_prob:.0%}"
+        if max_budget is not None and self.total_spend >= max_budget - 1e-9:
+            return True, f"预算用尽（{self.total_spend:.0f}）"
+        return False, ""
+
+    def summary(self) -> list[ArmSummary]:
+        cfg = self.config
+        pb = self.p_best()
+        pbb = self.p_beat_baseline()
+        out = []
+        for vid, a in self.arms.items():
+            alpha, beta = a.beta_params(cfg)
+            shape, rate = a.gamma_params(cfg)
+            out.append(
+                ArmSummary(
+                    variant_id=vid,
+                    spend=round(a.spend, 2),
+                    impressions=a.impressions,
+                    installs=a.installs,
+                    ipm_mean=round(1000 * alpha / (alpha + beta), 3),
+                    cpi_mean=round(rate / (shape - 1), 3) if shape > 1 else float("inf"),
+                    p_best=round(pb[vid], 4),
+                    p_beat_baseline=round(pbb[vid], 4) if vid in pbb else None,
+                )
+            )
+        return out
+
+
+# -------- 模拟环境 --------
+
+
+class MetricsEnvironment:
+    """
+    以 simulate_metrics 的结果作为各变体的「真实」CPM / CTR / IPM，
+    按花费抽样曝光、点击、安装，返回该批花费的 SimulatedMetrics。
+    """
+
+    def __init__(
+        self,
+        variants: list[Any],
+        os: str,
+        *,
+        vertical: str = "casual_game",
+        motivation_bucket: str = "",
+        seed: int = 0,
+    ) -> None:
+        if np is None:
+            raise RuntimeError("MetricsEnvironment 需要 numpy")
+        self.os = os
+        self.truth = {
+            v.variant_id: simulate_metrics(v, os, motivation_bucket=motivation_bucket, vertical=vertical)
+            for v in variants
+        }
+        self.rng = np.random.default_rng(seed)
+
+    def true_objective(self, variant_id: str, objective: str = "composite") -> float:
+        return _metrics_objective(objective, self.truth[variant_id])
+
+    def observe(self, variant_id: str, spend: float) -> SimulatedMetrics:
+        t = self.truth[variant_id]
+        cpm = t.spend / t.impressions * 1000
+        impressions = max(1, int(self.rng.poisson(spend / cpm * 1000)))
+        clicks = int(self.rng.binomial(impressions, min(1.0, t.ctr)))
+        installs = int(self.rng.binomial(impressions, min(1.0, t.ipm / 1000)))
+        spend = round(float(spend), 2)
+        return SimulatedMetrics(
+            variant_id=variant_id,
+            os=self.os,
+            impressions=impressions,
+            clicks=clicks,
+            installs=installs,
+            spend=spend,
+            early_events=0,
+            early_revenue=0.0,
+            ctr=round(clicks / impressions, 6),
+            ipm=round(installs / impressions * 1000, 2),
+            cpi=round(spend / installs, 2) if installs else spend,
+            early_roas=0.0,
+        )
+
+
+def run_bandit(
+    allocator: BanditAllocator,
+    env: MetricsEnvironment,
+    *,
+    max_budget: float,
+) -> BanditResult:
+    """按轮次 allocate → 环境回传 → update，直到停止条件满足"""
+    stop, reason = False, ""
+    while not stop:
+        plan = allocator.allocate(min(allocator.config.round_budget, max_budget - allocator.total_spend))
+        if not plan:
+            break
+        allocator.update(env.observe(vid, amt) for vid, amt in plan.items())
+        allocator.record_round(plan)
+        stop, reason = allocator.should_stop(max_budget)
+    arms = allocator.summary()
+    best = max(arms, key=lambda a: a.p_best)
+    return BanditResult(
+        os=env.os,
+        objective=allocator.config.objective,
+        winner=best.variant_id,
+        winner_p_best=best.p_best,
+        total_spend=round(allocator.total_spend, 2),
+        stopped_early=allocator.total_spend < max_budget - 1e-9,
+        stop_reason=reason or "预算用尽",
+        rounds=allocator.rounds,
+        arms=arms,
+    )
+
+
+class GateComparison(BaseModel):
+    """老虎机 vs 固定预算 Explore Gate 的多次模拟对比"""
+
+    n_trials: int
+    n_variants: int
+    gate_spend: float = Field(..., description="现行做法总花费：候选数 × min_spend")
+    bandit_budget: float = Field(..., description="老虎机预算上限（BanditConfig.max_budget，缺省同 gate_spend）")
+    bandit_spend_mean: float
+    spend_saved_pct: float
+    bandit_correct_rate: float = Field(..., description="选中真实最优变体的比例")
+    gate_correct_rate: float = Field(..., description="Gate 通过变体中观测最优者 = 真实最优的比例")
+    gate_pass_mean: float = Field(..., description="平均 PASS 变体数")
+
+
+def compare_with_gate(
+    variants: list[Any],
+    *,
+    os: str = "Android",
+    trials: int = 20,
+    config: BanditConfig | None = None,
+    gate_config: ExploreGateConfig | None = None,
+    vertical: str = "casual_game",
+    motivation_bucket: str = "",
+) -> GateComparison:
+    """
+    variants[0] 视为 baseline，其余为候选。每次试验用不同随机种子：
+    - 现行：每个候选花 min_spend，跑 evaluate_explore_gate，在 PASS 中取观测目标最优者
+    - 老虎机：预算上限为 BanditConfig.max_budget（缺省同为 候选数 × min_spend），提前停止则节省花费；
+      spend_saved_pct 相对现行做法的花费计算
+    """
+    cfg = config or BanditConfig()
+    gcfg = gate_config or ExploreGateConfig()
+    baseline_v, candidates = variants[0], variants[1:]
+    if not candidates:
+        raise ValueError("至少需要一个候选变体")
+    baseline = simulate_metrics(baseline_v, os, baseline=True, motivation_bucket=motivation_bucket, vertical=vertical)
+    ids = [v.variant_id for v in candidates]
+    gate_spend = len(ids) * gcfg.min_spend
+    budget = cfg.max_budget or gate_spend
+    bandit_spend, bandit_ok, gate_ok, gate_pass = [], 0, 0, []
+    for t in range(trials):
+        seed = cfg.seed + t
+        env = MetricsEnvironment(candidates, os, vertical=vertical, motivation_bucket=motivation_bucket, seed=seed)
+        true_best = max(ids, key=lambda vid: env.true_objective(vid, cfg.objective))
+
+        gate_obs = [env.observe(vid, gcfg.min_spend) for vid in ids]
+        gate = evaluate_explore_gate(gate_obs, baseline, {"os": os}, config=gcfg)
+        gate_pass.append(len(gate.eligible_variants))
+        passed = [m for m in gate_obs if m.variant_id in gate.eligible_variants]
+        if passed and max(passed, key=lambda m: _metrics_objective(cfg.objective, m)).variant_id == true_best:
+            gate_ok += 1
+
+        run_cfg = BanditConfig(**{**cfg.__dict__, "seed": seed})
+        res = run_bandit(BanditAllocator(ids, baseline=baseline, config=run_cfg), env, max_budget=budget)
+        bandit_spend.append(res.total_spend)
+        bandit_ok += res.winner == true_best
+
+    mean_spend = sum(bandit_spend) / trials
+    return GateComparison(
+        n_trials=trials,
+        n_variants=len(ids),
+        gate_spend=round(gate_spend, 2),
+        bandit_budget=round(budget, 2),
+        bandit_spend_mean=round(mean_spend, 2),
+        spend_saved_pct=round(100 * (1 - mean_spend / gate_spend), 2),
+        bandit_correct_rate=round(bandit_ok / trials, 3),
+        gate_correct_rate=round(gate_ok / trials, 3),
+        gate_pass_mean=round(sum(gate_pass) / trials, 2),
+    )
@@ -0,0 +1,494 @@
+"""
+决策看板计算链路：simulate → Explore Gate ×2 → 元素贡献 → Validate Gate → 诊断 → 变体建议 → 评分。
+无 Streamlit 依赖，输入为已解析的 StrategyCard + Variant 列表，输出与 app_demo.load_mock_data 一致的 dict。
+
+DecisionBoardPipeline 记录每个阶段的输入，再次 update 时只重算输入有变化的部分：
+- simulate：按 (variant_id, os) 行，输入 = variant_id / sell_point / baseline / 动机桶 / vertical
+- Explore Gate：按 OS 分组，只重判指标有变化的行；baseline 变化才整组重判
+- 元素贡献：按元素维护聚合量，只重扫被改动行涉及的元素
+- 诊断 / 建议 / 评分 / Summary：上游结果不变则整段跳过
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from decision_summary import compute_decision_summary
+from diagnosis import diagnose
+from element_index import Decomposition, decompose
+from element_scores import ElementScore, build_element_score
+from eval_schemas import StrategyCard, Variant
+from explore_gate import (
+    ExploreGateConfig,
+    ExploreGateResult,
+    evaluate_explore_gate,
+    evaluate_explore_variant,
+    summarize_explore_gate,
+)
+from profiling import profiled
+from scoring_eval import compute_card_score, compute_variant_scores
+from simulate_metrics import SimulatedMetrics, simulate_metrics
+from validate_gate import WindowMetrics, evaluate_validate_gate
+from variant_suggestions import next_variant_suggestions
+from vertical_config import get_compiled_config
+
+# 看板示例用的固定验证窗口（模拟数据）
+DEMO_WINDOWS = (
+    WindowMetrics(window_id="window_1", impressions=50000, clicks=800, installs=2000, spend=6000,
+                  early_events=1200, early_revenue=480, ipm=40.0, cpi=3.0, early_roas=0.08),
+    WindowMetrics(window_id="window_2", impressions=55000, clicks=880, installs=2090, spend=6270,
+                  early_events=1250, early_revenue=500, ipm=38.0, cpi=3.0, early_roas=0.08),
+)
+DEMO_EXPAND_SEGMENT = WindowMetrics(
+    window_id="expand_segment", impressions=20000, clicks=288, installs=720, spend=2160,
+    early_events=430, early_revenue=172, ipm=36.0, cpi=3.0, early_roas=0.08,
+)
+
+
+OS_LIST = ("iOS", "Android")
+
+STAGES = (
+    "simulate",
+    "explore_gate_iOS",
+    "explore_gate_Android",
+    "element_scores",
+    "validate_gate",
+    "diagnosis",
+    "suggestions",
+    "variant_scores",
+    "card_score",
+    "decision_summary",
+)
+
+Row = tuple[str, str]  # (variant_id, os)
+
+
+@dataclass
+class PipelineReport:
+    """一次 update 的重算/跳过明细"""
+
+    recomputed: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    resimulated: list[Row] = field(default_factory=list)
+    regated: dict[str, list[str]] = field(default_factory=dict)
+    touched_elements: int = 0
+
+    def mark(self, stage: str, changed: bool) -> bool:
+        (self.recomputed if changed else self.skipped).append(stage)
+        return changed
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "recomputed": list(self.recomputed),
+            "skipped": list(self.skipped),
+            "resimulated": [f"{vid}/{os}" for vid, os in self.resimulated],
+            "regated": {os: list(v) for os, v in self.regated.items()},
+            "touched_elements": self.touched_elements,
+        }
+
+
+@dataclass
+class _ElementAgg:
+    """单个元素的聚合量（按行序求和，与 compute_element_scores 结果一致）"""
+
+    n: int
+    mean_ipm: float
+    mean_cpi: float
+    os_means: list[tuple[float, float]]
+    first: tuple[int, int]  # (首次出现的行序, 行内标签序)，决定输出顺序
+
+
+class DecisionBoardPipeline:
+    """
+    带依赖追踪的决策看板计算。同一实例反复 update，只重算变化的阶段；
+    last_report 记录本次重算/跳过了哪些阶段。
+    """
+
+    def __init__(
+        self,
+        *,
+        explore_config: ExploreGateConfig | None = None,
+        min_sample_size: int = 2,
+    ) -> None:
+        self.explore_config = explore_config or ExploreGateConfig()
+        self.min_sample_size = min_sample_size
+        self.last_report = PipelineReport()
+        self._variants: dict[str, Variant] = {}
+        self._decomp: dict[str, Decomposition] = {}
+        self._row_order: list[Row] = []
+        self._sim_keys: dict[Row, tuple] = {}
+        self._metrics: dict[Row, SimulatedMetrics] = {}
+        # Explore Gate：os -> variant_id -> (status, reason)
+        self._gate_rows: dict[str, dict[str, tuple[str, str]]] = {os: {} for os in OS_LIST}
+        self._gate_baseline: dict[str, SimulatedMetrics | None] = {os: None for os in OS_LIST}
+        self._gate_ctx: dict[str, dict[str, Any]] = {}
+        self._explore: dict[str, ExploreGateResult] = {}
+        # 元素贡献
+        self._row_elements: dict[Row, tuple[tuple[str, str], ...]] = {}
+        self._element_rows: dict[tuple[str, str], dict[Row, int]] = {}
+        self._element_aggs: dict[tuple[str, str], _ElementAgg] = {}
+        self._card_means: tuple[float, float] | None = None
+        self._element_scores: list[ElementScore] = []
+        # 下游阶段
+        self._validate = None
+        self._diagnosis = None
+        self._diagnosis_key: tuple | None = None
+        self._suggestions: list[Any] = []
+        self._suggestions_key: tuple | None = None
+        self._scores: dict[str, dict[Row, float]] = {os: {} for os in OS_LIST}
+        self._scores_key: dict[str, tuple] = {}
+        self._card_score: dict[str, Any] | None = None
+        self._card_score_key: tuple | None = None
+        self._summary: dict[str, Any] | None = None
+        self._summary_key: tuple | None = None
+
+    # -------- 入口 --------
+
+    @profiled("decision_board")
+    def update(self, card: StrategyCard, variants: list[Variant], *, vertical: str) -> dict[str, Any]:
+        """以新的 card / variants 重新计算看板，返回与 build_decision_board 相同结构的 dict"""
+        report = PipelineReport()
+        vert = vertical
+        config_version = get_compiled_config().version
+        mb = getattr(card, "motivation_bucket", "") or ("省钱" if vert == "ecommerce" else "成就感")
+        obj = (card.objective or "").strip() or ("purchase" if vert == "ecommerce" else "install")
+        ctx_base = {"country": "CN", "objective": obj, "segment": card.segment, "motivation_bucket": mb}
+
+        # 1. 变体内容 diff → 元素标签
+        changed_variants = self._sync_variants(variants)
+
+        # 2. simulate：只重算输入变化的行
+        row_order: list[Row] = [(v.variant_id, os) for v in variants for os in OS_LIST]
+        order_changed = row_order != self._row_order
+        baseline_vid = variants[0].variant_id
+        changed_rows: set[Row] = set()
+        by_vid = {v.variant_id: v for v in variants}
+        for row in row_order:
+            vid, os = row
+            v = by_vid[vid]
+            is_baseline = vid == baseline_vid
+            key = (vid, v.sell_point, os, is_baseline, mb, vert)
+            if self._sim_keys.get(row) != key:
+                self._metrics[row] = simulate_metrics(
+                    v, os, baseline=is_baseline, motivation_bucket=mb, vertical=vert
+                )
+                self._sim_keys[row] = key
+                changed_rows.add(row)
+                report.resimulated.append(row)
+        removed_rows = set(self._row_order) - set(row_order)
+        for row in removed_rows:
+            self._sim_keys.pop(row, None)
+            self._metrics.pop(row, None)
+        self._row_order = row_order
+        report.mark("simulate", bool(changed_rows or removed_rows))
+        metrics = [self._metrics[r] for r in row_order]
+
+        # 3. Explore Gate（按 OS）
+        for os in OS_LIST:
+            changed = self._update_explore(os, row_order, baseline_vid, changed_rows, removed_rows,
+                                           order_changed, {**ctx_base, "os": os}, report)
+            report.mark(f"explore_gate_{os}", changed)
+        explore_ios, explore_android = self._explore["iOS"], self._explore["Android"]
+
+        # 4. 元素贡献（增量聚合）
+        tag_rows = {(vid, os) for vid in changed_variants for os in OS_LIST}
+        elements_changed = self._update_elements(
+            row_order, changed_rows | tag_rows, removed_rows, order_changed, report
+        )
+        report.mark("element_scores", elements_changed)
+        element_scores = self._element_scores
+
+        # 5. Validate Gate：输入为固定窗口，仅首次计算
+        validate_changed = self._validate is None
+        if validate_changed:
+            self._validate = evaluate_validate_gate(list(DEMO_WINDOWS), DEMO_EXPAND_SEGMENT)
+        report.mark("validate_gate", validate_changed)
+        validate_result = self._validate
+
+        # 6. 诊断
+        n_samples = sum(1 for m in metrics if not m.baseline)
+        diag_key = (explore_ios.gate_status, explore_android.gate_status, id(validate_result), n_samples)
+        diag_changed = diag_key != self._diagnosis_key
+        if diag_changed:
+            self._diagnosis = diagnose(
+                explore_ios=explore_ios,
+                explore_android=explore_android,
+                validate_result=validate_result,
+                metrics=metrics,
+            )
+            self._diagnosis_key = diag_key
+        report.mark("diagnosis", diag_changed)
+        diagnosis_result = self._diagnosis
+
+        # 7. 变体建议：只依赖元素贡献 + 诊断 + 语料
+        sugg_key = (id(element_scores), id(diagnosis_result), vert, config_version)
+        sugg_changed = sugg_key != self._suggestions_key
+        if sugg_changed:
+            self._suggestions = next_variant_suggestions(
+                element_scores,
+                gate_result=explore_android,
+                max_suggestions=3,
+                variant_metrics=metrics,
+                variant_to_tags={v.variant_id: self._decomp[v.variant_id].tags for v in variants},
+                variants=variants,
+                vertical=vert,
+                diagnosis=diagnosis_result,
+            )
+            self._suggestions_key = sugg_key
+        report.mark("suggestions", sugg_changed)
+
+        # 8. variant_score：同 OS 内 min-max 归一化，组内任一行变化则整组重算
+        scores_changed = False
+        for os in OS_LIST:
+            cohort_rows = [r for r in row_order if r[1] == os]
+            key = (tuple(id(self._metrics[r]) for r in cohort_rows), vert, config_version)
+            if key != self._scores_key.get(os):
+                self._scores[os] = compute_variant_scores([self._metrics[r] for r in cohort_rows], vertical=vert)
+                self._scores_key[os] = key
+                scores_changed = True
+        report.mark("variant_scores", scores_changed)
+        variant_scores_by_row = {r: self._scores[r[1]][r] for r in row_order}
+
+        # 9. card_score
+        wn_trigger = getattr(card, "why_now_trigger", "") or ""
+        card_key = (id(explore_ios), id(explore_android), *(id(self._scores[os]) for os in OS_LIST),
+                    id(validate_result), wn_trigger, vert, config_version)
+        card_changed = card_key != self._card_score_key
+        if card_changed:
+            self._card_score = self._compute_card_score(
+                variant_scores_by_row, explore_ios, explore_android, validate_result, wn_trigger, vert
+            )
+            self._card_score_key = card_key
+        report.mark("card_score", card_changed)
+
+        board = {
+            "card": card,
+            "vertical": vert,
+            "variants": variants,
+            "metrics": metrics,
+            "explore_ios": explore_ios,
+            "explore_android": explore_android,
+            "element_scores": element_scores,
+            "suggestions": self._suggestions,
+            "validate_result": validate_result,
+            "variant_scores_by_row": variant_scores_by_row,
+            "card_score_result": self._card_score,
+            "diagnosis": diagnosis_result,
+        }
+
+        # 10. decision_summary
+        summary_key = (id(explore_ios), id(explore_android), id(validate_result), id(diagnosis_result),
+                       tuple(id(m) for m in metrics))
+        summary_changed = summary_key != self._summary_key
+        if summary_changed:
+            self._summary = compute_decision_summary(board)
+            self._summary_key = summary_key
+        report.mark("decision_summary", summary_changed)
+        board["decision_summary"] = self._summary
+
+        self.last_report = report
+        board["pipeline_report"] = report.as_dict()
+        return board
+
+    # -------- 各阶段 --------
+
+    def _sync_variants(self, variants: list[Variant]) -> set[str]:
+        """对比变体内容，返回内容有变化（含新增）的 variant_id，并刷新其元素标签"""
+        changed: set[str] = set()
+        seen: set[str] = set()
+        for v in variants:
+            vid = v.variant_id
+            seen.add(vid)
+            old = self._variants.get(vid)
+            if old is v or (old is not None and old == v):
+                continue
+            self._variants[vid] = v
+            self._decomp[vid] = decompose(v)
+            changed.add(vid)
+        for vid in set(self._variants) - seen:
+            del self._variants[vid]
+            del self._decomp[vid]
+        return changed
+
+    @profiled("decision_board.explore")
+    def _update_explore(
+        self,
+        os: str,
+        row_order: list[Row],
+        baseline_vid: str,
+        changed_rows: set[Row],
+        removed_rows: set[Row],
+        order_changed: bool,
+        context: dict[str, Any],
+        report: PipelineReport,
+    ) -> bool:
+        baseline = self._metrics[(baseline_vid, os)]
+        cohort = [r for r in row_order if r[1] == os and r[0] != baseline_vid]
+        gate_rows = self._gate_rows[os]
+
+        if baseline is not self._gate_baseline[os]:
+            gate_rows.clear()
+            self._gate_baseline[os] = baseline
+        for vid, os_ in removed_rows:
+            if os_ == os:
+                gate_rows.pop(vid, None)
+        gate_rows.pop(baseline_vid, None)
+
+        regated: list[str] = []
+        for row in cohort:
+            vid = row[0]
+            if vid not in gate_rows or row in changed_rows:
+                gate_rows[vid] = evaluate_explore_variant(self._metrics[row], baseline, self.explore_config)
+                regated.append(vid)
+
+        if not regated and not order_changed and context == self._gate_ctx.get(os) and os in self._explore:
+            return False
+        report.regated[os] = regated
+        self._gate_ctx[os] = context
+
+        if not cohort:
+            self._explore[os] = evaluate_explore_gate([], [baseline], context=context, config=self.explore_config)
+            return True
+        variant_details: dict[str, str] = {}
+        eligible: list[str] = []
+        reasons: list[str] = []
+        for vid, _ in cohort:
+            status, reason = gate_rows[vid]
+            variant_details[vid] = status
+            reasons.append(reason)
+            if status == "PASS":
+                eligible.append(vid)
+        self._explore[os] = summarize_explore_gate(variant_details, eligible, reasons, context)
+        return True
+
+    @profiled("decision_board.elements")
+    def _update_elements(
+        self,
+        row_order: list[Row],
+        dirty_rows: set[Row],
+        removed_rows: set[Row],
+        order_changed: bool,
+        report: PipelineReport,
+    ) -> bool:
+        if not dirty_rows and not removed_rows and not order_changed:
+            return False
+        row_index = {r: i for i, r in enumerate(row_order)}
+        touched: set[tuple[str, str]] = set()
+
+        # 1. 摘除旧行、挂上新行
+        for row in removed_rows | dirty_rows:
+            for key in self._row_elements.pop(row, ()):
+                self._element_rows[key].pop(row, None)
+                touched.add(key)
+        for row in dirty_rows:
+            if row not in row_index:
+                continue
+            keys = self._decomp[row[0]].keys
+            for pos, key in enumerate(keys):
+                self._element_rows.setdefault(key, {})[row] = pos
+                touched.add(key)
+            self._row_elements[row] = keys
+
+        # 2. 行序变化时所有元素的求和顺序/首现位置都要重算
+        if order_changed:
+            touched = set(self._element_rows)
+        report.touched_elements = len(touched)
+
+        for key in touched:
+            rows = self._element_rows.get(key)
+            if not rows:
+                self._element_rows.pop(key, None)
+                self._element_aggs.pop(key, None)
+                continue
+            ordered = sorted(rows, key=row_index.__getitem__)
+            ms = [self._metrics[r] for r in ordered]
+            n = len(ms)
+            by_os: dict[str, list[SimulatedMetrics]] = {}
+            for m in ms:
+                by_os.setdefault(m.os, []).append(m)
+            first = ordered[0]
+            self._element_aggs[key] = _ElementAgg(
+                n=n,
+                mean_ipm=sum(m.ipm for m in ms) / n,
+                mean_cpi=sum(m.cpi for m in ms) / n,
+                os_means=[
+                    (sum(m.ipm for m in g) / len(g), sum(m.cpi for m in g) / len(g))
+                    for g in by_os.values()
+                ],
+                first=(row_index[first], rows[first]),
+            )
+
+        # 3. 卡片均值 + 物化 ElementScore（聚合量已就绪，不再扫描行）
+        all_metrics = [self._metrics[r] for r in row_order if r in self._row_elements]
+        if not all_metrics:
+            self._element_scores = []
+            return True
+        card_ipm = sum(m.ipm for m in all_metrics) / len(all_metrics)
+        card_cpi = sum(m.cpi for m in all_metrics) / len(all_metrics)
+        self._card_means = (card_ipm, card_cpi)
+        ordered_keys = sorted(self._element_aggs, key=lambda k: self._element_aggs[k].first)
+        self._element_scores = [
+            build_element_score(
+                et,
+                ev,
+                n=agg.n,
+                mean_ipm=agg.mean_ipm,
+                mean_cpi=agg.mean_cpi,
+                os_means=agg.os_means,
+                card_mean_ipm=card_ipm,
+                card_mean_cpi=card_cpi,
+                min_sample_size=self.min_sample_size,
+            )
+            for (et, ev), agg in ((k, self._element_aggs[k]) for k in ordered_keys)
+        ]
+        return True
+
+    @staticmethod
+    def _compute_card_score(
+        variant_scores_by_row: dict[Row, float],
+        explore_ios: ExploreGateResult,
+        explore_android: ExploreGateResult,
+        validate_result: Any,
+        wn_trigger: str,
+        vert: str,
+    ) -> dict[str, Any]:
+        by_vid: dict[str, list[float]] = {}
+        for (vid, _), s in variant_scores_by_row.items():
+            by_vid.setdefault(vid, []).append(s)
+        variant_scores_agg = {vid: sum(s) / len(s) for vid, s in by_vid.items()}
+
+        eligible_all = list(dict.fromkeys((explore_ios.eligible_variants or []) + (explore_android.eligible_variants or [])))
+        stab_penalty = 5.0 if validate_result.validate_status == "FAIL" else 0.0
+
+        view = get_compiled_config().view(vert)
+        why_now_penalty = 0.0
+        if wn_trigger in view.why_now_strong_triggers:
+            why_now_penalty = view.why_now_strong_stimulus_penalty
+        elif any(("why now" in n.lower() or "虚高" in n or "强刺激" in n) for n in validate_result.risk_notes):
+            why_now_penalty = view.why_now_strong_stimulus_penalty * 0.5
+
+        return compute_card_score(
+            eligible_variants=eligible_all,
+            variant_scores=variant_scores_agg,
+            top_k=5,
+            stability_penalty=stab_penalty,
+            why_now_strong_stimulus_penalty=why_now_penalty,
+        )
+
+
+def build_decision_board(
+    card: StrategyCard,
+    variants: list[Variant],
+    *,
+    vertical: str,
+    pipeline: DecisionBoardPipeline | None = None,
+) -> dict[str, Any]:
+    """
+    跑完整条决策链路。variants[0] 视为 baseline。
+    传入 pipeline 时在其已有状态上增量计算（只重算变化部分）。
+
+    返回 {card, vertical, variants, metrics, explore_ios, explore_android, element_scores,
+    suggestions, validate_result, variant_scores_by_row, card_score_result, diagnosis,
+    decision_summary, pipeline_report}
+    """
+    return (pipeline or DecisionBoardPipeline()).update(card, variants, vertical=vertical)
@@ -8,6 +8,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any
 
+from profiling import profiled
+
 MIN_SAMPLES = 6
 MIN_WINDOWS = 3
 
@@ -22,6 +24,7 @@ class DiagnosisResult:
     detail: str = ""
 
 
+@profiled("diagnosis")
 def diagnose(
     *,
     explore_ios: Any = None,
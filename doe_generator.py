@@ -0,0 +1,395 @@
+"""
+实验设计（DOE）变体生成器：与 OFAAT 并列，一轮同时改多个因子，用于估计主效应与两两交互。
+
+因子 = hook_type / sell_point / cta_type / 各素材变量（候选 ≥ 2 个的才参与），水平下标 0 为基线。
+设计：
+- full：全因子（itertools.product，惰性）
+- fractional：两水平（基线 vs 第 alt 个候选）的 2^(k-p) 部分因子，生成元取高阶交互以保分辨率
+- lhs：拉丁超立方，每个因子的各水平在 n 次试验中均匀分层
+- oa：强度 2 的正交表 OA(s², s+1, s)（GF(s) 上构造），s 取满足水平数与因子数、且被每个水平数整除的
+  最小素数幂，少水平因子按取模折叠（各水平数同为某素数的幂时才严格正交）；否则退回全因子
+
+iter_design_variants 惰性产出 Variant，按内容哈希去重，基线永远是第一条。
+estimate_effects 用最小二乘一次拟合主效应 + 两两交互（处理编码，相对基线水平）。
+"""
+from __future__ import annotations
+
+import functools
+import itertools
+import math
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy 随 streamlit 安装
+    np = None
+
+from pydantic import BaseModel, Field
+
+from element_index import variant_content_hash
+from eval_schemas import Variant
+from ofaat_generator import ASSET_KEYS, EXPRESSION_TEMPLATE, OfaatPools
+from simulate_metrics import SimulatedMetrics
+
+Point = tuple[int, ...]  # 每个因子的水平下标
+
+
+@dataclass(frozen=True)
+class Factor:
+    """一个实验因子：name 为 Variant 字段名（素材变量用 asset_variables 的键）"""
+
+    name: str
+    levels: tuple[str, ...]
+
+    @property
+    def is_asset(self) -> bool:
+        return self.name in ASSET_KEYS
+
+    def value_of(self, variant: Variant) -> str:
+        if self.is_asset:
+            asset = variant.asset_variables
+            return str((asset.get(self.name, "") if isinstance(asset, dict) else getattr(asset, self.name, "")) or "")
+        return str(getattr(variant, self.name, "") or "")
+
+
+def design_factors(pools: OfaatPools) -> list[Factor]:
+    """候选池 -> 因子列表（只保留 ≥ 2 个水平的因子）"""
+    factors = [
+        Factor("hook_type", pools.hooks),
+        Factor("sell_point", pools.sell_points),
+        Factor("cta_type", pools.ctas),
+        *(Factor(k, pools.assets[k]) for k in ASSET_KEYS),
+    ]
+    return [f for f in factors if len(f.levels) >= 2]
+
+
+# -------- 设计（惰性产出水平下标元组） --------
+
+
+def full_factorial(levels: Sequence[int]) -> Iterator[Point]:
+    return itertools.product(*(range(n) for n in levels))
+
+
+def _fraction_generators(base: int, p: int) -> list[tuple[int, ...]]:
+    """为 p 个附加因子挑选生成元：优先取基础因子的高阶组合（分辨率更高）"""
+    words = [c for r in range(base, 1, -1) for c in itertools.combinations(range(base), r)]
+    if len(words) < p:
+        raise ValueError(f"2^({base + p}-{p}) 部分因子无足够生成元，请减小 p")
+    return words[:p]
+
+
+def fractional_factorial(k: int, p: int = 1) -> Iterator[Point]:
+    """两水平 2^(k-p) 部分因子设计（0 = 基线，1 = 备选）"""
+    if not 0 <= p < k:
+        raise ValueError("需满足 0 <= p < k")
+    base = k - p
+    gens = _fraction_generators(base, p) if p else []
+    for run in itertools.product((0, 1), repeat=base):
+        yield run + tuple(sum(run[i] for i in g) % 2 for g in gens)
+
+
+def latin_hypercube(levels: Sequence[int], n: int, *, seed: int = 0) -> Iterator[Point]:
+    """n 次试验；每个因子把 n 个位置均分到各水平后随机排列"""
+    rng = random.Random(seed)
+    cols = []
+    for L in levels:
+        col = [i * L // n for i in range(n)]
+        rng.shuffle(col)
+        cols.append(col)
+    for r in range(n):
+        yield tuple(col[r] for col in cols)
+
+
+def _prime_power(q: int) -> tuple[int, int] | None:
+    """q = p^n 时返回 (p, n)，否则 None"""
+    for p in range(2, q + 1):
+        if q % p == 0:
+            n = 0
+            while q % p == 0:
+                q //= p
+                n += 1
+            return (p, n) if q == 1 else None
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _gf_tables(q: int) -> tuple[tuple[tuple[int, ...], ...], tuple[tuple[int, ...], ...]]:
+    """GF(q) 的加法 / 乘法表；元素 x 编码为 p 进制各位 = 多项式系数，x % p^j 即取低 j 位（线性投影）"""
+    p, n = _prime_power(q)
+    digits = lambda x: [(x // p**i) % p for i in range(n)]  # noqa: E731
+    value = lambda d: sum(c * p**i for i, c in enumerate(d))  # noqa: E731
+    add = tuple(tuple(value([(u + v) % p for u, v in zip(digits(x), digits(y))]) for y in range(q)) for x in range(q))
+
+    def mul(x: int, y: int, mod: list[int]) -> int:
+        prod = [0] * (2 * n - 1)
+        for i, u in enumerate(digits(x)):
+            for j, v in enumerate(digits(y)):
+                prod[i + j] = (prod[i + j] + u * v) % p
+        for d in range(2 * n - 2, n - 1, -1):  # x^n = -(mod[0] + mod[1]·x + …)
+            c, prod[d] = prod[d], 0
+            for i in range(n):
+                prod[d - n + i] = (prod[d - n + i] - c * mod[i]) % p
+        return value(prod[:n])
+
+    for low in range(q):  # 首一模多项式 x^n + low(x)，取第一个使每个非零元都有逆元的（即不可约）
+        mod = digits(low)
+        table = tuple(tuple(mul(x, y, mod) for y in range(q)) for x in range(q))
+        if all(1 in table[x][1:] for x in range(1, q)):
+            return add, table
+    raise ValueError(f"GF({q}) 找不到不可约多项式")
+
+
+def _oa_order(levels: Sequence[int]) -> int | None:
+    """
+    正交表阶数 s：≥ max(2, 水平数, 因子数-1) 且被每个水平数整除的最小素数幂。
+    要求所有水平数为同一素数 p 的幂（取 s = p^n 即可整除）；否则不存在，返回 None。
+    """
+    primes = set()
+    for L in levels:
+        pp = _prime_power(L) if L >= 2 else None
+        if pp is None:
+            return None
+        primes.add(pp[0])
+    if len(primes) > 1:
+        return None
+    p = primes.pop() if primes else 2
+    lo = max(2, max(levels, default=2), len(levels) - 1)
+    s = p
+    while s < lo:
+        s *= p
+    return s
+
+
+def orthogonal_array(levels: Sequence[int]) -> Iterator[Point]:
+    """
+    Rao-Hamming 强度 2 正交表：行 (a, b) ∈ GF(s)²，列 a、b、a+b、a+2b …（共 s+1 列，运算在 GF(s) 上）。
+    水平数 L < s 的因子取 x % L（L 整除 s，每个水平恰好 s/L 个取值，两两列组合仍均匀，保持正交）。
+    水平数不全是同一素数的幂（如 [4, 3, 2, 2]）时不存在这样的 s，退回全因子设计。
+    """
+    s = _oa_order(levels)
+    if s is None:
+        yield from full_factorial(levels)
+        return
+    add, mul = _gf_tables(s)
+    k = len(levels)
+    for a in range(s):
+        for b in range(s):
+            cols = [a, b] + [add[a][mul[m][b]] for m in range(1, s)]
+            yield tuple(cols[j] % levels[j] for j in range(k))
+
+
+def design_size(design: str, levels: Sequence[int], *, n: int | None = None, p: int = 1) -> int:
+    """去重前的试验次数"""
+    if design == "full":
+        return math.prod(levels)
+    if design == "fractional":
+        return 2 ** (len(levels) - p)
+    if design == "lhs":
+        return n or _default_lhs_runs(levels)
+    if design == "oa":
+        s = _oa_order(levels)
+        return s * s if s else math.prod(levels)
+    raise ValueError(f"未知设计：{design}")
+
+
+def _default_lhs_runs(levels: Sequence[int]) -> int:
+    # 主效应参数个数的 2 倍，至少覆盖每个水平两次
+    return max(2 * max(levels, default=1), 2 * (1 + sum(L - 1 for L in levels)))
+
+
+DESIGNS: dict[str, Callable[..., Iterator[Point]]] = {
+    "full": lambda levels, **kw: full_factorial(levels),
+    "fractional": lambda levels, *, p=1, alt=None, **kw: (
+        tuple((alt[j] if alt else 1) * x for j, x in enumerate(pt)) for pt in fractional_factorial(len(levels), p)
+    ),
+    "lhs": lambda levels, *, n=None, seed=0, **kw: latin_hypercube(levels, n or _default_lhs_runs(levels), seed=seed),
+    "oa": lambda levels, **kw: orthogonal_array(levels),
+}
+
+
+# -------- 物化为 Variant --------
+
+
+def _materialize(pools: OfaatPools, factors: list[Factor], point: Point, variant_id: str) -> Variant:
+    fields = {"hook_type": pools.hooks[0], "sell_point": pools.sell_points[0], "cta_type": pools.ctas[0]}
+    asset_update: dict[str, str] = {}
+    changed: list[str] = []
+    for f, lvl in zip(factors, point):
+        if lvl == 0:
+            continue
+        changed.append(f"{f.name}={f.levels[lvl]}")
+        if f.is_asset:
+            asset_update[f.name] = f.levels[lvl]
+        else:
+            fields[f.name] = f.levels[lvl]
+    asset = pools.default_asset.model_copy(update=asset_update) if asset_update else pools.default_asset
+    return Variant(
+        variant_id=variant_id,
+        parent_card_id=pools.parent_card_id,
+        expression_template=EXPRESSION_TEMPLATE,
+        asset_variables=asset,
+        why_you_expression=fields["sell_point"],
+        why_now_expression=fields["sell_point"],
+        changed_field="+".join(c.split("=", 1)[0] for c in changed),
+        delta_desc=("DOE: " + "; ".join(changed)) if changed else "基线",
+        **fields,
+    )
+
+
+def iter_design_variants(
+    parent_card_id: str,
+    hook_types: list[str],
+    sell_points: list[str],
+    ctas: list[str],
+    *,
+    design: str = "full",
+    asset_pool: dict[str, list[str]] | None = None,
+    limit: int | None = None,
+    **design_kw: Any,
+) -> Iterator[Variant]:
+    """
+    惰性产出设计变体：v001 为基线，其后按设计顺序，内容哈希重复的跳过；limit 限制产出条数。
+    design_kw 透传给设计：fractional 用 p / alt，lhs 用 n / seed。
+    """
+    if design not in DESIGNS:
+        raise ValueError(f"未知设计：{design}，可选 {', '.join(DESIGNS)}")
+    pools = OfaatPools.build(parent_card_id, hook_types, sell_points, ctas, asset_pool)
+    factors = design_factors(pools)
+    levels = [len(f.levels) for f in factors]
+    if design == "fractional" and "alt" in design_kw and isinstance(design_kw["alt"], dict):
+        design_kw["alt"] = [min(design_kw["alt"].get(f.name, 1), len(f.levels) - 1) for f in factors]
+    points = itertools.chain([tuple(0 for _ in factors)], DESIGNS[design](levels, **design_kw))
+    seen: set[str] = set()
+    count = 0
+    for pt in points:
+        if limit is not None and count >= limit:
+            return
+        v = _materialize(pools, factors, pt, f"v{count + 1:03d}")
+        h = variant_content_hash(v)
+        if h in seen:
+            continue
+        seen.add(h)
+        count += 1
+        yield v
+
+
+def generate_design_variants(
+    parent_card_id: str,
+    hook_types: list[str],
+    sell_points: list[str],
+    ctas: list[str],
+    **kw: Any,
+) -> list[Variant]:
+    return list(iter_design_variants(parent_card_id, hook_types, sell_points, ctas, **kw))
+
+
+# -------- 效应估计 --------
+
+
+class TermEffect(BaseModel):
+    """单个回归项的估计"""
+
+    term: str = Field(..., description="如 hook_type=冲突 或 hook_type=冲突 × cta_type=领福利")
+    kind: str = Field(..., description="main / interaction / os")
+    estimate: float = Field(..., description="相对基线水平的效应")
+    std_error: float | None = Field(default=None, description="残差自由度为 0 时为空")
+    t_value: float | None = None
+    support: int = Field(..., description="该项为 1 的观测数")
+
+
+class EffectReport(BaseModel):
+    """一轮 DOE 的效应估计"""
+
+    metric: str
+    n_obs: int
+    n_terms: int
+    intercept: float
+    r2: float
+    residual_dof: int
+    effects: list[TermEffect] = Field(default_factory=list)
+
+
+def estimate_effects(
+    variants: Iterable[Variant],
+    metrics: Iterable[SimulatedMetrics | dict],
+    *,
+    metric: str = "ipm",
+    factors: list[str] | None = None,
+    interactions: bool = True,
+    os: str | None = None,
+) -> EffectReport:
+    """
+    最小二乘拟合 y = b0 + Σ主效应 + Σ两两交互 (+ OS 项)。
+    - 因子水平从 Variant 字段读取，基线水平取第一个变体的取值；未变化的因子自动跳过
+    - os 为空且数据含多个 OS 时加入 OS 主效应列
+    - 秩亏时取最小范数解，std_error 基于伪逆
+    """
+    if np is None:
+        raise RuntimeError("estimate_effects 需要 numpy")
+    vlist = list(variants)
+    by_id = {v.variant_id: v for v in vlist}
+    rows = [SimulatedMetrics.model_validate(m) if isinstance(m, dict) else m for m in metrics]
+    rows = [m for m in rows if m.variant_id in by_id and (os is None or m.os == os)]
+    if not rows or not vlist:
+        return EffectReport(metric=metric, n_obs=0, n_terms=0, intercept=0.0, r2=0.0, residual_dof=0)
+
+    names = factors or ["hook_type", "sell_point", "cta_type", *ASSET_KEYS]
+    facs = [Factor(n, ()) for n in names]
+    base = {f.name: f.value_of(vlist[0]) for f in facs}
+
+    # 每个因子的非基线水平 -> 列
+    main_cols: list[tuple[str, str, Any]] = []
+    vals = {f.name: np.array([f.value_of(by_id[m.variant_id]) for m in rows], dtype=object) for f in facs}
+    for f in facs:
+        for lvl in dict.fromkeys(vals[f.name]):
+            if lvl != base[f.name]:
+                main_cols.append((f.name, lvl, (vals[f.name] == lvl).astype(float)))
+    cols: list[tuple[str, str, Any]] = [(f"{n}={lvl}", "main", x) for n, lvl, x in main_cols]
+    if interactions:
+        for (n1, l1, x1), (n2, l2, x2) in itertools.combinations(main_cols, 2):
+            if n1 == n2:
+                continue
+            x = x1 * x2
+            if x.any():
+                cols.append((f"{n1}={l1} × {n2}={l2}", "interaction", x))
+    os_vals = np.array([m.os for m in rows], dtype=object)
+    if os is None:
+        for o in list(dict.fromkeys(os_vals))[1:]:
+            cols.append((f"os={o}", "os", (os_vals == o).astype(float)))
+
+    y = np.array([float(getattr(m, metric)) for m in rows])
+    X = np.column_stack([np.ones(len(rows))] + [c[2] for c in cols])
+    beta, _, rank, _ = np.linalg.lstsq(X, y, rcond=None)
+    resid = y - X @ beta
+    dof = len(rows) - int(rank)
+    ss_tot = float(((y - y.mean()) ** 2).sum())
+    r2 = 1.0 - float(resid @ resid) / ss_tot if ss_tot > 0 else 0.0
+    se = None
+    if dof > 0:
+        sigma2 = float(resid @ resid) / dof
+        se = np.sqrt(np.clip(np.diag(np.linalg.pinv(X.T @ X)) * sigma2, 0.0, None))
+
+    effects = []
+    for j, (term, kind, x) in enumerate(cols, start=1):
+        s = float(se[j]) if se is not None else None
+        effects.append(
+            TermEffect(
+                term=term,
+                kind=kind,
+                estimate=round(float(beta[j]), 4),
+                std_error=round(s, 4) if s is not None else None,
+                t_value=round(float(beta[j]) / s, 3) if s else None,
+                support=int(x.sum()),
+            )
+        )
+    return EffectReport(
+        metric=metric,
+        n_obs=len(rows),
+        n_terms=len(cols),
+        intercept=round(float(beta[0]), 4),
+        r2=round(r2, 4),
+        residual_dof=dof,
+        effects=effects,
+    )
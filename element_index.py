@@ -0,0 +1,178 @@
+"""
+元素拆解缓存与整数化。
+
+decompose_variant_to_element_tags 每次都新建一批 ElementTag，且同一 (element_type, element_value)
+字符串在成千上万个变体间重复。这里：
+- 按变体「内容键」（只含参与拆解的字段，与 variant_id 无关）缓存拆解结果，同内容变体共享一份；
+- (element_type, element_value) 驻留为进程内唯一的小整数 ID，ElementTag 对象按 ID 复用；
+- 下游可直接用整数 ID 元组 / CSR 数组（element_id_csr）代替 pydantic 标签列表。
+
+缓存结果只读（tuple + 共享 ElementTag，勿修改）。ID 只在本进程内有效，跨进程 / 落盘请用 ELEMENTS.key(i)。
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from eval_schemas import ElementTag, Variant, decompose_variant_to_element_tags
+
+ElementKey = tuple[str, str]
+ContentKey = tuple[Any, ...]
+
+DEFAULT_CACHE_SIZE = 65536
+
+
+# -------- 元素驻留 --------
+
+
+class ElementInterner:
+    """(element_type, element_value) <-> int；ID 按首次出现顺序从 0 递增，永不回收"""
+
+    def __init__(self) -> None:
+        self._ids: dict[ElementKey, int] = {}
+        self._keys: list[ElementKey] = []
+        self._tags: list[ElementTag] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def intern(self, element_type: str, element_value: str) -> int:
+        key = (element_type, element_value)
+        i = self._ids.get(key)
+        if i is not None:
+            return i
+        with self._lock:
+            i = self._ids.get(key)
+            if i is None:
+                i = len(self._keys)
+                self._keys.append(key)
+                self._tags.append(ElementTag(element_type=element_type, element_value=element_value))
+                self._ids[key] = i
+        return i
+
+    def lookup(self, element_type: str, element_value: str) -> int | None:
+        """只查不建"""
+        return self._ids.get((element_type, element_value))
+
+    def key(self, i: int) -> ElementKey:
+        return self._keys[i]
+
+    def tag(self, i: int) -> ElementTag:
+        """ID 对应的共享 ElementTag（只读）"""
+        return self._tags[i]
+
+
+ELEMENTS = ElementInterner()
+
+
+# -------- 变体内容键 --------
+
+
+def variant_content_key(variant: Variant) -> ContentKey:
+    """参与元素拆解的字段组成的可哈希键；内容相同的变体（不论 variant_id）键相同"""
+    asset = variant.asset_variables
+    if isinstance(asset, dict):
+        asset_key: tuple[Any, ...] = ("dict", *((k, v) for k, v in asset.items() if v and isinstance(v, str)))
+    else:
+        asset_key = ("model", asset.subtitle_template, asset.bgm, asset.rhythm, asset.shot_template)
+    return (
+        variant.hook_type,
+        variant.why_you_expression,
+        variant.why_now_expression,
+        variant.sell_point,
+        variant.cta_type,
+        asset_key,
+    )
+
+
+def variant_content_hash(variant: Variant) -> str:
+    """内容键的稳定摘要（跨进程一致），用于落盘 / 去重"""
+    return hashlib.blake2b(repr(variant_content_key(variant)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+# -------- 拆解缓存 --------
+
+
+@dataclass(frozen=True)
+class Decomposition:
+    """一个变体内容的拆解结果"""
+
+    tags: tuple[ElementTag, ...]  # 与 decompose_variant_to_element_tags 同序（含重复）
+    ids: tuple[int, ...]  # 去重后的元素 ID，保持首次出现顺序
+    keys: tuple[ElementKey, ...]  # 与 ids 一一对应
+
+
+_cache: dict[ContentKey, Decomposition] = {}
+_cache_size = DEFAULT_CACHE_SIZE
+_stats = {"hits": 0, "misses": 0}
+
+
+def _build(variant: Variant) -> Decomposition:
+    tag_ids = [ELEMENTS.intern(t.element_type, t.element_value) for t in decompose_variant_to_element_tags(variant)]
+    ids = tuple(dict.fromkeys(tag_ids))
+    return Decomposition(
+        tags=tuple(ELEMENTS.tag(i) for i in tag_ids),
+        ids=ids,
+        keys=tuple(ELEMENTS.key(i) for i in ids),
+    )
+
+
+def decompose(variant: Variant) -> Decomposition:
+    """带缓存的拆解；缓存满时按插入顺序淘汰最旧的一项"""
+    ck = variant_content_key(variant)
+    d = _cache.get(ck)
+    if d is not None:
+        _stats["hits"] += 1
+        return d
+    _stats["misses"] += 1
+    d = _build(variant)
+    if len(_cache) >= _cache_size:
+        try:
+            del _cache[next(iter(_cache))]
+        except (StopIteration, KeyError, RuntimeError):
+            pass
+    _cache[ck] = d
+    return d
+
+
+def element_tags(variant: Variant) -> tuple[ElementTag, ...]:
+    """decompose_variant_to_element_tags 的缓存版（返回共享只读 tuple）"""
+    return decompose(variant).tags
+
+
+def element_ids(variant: Variant) -> tuple[int, ...]:
+    return decompose(variant).ids
+
+
+def variant_tags_map(variants: Iterable[Variant]) -> dict[str, tuple[ElementTag, ...]]:
+    """variant_id -> tags，可直接作为各模块的 variant_to_tags 参数"""
+    return {v.variant_id: decompose(v).tags for v in variants}
+
+
+def element_id_csr(variants: Iterable[Variant]) -> tuple[list[int], list[int]]:
+    """
+    变体 × 元素 的 CSR 结构 (indptr, indices)：第 r 个变体的元素 ID 为 indices[indptr[r]:indptr[r+1]]。
+    调用方可按需转 numpy 数组。
+    """
+    indptr = [0]
+    indices: list[int] = []
+    for v in variants:
+        indices.extend(decompose(v).ids)
+        indptr.append(len(indices))
+    return indptr, indices
+
+
+def cache_info() -> dict[str, int]:
+    return {**_stats, "size": len(_cache), "maxsize": _cache_size, "elements": len(ELEMENTS)}
+
+
+def clear_cache(maxsize: int | None = None) -> None:
+    """清空拆解缓存（元素 ID 保留不变）；maxsize 可调整容量"""
+    global _cache_size
+    _cache.clear()
+    _stats["hits"] = _stats["misses"] = 0
+    if maxsize is not None:
+        _cache_size = max(1, int(maxsize))
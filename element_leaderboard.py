@@ -0,0 +1,275 @@
+"""
+跨卡片元素排行榜：基于知识库 element_scores 的累计证据。
+
+按 (vertical, element_type, element_value, os) 维护运行统计（Welford 均值/方差、拉/拖次数），
+写入 knowledge_store 的 element_stats 表；每次 write_experiment 增量更新，不回扫历史。
+top_elements 给出带置信区间的 Top-K，rank_by_evidence 供 variant_suggestions 给候选值排序。
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable
+
+from pydantic import BaseModel, Field
+
+import knowledge_store
+from scoring_eval import compute_element_normalized_score
+
+OS_ALL = "all"
+Z_95 = 1.96
+# 只有 1 次观测时用的先验方差（与 compute_element_normalized_score 的 ipm/cpi 尺度一致）
+PRIOR_IPM_VAR = 8.0 ** 2
+PRIOR_CPI_VAR = 1.5 ** 2
+
+StatKey = tuple[str, str, str, str]  # (vertical, element_type, element_value, os)
+
+
+# -------- 运行统计 --------
+
+
+@dataclass
+class ElementStat:
+    """单个 (vertical, element_type, element_value, os) 的累计统计"""
+
+    n: int = 0
+    ipm_mean: float = 0.0
+    ipm_m2: float = 0.0
+    cpi_mean: float = 0.0
+    cpi_m2: float = 0.0
+    pos_count: int = 0
+    neg_count: int = 0
+
+    def observe(self, ipm_delta: float, cpi_delta: float) -> None:
+        """吃入一次实验的元素 Δ（Welford）；拉 = IPMΔ>0 或 CPIΔ<0，拖 = IPMΔ<0 或 CPIΔ>0"""
+        self.n += 1
+        d = ipm_delta - self.ipm_mean
+        self.ipm_mean += d / self.n
+        self.ipm_m2 += d * (ipm_delta - self.ipm_mean)
+        d = cpi_delta - self.cpi_mean
+        self.cpi_mean += d / self.n
+        self.cpi_m2 += d * (cpi_delta - self.cpi_mean)
+        if ipm_delta > 0 or cpi_delta < 0:
+            self.pos_count += 1
+        elif ipm_delta < 0 or cpi_delta > 0:
+            self.neg_count += 1
+
+    def _se(self, m2: float, prior_var: float) -> float:
+        var = m2 / (self.n - 1) if self.n > 1 else prior_var
+        return math.sqrt(var / self.n) if self.n else math.inf
+
+    def ipm_ci(self, z: float = Z_95) -> tuple[float, float]:
+        h = z * self._se(self.ipm_m2, PRIOR_IPM_VAR)
+        return self.ipm_mean - h, self.ipm_mean + h
+
+    def cpi_ci(self, z: float = Z_95) -> tuple[float, float]:
+        h = z * self._se(self.cpi_m2, PRIOR_CPI_VAR)
+        return self.cpi_mean - h, self.cpi_mean + h
+
+    def evidence_score(self, z: float = Z_95) -> float:
+        """保守分：取 IPMΔ 下界、CPIΔ 上界再标准化（-100~100），样本少则自然偏低"""
+        return compute_element_normalized_score(self.ipm_ci(z)[0], self.cpi_ci(z)[1])
+
+
+class ElementEvidence(BaseModel):
+    """排行榜条目"""
+
+    vertical: str
+    element_type: str
+    element_value: str
+    os: str = Field(default=OS_ALL, description="iOS / Android / all")
+    sample_size: int = Field(..., description="累计实验次数")
+    mean_IPM_delta: float
+    IPM_delta_ci: tuple[float, float]
+    mean_CPI_delta: float
+    CPI_delta_ci: tuple[float, float]
+    pos_count: int = Field(..., description="拉的次数")
+    neg_count: int = Field(..., description="拖的次数")
+    consistency: float = Field(..., description="方向一致率 = max(pos, neg) / n")
+    evidence_score: float = Field(..., description="保守标准化分，用于排序")
+
+
+def _to_evidence(key: StatKey, st: ElementStat, z: float) -> ElementEvidence:
+    vertical, et, ev, os = key
+    ipm_ci = st.ipm_ci(z)
+    cpi_ci = st.cpi_ci(z)
+    return ElementEvidence(
+        vertical=vertical,
+        element_type=et,
+        element_value=ev,
+        os=os,
+        sample_size=st.n,
+        mean_IPM_delta=round(st.ipm_mean, 4),
+        IPM_delta_ci=(round(ipm_ci[0], 4), round(ipm_ci[1], 4)),
+        mean_CPI_delta=round(st.cpi_mean, 4),
+        CPI_delta_ci=(round(cpi_ci[0], 4), round(cpi_ci[1], 4)),
+        pos_count=st.pos_count,
+        neg_count=st.neg_count,
+        consistency=round(max(st.pos_count, st.neg_count) / st.n, 3) if st.n else 0.0,
+        evidence_score=compute_element_normalized_score(ipm_ci[0], cpi_ci[1]),
+    )
+
+
+# -------- 持久化（knowledge_store.element_stats） --------
+
+
+_COLUMNS = ("n", "ipm_mean", "ipm_m2", "cpi_mean", "cpi_m2", "pos_count", "neg_count")
+
+
+def _read_stat(c: sqlite3.Cursor, key: StatKey) -> ElementStat:
+    c.execute(
+        f"SELECT {', '.join(_COLUMNS)} FROM element_stats "
+        "WHERE vertical=? AND element_type=? AND element_value=? AND os=?",
+        key,
+    )
+    row = c.fetchone()
+    return ElementStat(*row) if row else ElementStat()
+
+
+def _write_stat(c: sqlite3.Cursor, key: StatKey, st: ElementStat, now: str) -> None:
+    c.execute(
+        f"INSERT OR REPLACE INTO element_stats (vertical, element_type, element_value, os, {', '.join(_COLUMNS)}, updated_at) "
+        f"VALUES (?,?,?,?,{','.join('?' * len(_COLUMNS))},?)",
+        (*key, st.n, st.ipm_mean, st.ipm_m2, st.cpi_mean, st.cpi_m2, st.pos_count, st.neg_count, now),
+    )
+
+
+def record_element_observations(
+    conn: sqlite3.Connection,
+    vertical: str,
+    observations: Iterable[tuple[str, str, str, float, float]],
+) -> int:
+    """
+    增量更新 element_stats（调用方负责 commit）。
+    observations: (os, element_type, element_value, IPMΔ, CPIΔ)，每条为一次实验的结果。
+    返回更新的条目数。
+    """
+    c = conn.cursor()
+    now = datetime.now().isoformat()
+    touched: dict[StatKey, ElementStat] = {}
+    for os, et, ev, ipm_d, cpi_d in observations:
+        key = (vertical or "", et, ev, os or OS_ALL)
+        st = touched.get(key)
+        if st is None:
+            st = touched[key] = _read_stat(c, key)
+        st.observe(float(ipm_d or 0.0), float(cpi_d or 0.0))
+    for key, st in touched.items():
+        _write_stat(c, key, st, now)
+    return len(touched)
+
+
+def rebuild_element_stats() -> int:
+    """由 element_scores 明细全量重建 element_stats（用于旧库回填；返回条目数）"""
+    knowledge_store.init_schema()
+    conn = knowledge_store._get_conn()
+    try:
+        c = conn.cursor()
+        c.execute("""
+            SELECT e.vertical, s.exp_id, s.os, s.element_type, s.element_value, s.metric, s.delta
+            FROM element_scores s JOIN experiments e ON s.exp_id=e.exp_id
+            ORDER BY s.id
+        """)
+        pairs: dict[tuple, dict[str, float]] = {}
+        for row in c.fetchall():
+            k = (row["vertical"] or "", row["exp_id"], row["os"] or OS_ALL, row["element_type"], row["element_value"])
+            pairs.setdefault(k, {})[(row["metric"] or "IPM").upper()] = row["delta"] or 0.0
+        c.execute("DELETE FROM element_stats")
+        by_vertical: dict[str, list[tuple[str, str, str, float, float]]] = {}
+        for (vertical, _, os, et, ev), d in pairs.items():
+            by_vertical.setdefault(vertical, []).append((os, et, ev, d.get("IPM", 0.0), d.get("CPI", 0.0)))
+        n = sum(record_element_observations(conn, v, obs) for v, obs in by_vertical.items())
+        conn.commit()
+        return n
+    finally:
+        conn.close()
+        invalidate_cache()
+
+
+# -------- 查询（进程内快照，按库文件 mtime 失效） --------
+
+
+_cache_lock = threading.Lock()
+_cache: dict[str, Any] = {"sig": None, "stats": {}}
+
+
+def invalidate_cache() -> None:
+    with _cache_lock:
+        _cache["sig"] = None
+
+
+def _snapshot() -> dict[StatKey, ElementStat]:
+    """element_stats 全表快照；库不存在时返回空（不创建库文件）"""
+    path = knowledge_store.DB_PATH
+    try:
+        st = path.stat()
+    except OSError:
+        return {}
+    sig = (str(path), st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        if _cache["sig"] == sig:
+            return _cache["stats"]
+    conn = knowledge_store._get_conn()
+    try:
+        knowledge_store.init_schema(conn)
+        rows = conn.execute(
+            f"SELECT vertical, element_type, element_value, os, {', '.join(_COLUMNS)} FROM element_stats"
+        ).fetchall()
+    finally:
+        conn.close()
+    stats = {(r[0], r[1], r[2], r[3]): ElementStat(*r[4:]) for r in rows}
+    with _cache_lock:
+        _cache["sig"] = sig
+        _cache["stats"] = stats
+    return stats
+
+
+def top_elements(
+    vertical: str,
+    element_type: str | None = None,
+    *,
+    os: str = OS_ALL,
+    k: int = 10,
+    min_samples: int = 1,
+    worst: bool = False,
+    z: float = Z_95,
+) -> list[ElementEvidence]:
+    """按 evidence_score 取 Top-K（worst=True 取最拖后腿的 K 个）"""
+    stats = _snapshot()
+    cands = [
+        (key, st) for key, st in stats.items()
+        if key[0] == vertical and key[3] == os and st.n >= min_samples
+        and (element_type is None or key[1] == element_type)
+    ]
+    pick = heapq.nsmallest if worst else heapq.nlargest
+    chosen = pick(k, cands, key=lambda x: x[1].evidence_score(z))
+    return [_to_evidence(key, st, z) for key, st in chosen]
+
+
+def rank_by_evidence(
+    vertical: str,
+    element_type: str,
+    values: list[str],
+    *,
+    os: str = OS_ALL,
+    value_prefix: str = "",
+) -> list[str]:
+    """
+    按历史证据给候选值排序：有证据的按 evidence_score 降序在前，无证据的保持原顺序在后。
+    value_prefix 用于 asset（库里存的是 "key=value"）。知识库为空时原样返回。
+    """
+    stats = _snapshot()
+    if not stats or not values:
+        return list(values)
+    scored: list[tuple[int, float, int, str]] = []
+    for i, v in enumerate(values):
+        st = stats.get((vertical, element_type, f"{value_prefix}{v}", os))
+        if st is not None and st.n > 0:
+            scored.append((0, -st.evidence_score(), i, v))
+        else:
+            scored.append((1, 0.0, i, v))
+    scored.sort()
+    return [v for *_, v in scored]
@@ -0,0 +1,220 @@
+"""
+元素贡献的稀疏矩阵实现：指标行 × 元素 的 0/1 关联矩阵（CSR），
+一次稀疏矩阵-向量乘得到每个元素、每个 OS 的样本数与 IPM/CPI 求和。
+
+与 element_scores.compute_element_scores 输出一致（含顺序与浮点结果），
+行可以来自多张卡片，用于跨卡片 / 全知识库的元素分析。
+numpy 不可用时回退到 compute_element_scores。
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Hashable, Iterable, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy 随 streamlit 安装
+    np = None
+
+from element_index import ELEMENTS, decompose
+from element_scores import ElementScore, build_element_score, compute_element_scores
+from eval_schemas import ElementTag, Variant
+from simulate_metrics import SimulatedMetrics
+
+ElementKey = tuple[str, str]
+
+
+@dataclass
+class ElementIncidence:
+    """
+    CSR 关联矩阵：第 r 行含元素 indices[indptr[r]:indptr[r+1]]（行内去重、保持标签顺序）。
+    elements[j] 为第 j 列的 (element_type, element_value)，列序 = 首次出现顺序。
+    """
+
+    elements: list[ElementKey]
+    indptr: Any  # int64[n_rows + 1]
+    indices: Any  # int64[nnz]
+    os_codes: Any  # int64[n_rows]
+    os_names: list[str]
+    ipm: Any  # float64[n_rows]
+    cpi: Any  # float64[n_rows]
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.os_codes)
+
+    @property
+    def n_elements(self) -> int:
+        return len(self.elements)
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[tuple[Sequence[ElementTag], str, float, float]],
+    ) -> "ElementIncidence":
+        """rows: (该行的 ElementTag 列表, os, ipm, cpi)；可混合多张卡片的行"""
+        element_ids: dict[ElementKey, int] = {}
+        os_ids: dict[str, int] = {}
+        indptr = [0]
+        indices: list[int] = []
+        os_codes: list[int] = []
+        ipms: list[float] = []
+        cpis: list[float] = []
+        # 同一标签列表（同一 variant 的多个 OS 行）只解析一次
+        row_cache: dict[int, tuple[Sequence[ElementTag], list[int]]] = {}
+        for tags, os, ipm, cpi in rows:
+            cached = row_cache.get(id(tags))
+            if cached is None or cached[0] is not tags:
+                ids: list[int] = []
+                for t in tags:
+                    j = element_ids.setdefault((t.element_type, t.element_value), len(element_ids))
+                    if j not in ids:
+                        ids.append(j)
+                cached = row_cache[id(tags)] = (tags, ids)
+            indices.extend(cached[1])
+            indptr.append(len(indices))
+            os_codes.append(os_ids.setdefault(os, len(os_ids)))
+            ipms.append(ipm)
+            cpis.append(cpi)
+        return cls(
+            elements=list(element_ids),
+            indptr=np.asarray(indptr, dtype=np.int64),
+            indices=np.asarray(indices, dtype=np.int64),
+            os_codes=np.asarray(os_codes, dtype=np.int64),
+            os_names=list(os_ids),
+            ipm=np.asarray(ipms, dtype=np.float64),
+            cpi=np.asarray(cpis, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_id_rows(
+        cls,
+        rows: Iterable[tuple[Sequence[int], str, float, float]],
+    ) -> "ElementIncidence":
+        """
+        rows: (该行去重后的 element_index 元素 ID, os, ipm, cpi)。
+        全局 ID 重映射为本矩阵的列号（首次出现顺序），列序与 from_rows 一致。
+        """
+        local: dict[int, int] = {}
+        os_ids: dict[str, int] = {}
+        indptr = [0]
+        indices: list[int] = []
+        os_codes: list[int] = []
+        ipms: list[float] = []
+        cpis: list[float] = []
+        for ids, os, ipm, cpi in rows:
+            for g in ids:
+                indices.append(local.setdefault(g, len(local)))
+            indptr.append(len(indices))
+            os_codes.append(os_ids.setdefault(os, len(os_ids)))
+            ipms.append(ipm)
+            cpis.append(cpi)
+        return cls(
+            elements=[ELEMENTS.key(g) for g in local],
+            indptr=np.asarray(indptr, dtype=np.int64),
+            indices=np.asarray(indices, dtype=np.int64),
+            os_codes=np.asarray(os_codes, dtype=np.int64),
+            os_names=list(os_ids),
+            ipm=np.asarray(ipms, dtype=np.float64),
+            cpi=np.asarray(cpis, dtype=np.float64),
+        )
+
+    def nnz_rows(self) -> Any:
+        """每个非零元所在的行号"""
+        return np.repeat(np.arange(self.n_rows, dtype=np.int64), np.diff(self.indptr))
+
+    def transpose_dot(self, values: Any, *, by_os: bool = False) -> Any:
+        """
+        Aᵀ·values：每个元素（by_os=True 时每个 元素×OS）的加权和。
+        np.bincount 按非零元顺序（行序）逐个累加，与逐行 Python 求和的浮点结果一致。
+        """
+        rows = self.nnz_rows()
+        weights = values[rows] if values is not None else None
+        if not by_os:
+            return np.bincount(self.indices, weights=weights, minlength=self.n_elements)
+        n_os = max(1, len(self.os_names))
+        bins = self.indices * n_os + self.os_codes[rows]
+        out = np.bincount(bins, weights=weights, minlength=self.n_elements * n_os)
+        return out.reshape(self.n_elements, n_os)
+
+
+def element_scores_from_incidence(
+    inc: ElementIncidence,
+    *,
+    min_sample_size: int = 2,
+) -> list[ElementScore]:
+    """由关联矩阵计算全部元素的 ElementScore（列序输出）"""
+    if inc.n_rows == 0 or inc.n_elements == 0:
+        return []
+    # 卡片均值：逐行顺序求和（与 Python sum 一致，避免 np.sum 的成对求和误差）
+    card_mean_ipm = float(np.bincount(np.zeros(inc.n_rows, dtype=np.int64), weights=inc.ipm)[0]) / inc.n_rows
+    card_mean_cpi = float(np.bincount(np.zeros(inc.n_rows, dtype=np.int64), weights=inc.cpi)[0]) / inc.n_rows
+
+    counts = inc.transpose_dot(None)
+    sum_ipm = inc.transpose_dot(inc.ipm)
+    sum_cpi = inc.transpose_dot(inc.cpi)
+    os_counts = inc.transpose_dot(None, by_os=True)
+    os_ipm = inc.transpose_dot(inc.ipm, by_os=True)
+    os_cpi = inc.transpose_dot(inc.cpi, by_os=True)
+
+    results: list[ElementScore] = []
+    for j, (et, ev) in enumerate(inc.elements):
+        n = int(counts[j])
+        if n == 0:
+            continue
+        os_means = [
+            (float(os_ipm[j, k]) / int(os_counts[j, k]), float(os_cpi[j, k]) / int(os_counts[j, k]))
+            for k in range(os_counts.shape[1])
+            if os_counts[j, k] > 0
+        ]
+        results.append(
+            build_element_score(
+                et,
+                ev,
+                n=n,
+                mean_ipm=float(sum_ipm[j]) / n,
+                mean_cpi=float(sum_cpi[j]) / n,
+                os_means=os_means,
+                card_mean_ipm=card_mean_ipm,
+                card_mean_cpi=card_mean_cpi,
+                min_sample_size=min_sample_size,
+            )
+        )
+    return results
+
+
+def compute_element_scores_sparse(
+    variant_metrics: list[SimulatedMetrics | dict],
+    variant_to_tags: dict[Hashable, list[ElementTag]] | None = None,
+    variants: list[Variant] | None = None,
+    *,
+    min_sample_size: int = 2,
+) -> list[ElementScore]:
+    """
+    compute_element_scores 的稀疏矩阵版本，参数与输出一致。
+    传 variants 时走 element_index 的缓存整数 ID；行按 variant_metrics 顺序进入矩阵。
+    """
+    if np is None:
+        return compute_element_scores(
+            variant_metrics, variant_to_tags, variants, min_sample_size=min_sample_size
+        )
+    metrics_list = (
+        SimulatedMetrics.model_validate(m) if isinstance(m, dict) else m for m in variant_metrics
+    )
+    if variant_to_tags is None and variants:
+        # 直接用缓存的整数元素 ID，不经过 ElementTag
+        variant_ids = {v.variant_id: decompose(v).ids for v in variants}
+        inc = ElementIncidence.from_id_rows(
+            (variant_ids[m.variant_id], m.os, m.ipm, m.cpi)
+            for m in metrics_list
+            if m.variant_id in variant_ids
+        )
+        return element_scores_from_incidence(inc, min_sample_size=min_sample_size)
+    if not variant_to_tags:
+        return []
+    inc = ElementIncidence.from_rows(
+        (variant_to_tags[m.variant_id], m.os, m.ipm, m.cpi)
+        for m in metrics_list
+        if m.variant_id in variant_to_tags
+    )
+    return element_scores_from_incidence(inc, min_sample_size=min_sample_size)
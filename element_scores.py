@@ -9,7 +9,9 @@ from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
-from eval_schemas import ElementTag, Variant, decompose_variant_to_element_tags
+from element_index import variant_tags_map
+from eval_schemas import ElementTag, Variant
+from profiling import profiled
 from simulate_metrics import SimulatedMetrics
 from scoring_eval import compute_element_normalized_score
 
@@ -55,6 +57,7 @@ class ElementScore(BaseModel):
 # -------- 贡献分析 --------
 
 
+@profiled("element_scores")
 def compute_element_scores(
     variant_metrics: list[SimulatedMetrics | dict],
     variant_to_tags: dict[str, list[ElementTag]] | None = None,
@@ -87,9 +90,7 @@ def compute_element_scores(
 
     # 1. 构建 variant_id -> tags
     if variant_to_tags is None and variants:
-        variant_to_tags = {}
-        for v in variants:
-            variant_to_tags[v.variant_id] = decompose_variant_to_element_tags(v)
+        variant_to_tags = variant_tags_map(variants)
     if not variant_to_tags:
         return []
 
@@ -118,76 +119,98 @@ def compute_element_scores(
                 seen.add(key)
                 element_metrics[key].append((m.ipm, m.cpi, m.os))
 
-    def _cross_os_consistency(
-        ipm_cpi_os_list: list[tuple[float, float, str]],
-        card_ipm: float,
-        card_cpi: float,
-    ) -> CrossOSConsistency:
-        """pos: 双端一致拉 | neg: 双端一致拖 | mixed: 双端不一致"""
-        by_os: dict[str, list[tuple[float, float]]] = defaultdict(list)
-        for ipm, cpi, os_ in ipm_cpi_os_list:
-            by_os[os_].append((ipm, cpi))
-        if len(by_os) < 2:
-            return "mixed"
-        os_deltas: list[tuple[float, float]] = []
-        for os_, rows in by_os.items():
-            mean_ipm = sum(x[0] for x in rows) / len(rows)
-            mean_cpi = sum(x[1] for x in rows) / len(rows)
-            os_deltas.append((mean_ipm - card_ipm, mean_cpi - card_cpi))
-        # 方向：拉 = IPMΔ>0 或 CPIΔ<0；拖 = IPMΔ<0 或 CPIΔ>0
-        dirs = []
-        for ipm_d, cpi_d in os_deltas:
-            if ipm_d > 0 or cpi_d < 0:
-                dirs.append(1)  # 拉
-            elif ipm_d < 0 or cpi_d > 0:
-                dirs.append(-1)  # 拖
-            else:
-                dirs.append(0)
-        if len(set(dirs)) > 1:
-            return "mixed"
-        if dirs[0] == 1:
-            return "pos"
-        return "neg"
-
-    def _confidence_level(n: int, cross_os: CrossOSConsistency) -> ConfidenceLevel:
-        if n < 6:
-            base = "low"
-        elif n <= 15:
-            base = "medium"
-        else:
-            base = "high"
-        if cross_os == "mixed":
-            if base == "high":
-                return "medium"
-            if base == "medium":
-                return "low"
-        return base
-
     # 5. 计算 ElementScore
     results: list[ElementScore] = []
     for (et, ev), ipm_cpi_os_list in element_metrics.items():
         n = len(ipm_cpi_os_list)
-        mean_ipm = sum(x[0] for x in ipm_cpi_os_list) / n
-        mean_cpi = sum(x[1] for x in ipm_cpi_os_list) / n
-        ipm_delta = mean_ipm - card_mean_ipm
-        cpi_delta = mean_cpi - card_mean_cpi
-
-        cross_os = _cross_os_consistency(ipm_cpi_os_list, card_mean_ipm, card_mean_cpi)
-        conf = _confidence_level(n, cross_os)
-
-        ns = compute_element_normalized_score(ipm_delta, cpi_delta)
+        by_os: dict[str, list[tuple[float, float]]] = defaultdict(list)
+        for ipm, cpi, os_ in ipm_cpi_os_list:
+            by_os[os_].append((ipm, cpi))
+        os_means = [
+            (sum(x[0] for x in rows) / len(rows), sum(x[1] for x in rows) / len(rows))
+            for rows in by_os.values()
+        ]
         results.append(
-            ElementScore(
-                element_type=et,
-                element_value=ev,
-                avg_IPM_delta_vs_card_mean=round(ipm_delta, 4),
-                avg_CPI_delta_vs_card_mean=round(cpi_delta, 4),
-                sample_size=n,
-                stability_flag=n >= min_sample_size,
-                normalized_score=ns,
-                confidence_level=conf,
-                cross_os_consistency=cross_os,
+            build_element_score(
+                et,
+                ev,
+                n=n,
+                mean_ipm=sum(x[0] for x in ipm_cpi_os_list) / n,
+                mean_cpi=sum(x[1] for x in ipm_cpi_os_list) / n,
+                os_means=os_means,
+                card_mean_ipm=card_mean_ipm,
+                card_mean_cpi=card_mean_cpi,
+                min_sample_size=min_sample_size,
             )
         )
 
     return results
+
+
+def cross_os_consistency(
+    os_means: list[tuple[float, float]],
+    card_ipm: float,
+    card_cpi: float,
+) -> CrossOSConsistency:
+    """pos: 双端一致拉 | neg: 双端一致拖 | mixed: 双端不一致。os_means 为各端 (IPM 均值, CPI 均值)"""
+    if len(os_means) < 2:
+        return "mixed"
+    os_deltas = [(mean_ipm - card_ipm, mean_cpi - card_cpi) for mean_ipm, mean_cpi in os_means]
+    # 方向：拉 = IPMΔ>0 或 CPIΔ<0；拖 = IPMΔ<0 或 CPIΔ>0
+    dirs = []
+    for ipm_d, cpi_d in os_deltas:
+        if ipm_d > 0 or cpi_d < 0:
+            dirs.append(1)  # 拉
+        elif ipm_d < 0 or cpi_d > 0:
+            dirs.append(-1)  # 拖
+        else:
+            dirs.append(0)
+    if len(set(dirs)) > 1:
+        return "mixed"
+    if dirs[0] == 1:
+        return "pos"
+    return "neg"
+
+
+def confidence_level(n: int, cross_os: CrossOSConsistency) -> ConfidenceLevel:
+    if n < 6:
+        base = "low"
+    elif n <= 15:
+        base = "medium"
+    else:
+        base = "high"
+    if cross_os == "mixed":
+        if base == "high":
+            return "medium"
+        if base == "medium":
+            return "low"
+    return base
+
+
+def build_element_score(
+    element_type: str,
+    element_value: str,
+    *,
+    n: int,
+    mean_ipm: float,
+    mean_cpi: float,
+    os_means: list[tuple[float, float]],
+    card_mean_ipm: float,
+    card_mean_cpi: float,
+    min_sample_size: int = 2,
+) -> ElementScore:
+    """由聚合量（样本数、均值、各端均值）构造 ElementScore，供全量与增量计算共用"""
+    ipm_delta = mean_ipm - card_mean_ipm
+    cpi_delta = mean_cpi - card_mean_cpi
+    cross_os = cross_os_consistency(os_means, card_mean_ipm, card_mean_cpi)
+    return ElementScore(
+        element_type=element_type,
+        element_value=element_value,
+        avg_IPM_delta_vs_card_mean=round(ipm_delta, 4),
+        avg_CPI_delta_vs_card_mean=round(cpi_delta, 4),
+        sample_size=n,
+        stability_flag=n >= min_sample_size,
+        normalized_score=compute_element_normalized_score(ipm_delta, cpi_delta),
+        confidence_level=confidence_level(n, cross_os),
+        cross_os_consistency=cross_os,
+    )
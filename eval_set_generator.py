@@ -13,15 +13,10 @@ from eval_schemas import StrategyCard, Variant
 
 from explore_gate import evaluate_explore_gate
 from ofaat_generator import generate_ofaat_variants
+from profiling import profiled
 from simulate_metrics import simulate_metrics
 from validate_gate import WindowMetrics, evaluate_validate_gate
-from vertical_config import (
-    get_corpus,
-    get_why_now_buckets,
-    get_why_now_phrases,
-    get_why_you_buckets,
-    get_why_you_phrases,
-)
+from vertical_config import get_compiled_config
 
 CARD_STATUSES = ("未测", "探索中", "进验证", "可放量")
 
@@ -67,6 +62,7 @@ class CardEvalRecord:
             self.metrics = []
 
 
+@profiled("eval_set.generate")
 def generate_eval_set(
     n_cards: int = 75,
     variants_per_card: int = 12,
@@ -77,8 +73,10 @@ def generate_eval_set(
     rng = _seeded("eval_set_v2")
     records: list[CardEvalRecord] = []
 
-    wy_buckets = get_why_you_buckets()
-    wn_buckets = get_why_now_buckets()
+    # 一次取编译视图，逐卡循环内不再重复拷贝/展开语料
+    compiled = get_compiled_config()
+    wy_buckets = compiled.why_you_buckets
+    wn_buckets = compiled.why_now_buckets
 
     for i in range(n_cards):
         cid = f"sc_{i+1:03d}"
@@ -86,15 +84,16 @@ def generate_eval_set(
         r = _seeded(seed)
 
         vert = "casual_game" if r.random() < 0.7 else "ecommerce"
-        corp = get_corpus(vert)
+        view = compiled.view(vert)
+        corp = view.corpus
         mb_pool = corp.get("motivation_bucket") or ["成就感", "爽感", "其他"]
         seg_pool = corp.get("segment") or ["18-45岁手游玩家"]
 
         mb_raw = r.choice(mb_pool) if mb_pool else "其他"
         mb = _normalize_mb(mb_raw)
 
-        wy_phrases = get_why_you_phrases(vert)
-        wn_phrases = get_why_now_phrases(vert)
+        wy_phrases = view.why_you_phrases
+        wn_phrases = view.why_now_phrases
         wyb_raw = r.choice(wy_buckets) if wy_buckets else "其他"
         wnb_raw = r.choice(wn_buckets) if wn_buckets else "其他"
         wyb = _normalize_wyb(wyb_raw)
@@ -219,6 +218,7 @@ def generate_eval_set(
     return records
 
 
+@profiled("eval_set.generate")
 def generate_eval_set_from_cards(
     cards: list[StrategyCard],
     variants_per_card: int = 12,
@@ -229,13 +229,14 @@ def generate_eval_set_from_cards(
     status_dist = status_dist or {"未测": 0.25, "探索中": 0.30, "进验证": 0.25, "可放量": 0.20}
     rng = _seeded("eval_from_cards")
     records: list[CardEvalRecord] = []
+    compiled = get_compiled_config()
     for card in cards:
         vert = getattr(card, "vertical", "casual_game") or "casual_game"
         mb = getattr(card, "motivation_bucket", "其他") or "其他"
         mb = _normalize_mb(mb)
         seg = getattr(card, "segment", "默认人群") or "默认人群"
         obj = getattr(card, "objective", "install") or ("purchase" if vert == "ecommerce" else "install")
-        corp = get_corpus(vert)
+        corp = compiled.view(vert).corpus
         hooks = corp.get("hook_type") or ["冲突", "利益前置", "社交"]
         sells = corp.get("sell_point") or ["上手快爽点前置", "福利多登录即送"]
         ctas = corp.get("cta") or ["立即下载", "领福利", "马上开玩"]
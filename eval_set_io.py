@@ -0,0 +1,302 @@
+"""
+评测集列式导入导出：卡片、变体、模拟指标、Validate 窗口、门禁结果、元素得分各一张表。
+
+- arrow（默认）：Arrow IPC 文件，读取走 pyarrow.memory_map，列缓冲区直接映射磁盘，不拷贝
+- parquet：压缩列存，适合归档/跨工具分析（读取同样开启 memory_map）
+- csv：无 pyarrow 时的纯 Python 回退；列类型记在 manifest.json 里，读回时还原
+
+目录结构：<dir>/manifest.json + <dir>/<表名>.<arrow|parquet|csv>。
+嵌套字段（list / dict，如 proof_points、asset_variables、门禁结果全文）以 JSON 字符串成列，
+列类型标为 json，read_eval_set 还原为 CardEvalRecord。
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pa_ipc = None
+    pq = None
+
+from eval_schemas import StrategyCard, Variant
+from explore_gate import ExploreGateResult
+from simulate_metrics import SimulatedMetrics
+from validate_gate import ValidateGateResult, WindowMetrics
+
+FORMAT_VERSION = 1
+FORMATS = ("arrow", "parquet", "csv")
+SUFFIX = {"arrow": ".arrow", "parquet": ".parquet", "csv": ".csv"}
+TABLES = ("cards", "variants", "metrics", "windows", "gate_results", "element_scores")
+GATES = ("explore_ios", "explore_android", "validate")
+
+Columns = dict[str, list[Any]]
+
+
+# -------- 记录 → 列 --------
+
+
+def _model_row(m: Any) -> dict[str, Any]:
+    return m.model_dump() if hasattr(m, "model_dump") else dict(m)
+
+
+def _append(cols: Columns, row: dict[str, Any]) -> None:
+    n = len(next(iter(cols.values()))) if cols else 0
+    for k in row:
+        if k not in cols:
+            cols[k] = [None] * n
+    for k, col in cols.items():
+        col.append(row.get(k))
+
+
+def eval_set_columns(
+    records: Sequence[Any],
+    *,
+    element_scores: dict[str, Sequence[Any]] | Sequence[Any] | None = None,
+) -> dict[str, Columns]:
+    """
+    CardEvalRecord 列表 → {表名: {列名: 值列表}}。
+    element_scores 可为 ElementScore 列表（scope=all）或 {scope: 列表}（如按 card_id）。
+    """
+    tables: dict[str, Columns] = {name: {} for name in TABLES}
+    for r in records:
+        card_id = r.card.card_id
+        _append(tables["cards"], {"card_score": r.card_score, "status": r.status, **_model_row(r.card)})
+        for v in r.variants or []:
+            _append(tables["variants"], _model_row(v))
+        for m in r.metrics or []:
+            _append(tables["metrics"], {"card_id": card_id, **_model_row(m)})
+        for w in r.window_metrics or []:
+            _append(tables["windows"], {"card_id": card_id, "segment": "window", **_model_row(w)})
+        if r.expand_segment_metrics is not None:
+            _append(tables["windows"], {"card_id": card_id, "segment": "expand", **_model_row(r.expand_segment_metrics)})
+        for gate, res in zip(GATES, (r.explore_ios, r.explore_android, r.validate_result)):
+            if res is None:
+                continue
+            status = getattr(res, "gate_status", None) or getattr(res, "validate_status", "")
+            _append(tables["gate_results"], {
+                "card_id": card_id,
+                "gate": gate,
+                "status": status,
+                "n_eligible": len(getattr(res, "eligible_variants", []) or []),
+                "result": _model_row(res),
+            })
+    if element_scores is not None:
+        scoped = element_scores if isinstance(element_scores, dict) else {"all": element_scores}
+        for scope, scores in scoped.items():
+            for s in scores:
+                _append(tables["element_scores"], {"scope": scope, **_model_row(s)})
+    return tables
+
+
+def _column_type(values: Iterable[Any]) -> str:
+    kinds = {type(v) for v in values if v is not None}
+    if kinds & {list, dict, tuple}:
+        return "json"
+    if kinds and kinds <= {bool}:
+        return "bool"
+    if kinds and kinds <= {int}:
+        return "int"
+    if kinds and kinds <= {int, float}:
+        return "float"
+    return "str"
+
+
+def _encode_column(values: list[Any], kind: str) -> list[Any]:
+    if kind == "json":
+        return [None if v is None else json.dumps(v, ensure_ascii=False) for v in values]
+    if kind == "float":
+        return [None if v is None else float(v) for v in values]
+    if kind == "str":
+        return [None if v is None else str(v) for v in values]
+    return values
+
+
+def _decode_csv(value: str, kind: str) -> Any:
+    if value == "" and kind != "str":
+        return None
+    if kind == "int":
+        return int(value)
+    if kind == "float":
+        return float(value)
+    if kind == "bool":
+        return value == "True"
+    return value
+
+
+# -------- 写 --------
+
+
+def default_format() -> str:
+    return "arrow" if pa is not None else "csv"
+
+
+def write_tables(tables: dict[str, Columns], out_dir: str | Path, *, format: str | None = None) -> Path:
+    """写出各表 + manifest.json，返回 manifest 路径"""
+    fmt = format or default_format()
+    if fmt not in FORMATS:
+        raise ValueError(f"未知格式：{fmt}（可选 {', '.join(FORMATS)}）")
+    if fmt != "csv" and pa is None:
+        raise RuntimeError(f"{fmt} 格式需要 pyarrow；可改用 format='csv'")
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest: dict[str, Any] = {"format": fmt, "version": FORMAT_VERSION, "tables": {}}
+    for name, cols in tables.items():
+        types = {c: _column_type(v) for c, v in cols.items()}
+        encoded = {c: _encode_column(v, types[c]) for c, v in cols.items()}
+        path = out / f"{name}{SUFFIX[fmt]}"
+        tmp = path.with_name(path.name + ".tmp")
+        if fmt == "csv":
+            with open(tmp, "w", encoding="utf-8", newline="") as f:
+                w = csv.writer(f)
+                w.writerow(list(encoded))
+                w.writerows(zip(*encoded.values()))
+        else:
+            table = pa.table(encoded) if encoded else pa.table({})
+            if fmt == "arrow":
+                with pa.OSFile(str(tmp), "wb") as sink, pa_ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            else:
+                pq.write_table(table, tmp)
+        os.replace(tmp, path)
+        rows = len(next(iter(cols.values()))) if cols else 0
+        manifest["tables"][name] = {"file": path.name, "rows": rows, "columns": types}
+    manifest_path = out / "manifest.json"
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest_path
+
+
+def write_eval_set(
+    records: Sequence[Any],
+    out_dir: str | Path,
+    *,
+    format: str | None = None,
+    element_scores: dict[str, Sequence[Any]] | Sequence[Any] | None = None,
+) -> Path:
+    """导出评测集；format 为空时有 pyarrow 用 arrow，否则 csv"""
+    return write_tables(eval_set_columns(records, element_scores=element_scores), out_dir, format=format)
+
+
+# -------- 读 --------
+
+
+def read_manifest(path_dir: str | Path) -> dict[str, Any]:
+    with open(Path(path_dir) / "manifest.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_table(path_dir: str | Path, name: str, *, columns: Sequence[str] | None = None) -> Any:
+    """
+    读一张表。arrow / parquet 返回 pyarrow.Table（arrow 为内存映射、零拷贝）；
+    csv 返回 {列名: 值列表}（按 manifest 还原类型，json 列保持字符串）。
+    """
+    manifest = read_manifest(path_dir)
+    meta = manifest["tables"].get(name)
+    if meta is None:
+        raise KeyError(f"表不存在：{name}")
+    path = Path(path_dir) / meta["file"]
+    fmt = manifest["format"]
+    if fmt == "arrow":
+        source = pa.memory_map(str(path), "r")
+        table = pa_ipc.open_file(source).read_all()
+        return table.select(list(columns)) if columns else table
+    if fmt == "parquet":
+        return pq.read_table(path, columns=list(columns) if columns else None, memory_map=True)
+    types = meta["columns"]
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        keep = [i for i, c in enumerate(header) if not columns or c in columns]
+        out: Columns = {header[i]: [] for i in keep}
+        for row in reader:
+            for i in keep:
+                out[header[i]].append(_decode_csv(row[i], types[header[i]]))
+    return out
+
+
+def table_rows(table: Any, json_columns: Iterable[str] = ()) -> list[dict[str, Any]]:
+    """pyarrow.Table 或列字典 → 行字典列表，json 列解析回对象"""
+    cols = table.to_pydict() if hasattr(table, "to_pydict") else table
+    jcols = [c for c in json_columns if c in cols]
+    for c in jcols:
+        cols[c] = [None if v is None else json.loads(v) for v in cols[c]]
+    names = list(cols)
+    return [dict(zip(names, vals)) for vals in zip(*cols.values())]
+
+
+def json_columns(manifest: dict[str, Any], name: str) -> list[str]:
+    meta = manifest["tables"].get(name) or {}
+    return [c for c, t in meta.get("columns", {}).items() if t == "json"]
+
+
+def _read_rows(path_dir: str | Path, manifest: dict[str, Any], name: str) -> list[dict[str, Any]]:
+    meta = manifest["tables"].get(name)
+    if not meta or not meta["rows"]:
+        return []
+    return table_rows(read_table(path_dir, name), json_columns(manifest, name))
+
+
+def _strip_none(row: dict[str, Any]) -> dict[str, Any]:
+    """合并多种结构时补出的空列去掉，交给模型默认值"""
+    return {k: v for k, v in row.items() if v is not None}
+
+
+def read_eval_set(path_dir: str | Path) -> list[Any]:
+    """导出目录 → CardEvalRecord 列表（与导出前等价）"""
+    manifest = read_manifest(path_dir)
+    return records_from_rows({name: _read_rows(path_dir, manifest, name) for name in TABLES})
+
+
+def records_from_rows(rows: dict[str, list[dict[str, Any]]]) -> list[Any]:
+    """各表的行字典（json 列已解析）→ CardEvalRecord 列表，卡片顺序同 cards 表"""
+    from eval_set_generator import CardEvalRecord
+
+    by_card: dict[str, dict[str, Any]] = {}
+    for row in rows.get("cards", []):
+        row = _strip_none(row)
+        score, status = row.pop("card_score"), row.pop("status")
+        card = StrategyCard.model_validate(row)
+        by_card[card.card_id] = {
+            "card": card, "card_score": score, "status": status, "variants": [], "metrics": [],
+            "window_metrics": [], "expand_segment_metrics": None,
+            "explore_ios": None, "explore_android": None, "validate_result": None,
+        }
+    for row in rows.get("variants", []):
+        v = Variant.model_validate(_strip_none(row))
+        by_card[v.parent_card_id]["variants"].append(v)
+    for row in rows.get("metrics", []):
+        row = dict(row)
+        card_id = row.pop("card_id")
+        by_card[card_id]["metrics"].append(SimulatedMetrics.model_validate(_strip_none(row)))
+    for row in rows.get("windows", []):
+        row = dict(row)
+        card_id, segment = row.pop("card_id"), row.pop("segment")
+        w = WindowMetrics.model_validate(_strip_none(row))
+        if segment == "expand":
+            by_card[card_id]["expand_segment_metrics"] = w
+        else:
+            by_card[card_id]["window_metrics"].append(w)
+    for row in rows.get("gate_results", []):
+        model = ValidateGateResult if row["gate"] == "validate" else ExploreGateResult
+        key = "validate_result" if row["gate"] == "validate" else row["gate"]
+        by_card[row["card_id"]][key] = model.model_validate(row["result"])
+    return [CardEvalRecord(**fields) for fields in by_card.values()]
+
+
+def read_element_scores(path_dir: str | Path) -> dict[str, list[Any]]:
+    """element_scores 表 → {scope: [ElementScore, ...]}"""
+    from element_scores import ElementScore
+
+    out: dict[str, list[Any]] = {}
+    for row in _read_rows(path_dir, read_manifest(path_dir), "element_scores"):
+        scope = row.pop("scope")
+        out.setdefault(scope, []).append(ElementScore.model_validate(_strip_none(row)))
+    return out
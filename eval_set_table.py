@@ -0,0 +1,184 @@
+"""
+评测集卡片表：列式摘要 + 服务端分页 / 排序 / 筛选。
+
+records 只在 build_eval_set_columns 时扫一遍，之后每次翻页、排序、筛选都只在列上做，
+只把当前页的行物化成 dict 交给前端；明细（门禁原因、验证窗口）按需从原 record 取。
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+STATUS_ORDER = ("未测", "探索中", "进验证", "可放量")
+GATE_STATUS_ORDER = ("PASS", "INSUFFICIENT", "INVALID", "FAIL", "")
+DEFAULT_PAGE_SIZE = 50
+PAGE_SIZE_OPTIONS = (20, 50, 100, 200)
+
+# 可排序列 -> 列表头
+SORT_COLUMNS = {
+    "card_id": "卡片ID",
+    "card_score": "分数",
+    "status": "状态",
+    "explore_ios": "iOS 门禁",
+    "explore_android": "Android 门禁",
+    "validate": "Validate",
+    "n_variants": "变体数",
+}
+
+
+@dataclass(frozen=True)
+class EvalSetColumns:
+    """CardEvalRecord 列表的列式摘要（每列一个 tuple，下标与 records 对齐）"""
+
+    card_id: tuple[str, ...]
+    card_score: tuple[float, ...]
+    status: tuple[str, ...]
+    explore_ios: tuple[str, ...]
+    explore_android: tuple[str, ...]
+    ios_pass: tuple[int, ...]
+    android_pass: tuple[int, ...]
+    validate: tuple[str, ...]
+    n_variants: tuple[int, ...]
+    motivation_bucket: tuple[str, ...]
+    vertical: tuple[str, ...]
+    segment: tuple[str, ...]
+    _sort_cache: dict[str, list[int]] = field(default_factory=dict, compare=False, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.card_id)
+
+    def sorted_indices(self, column: str) -> list[int]:
+        """按列升序的下标（每列只排一次，之后复用）"""
+        if column not in SORT_COLUMNS:
+            raise ValueError(f"不支持的排序列：{column}")
+        order = self._sort_cache.get(column)
+        if order is None:
+            values = getattr(self, column)
+            if column == "status":
+                rank = {s: i for i, s in enumerate(STATUS_ORDER)}
+                key = lambda i: (rank.get(values[i], len(rank)), self.card_id[i])
+            elif column in ("explore_ios", "explore_android", "validate"):
+                rank = {s: i for i, s in enumerate(GATE_STATUS_ORDER)}
+                key = lambda i: (rank.get(values[i], len(rank)), self.card_id[i])
+            else:
+                key = lambda i: (values[i], self.card_id[i])
+            order = sorted(range(len(values)), key=key)
+            self._sort_cache[column] = order
+        return order
+
+
+@dataclass
+class EvalSetQuery:
+    """一次表格查询：筛选 + 排序 + 分页（page 从 1 开始）"""
+
+    status_filter: tuple[str, ...] = ()
+    gate_filter: tuple[str, ...] = ()  # 任一 OS 的 Explore 状态命中即保留
+    validate_only: bool = False  # 只保留有 Validate 结果的卡片
+    search: str = ""
+    sort_by: str = "card_id"
+    descending: bool = False
+    page: int = 1
+    page_size: int = DEFAULT_PAGE_SIZE
+
+
+@dataclass
+class EvalSetPage:
+    """查询结果：只含当前页的下标与行"""
+
+    indices: list[int]
+    rows: list[dict[str, Any]]
+    total: int
+    page: int
+    n_pages: int
+    page_size: int
+
+
+def _gate_label(result: Any) -> str:
+    if result is None:
+        return ""
+    return getattr(result, "gate_status", "") or ""
+
+
+def build_eval_set_columns(records: Sequence[Any]) -> EvalSetColumns:
+    """把 CardEvalRecord 列表压成列式摘要（O(N)，每份 records 只需做一次）"""
+    cols: dict[str, list] = {name: [] for name in (
+        "card_id", "card_score", "status", "explore_ios", "explore_android", "ios_pass",
+        "android_pass", "validate", "n_variants", "motivation_bucket", "vertical", "segment",
+    )}
+    for r in records:
+        card = r.card
+        cols["card_id"].append(card.card_id)
+        cols["card_score"].append(float(r.card_score))
+        cols["status"].append(r.status)
+        cols["explore_ios"].append(_gate_label(r.explore_ios))
+        cols["explore_android"].append(_gate_label(r.explore_android))
+        cols["ios_pass"].append(len(getattr(r.explore_ios, "eligible_variants", None) or []))
+        cols["android_pass"].append(len(getattr(r.explore_android, "eligible_variants", None) or []))
+        cols["validate"].append(getattr(r.validate_result, "validate_status", "") if r.validate_result else "")
+        cols["n_variants"].append(len(r.variants))
+        cols["motivation_bucket"].append(card.motivation_bucket)
+        cols["vertical"].append(card.vertical)
+        cols["segment"].append(card.segment)
+    return EvalSetColumns(**{k: tuple(v) for k, v in cols.items()})
+
+
+def _matches(cols: EvalSetColumns, i: int, query: EvalSetQuery, needle: str) -> bool:
+    if query.status_filter and cols.status[i] not in query.status_filter:
+        return False
+    if query.gate_filter and not (
+        cols.explore_ios[i] in query.gate_filter or cols.explore_android[i] in query.gate_filter
+    ):
+        return False
+    if query.validate_only and not cols.validate[i]:
+        return False
+    if needle and needle not in cols.card_id[i].lower() and needle not in cols.segment[i].lower():
+        return False
+    return True
+
+
+def filter_indices(cols: EvalSetColumns, query: EvalSetQuery) -> list[int]:
+    """按 query 筛选并排序后的全部下标（只含 int，不物化行）"""
+    order = cols.sorted_indices(query.sort_by)
+    if query.descending:
+        order = order[::-1]
+    needle = query.search.strip().lower()
+    if not (query.status_filter or query.gate_filter or query.validate_only or needle):
+        return list(order)
+    return [i for i in order if _matches(cols, i, query, needle)]
+
+
+def summary_row(cols: EvalSetColumns, i: int) -> dict[str, Any]:
+    """单行展示数据（仅对当前页调用）"""
+    seg = cols.segment[i]
+    return {
+        "卡片ID": cols.card_id[i],
+        "分数": f"{cols.card_score[i]:.1f}",
+        "状态": cols.status[i],
+        "iOS 门禁": cols.explore_ios[i] or "-",
+        "Android 门禁": cols.explore_android[i] or "-",
+        "iOS 通过数": cols.ios_pass[i],
+        "Android 通过数": cols.android_pass[i],
+        "Validate": cols.validate[i] or "-",
+        "变体数": cols.n_variants[i],
+        "动机桶": cols.motivation_bucket[i],
+        "行业": "休闲游戏" if cols.vertical[i] == "casual_game" else "电商",
+        "人群": seg[:20] + "…" if len(seg) > 20 else seg,
+    }
+
+
+def query_eval_set(cols: EvalSetColumns, query: EvalSetQuery) -> EvalSetPage:
+    """筛选 → 排序 → 取页；page 越界时夹到有效范围"""
+    matched = filter_indices(cols, query)
+    page_size = max(1, int(query.page_size))
+    total = len(matched)
+    n_pages = max(1, -(-total // page_size))
+    page = min(max(1, int(query.page)), n_pages)
+    indices = matched[(page - 1) * page_size: page * page_size]
+    return EvalSetPage(
+        indices=indices,
+        rows=[summary_row(cols, i) for i in indices],
+        total=total,
+        page=page,
+        n_pages=n_pages,
+        page_size=page_size,
+    )
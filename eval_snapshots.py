@@ -0,0 +1,314 @@
+"""
+评测集快照：不可变、按内容寻址的列式目录，只读内存映射，跨 Streamlit session 与工作进程共享。
+
+- create_snapshot(records) → snapshot_id（内容 sha256 前 16 位）；同内容重复创建直接复用已有目录
+- 目录 = eval_set_io 的各表 + summary 表（eval_set_table 的列式摘要 + 每张卡在各表中的行区间）
+- open_snapshot(snapshot_id)：进程内同一快照只打开一次，arrow 表走 memory_map，
+  多个进程映射同一文件时共用操作系统页缓存
+- session 只存 snapshot_id 与自己的筛选条件；表格查询用 snapshot.columns，
+  看明细时 snapshot[i] 只从各表切出这一张卡的行还原 CardEvalRecord（LRU 缓存）
+
+快照目录在写完后改名到位（原子可见），文件设为只读。
+清理：目录 mtime 作为最近使用时间（创建 / 复用 / 打开时刷新），每次写入新快照后 prune_snapshots()
+按 LRU 删除超出 SNAPSHOT_MAX_COUNT 个或 SNAPSHOT_MAX_BYTES 字节的旧快照；只保护本次新建的快照与
+本进程最近打开的 OPEN_PROTECT_RECENT 个。进程内已打开的快照对象同样按 LRU 最多保留 OPEN_MAX_SNAPSHOTS 个。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterator, Sequence
+
+from eval_set_io import (
+    TABLES,
+    default_format,
+    eval_set_columns,
+    json_columns,
+    read_manifest,
+    read_table,
+    records_from_rows,
+    table_rows,
+    write_tables,
+)
+from eval_set_table import EvalSetColumns, build_eval_set_columns
+
+SNAPSHOT_DIR = Path(os.getenv("EVAL_SNAPSHOT_DIR", "") or Path(__file__).resolve().parent / "data" / "snapshots")
+SUMMARY_TABLE = "summary"
+RECORD_TABLES = ("variants", "metrics", "windows", "gate_results")
+RECORD_CACHE_SIZE = 256
+SNAPSHOT_MAX_COUNT = int(os.getenv("EVAL_SNAPSHOT_MAX_COUNT", "") or 32)
+SNAPSHOT_MAX_BYTES = int(os.getenv("EVAL_SNAPSHOT_MAX_BYTES", "") or 2 * 1024**3)
+OPEN_MAX_SNAPSHOTS = int(os.getenv("EVAL_SNAPSHOT_OPEN_MAX", "") or 4)
+OPEN_PROTECT_RECENT = 1  # 清理时不删的最近打开快照数（正在看的那份）
+STALE_TMP_SECONDS = 3600  # 写入中断遗留的临时目录超过该时长才清理
+
+_SUMMARY_FIELDS = tuple(f for f in EvalSetColumns.__dataclass_fields__ if not f.startswith("_"))
+
+
+# -------- 创建 --------
+
+
+def _content_id(tables: dict[str, dict[str, list[Any]]]) -> str:
+    h = hashlib.sha256()
+    for name in sorted(tables):
+        h.update(name.encode("utf-8"))
+        h.update(json.dumps(tables[name], ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _summary_columns(records: Sequence[Any]) -> dict[str, list[Any]]:
+    """eval_set_table 摘要列 + 每张卡在明细表中的起始行与行数"""
+    cols = build_eval_set_columns(records)
+    out: dict[str, list[Any]] = {f: list(getattr(cols, f)) for f in _SUMMARY_FIELDS}
+    counts = {
+        "variants": [len(r.variants or []) for r in records],
+        "metrics": [len(r.metrics or []) for r in records],
+        "windows": [len(r.window_metrics or []) + (r.expand_segment_metrics is not None) for r in records],
+        "gate_results": [
+            sum(x is not None for x in (r.explore_ios, r.explore_android, r.validate_result)) for r in records
+        ],
+    }
+    for name, ns in counts.items():
+        start = 0
+        out[f"{name}_start"], out[f"{name}_rows"] = [], []
+        for n in ns:
+            out[f"{name}_start"].append(start)
+            out[f"{name}_rows"].append(n)
+            start += n
+    return out
+
+
+def _make_readonly(path: Path) -> None:
+    for p in path.iterdir():
+        p.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+
+def create_snapshot(records: Sequence[Any], *, root: Path | None = None) -> str:
+    """写入快照并返回 snapshot_id；同内容的快照已存在时不重复写"""
+    root = Path(root or SNAPSHOT_DIR)
+    tables = eval_set_columns(records)
+    tables[SUMMARY_TABLE] = _summary_columns(records)
+    snapshot_id = _content_id(tables)
+    final = root / snapshot_id
+    if (final / "manifest.json").exists():
+        _touch(final)
+        return snapshot_id
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{snapshot_id}-", dir=root))
+    try:
+        write_tables(tables, tmp, format=default_format())
+        _make_readonly(tmp)
+        try:
+            os.rename(tmp, final)
+        except OSError:
+            # 其它进程已抢先写好同一快照
+            if not (final / "manifest.json").exists():
+                raise
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+    prune_snapshots(root=root, keep=(snapshot_id,))
+    return snapshot_id
+
+
+# -------- 读取 --------
+
+
+def _slice(table: Any, start: int, n: int) -> Any:
+    """pyarrow.Table 零拷贝切片；csv 回退时为列字典"""
+    if hasattr(table, "slice"):
+        return table.slice(start, n)
+    return {k: v[start:start + n] for k, v in table.items()}
+
+
+class EvalSetSnapshot:
+    """一个已打开的只读快照；可按下标取单张卡的 CardEvalRecord"""
+
+    def __init__(self, snapshot_id: str, path: Path) -> None:
+        self.snapshot_id = snapshot_id
+        self.path = path
+        self.manifest = read_manifest(path)
+        self._tables: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        summary = self.table(SUMMARY_TABLE)
+        cols = summary.to_pydict() if hasattr(summary, "to_pydict") else summary
+        self.columns = EvalSetColumns(**{f: tuple(cols[f]) for f in _SUMMARY_FIELDS})
+        self._offsets = {name: (cols[f"{name}_start"], cols[f"{name}_rows"]) for name in RECORD_TABLES}
+        self._record = lru_cache(maxsize=RECORD_CACHE_SIZE)(self._build_record)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __getitem__(self, i: int) -> Any:
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return self._record(i % len(self))
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def table(self, name: str) -> Any:
+        """整表（arrow 为内存映射），进程内只打开一次"""
+        t = self._tables.get(name)
+        if t is None:
+            with self._lock:
+                t = self._tables.get(name)
+                if t is None:
+                    t = self._tables[name] = read_table(self.path, name)
+        return t
+
+    def _rows(self, name: str, start: int, n: int) -> list[dict[str, Any]]:
+        if not n:
+            return []
+        return table_rows(_slice(self.table(name), start, n), json_columns(self.manifest, name))
+
+    def _build_record(self, i: int) -> Any:
+        rows = {"cards": self._rows("cards", i, 1)}
+        for name in RECORD_TABLES:
+            starts, counts = self._offsets[name]
+            rows[name] = self._rows(name, starts[i], counts[i])
+        return records_from_rows(rows)[0]
+
+    def close(self) -> None:
+        """释放已映射的表与单卡缓存（之后再访问会按需重新打开）"""
+        with self._lock:
+            self._tables.clear()
+        self._record.cache_clear()
+
+    def to_records(self) -> list[Any]:
+        """全部还原为 CardEvalRecord（离线分析 / 回放用，会物化整份数据）"""
+        return records_from_rows({name: self._rows(name, 0, self.manifest["tables"][name]["rows"]) for name in TABLES})
+
+
+_OPEN: OrderedDict[str, EvalSetSnapshot] = OrderedDict()  # 按最近打开排序，末尾最新
+_OPEN_LOCK = threading.Lock()
+
+
+def open_snapshot(snapshot_id: str, *, root: Path | None = None) -> EvalSetSnapshot:
+    """进程内共享的快照对象（同一 snapshot_id 只映射一次）；超出 OPEN_MAX_SNAPSHOTS 时关闭最久未用的"""
+    path = Path(root or SNAPSHOT_DIR) / snapshot_id
+    key = str(path)
+    evicted: list[EvalSetSnapshot] = []
+    with _OPEN_LOCK:
+        snap = _OPEN.get(key)
+        if snap is None:
+            if not (path / "manifest.json").exists():
+                raise KeyError(f"快照不存在：{snapshot_id}")
+            snap = _OPEN[key] = EvalSetSnapshot(snapshot_id, path)
+            while len(_OPEN) > max(1, OPEN_MAX_SNAPSHOTS):
+                evicted.append(_OPEN.popitem(last=False)[1])
+        else:
+            _OPEN.move_to_end(key)
+    for old in evicted:
+        old.close()
+    _touch(path)
+    return snap
+
+
+def snapshot_exists(snapshot_id: str, *, root: Path | None = None) -> bool:
+    return (Path(root or SNAPSHOT_DIR) / snapshot_id / "manifest.json").exists()
+
+
+def list_snapshots(*, root: Path | None = None) -> list[str]:
+    root = Path(root or SNAPSHOT_DIR)
+    if not root.exists():
+        return []
+    return sorted(p.name for p in root.iterdir() if not p.name.startswith(".") and (p / "manifest.json").exists())
+
+
+def close_snapshots() -> None:
+    """释放进程内已打开的快照（删除快照目录前调用）"""
+    with _OPEN_LOCK:
+        snaps = list(_OPEN.values())
+        _OPEN.clear()
+    for snap in snaps:
+        snap.close()
+
+
+# -------- 清理 --------
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _dir_bytes(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.iterdir() if p.is_file())
+
+
+def _rmtree(path: Path) -> None:
+    def _retry(func: Any, p: str, _exc: Any) -> None:
+        # Windows 上只读文件不能直接删除
+        os.chmod(p, stat.S_IWUSR | stat.S_IRUSR)
+        func(p)
+
+    shutil.rmtree(path, onerror=_retry)
+
+
+def prune_snapshots(
+    *,
+    root: Path | None = None,
+    max_count: int | None = None,
+    max_bytes: int | None = None,
+    keep: Sequence[str] = (),
+) -> list[str]:
+    """
+    按最近使用时间（目录 mtime）淘汰旧快照，直到数量 ≤ max_count 且总大小 ≤ max_bytes
+    （缺省取 SNAPSHOT_MAX_COUNT / SNAPSHOT_MAX_BYTES，≤ 0 表示不限）。
+    keep 中的快照与本进程最近打开的 OPEN_PROTECT_RECENT 个不删，其余已打开的先从进程内缓存移除再删目录；
+    顺带清理中断遗留的临时目录。返回删除的 snapshot_id。
+    """
+    root = Path(root or SNAPSHOT_DIR)
+    if not root.exists():
+        return []
+    max_count = SNAPSHOT_MAX_COUNT if max_count is None else max_count
+    max_bytes = SNAPSHOT_MAX_BYTES if max_bytes is None else max_bytes
+    now = time.time()
+    for p in root.iterdir():
+        if p.name.startswith(".") and p.is_dir() and now - p.stat().st_mtime > STALE_TMP_SECONDS:
+            shutil.rmtree(p, ignore_errors=True)
+
+    entries = []
+    for sid in list_snapshots(root=root):
+        try:
+            entries.append((os.stat(root / sid).st_mtime, sid, _dir_bytes(root / sid)))
+        except OSError:  # 其它进程刚删掉
+            continue
+    entries.sort(reverse=True)
+    with _OPEN_LOCK:
+        recent = [s.snapshot_id for k, s in reversed(_OPEN.items()) if Path(k).parent == root]
+    protected = set(keep) | set(recent[:OPEN_PROTECT_RECENT])
+    count = len(entries)
+    total = sum(size for _, _, size in entries)
+    removed: list[str] = []
+    for _, sid, size in reversed(entries):  # 最久未用的先删
+        over = (max_count > 0 and count > max_count) or (max_bytes > 0 and total > max_bytes)
+        if not over:
+            break
+        if sid in protected:
+            continue
+        with _OPEN_LOCK:
+            snap = _OPEN.pop(str(root / sid), None)
+        if snap is not None:
+            snap.close()
+        try:
+            _rmtree(root / sid)
+        except OSError:
+            continue
+        count -= 1
+        total -= size
+        removed.append(sid)
+    return removed
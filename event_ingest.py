@@ -0,0 +1,411 @@
+"""
+事件级流式接入：曝光 / 点击 / 安装 / 花费 等事件 → 按 (card, variant, os, window) 滚动聚合，
+只对有变化的键重跑 Explore / Validate Gate，并定期落检查点。
+
+事件记录（JSONL 一行一个 / CSV 表头同名 / 本地 socket 按行发 JSON）：
+    {"ts": 1718000000 或 "2024-06-10T08:00:00", "card_id": "...", "variant_id": "v002", "os": "iOS",
+     "event": "impression|click|install|spend|early_event|revenue", "count": 1, "value": 0.0,
+     "baseline": false, "segment": "main|expand"}
+- spend / revenue 用 value（美元），其余事件用 count（缺失或空时为 1，显式 0 保留）
+- baseline=true 标记该卡片的基线变体；segment=expand 的事件归入轻扩人群（window_id = expand_segment）
+
+Explore Gate 按 (card, os) 汇总全部窗口；Validate Gate 按 (card, variant) 取各窗口（合并 OS）。
+传入 timeseries（HourlyMetricsStore）时事件同时按小时落入时序库。
+"""
+from __future__ import annotations
+
+import csv
+import json
+import math
+import os as _os
+import socket
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from explore_gate import (
+    ExploreGateConfig,
+    ExploreGateResult,
+    evaluate_explore_variant,
+    summarize_explore_gate,
+)
+from simulate_metrics import SimulatedMetrics
+from validate_gate import ValidateGateConfig, ValidateGateResult, WindowMetrics, evaluate_validate_gate
+
+EVENT_FIELDS = {
+    "impression": "impressions",
+    "click": "clicks",
+    "install": "installs",
+    "early_event": "early_events",
+}
+VALUE_FIELDS = {"spend": "spend", "revenue": "early_revenue"}
+EXPAND_WINDOW = "expand_segment"
+EXPAND_SUFFIX = "@expand"  # 写入小时时序库时，轻扩人群序列的 variant_id 后缀
+
+AggKey = tuple[str, str, str, str]  # (card_id, variant_id, os, window_id)
+
+
+# -------- 聚合 --------
+
+
+@dataclass
+class EventAgg:
+    """一个键上的累计计数"""
+
+    impressions: int = 0
+    clicks: int = 0
+    installs: int = 0
+    spend: float = 0.0
+    early_events: int = 0
+    early_revenue: float = 0.0
+
+    def merge(self, other: "EventAgg") -> None:
+        self.impressions += other.impressions
+        self.clicks += other.clicks
+        self.installs += other.installs
+        self.spend += other.spend
+        self.early_events += other.early_events
+        self.early_revenue += other.early_revenue
+
+    def derived(self) -> dict[str, float]:
+        imp, inst, spend = self.impressions, self.installs, round(self.spend, 2)
+        return {
+            "ctr": round(self.clicks / imp, 6) if imp else 0.0,
+            "ipm": round(inst / imp * 1000, 2) if imp else 0.0,
+            "cpi": round(spend / inst, 2) if inst else 0.0,
+            "early_roas": round(self.early_revenue / spend, 4) if spend > 0 else 0.0,
+        }
+
+    def to_simulated(self, variant_id: str, os: str, baseline: bool) -> SimulatedMetrics:
+        return SimulatedMetrics(
+            variant_id=variant_id,
+            os=os,
+            baseline=baseline,
+            impressions=self.impressions,
+            clicks=self.clicks,
+            installs=self.installs,
+            spend=round(self.spend, 2),
+            early_events=self.early_events,
+            early_revenue=round(self.early_revenue, 2),
+            **self.derived(),
+        )
+
+    def to_window(self, window_id: str) -> WindowMetrics:
+        d = self.derived()
+        return WindowMetrics(
+            window_id=window_id,
+            impressions=self.impressions,
+            clicks=self.clicks,
+            installs=self.installs,
+            spend=round(self.spend, 2),
+            early_events=self.early_events,
+            early_revenue=round(self.early_revenue, 2),
+            ipm=d["ipm"],
+            cpi=d["cpi"],
+            early_roas=d["early_roas"],
+        )
+
+
+def _parse_ts(ts: Any) -> float:
+    if ts is None or ts == "":
+        return datetime.now(timezone.utc).timestamp()
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    s = str(ts).strip()
+    try:
+        return float(s)
+    except ValueError:
+        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+
+
+def window_id_for(ts: float, window_seconds: int) -> str:
+    """滚动窗口标识：窗口起点的 UTC 时间"""
+    start = int(ts // window_seconds) * window_seconds
+    return datetime.fromtimestamp(start, timezone.utc).strftime("%Y-%m-%dT%H:%M")
+
+
+# -------- 事件源 --------
+
+
+def iter_jsonl(path: str | Path, *, offset: int = 0) -> Iterator[tuple[dict[str, Any], int]]:
+    """逐行读取 JSONL，产出 (事件, 读完该行后的字节偏移)，可从 offset 续读"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in iter(f.readline, b""):
+            pos = f.tell()
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line), pos
+            except json.JSONDecodeError:
+                continue
+
+
+def iter_csv(path: str | Path, *, offset: int = 0) -> Iterator[tuple[dict[str, Any], int]]:
+    """CSV（首行表头）；offset 为已处理的数据行数"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for i, row in enumerate(csv.DictReader(f), start=1):
+            if i <= offset:
+                continue
+            yield row, i
+
+
+def iter_socket(host: str = "127.0.0.1", port: int = 9009, *, timeout: float | None = None) -> Iterator[dict[str, Any]]:
+    """本地 TCP：接受一个连接，按行读 JSON 事件，连接关闭即结束"""
+    with socket.create_server((host, port)) as srv:
+        srv.settimeout(timeout)
+        conn, _ = srv.accept()
+        with conn, conn.makefile("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+# -------- 接入器 --------
+
+
+@dataclass
+class RefreshStats:
+    explore_keys: int = 0
+    explore_variants: int = 0
+    validate_keys: int = 0
+
+
+@dataclass
+class _ExploreState:
+    details: dict[str, tuple[str, str]] = field(default_factory=dict)  # vid -> (status, reason)
+    result: ExploreGateResult | None = None
+
+
+class StreamIngestor:
+    """
+        ing = StreamIngestor(window_seconds=3600, checkpoint_path="data/ingest.json")
+        ing.ingest_file("events.jsonl")     # 或 ing.ingest(事件可迭代对象)
+        ing.refresh()                       # 只重跑有变化的键
+        ing.explore_results[(card_id, os)]; ing.validate_results[(card_id, variant_id)]
+    """
+
+    def __init__(
+        self,
+        *,
+        window_seconds: int = 86400,
+        explore_config: ExploreGateConfig | None = None,
+        validate_config: ValidateGateConfig | None = None,
+        checkpoint_path: str | Path | None = None,
+        checkpoint_every: int = 10000,
+        context: dict[str, Any] | None = None,
+        timeseries: Any | None = None,
+    ) -> None:
+        self.window_seconds = int(window_seconds)
+        # 可选：同时写入 metrics_timeseries.HourlyMetricsStore（原始小时粒度，供任意窗口回放）
+        self.timeseries = timeseries
+        self.explore_config = explore_config or ExploreGateConfig()
+        self.validate_config = validate_config or ValidateGateConfig()
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.checkpoint_every = checkpoint_every
+        self.context = dict(context or {})
+
+        self.aggs: dict[AggKey, EventAgg] = {}
+        self.baselines: dict[str, str] = {}  # card_id -> baseline variant_id
+        self.offsets: dict[str, int] = {}  # 文件 -> 已处理偏移
+        self.events_seen = 0
+        self._since_checkpoint = 0
+
+        # 汇总视图（增量维护，避免每次刷新扫全部窗口）
+        self._explore_totals: dict[tuple[str, str, str], EventAgg] = {}  # (card, vid, os)
+        self._variant_order: dict[tuple[str, str], list[str]] = {}  # (card, os) -> 首现顺序
+        self._dirty_explore: dict[tuple[str, str], set[str]] = {}  # (card, os) -> 变动的 vid
+        self._dirty_validate: set[tuple[str, str]] = set()
+        self._variant_keys: dict[tuple[str, str], list[AggKey]] = {}  # (card, vid) -> 其全部键
+
+        self._explore: dict[tuple[str, str], _ExploreState] = {}
+        self.explore_results: dict[tuple[str, str], ExploreGateResult] = {}
+        self.validate_results: dict[tuple[str, str], ValidateGateResult] = {}
+
+        if self.checkpoint_path and self.checkpoint_path.exists():
+            self.load_checkpoint(self.checkpoint_path)
+
+    # ---- 写入 ----
+
+    def ingest_event(self, ev: dict[str, Any]) -> bool:
+        """吃入单个事件；字段不全、事件类型未知或 count / value / ts 无法解析时忽略并返回 False"""
+        if not isinstance(ev, dict):
+            return False
+        card = str(ev.get("card_id") or "")
+        vid = str(ev.get("variant_id") or "")
+        os = str(ev.get("os") or "")
+        kind = str(ev.get("event") or "").strip().lower()
+        if not (card and vid and os) or (kind not in EVENT_FIELDS and kind not in VALUE_FIELDS):
+            return False
+        expand = str(ev.get("segment") or "").lower() == "expand"
+        try:
+            ts = _parse_ts(ev.get("ts"))
+            window = EXPAND_WINDOW if expand else window_id_for(ts, self.window_seconds)
+            if kind in EVENT_FIELDS:
+                count = ev.get("count")
+                fname, amount = EVENT_FIELDS[kind], 1 if count is None or count == "" else int(float(count))
+            else:
+                fname, amount = VALUE_FIELDS[kind], float(ev.get("value") or 0.0)
+                if not math.isfinite(amount):
+                    return False
+        except (ValueError, TypeError, OverflowError, OSError):
+            # 单条坏数据不中断文件 / socket 流，与 iter_jsonl 跳过坏 JSON 一致
+            return False
+        delta = EventAgg()
+        setattr(delta, fname, amount)
+        self._apply(card, vid, os, window, delta)
+        if self.timeseries is not None:
+            self.timeseries.add(card, f"{vid}{EXPAND_SUFFIX}" if expand else vid, os, ts, **{fname: amount})
+        if str(ev.get("baseline", "")).lower() in ("1", "true", "yes"):
+            if self.baselines.get(card) != vid:
+                self.baselines[card] = vid
+                for (c, o) in self._variant_order:
+                    if c == card:
+                        self._dirty_explore.setdefault((c, o), set()).add("__baseline__")
+        self.events_seen += 1
+        self._since_checkpoint += 1
+        if self.checkpoint_path and self._since_checkpoint >= self.checkpoint_every:
+            self.save_checkpoint()
+        return True
+
+    def _apply(self, card: str, vid: str, os: str, window: str, delta: EventAgg) -> None:
+        key = (card, vid, os, window)
+        agg = self.aggs.get(key)
+        if agg is None:
+            agg = self.aggs[key] = EventAgg()
+            self._variant_keys.setdefault((card, vid), []).append(key)
+        agg.merge(delta)
+        if window != EXPAND_WINDOW:
+            tk = (card, vid, os)
+            tot = self._explore_totals.get(tk)
+            if tot is None:
+                tot = self._explore_totals[tk] = EventAgg()
+                self._variant_order.setdefault((card, os), []).append(vid)
+            tot.merge(delta)
+            self._dirty_explore.setdefault((card, os), set()).add(vid)
+        self._dirty_validate.add((card, vid))
+
+    def ingest(self, events: Iterable[dict[str, Any]]) -> int:
+        n = 0
+        for ev in events:
+            n += self.ingest_event(ev)
+        return n
+
+    def ingest_file(self, path: str | Path) -> int:
+        """JSONL / CSV（按扩展名），从上次检查点的偏移续读"""
+        key = str(Path(path).resolve())
+        reader = iter_csv if str(path).lower().endswith(".csv") else iter_jsonl
+        n = 0
+        for ev, pos in reader(path, offset=self.offsets.get(key, 0)):
+            # 先记偏移：ingest_event 内触发的检查点与聚合保持一致
+            self.offsets[key] = pos
+            n += self.ingest_event(ev)
+        return n
+
+    # ---- 刷新 ----
+
+    def pending(self) -> tuple[int, int]:
+        return len(self._dirty_explore), len(self._dirty_validate)
+
+    def refresh(self) -> RefreshStats:
+        """只对变动过的 (card, os) / (card, variant) 重跑门禁"""
+        stats = RefreshStats()
+        for (card, os), vids in self._dirty_explore.items():
+            stats.explore_keys += 1
+            stats.explore_variants += self._refresh_explore(card, os, vids)
+        self._dirty_explore = {}
+        for card, vid in self._dirty_validate:
+            stats.validate_keys += 1
+            self._refresh_validate(card, vid)
+        self._dirty_validate = set()
+        return stats
+
+    def _refresh_explore(self, card: str, os: str, dirty: set[str]) -> int:
+        base_vid = self.baselines.get(card)
+        ctx = {**self.context, "card_id": card, "os": os}
+        base_tot = self._explore_totals.get((card, base_vid, os)) if base_vid else None
+        if base_tot is None:
+            self.explore_results[(card, os)] = ExploreGateResult(
+                gate_status="INVALID",
+                reasons=["缺少 baseline 数据或 baseline 与 context.os 不匹配"],
+                context=ctx,
+            )
+            return 0
+        st = self._explore.setdefault((card, os), _ExploreState())
+        baseline = base_tot.to_simulated(base_vid, os, True)
+        # baseline 变了要全量重判，否则只判变动的变体（evaluate_explore_variant 与其它变体无关）
+        redo = [v for v in self._variant_order[(card, os)] if v != base_vid]
+        if base_vid not in dirty and "__baseline__" not in dirty:
+            redo = [v for v in redo if v in dirty]
+        for vid in redo:
+            m = self._explore_totals[(card, vid, os)].to_simulated(vid, os, False)
+            st.details[vid] = evaluate_explore_variant(m, baseline, self.explore_config)
+        st.details.pop(base_vid, None)
+        order = [v for v in self._variant_order[(card, os)] if v in st.details]
+        if not order:
+            st.result = ExploreGateResult(gate_status="FAIL", reasons=["无待评测变体或变体与 context.os 不匹配"], context=ctx)
+        else:
+            details = {v: st.details[v][0] for v in order}
+            st.result = summarize_explore_gate(
+                details,
+                [v for v in order if details[v] == "PASS"],
+                [st.details[v][1] for v in order],
+                ctx,
+            )
+        self.explore_results[(card, os)] = st.result
+        return len(redo)
+
+    def windows_for(self, card: str, vid: str) -> tuple[list[WindowMetrics], WindowMetrics | None]:
+        """(时间窗口按起点排序、合并 OS, 轻扩人群)"""
+        by_window: dict[str, EventAgg] = {}
+        for key in self._variant_keys.get((card, vid), ()):
+            by_window.setdefault(key[3], EventAgg()).merge(self.aggs[key])
+        expand = by_window.pop(EXPAND_WINDOW, None)
+        windows = [by_window[w].to_window(w) for w in sorted(by_window)]
+        return windows, expand.to_window(EXPAND_WINDOW) if expand else None
+
+    def _refresh_validate(self, card: str, vid: str) -> None:
+        windows, expand = self.windows_for(card, vid)
+        self.validate_results[(card, vid)] = evaluate_validate_gate(windows, expand, config=self.validate_config)
+
+    # ---- 检查点 ----
+
+    def save_checkpoint(self, path: str | Path | None = None) -> Path:
+        """原子写入（临时文件 + rename）"""
+        target = Path(path or self.checkpoint_path or "ingest_checkpoint.json")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "window_seconds": self.window_seconds,
+            "events_seen": self.events_seen,
+            "baselines": self.baselines,
+            "offsets": self.offsets,
+            "aggs": [[*k, asdict(a)] for k, a in self.aggs.items()],
+        }
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        _os.replace(tmp, target)
+        self._since_checkpoint = 0
+        return target
+
+    def load_checkpoint(self, path: str | Path) -> None:
+        """恢复聚合与偏移；全部键标记为待刷新"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if int(data.get("window_seconds", self.window_seconds)) != self.window_seconds:
+            raise ValueError("检查点的 window_seconds 与当前配置不一致")
+        self.events_seen = int(data.get("events_seen", 0))
+        self.baselines = dict(data.get("baselines", {}))
+        self.offsets = {k: int(v) for k, v in data.get("offsets", {}).items()}
+        for card, vid, os, window, agg in data.get("aggs", []):
+            self._apply(card, vid, os, window, EventAgg(**agg))
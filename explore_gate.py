@@ -8,6 +8,7 @@ from typing import Any
 
 from pydantic import BaseModel, Field
 
+from profiling import profiled
 from simulate_metrics import SimulatedMetrics
 
 
@@ -121,6 +122,7 @@ def _count_better(
     return better_count, details
 
 
+@profiled("gate.explore")
 def evaluate_explore_gate(
     variant_metrics: list[SimulatedMetrics | dict],
     baseline_metrics: SimulatedMetrics | dict | list[SimulatedMetrics | dict],
@@ -196,32 +198,55 @@ def evaluate_explore_gate(
 
     # 3. 逐变体判断
     for v in variants_for_os:
-        vid = v.variant_id
-
-        # 3a. bucket 一致性（若提供了 baseline 与 variant 的 bucket）
-        if bucket_info and "__baseline__" in bucket_info and baseline_bucket:
-            vb = _bucket_key(bucket_info.get(vid))
-            if vb and vb != baseline_bucket:
-                variant_details[vid] = "INVALID"
-                reasons.append(f"{vid}: bucket 与 baseline 不一致")
-                continue
-
-        # 3b. 预算门槛
-        if v.spend < cfg.min_spend:
-            variant_details[vid] = "INSUFFICIENT"
-            reasons.append(f"{vid}: spend={v.spend:.0f} < 最小预算门槛 {cfg.min_spend}")
-            continue
+        status, reason = evaluate_explore_variant(
+            v, baseline, cfg, bucket_info=bucket_info, baseline_bucket=baseline_bucket
+        )
+        variant_details[v.variant_id] = status
+        reasons.append(reason)
+        if status == "PASS":
+            eligible.append(v.variant_id)
 
-        # 3c. 代理指标优于 baseline
-        better_count, _ = _count_better(v, baseline, cfg.improvement_pct)
-        if better_count >= cfg.min_better_metrics:
-            variant_details[vid] = "PASS"
-            eligible.append(vid)
-            reasons.append(f"{vid}: 在 {better_count} 个指标上优于 baseline，通过")
-        else:
-            variant_details[vid] = "FAIL"
-            reasons.append(f"{vid}: 仅 {better_count} 个指标优于 baseline，需 ≥{cfg.min_better_metrics}")
+    return summarize_explore_gate(variant_details, eligible, reasons, context)
+
+
+def evaluate_explore_variant(
+    v: SimulatedMetrics,
+    baseline: SimulatedMetrics,
+    cfg: ExploreGateConfig,
+    *,
+    bucket_info: dict[str, dict[str, Any]] | None = None,
+    baseline_bucket: tuple = (),
+) -> tuple[str, str]:
+    """
+    单个变体对 baseline 的门禁判断（与其它变体无关，可单独重算）。
+    返回 (PASS/FAIL/INSUFFICIENT/INVALID, 原因说明)
+    """
+    vid = v.variant_id
+
+    # 3a. bucket 一致性（若提供了 baseline 与 variant 的 bucket）
+    if bucket_info and "__baseline__" in bucket_info and baseline_bucket:
+        vb = _bucket_key(bucket_info.get(vid))
+        if vb and vb != baseline_bucket:
+            return "INVALID", f"{vid}: bucket 与 baseline 不一致"
+
+    # 3b. 预算门槛
+    if v.spend < cfg.min_spend:
+        return "INSUFFICIENT", f"{vid}: spend={v.spend:.0f} < 最小预算门槛 {cfg.min_spend}"
 
+    # 3c. 代理指标优于 baseline
+    better_count, _ = _count_better(v, baseline, cfg.improvement_pct)
+    if better_count >= cfg.min_better_metrics:
+        return "PASS", f"{vid}: 在 {better_count} 个指标上优于 baseline，通过"
+    return "FAIL", f"{vid}: 仅 {better_count} 个指标优于 baseline，需 ≥{cfg.min_better_metrics}"
+
+
+def summarize_explore_gate(
+    variant_details: dict[str, str],
+    eligible: list[str],
+    reasons: list[str],
+    context: dict[str, Any],
+) -> ExploreGateResult:
+    """由逐变体结果汇总 gate_status，并补充引用 motivation_bucket 的门禁说明"""
     # 4. 汇总 gate_status
     if eligible:
         gate_status = "PASS"
@@ -1,81 +1,130 @@
-"""导出 Markdown / CSV"""
+"""
+导出 Markdown / CSV / JSON。
+
+export_* 返回完整字符串；iter_* 为生成器版本，逐块产出文本（约 CHUNK_SIZE 字符一块），
+配合 write_chunks 写入任意文件对象（可选 gzip），写文件时内存占用与行数无关；
+deferred_download 交给 st.download_button 时改为点击后才生成（Streamlit 会把整份内容读进内存）。
+"""
 from __future__ import annotations
 
 import csv
 import io
-from typing import TYPE_CHECKING
+import json
+import zlib
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Callable, Iterable, Iterator, Sequence
 
 if TYPE_CHECKING:
     from schemas import VariantWithReview
 
+CHUNK_SIZE = 64 * 1024
+
+
+def _batched(pieces: Iterable[str], chunk_size: int) -> Iterator[str]:
+    """把小段文本攒成约 chunk_size 字符的块"""
+    buf: list[str] = []
+    size = 0
+    for p in pieces:
+        buf.append(p)
+        size += len(p)
+        if size >= chunk_size:
+            yield "".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def _joined(lines: Iterable[str]) -> Iterator[str]:
+    """逐段产出 "\n".join(lines) 的内容"""
+    for i, line in enumerate(lines):
+        yield line if i == 0 else "\n" + line
+
+
+# -------- Markdown --------
+
 
 def export_markdown(rows: list["VariantWithReview"]) -> str:
     """导出为 Markdown 表格"""
-    lines = [
+    return "".join(iter_markdown(rows))
+
+
+def iter_markdown(rows: Sequence["VariantWithReview"], *, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """export_markdown 的流式版本：rows 需为可重复迭代的序列（表格与详情各遍历一次），不能传生成器"""
+    return _batched(_joined(_markdown_lines(rows)), chunk_size)
+
+
+def _markdown_lines(rows: Sequence["VariantWithReview"]) -> Iterator[str]:
+    yield from (
         "# 创意变体评审报告",
         "",
         "| # | headline | decision | fuse_level | wt_risk_final | clarity | hook_strength | compliance_safety | expected_test_value | 总结 |",
         "|---|------|----------|--------------------------|------------|--------|----------|------|--------|----------|----------|------|",
-    ]
+    )
 
     for i, rw in enumerate(rows, 1):
         s = rw.review.scores
         summary = (rw.review.error or rw.review.overall_summary or "-")[:30]
         if len(rw.review.error or rw.review.overall_summary or "") > 30:
             summary += "..."
-        lines.append(
+        yield (
             f"| {i} | {_esc(rw.variant.variant_id or rw.variant.headline or rw.variant.title)} | {rw.verdict} | {rw.fuse_level} | {rw.white_traffic_risk_final} | "
             f"{s.clarity} | {s.hook_strength} | {s.compliance_safety} | {s.expected_test_value} | {_esc(summary)} |"
         )
 
-    lines.append("")
-    lines.append("## 详情")
-    lines.append("")
+    yield ""
+    yield "## 详情"
+    yield ""
 
     for i, rw in enumerate(rows, 1):
-        lines.append(f"### 变体 {i}: {_esc(rw.variant.variant_id or rw.variant.headline or rw.variant.title)} — {rw.verdict} | fuse={rw.fuse_level} | white_traffic_risk={rw.white_traffic_risk_final}")
-        lines.append("")
+        yield f"### 变体 {i}: {_esc(rw.variant.variant_id or rw.variant.headline or rw.variant.title)} — {rw.verdict} | fuse={rw.fuse_level} | white_traffic_risk={rw.white_traffic_risk_final}"
+        yield ""
         freasons = getattr(rw.review, "_fuse_reasons_list", lambda: rw.review.fuse_reasons)()
         if freasons:
-            lines.append("**fuse_reasons:** " + "; ".join(freasons))
-            lines.append("")
-        rfix = getattr(rw.review, "required_fixes_flat", lambda: rw.review.fixes or [])()
+            yield "**fuse_reasons:** " + "; ".join(freasons)
+            yield ""
+        rfix = _required_fixes(rw.review)
         if rfix:
-            lines.append("**required_fixes:** " + " | ".join(rfix))
-            lines.append("")
+            yield "**required_fixes:** " + " | ".join(rfix)
+            yield ""
         if rw.review.error:
-            lines.append("**错误:** " + _esc(rw.review.error))
-            lines.append("")
+            yield "**错误:** " + _esc(rw.review.error)
+            yield ""
         else:
-            lines.append("**variant_id:** " + _esc(rw.variant.variant_id))
-            lines.append("")
-            lines.append("**hook_type:** " + _esc(rw.variant.hook_type))
+            yield "**variant_id:** " + _esc(rw.variant.variant_id)
+            yield ""
+            yield "**hook_type:** " + _esc(rw.variant.hook_type)
             w = rw.variant.who_why_now
             if w:
-                lines.append("**who_why_now:** who=" + _esc(w.who) + " | why=" + _esc(w.why) + " | why_now=" + _esc(w.why_now))
-            lines.append("")
-            lines.append("**cta:** " + _esc(rw.variant.cta))
+                yield "**who_why_now:** who=" + _esc(w.who) + " | why=" + _esc(w.why) + " | why_now=" + _esc(w.why_now)
+            yield ""
+            yield "**cta:** " + _esc(rw.variant.cta)
             if rw.variant.notes:
-                lines.append("")
-                lines.append("**notes:** " + _esc(rw.variant.notes))
+                yield ""
+                yield "**notes:** " + _esc(rw.variant.notes)
             rf = rw.variant.risk_flags
             if hasattr(rf, "policy_risk"):
-                lines.append("**risk_flags:** policy=" + str(rf.policy_risk) + " | exaggeration=" + str(rf.exaggeration_risk) + " | white_traffic=" + str(rf.white_traffic_risk))
+                yield "**risk_flags:** policy=" + str(rf.policy_risk) + " | exaggeration=" + str(rf.exaggeration_risk) + " | white_traffic=" + str(rf.white_traffic_risk)
             if rw.variant.script and rw.variant.script.shots:
-                lines.append("")
-                lines.append("**shots:**")
+                yield ""
+                yield "**shots:**"
                 for s in rw.variant.script.shots:
-                    lines.append(f"  - {s.t}s: {_esc(s.visual)} | 字幕:{_esc(s.overlay_text)} | 口播:{_esc((s.voiceover or '')[:100])}")
-            lines.append("")
+                    yield f"  - {s.t}s: {_esc(s.visual)} | 字幕:{_esc(s.overlay_text)} | 口播:{_esc((s.voiceover or '')[:100])}"
+            yield ""
             if rw.review.key_reasons:
-                lines.append("**key_reasons:** " + "; ".join(rw.review.key_reasons))
+                yield "**key_reasons:** " + "; ".join(rw.review.key_reasons)
             elif rw.review.risks:
-                lines.append("**风险:** " + "; ".join(rw.review.risks))
-                lines.append("")
-        lines.append("---")
-        lines.append("")
+                yield "**风险:** " + "; ".join(rw.review.risks)
+                yield ""
+        yield "---"
+        yield ""
+
 
-    return "\n".join(lines)
+def _required_fixes(review: Any) -> list[str]:
+    """required_fixes_flat 在 ReviewResult 上是 property，兼容旧对象上的同名方法"""
+    rf = getattr(review, "required_fixes_flat", None)
+    if callable(rf):
+        rf = rf()
+    return rf if rf is not None else (review.fixes or [])
 
 
 def _rf_to_str(rf) -> str:
@@ -94,42 +143,161 @@ def _esc(s: str) -> str:
     return str(s).replace("|", "\\|").replace("\n", " ")
 
 
+# -------- CSV --------
+
+
+CSV_HEADER = [
+    "序号", "headline", "hook_type", "decision", "fuse_level", "white_traffic_risk_final",
+    "clarity", "hook_strength", "compliance_safety", "expected_test_value",
+    "core_message", "cta", "risk_flags", "fuse_reasons", "required_fixes", "风险", "修改建议", "总结", "错误",
+]
+
+
 def export_csv(rows: list["VariantWithReview"]) -> str:
     """导出为 CSV"""
+    return "".join(iter_csv(rows))
+
+
+def iter_csv(rows: Iterable["VariantWithReview"], *, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """export_csv 的流式版本"""
+    return iter_csv_records(CSV_HEADER, (_csv_record(i, rw) for i, rw in enumerate(rows, 1)), chunk_size=chunk_size)
+
+
+def _csv_record(i: int, rw: "VariantWithReview") -> list[Any]:
+    s = rw.review.scores
+    risks = "; ".join(rw.review.risks) if rw.review.risks else ""
+    fixes = "; ".join(rw.review.fixes) if rw.review.fixes else ""
+    freasons = getattr(rw.review, "_fuse_reasons_list", lambda: rw.review.fuse_reasons or [])()
+    fuse_reasons = "; ".join(freasons) if freasons else ""
+    rfix = _required_fixes(rw.review)
+    required_fixes = " | ".join(rfix) if rfix else ""
+    return [
+        i,
+        rw.variant.variant_id or rw.variant.headline or rw.variant.title,
+        rw.variant.hook_type or "",
+        rw.verdict,
+        rw.fuse_level,
+        rw.white_traffic_risk_final,
+        s.clarity,
+        s.hook_strength,
+        s.compliance_safety,
+        s.expected_test_value,
+        (rw.variant.core_message or rw.variant.script_15s or "")[:500],
+        rw.variant.cta or rw.variant.cta_text,
+        (_rf_to_str(rw.variant.risk_flags)),
+        fuse_reasons,
+        required_fixes,
+        risks,
+        fixes,
+        rw.review.overall_summary or "",
+        rw.review.error or "",
+    ]
+
+
+def iter_csv_records(
+    header: list[str] | None,
+    records: Iterable[Iterable[Any]],
+    *,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[str]:
+    """header + 每行一个值序列 → CSV 文本块（csv.writer 默认方言，与整串导出逐字节一致）"""
     buf = io.StringIO()
     w = csv.writer(buf)
-    w.writerow([
-        "序号", "headline", "hook_type", "decision", "fuse_level", "white_traffic_risk_final",
-        "clarity", "hook_strength", "compliance_safety", "expected_test_value",
-        "core_message", "cta", "risk_flags", "fuse_reasons", "required_fixes", "风险", "修改建议", "总结", "错误",
-    ])
-    for i, rw in enumerate(rows, 1):
-        s = rw.review.scores
-        risks = "; ".join(rw.review.risks) if rw.review.risks else ""
-        fixes = "; ".join(rw.review.fixes) if rw.review.fixes else ""
-        freasons = getattr(rw.review, "_fuse_reasons_list", lambda: rw.review.fuse_reasons or [])()
-        fuse_reasons = "; ".join(freasons) if freasons else ""
-        rfix = getattr(rw.review, "required_fixes_flat", lambda: rw.review.fixes or [])()
-        required_fixes = " | ".join(rfix) if rfix else ""
-        w.writerow([
-            i,
-            rw.variant.variant_id or rw.variant.headline or rw.variant.title,
-            rw.variant.hook_type or "",
-            rw.verdict,
-            rw.fuse_level,
-            rw.white_traffic_risk_final,
-            s.clarity,
-            s.hook_strength,
-            s.compliance_safety,
-            s.expected_test_value,
-            (rw.variant.core_message or rw.variant.script_15s or "")[:500],
-            rw.variant.cta or rw.variant.cta_text,
-            (_rf_to_str(rw.variant.risk_flags)),
-            fuse_reasons,
-            required_fixes,
-            risks,
-            fixes,
-            rw.review.overall_summary or "",
-            rw.review.error or "",
-        ])
-    return buf.getvalue()
+
+    if header is not None:
+        w.writerow(header)
+    for rec in records:
+        w.writerow(rec)
+        if buf.tell() >= chunk_size:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def iter_dict_csv(rows: Iterable[dict[str, Any]], fieldnames: list[str], *, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """csv.DictWriter 的流式版本"""
+    return iter_csv_records(fieldnames, ([row.get(f, "") for f in fieldnames] for row in rows), chunk_size=chunk_size)
+
+
+# -------- JSON --------
+
+
+def iter_json_array(items: Iterable[Any], *, indent: int = 2, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """逐项产出 json.dumps(list(items), ensure_ascii=False, indent=indent) 的内容"""
+    pad = " " * indent
+
+    def pieces() -> Iterator[str]:
+        empty = True
+        for item in items:
+            body = json.dumps(item, ensure_ascii=False, indent=indent).replace("\n", "\n" + pad)
+            yield ("[\n" if empty else ",\n") + pad + body
+            empty = False
+        yield "[]" if empty else "\n]"
+
+    return _batched(pieces(), chunk_size)
+
+
+# -------- 输出 --------
+
+
+def encode_chunks(chunks: Iterable[str], *, gzip: bool = False, encoding: str = "utf-8") -> Iterator[bytes]:
+    """文本块 → 字节块；gzip=True 时边读边压缩（标准 gzip 格式）"""
+    comp = zlib.compressobj(wbits=31) if gzip else None
+    for c in chunks:
+        b = c.encode(encoding)
+        if comp is not None:
+            b = comp.compress(b)
+        if b:
+            yield b
+    if comp is not None:
+        tail = comp.flush()
+        if tail:
+            yield tail
+
+
+def write_chunks(
+    chunks: Iterable[str],
+    sink: str | Path | IO[Any],
+    *,
+    gzip: bool | None = None,
+    encoding: str = "utf-8",
+) -> int:
+    """
+    写入路径或文件对象，返回写出的字节数（gzip 时为压缩后）。
+    gzip 为空时：路径以 .gz 结尾则压缩，文件对象不压缩。文本文件对象不压缩时直接写 str。
+    """
+    if isinstance(sink, (str, Path)):
+        with open(sink, "wb") as f:
+            return write_chunks(chunks, f, gzip=str(sink).endswith(".gz") if gzip is None else gzip, encoding=encoding)
+    if isinstance(sink, io.TextIOBase):
+        if gzip:
+            raise ValueError("gzip 输出需要二进制文件对象")
+        n = 0
+        for c in chunks:
+            sink.write(c)
+            n += len(c.encode(encoding))
+        return n
+    n = 0
+    for b in encode_chunks(chunks, gzip=bool(gzip), encoding=encoding):
+        sink.write(b)
+        n += len(b)
+    return n
+
+
+def deferred_download(make_chunks: Callable[[], Iterable[str]], *, gzip: bool = False) -> Any:
+    """
+    st.download_button 的 data 参数：Streamlit 支持延迟下载时返回可调用对象，点击后才生成；
+    旧版本回退为立即生成的 bytes。
+    可调用对象返回完整 bytes：Streamlit 解析延迟数据时会 seek(0) 并整体读入内存，不接受不可 seek 的流。
+    """
+    try:
+        from streamlit.runtime.media_file_manager import MediaFileManager
+
+        deferred = hasattr(MediaFileManager, "add_deferred")
+    except ImportError:
+        deferred = False
+    if deferred:
+        return lambda: b"".join(encode_chunks(make_chunks(), gzip=gzip))
+    return b"".join(encode_chunks(make_chunks(), gzip=gzip))
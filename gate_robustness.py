@@ -0,0 +1,409 @@
+"""
+Gate 决策稳健性（Monte Carlo）：对每张卡片的变体用 K 个独立种子重新模拟投放，
+统计 Explore / Validate 结论在噪声下的分布。
+
+- simulate_metrics_batch：与 simulate_metrics 同一套分布（质量系数、iOS/Android 噪声、基线更稳），
+  一次生成 (K, 变体数) 的指标数组
+- Explore：逐种子对同 OS 基线比较 CTR / IPM / CPI，规则同 evaluate_explore_variant
+- Validate：按 eval_set_generator 的窗口构造方式从变体指标派生两窗口 + 轻扩人群，走 validate_batch
+- 输出：变体 PASS 概率、决策稳定度（众数结论占比）、误晋级率（晋级但真实质量不如基线）
+
+真实质量 = _variant_quality × _sell_point_factor（与模拟器内部一致），优于基线即视为「真更好」。
+多张卡片时按卡片分发到进程池；每张卡片的随机流由 (seed, card_id) 派生，结果与进程数无关。
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy 随 streamlit 安装
+    np = None
+
+from pydantic import BaseModel, Field
+
+from explore_gate import ExploreGateConfig
+from simulate_metrics import (
+    _CPI_RANGE_ANDROID,
+    _CPI_RANGE_IOS,
+    _CTR_RANGE,
+    _EARLY_ROAS_RANGE,
+    _EVENTS_PER_INSTALL,
+    _IMPRESSIONS_BASE,
+    _IMPRESSIONS_VARIANCE,
+    _IPM_RANGE,
+    _motivation_bucket_factors,
+    _sell_point_factor,
+    _variant_quality,
+)
+from validate_batch import ValidateTensor, evaluate_validate_gate_batch
+from validate_gate import ValidateGateConfig
+
+OS_LIST = ("iOS", "Android")
+EXPLORE_STATUSES = ("PASS", "FAIL", "INSUFFICIENT")
+_PASS, _FAIL, _INSUFFICIENT = 0, 1, 2
+
+
+# -------- 配置 --------
+
+
+@dataclass
+class RobustnessConfig:
+    """Monte Carlo 配置"""
+
+    n_seeds: int = 1000
+    seed: int = 0
+    workers: int = 0  # 0 = CPU 核数；1 = 当前进程串行
+    explore: ExploreGateConfig = field(default_factory=ExploreGateConfig)
+    validate: ValidateGateConfig = field(default_factory=ValidateGateConfig)
+
+
+# -------- 输出 --------
+
+
+class VariantRobustness(BaseModel):
+    """单个变体在某 OS 下的 K 次重模拟统计"""
+
+    variant_id: str
+    os: str
+    explore_pass_prob: float = Field(..., description="Explore PASS 的比例")
+    validate_pass_prob: float = Field(..., description="Explore PASS 后 Validate 也 PASS 的比例（即晋级概率）")
+    modal_status: str = Field(..., description="最常见的 Explore 结论")
+    stability: float = Field(..., description="众数结论占比，1 表示任何噪声下结论都不变")
+    status_dist: dict[str, float] = Field(default_factory=dict)
+    quality_ratio: float = Field(..., description="真实质量 / 基线真实质量")
+    truly_better: bool
+
+
+class CardRobustness(BaseModel):
+    """单张卡片的稳健性汇总"""
+
+    card_id: str
+    n_seeds: int
+    gate_pass_prob: dict[str, float] = Field(default_factory=dict, description="按 OS：卡片 Explore gate_status=PASS 的比例")
+    gate_stability: dict[str, float] = Field(default_factory=dict, description="按 OS：卡片 gate_status 众数占比")
+    expected_promotions: float = Field(..., description="每次决策平均晋级（Explore+Validate PASS）的变体×OS 数")
+    expected_false_promotions: float = Field(..., description="其中真实质量不如基线的期望个数")
+    false_promotion_rate: float = Field(..., description="误晋级数 / 晋级数")
+    variants: list[VariantRobustness] = Field(default_factory=list)
+
+
+class RobustnessReport(BaseModel):
+    """多张卡片汇总"""
+
+    n_cards: int
+    n_seeds: int
+    mean_stability: float
+    unstable_variants: int = Field(..., description="稳定度 < 0.8 的变体×OS 数")
+    false_promotion_rate: float
+    cards: list[CardRobustness] = Field(default_factory=list)
+
+
+# -------- 批量模拟 --------
+
+
+def _noise(value: Any, noise_pct: float, rng: Any) -> Any:
+    """simulate_metrics._add_noise 的向量版"""
+    delta = value * noise_pct * (2 * rng.random(value.shape) - 1)
+    return np.maximum(value * 0.5, value + delta)
+
+
+def _uniform(rng: Any, lo_hi: tuple[float, float], shape: tuple[int, ...]) -> Any:
+    return rng.uniform(lo_hi[0], lo_hi[1], shape)
+
+
+def variant_qualities(variants: Sequence[Any]) -> Any:
+    """真实质量系数（与 simulate_metrics 内部一致）"""
+    return np.array([
+        _variant_quality(getattr(v, "variant_id", str(v))) * _sell_point_factor(getattr(v, "sell_point", "") or "")
+        for v in variants
+    ])
+
+
+def simulate_metrics_batch(
+    variants: Sequence[Any],
+    os: str,
+    n_seeds: int,
+    rng: Any,
+    *,
+    baseline: bool = False,
+    motivation_bucket: str = "",
+    vertical: str = "casual_game",
+) -> dict[str, Any]:
+    """
+    K 个独立种子下的模拟指标，每个字段形状 (n_seeds, len(variants))。
+    步骤与 simulate_metrics 一一对应（电商退款/转化代理不参与门禁，略去）。
+    """
+    quality = variant_qualities(variants)[None, :]
+    shape = (n_seeds, len(variants))
+    ctr_ipm_f, cpi_f, roas_f = _motivation_bucket_factors(motivation_bucket, vertical)
+    ios = os == "iOS"
+
+    imp_base = _IMPRESSIONS_BASE * (1.1 if baseline else 1.0) * quality
+    imp_noise = _IMPRESSIONS_VARIANCE * (0.5 if baseline else 1.0) * (1.3 if ios else 0.9)
+    impressions = np.clip(np.floor(_noise(np.broadcast_to(imp_base, shape), imp_noise, rng)), 5000, 200_000)
+
+    ctr_base = (_uniform(rng, _CTR_RANGE, shape) + sum(_CTR_RANGE) / 2) / 2 * quality * ctr_ipm_f
+    ctr = np.clip(_noise(ctr_base, 0.15 if baseline else (0.25 if ios else 0.18), rng), 0.003, 0.04)
+    clicks = np.maximum(1, np.floor(impressions * ctr))
+
+    ipm_base = _uniform(rng, _IPM_RANGE, shape) * quality * ctr_ipm_f
+    ipm = np.clip(_noise(ipm_base, 0.12 if baseline else (0.22 if ios else 0.15), rng), 3, 80)
+    installs = np.maximum(1, np.floor(impressions * ipm / 1000))
+
+    cpi_base = _uniform(rng, _CPI_RANGE_IOS if ios else _CPI_RANGE_ANDROID, shape) / quality * cpi_f
+    cpi = np.clip(_noise(cpi_base, 0.1 if baseline else (0.2 if ios else 0.12), rng), 0.8, 12)
+    spend = np.maximum(10, np.round(installs * cpi, 2))
+
+    early_events = np.floor(installs * _uniform(rng, _EVENTS_PER_INSTALL, shape))
+
+    roas_base = _uniform(rng, _EARLY_ROAS_RANGE, shape) * roas_f
+    early_roas = np.clip(_noise(roas_base, 0.3 if baseline else (0.6 if ios else 0.4), rng), 0, 0.5)
+    early_revenue = np.round(spend * early_roas, 2)
+    if not baseline:
+        early_revenue = np.where(rng.random(shape) < 0.15, 0.0, early_revenue)
+
+    return {
+        "impressions": impressions,
+        "clicks": clicks,
+        "installs": installs,
+        "spend": spend,
+        "early_events": early_events,
+        "early_revenue": early_revenue,
+        "ctr": np.round(clicks / impressions, 6),
+        "ipm": np.round(installs / impressions * 1000, 2),
+        "cpi": np.round(spend / installs, 2),
+        "early_roas": np.round(early_revenue / spend, 4),
+    }
+
+
+def explore_status_batch(
+    variant_m: dict[str, Any],
+    baseline_m: dict[str, Any],
+    cfg: ExploreGateConfig,
+) -> Any:
+    """逐种子的 Explore 结论码 (K, N)：0=PASS 1=FAIL 2=INSUFFICIENT，规则同 evaluate_explore_variant"""
+    b = {k: baseline_m[k][:, :1] for k in ("ctr", "ipm", "cpi")}
+    if cfg.improvement_pct <= 0:
+        wins = (variant_m["ctr"] > b["ctr"]).astype(np.int64)
+        wins += variant_m["ipm"] > b["ipm"]
+        wins += variant_m["cpi"] < b["cpi"]
+    else:
+        up, down = 1 + cfg.improvement_pct / 100, 1 - cfg.improvement_pct / 100
+        wins = (variant_m["ctr"] >= b["ctr"] * up).astype(np.int64)
+        wins += variant_m["ipm"] >= b["ipm"] * up
+        wins += variant_m["cpi"] <= b["cpi"] * down
+    status = np.where(wins >= cfg.min_better_metrics, _PASS, _FAIL)
+    return np.where(variant_m["spend"] < cfg.min_spend, _INSUFFICIENT, status)
+
+
+def validate_tensor_batch(m: dict[str, Any], rng: Any) -> ValidateTensor:
+    """
+    按 eval_set_generator 的方式从变体指标派生 window_1 / window_2 / expand_segment，
+    每个 (种子, 变体) 一行。
+    """
+    ipm, cpi, roas = (m[k].ravel() for k in ("ipm", "cpi", "early_roas"))
+    C = ipm.size
+    u = lambda lo=0.0, hi=1.0: rng.uniform(lo, hi, C)  # noqa: E731
+    w1_ipm = ipm * (0.95 + u() * 0.1)
+    w1_cpi = cpi * (0.98 + u() * 0.06)
+    w1_roas = roas * (0.9 + u() * 0.2)
+    w2_ipm = w1_ipm * (0.85 + u() * 0.2)
+    w2_cpi = w1_cpi * (1.0 + u(-0.05, 0.15))
+    w2_roas = w1_roas * (0.95 + u(-0.1, 0.2))
+    exp_ipm = w2_ipm * (0.80 + u() * 0.15)
+    exp_cpi = w2_cpi * (1.0 + u() * 0.2)
+    exp_roas = w2_roas * (0.9 + u(-0.1, 0.15))
+
+    def col(a: Any, b: Any) -> Any:
+        return np.stack([a, b], axis=1)
+
+    ones = np.ones(C)
+    windows = {
+        "impressions": col(ones * 50000, ones * 52000),
+        "installs": col(np.maximum(100, np.floor(50 * w1_ipm)), np.maximum(100, np.floor(52 * w2_ipm))),
+        "spend": col(ones * 6000, ones * 6240),
+        "early_events": col(ones * 1200, ones * 1250),
+        "ipm": np.round(col(w1_ipm, w2_ipm), 2),
+        "cpi": np.round(col(w1_cpi, w2_cpi), 2),
+        "early_roas": np.round(col(w1_roas, w2_roas), 4),
+    }
+    expand = {
+        "impressions": ones * 20000,
+        "spend": ones * 2400,
+        "ipm": np.round(exp_ipm, 2),
+        "cpi": np.round(exp_cpi, 2),
+        "early_roas": np.round(exp_roas, 4),
+    }
+    ids = ["window_1", "window_2"]
+    return ValidateTensor(
+        windows=windows,
+        n_windows=np.full(C, 2, dtype=np.int64),
+        window_ids=[ids] * C,
+        expand=expand,
+        has_expand=np.ones(C, dtype=bool),
+    )
+
+
+# -------- 单卡 / 多卡 --------
+
+
+def _card_rng(seed: int, card_id: str) -> Any:
+    h = int(hashlib.sha256(card_id.encode()).hexdigest()[:8], 16)
+    return np.random.default_rng(np.random.SeedSequence([seed, h]))
+
+
+def _modal(counts: Any) -> tuple[int, float]:
+    """counts 为各结论出现次数，返回 (众数下标, 占比)"""
+    i = int(np.argmax(counts))
+    return i, float(counts[i] / max(1, counts.sum()))
+
+
+@dataclass
+class CardSimulation:
+    """单卡 K 次重模拟的原始数组，门禁阈值变化时可反复复用"""
+
+    card_id: str
+    variant_ids: list[str]
+    quality_ratio: Any  # [N]：变体真实质量 / 基线真实质量
+    variant_metrics: dict[str, dict[str, Any]]  # os -> 字段 -> (K, N)
+    baseline_metrics: dict[str, dict[str, Any]]  # os -> 字段 -> (K, 1)
+    validate_inputs: dict[str, ValidateTensor]  # os -> K×N 行（种子优先）
+
+
+def simulate_card(
+    card_id: str,
+    variants: Sequence[Any],
+    *,
+    n_seeds: int = 1000,
+    seed: int = 0,
+    motivation_bucket: str = "",
+    vertical: str = "casual_game",
+) -> CardSimulation:
+    """variants[0] 为基线（与 eval_set_generator 一致），其余为待评测变体"""
+    if np is None:
+        raise RuntimeError("simulate_card 需要 numpy")
+    rng = _card_rng(seed, card_id)
+    base, cands = variants[:1], list(variants[1:])
+    quality = variant_qualities(variants)
+    kw = {"motivation_bucket": motivation_bucket, "vertical": vertical}
+    vms, bms, vts = {}, {}, {}
+    for os_name in OS_LIST:
+        bms[os_name] = simulate_metrics_batch(base, os_name, n_seeds, rng, baseline=True, **kw)
+        vms[os_name] = simulate_metrics_batch(cands, os_name, n_seeds, rng, **kw)
+        vts[os_name] = validate_tensor_batch(vms[os_name], rng)
+    return CardSimulation(
+        card_id=card_id,
+        variant_ids=[v.variant_id for v in cands],
+        quality_ratio=quality[1:] / quality[0],
+        variant_metrics=vms,
+        baseline_metrics=bms,
+        validate_inputs=vts,
+    )
+
+
+def card_robustness(
+    card_id: str,
+    variants: Sequence[Any],
+    *,
+    motivation_bucket: str = "",
+    vertical: str = "casual_game",
+    config: RobustnessConfig | None = None,
+) -> CardRobustness:
+    """
+    variants[0] 为基线（与 eval_set_generator 一致），其余为待评测变体。
+    """
+    cfg = config or RobustnessConfig()
+    K = cfg.n_seeds
+    sim = simulate_card(
+        card_id, variants, n_seeds=K, seed=cfg.seed, motivation_bucket=motivation_bucket, vertical=vertical
+    )
+    ratio = sim.quality_ratio
+    truly_better = ratio > 1.0
+
+    out_variants: list[VariantRobustness] = []
+    gate_pass: dict[str, float] = {}
+    gate_stab: dict[str, float] = {}
+    promotions = np.zeros(K)
+    false_promotions = np.zeros(K)
+    for os_name in OS_LIST:
+        status = explore_status_batch(sim.variant_metrics[os_name], sim.baseline_metrics[os_name], cfg.explore)
+        passed = status == _PASS
+        vres = evaluate_validate_gate_batch(sim.validate_inputs[os_name], config=cfg.validate)
+        promoted = passed & (vres.status == "PASS").reshape(status.shape)
+        promotions += promoted.sum(axis=1)
+        false_promotions += (promoted & ~truly_better[None, :]).sum(axis=1)
+
+        # 卡片 gate_status：有 PASS 即 PASS，否则有 INSUFFICIENT 即 INSUFFICIENT，否则 FAIL
+        card_status = np.where(passed.any(axis=1), _PASS, np.where((status == _INSUFFICIENT).any(axis=1), _INSUFFICIENT, _FAIL))
+        card_counts = np.bincount(card_status, minlength=3)
+        gate_pass[os_name] = round(float(card_counts[_PASS] / K), 4)
+        gate_stab[os_name] = round(_modal(card_counts)[1], 4)
+
+        for j, vid in enumerate(sim.variant_ids):
+            counts = np.bincount(status[:, j], minlength=3)
+            mode, stab = _modal(counts)
+            out_variants.append(VariantRobustness(
+                variant_id=vid,
+                os=os_name,
+                explore_pass_prob=round(float(counts[_PASS] / K), 4),
+                validate_pass_prob=round(float(promoted[:, j].mean()), 4),
+                modal_status=EXPLORE_STATUSES[mode],
+                stability=round(stab, 4),
+                status_dist={s: round(float(c / K), 4) for s, c in zip(EXPLORE_STATUSES, counts)},
+                quality_ratio=round(float(ratio[j]), 4),
+                truly_better=bool(truly_better[j]),
+            ))
+
+    total = float(promotions.sum())
+    return CardRobustness(
+        card_id=card_id,
+        n_seeds=K,
+        gate_pass_prob=gate_pass,
+        gate_stability=gate_stab,
+        expected_promotions=round(float(promotions.mean()), 4),
+        expected_false_promotions=round(float(false_promotions.mean()), 4),
+        false_promotion_rate=round(float(false_promotions.sum()) / total, 4) if total else 0.0,
+        variants=out_variants,
+    )
+
+
+def _card_job(args: tuple) -> CardRobustness:
+    card_id, variants, mb, vertical, cfg = args
+    return card_robustness(card_id, variants, motivation_bucket=mb, vertical=vertical, config=cfg)
+
+
+def eval_set_robustness(
+    records: Sequence[Any],
+    *,
+    config: RobustnessConfig | None = None,
+) -> RobustnessReport:
+    """records: CardEvalRecord 列表（用 card / variants）；workers != 1 时按卡片并行"""
+    cfg = config or RobustnessConfig()
+    jobs = [
+        (r.card.card_id, list(r.variants), r.card.motivation_bucket, r.card.vertical, cfg)
+        for r in records
+        if len(r.variants) >= 2
+    ]
+    workers = cfg.workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            cards = list(pool.map(_card_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        cards = [_card_job(j) for j in jobs]
+
+    all_v = [v for c in cards for v in c.variants]
+    promos = sum(c.expected_promotions for c in cards)
+    false_promos = sum(c.expected_false_promotions for c in cards)
+    return RobustnessReport(
+        n_cards=len(cards),
+        n_seeds=cfg.n_seeds,
+        mean_stability=round(sum(v.stability for v in all_v) / len(all_v), 4) if all_v else 0.0,
+        unstable_variants=sum(1 for v in all_v if v.stability < 0.8),
+        false_promotion_rate=round(false_promos / promos, 4) if promos else 0.0,
+        cards=cards,
+    )
@@ -0,0 +1,478 @@
+"""
+门禁阈值自动调参：在大规模模拟评测集上搜索 ExploreGateConfig / ValidateGateConfig，
+以「已知真实质量」为标准，最大化每单位花费的晋级精确率/召回率。
+
+- 模拟一次、反复判门：SimulatedEvalSet 把每张卡片 K 次重模拟的指标（gate_robustness.simulate_card）
+  拼成 (K, 变体×OS) 数组并缓存为 .npz；每个候选配置只重跑 Explore 比较 + validate_batch
+- 真实标签：变体真实质量（_variant_quality × _sell_point_factor）高于基线 × (1 + truth_margin)
+- 目标：F_beta（晋级 vs 真更好）× 10000 / 每卡花费；花费 = Explore 实际花费 + INSUFFICIENT 补足到
+  min_spend + 每个 Explore PASS 变体的 Validate 花费
+- 搜索：grid（笛卡尔积）或 bayes（高斯过程 + 期望提升，numpy 实现），候选在进程池里并行评估
+
+参数空间写作 {"explore.min_spend": (200, 1500), "explore.min_better_metrics": [1, 2, 3], ...}：
+元组为连续区间（两端都是 int 时取整），列表为离散取值。
+"""
+from __future__ import annotations
+
+import hashlib
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy 随 streamlit 安装
+    np = None
+
+from pydantic import BaseModel, Field
+
+from explore_gate import ExploreGateConfig
+from gate_robustness import OS_LIST, _INSUFFICIENT, _PASS, explore_status_batch, simulate_card
+from validate_batch import ValidateTensor, evaluate_validate_gate_batch
+from validate_gate import ValidateGateConfig
+
+try:
+    from path_config import SAMPLES_DIR
+except ImportError:
+    SAMPLES_DIR = Path(__file__).resolve().parent / "samples"
+CACHE_DIR = SAMPLES_DIR / "tuning_cache"
+# 模拟逻辑（simulate_card / 评测集生成）变化时递增，使旧 .npz 缓存失效
+SIM_VERSION = 1
+
+ParamSpace = dict[str, Any]  # 名称 -> (lo, hi) 或 [取值, ...]
+
+DEFAULT_SPACE: ParamSpace = {
+    "explore.min_spend": (200, 1500),
+    "explore.min_better_metrics": [1, 2, 3],
+    "explore.improvement_pct": (0.0, 15.0),
+    "validate.ipm_cv_max": (0.15, 0.6),
+    "validate.ipm_drop_max_pct": (0.1, 0.5),
+    "validate.cpi_increase_max_pct": (0.1, 0.5),
+    "validate.light_expansion_ipm_drop_max": (0.1, 0.4),
+    "validate.light_expansion_cpi_increase_max": (0.1, 0.5),
+}
+
+_EXPLORE_FIELDS = ("ctr", "ipm", "cpi", "spend")
+_VALIDATE_WINDOW_FIELDS = ("impressions", "installs", "spend", "early_events", "ipm", "cpi", "early_roas")
+_VALIDATE_EXPAND_FIELDS = ("impressions", "spend", "ipm", "cpi", "early_roas")
+
+
+# -------- 配置 --------
+
+
+@dataclass
+class TuningObjective:
+    """评分口径"""
+
+    beta: float = 1.0  # F_beta：>1 偏召回，<1 偏精确
+    truth_margin: float = 0.0  # 真实质量需高于基线的比例
+    spend_unit: float = 10_000.0  # 得分 = F_beta × spend_unit / 每卡花费
+
+
+@dataclass
+class TuningConfig:
+    """搜索配置"""
+
+    method: str = "bayes"  # grid / bayes
+    n_trials: int = 60  # bayes 的总评估次数（grid 忽略）
+    n_init: int = 12  # bayes 的随机起步点数
+    grid_points: int = 4  # grid 中每个连续维度的取点数
+    n_cards: int = 75
+    variants_per_card: int = 12
+    n_seeds: int = 200
+    seed: int = 0
+    workers: int = 0  # 0 = CPU 核数；1 = 当前进程串行
+    objective: TuningObjective = field(default_factory=TuningObjective)
+
+
+# -------- 输出 --------
+
+
+class TrialResult(BaseModel):
+    """一组阈值在模拟评测集上的表现"""
+
+    params: dict[str, float | int] = Field(default_factory=dict)
+    precision: float
+    recall: float
+    f_beta: float
+    promotions_per_card: float = Field(..., description="每卡每次决策平均晋级的变体×OS 数")
+    spend_per_card: float
+    false_promotion_rate: float
+    score: float
+
+
+class TuningReport(BaseModel):
+    method: str
+    n_trials: int
+    n_cards: int
+    n_seeds: int
+    default: TrialResult = Field(..., description="当前默认阈值的表现")
+    best: TrialResult
+    trials: list[TrialResult] = Field(default_factory=list, description="按 score 降序")
+
+
+# -------- 模拟评测集（缓存） --------
+
+
+@dataclass
+class SimulatedEvalSet:
+    """
+    全部卡片 × OS 的变体列拼接后的数组（列 = 变体×OS，行 = 种子）。
+    validate 为 K×M 行的 ValidateTensor（种子优先，与 explore 状态 ravel 顺序一致）。
+    """
+
+    variant: dict[str, Any]  # 字段 -> (K, M)
+    baseline: dict[str, Any]  # 字段 -> (K, M)，同卡同 OS 的基线广播到每列
+    quality_ratio: Any  # [M]
+    validate: ValidateTensor
+    n_cards: int
+
+    @property
+    def n_seeds(self) -> int:
+        return self.variant["spend"].shape[0]
+
+    def content_hash(self) -> str:
+        """全部数组内容的哈希（调用方传入的评测集按此落盘，不占用按配置命名的缓存）"""
+        h = hashlib.sha256(str(self.n_cards).encode())
+        for prefix, arrays in (
+            ("v", self.variant),
+            ("b", self.baseline),
+            ("w", self.validate.windows),
+            ("e", self.validate.expand),
+        ):
+            for f in sorted(arrays):
+                h.update(f"{prefix}_{f}".encode())
+                h.update(np.ascontiguousarray(arrays[f]).tobytes())
+        h.update(np.ascontiguousarray(self.quality_ratio).tobytes())
+        return h.hexdigest()[:12]
+
+    @classmethod
+    def from_records(cls, records: Sequence[Any], *, n_seeds: int = 200, seed: int = 0) -> "SimulatedEvalSet":
+        """records: CardEvalRecord 列表（用 card / variants）"""
+        v_cols: dict[str, list[Any]] = {f: [] for f in _EXPLORE_FIELDS}
+        b_cols: dict[str, list[Any]] = {f: [] for f in _EXPLORE_FIELDS}
+        w_cols: dict[str, list[Any]] = {f: [] for f in _VALIDATE_WINDOW_FIELDS}
+        e_cols: dict[str, list[Any]] = {f: [] for f in _VALIDATE_EXPAND_FIELDS}
+        ratios = []
+        n_cards = 0
+        for r in records:
+            if len(r.variants) < 2:
+                continue
+            n_cards += 1
+            sim = simulate_card(
+                r.card.card_id, list(r.variants), n_seeds=n_seeds, seed=seed,
+                motivation_bucket=r.card.motivation_bucket, vertical=r.card.vertical,
+            )
+            n = len(sim.variant_ids)
+            for os_name in OS_LIST:
+                vm, bm, vt = sim.variant_metrics[os_name], sim.baseline_metrics[os_name], sim.validate_inputs[os_name]
+                for f in _EXPLORE_FIELDS:
+                    v_cols[f].append(vm[f])
+                    b_cols[f].append(np.broadcast_to(bm[f], vm[f].shape))
+                for f in _VALIDATE_WINDOW_FIELDS:
+                    w_cols[f].append(vt.windows[f].reshape(n_seeds, n, -1))
+                for f in _VALIDATE_EXPAND_FIELDS:
+                    e_cols[f].append(vt.expand[f].reshape(n_seeds, n))
+                ratios.append(sim.quality_ratio)
+        windows = {f: np.concatenate(c, axis=1) for f, c in w_cols.items()}
+        expand = {f: np.concatenate(c, axis=1) for f, c in e_cols.items()}
+        return cls(
+            variant={f: np.concatenate(c, axis=1) for f, c in v_cols.items()},
+            baseline={f: np.concatenate(c, axis=1) for f, c in b_cols.items()},
+            quality_ratio=np.concatenate(ratios),
+            validate=_validate_tensor(windows, expand),
+            n_cards=n_cards,
+        )
+
+    def save(self, path: Path) -> None:
+        arrays = {f"v_{f}": a for f, a in self.variant.items()}
+        arrays.update({f"b_{f}": a for f, a in self.baseline.items()})
+        K, M = self.variant["spend"].shape
+        arrays.update({f"w_{f}": a.reshape(K, M, -1) for f, a in self.validate.windows.items()})
+        arrays.update({f"e_{f}": a.reshape(K, M) for f, a in self.validate.expand.items()})
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(tmp, quality_ratio=self.quality_ratio, n_cards=np.array(self.n_cards), **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "SimulatedEvalSet":
+        with np.load(path) as z:
+            pick = lambda prefix: {k[len(prefix):]: z[k] for k in z.files if k.startswith(prefix)}  # noqa: E731
+            return cls(
+                variant=pick("v_"),
+                baseline=pick("b_"),
+                quality_ratio=z["quality_ratio"],
+                validate=_validate_tensor(pick("w_"), pick("e_")),
+                n_cards=int(z["n_cards"]),
+            )
+
+
+def _validate_tensor(windows: dict[str, Any], expand: dict[str, Any]) -> ValidateTensor:
+    """(K, M, W) / (K, M) → K×M 行的 ValidateTensor"""
+    K, M, W = windows["ipm"].shape
+    C = K * M
+    ids = [f"window_{j + 1}" for j in range(W)]
+    return ValidateTensor(
+        windows={f: a.reshape(C, W) for f, a in windows.items()},
+        n_windows=np.full(C, W, dtype=np.int64),
+        window_ids=[ids] * C,
+        expand={f: a.reshape(C) for f, a in expand.items()},
+        has_expand=np.ones(C, dtype=bool),
+    )
+
+
+def cache_path(cfg: TuningConfig) -> Path:
+    """缓存 key 含模拟版本与 vertical_config 版本，配置或模拟逻辑变化后重新生成"""
+    from vertical_config import get_config_version
+
+    key = f"{cfg.n_cards}-{cfg.variants_per_card}-{cfg.n_seeds}-{cfg.seed}-v{SIM_VERSION}-{get_config_version()}"
+    return CACHE_DIR / f"simset_{hashlib.sha256(key.encode()).hexdigest()[:12]}.npz"
+
+
+def load_or_build_eval_set(cfg: TuningConfig) -> tuple[SimulatedEvalSet, Path]:
+    """按 (卡片数, 变体数, 种子数, seed, 配置版本) 复用磁盘缓存，不存在时生成评测集并模拟"""
+    path = cache_path(cfg)
+    if path.exists():
+        return SimulatedEvalSet.load(path), path
+    from eval_set_generator import generate_eval_set
+
+    records = generate_eval_set(n_cards=cfg.n_cards, variants_per_card=cfg.variants_per_card)
+    sim_set = SimulatedEvalSet.from_records(records, n_seeds=cfg.n_seeds, seed=cfg.seed)
+    sim_set.save(path)
+    return sim_set, path
+
+
+# -------- 评估 --------
+
+
+def apply_params(params: dict[str, Any]) -> tuple[ExploreGateConfig, ValidateGateConfig]:
+    """{"explore.x": …, "validate.y": …} → 两个门禁配置（未给出的字段取默认值）"""
+    explore = {k.split(".", 1)[1]: v for k, v in params.items() if k.startswith("explore.")}
+    validate = {k.split(".", 1)[1]: v for k, v in params.items() if k.startswith("validate.")}
+    return replace(ExploreGateConfig(), **explore), replace(ValidateGateConfig(), **validate)
+
+
+def evaluate_params(
+    sim_set: SimulatedEvalSet,
+    params: dict[str, Any],
+    objective: TuningObjective | None = None,
+) -> TrialResult:
+    """在缓存的模拟数据上只重跑门禁逻辑"""
+    obj = objective or TuningObjective()
+    explore_cfg, validate_cfg = apply_params(params)
+    status = explore_status_batch(sim_set.variant, sim_set.baseline, explore_cfg)
+    explored = status == _PASS
+    vres = evaluate_validate_gate_batch(sim_set.validate, config=validate_cfg)
+    promoted = explored & (vres.status == "PASS").reshape(status.shape)
+
+    truth = (sim_set.quality_ratio > 1.0 + obj.truth_margin)[None, :]
+    tp = float((promoted & truth).sum())
+    n_promoted = float(promoted.sum())
+    n_true = float(truth.sum()) * sim_set.n_seeds
+    precision = tp / n_promoted if n_promoted else 0.0
+    recall = tp / n_true if n_true else 0.0
+    b2 = obj.beta ** 2
+    f_beta = (1 + b2) * precision * recall / (b2 * precision + recall) if precision + recall else 0.0
+
+    spend = sim_set.variant["spend"]
+    validate_cost = float(sim_set.validate.windows["spend"][0].sum() + sim_set.validate.expand["spend"][0])
+    total = (
+        spend.sum()
+        + np.where(status == _INSUFFICIENT, explore_cfg.min_spend - spend, 0.0).sum()
+        + explored.sum() * validate_cost
+    )
+    runs = sim_set.n_seeds * max(1, sim_set.n_cards)
+    spend_per_card = float(total) / runs
+    return TrialResult(
+        params=params,
+        precision=round(precision, 4),
+        recall=round(recall, 4),
+        f_beta=round(f_beta, 4),
+        promotions_per_card=round(n_promoted / runs, 4),
+        spend_per_card=round(spend_per_card, 2),
+        false_promotion_rate=round(1 - precision, 4) if n_promoted else 0.0,
+        score=round(f_beta * obj.spend_unit / spend_per_card, 6) if spend_per_card else 0.0,
+    )
+
+
+# -------- 进程池 --------
+
+
+_WORKER_SET: SimulatedEvalSet | None = None
+
+
+def _init_worker(path: str) -> None:
+    global _WORKER_SET
+    _WORKER_SET = SimulatedEvalSet.load(Path(path))
+
+
+def _trial_job(args: tuple[dict[str, Any], TuningObjective]) -> TrialResult:
+    params, objective = args
+    return evaluate_params(_WORKER_SET, params, objective)
+
+
+class _Evaluator:
+    """workers > 1 时把候选分发到进程池（每个进程从 .npz 缓存加载一次数据），否则当前进程直接算"""
+
+    def __init__(self, sim_set: SimulatedEvalSet, path: Path, workers: int, objective: TuningObjective) -> None:
+        self.sim_set = sim_set
+        self.objective = objective
+        self.pool = (
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(path),))
+            if workers > 1 else None
+        )
+
+    def __call__(self, batch: list[dict[str, Any]]) -> list[TrialResult]:
+        if self.pool is None:
+            return [evaluate_params(self.sim_set, p, self.objective) for p in batch]
+        return list(self.pool.map(_trial_job, [(p, self.objective) for p in batch]))
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+# -------- 搜索 --------
+
+
+def _is_int_range(spec: Any) -> bool:
+    return isinstance(spec, tuple) and all(isinstance(x, int) and not isinstance(x, bool) for x in spec)
+
+
+def grid_candidates(space: ParamSpace, points: int = 4) -> list[dict[str, Any]]:
+    axes = []
+    for name, spec in space.items():
+        if isinstance(spec, tuple):
+            lo, hi = spec
+            vals = [lo + (hi - lo) * i / max(1, points - 1) for i in range(points)]
+            vals = sorted({int(round(v)) for v in vals}) if _is_int_range(spec) else [round(v, 4) for v in vals]
+        else:
+            vals = list(spec)
+        axes.append([(name, v) for v in vals])
+    return [dict(combo) for combo in itertools.product(*axes)]
+
+
+def _encode(space: ParamSpace, params: dict[str, Any]) -> list[float]:
+    """参数 → [0, 1]^d（离散维度按取值下标归一化）"""
+    out = []
+    for name, spec in space.items():
+        v = params[name]
+        if isinstance(spec, tuple):
+            lo, hi = spec
+            out.append((v - lo) / (hi - lo) if hi != lo else 0.0)
+        else:
+            out.append(list(spec).index(v) / max(1, len(spec) - 1))
+    return out
+
+
+def _decode(space: ParamSpace, x: Any) -> dict[str, Any]:
+    params: dict[str, Any] = {}
+    for (name, spec), u in zip(space.items(), x):
+        if isinstance(spec, tuple):
+            lo, hi = spec
+            v = lo + (hi - lo) * float(u)
+            params[name] = int(round(v)) if _is_int_range(spec) else round(v, 4)
+        else:
+            params[name] = list(spec)[int(round(float(u) * (len(spec) - 1)))]
+    return params
+
+
+_erf = np.vectorize(math.erf) if np is not None else None
+
+
+def expected_improvement(X: Any, y: Any, cand: Any, *, length: float = 0.25, xi: float = 0.01) -> Any:
+    """RBF 核高斯过程后验上的期望提升（y 先标准化）"""
+    mu_y, sd_y = y.mean(), y.std() or 1.0
+    yn = (y - mu_y) / sd_y
+
+    def rbf(a: Any, b: Any) -> Any:
+        d2 = ((a[:, None, :] - b[None, :, :]) ** 2).sum(-1)
+        return np.exp(-0.5 * d2 / length ** 2)
+
+    K = rbf(X, X) + 1e-6 * np.eye(len(X))
+    Ks = rbf(cand, X)
+    alpha = np.linalg.solve(K, yn)
+    mu = Ks @ alpha
+    var = np.clip(1.0 - np.einsum("ij,ji->i", Ks, np.linalg.solve(K, Ks.T)), 1e-12, None)
+    sd = np.sqrt(var)
+    z = (mu - yn.max() - xi) / sd
+    cdf = 0.5 * (1 + _erf(z / math.sqrt(2)))
+    pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2 * math.pi)
+    return (mu - yn.max() - xi) * cdf + sd * pdf
+
+
+def _bayes_search(space: ParamSpace, evaluate: _Evaluator, cfg: TuningConfig, batch: int) -> list[TrialResult]:
+    rng = np.random.default_rng(cfg.seed)
+    d = len(space)
+    trials = evaluate([_decode(space, x) for x in rng.random((cfg.n_init, d))])
+    while len(trials) < cfg.n_trials:
+        X = np.array([_encode(space, t.params) for t in trials])
+        y = np.array([t.score for t in trials])
+        cand = rng.random((max(256, 64 * d), d))
+        # 在当前最优点附近补一批局部候选
+        best = X[int(np.argmax(y))]
+        cand = np.vstack([cand, np.clip(best + rng.normal(0, 0.08, (64 * d, d)), 0, 1)])
+        order = np.argsort(-expected_improvement(X, y, cand))
+        seen = {tuple(sorted(t.params.items())) for t in trials}
+        picks: list[dict[str, Any]] = []
+        for i in order:
+            p = _decode(space, cand[i])
+            key = tuple(sorted(p.items()))
+            if key not in seen:
+                seen.add(key)
+                picks.append(p)
+            if len(picks) >= min(batch, cfg.n_trials - len(trials)):
+                break
+        if not picks:
+            break
+        trials += evaluate(picks)
+    return trials
+
+
+def tune_gates(
+    space: ParamSpace | None = None,
+    *,
+    config: TuningConfig | None = None,
+    sim_set: SimulatedEvalSet | None = None,
+) -> TuningReport:
+    """
+    在模拟评测集上搜索门禁阈值。sim_set 为空时按 config 从磁盘缓存加载或生成；
+    传入的 sim_set 不写入按配置命名的缓存，仅在需要进程池时按内容哈希落盘供子进程加载。
+    """
+    if np is None:
+        raise RuntimeError("tune_gates 需要 numpy")
+    cfg = config or TuningConfig()
+    space = space or DEFAULT_SPACE
+    workers = cfg.workers or os.cpu_count() or 1
+    if sim_set is None:
+        sim_set, path = load_or_build_eval_set(cfg)
+    else:
+        path = CACHE_DIR / f"simset_user_{sim_set.content_hash()}.npz"
+        if workers > 1 and not path.exists():
+            sim_set.save(path)
+    evaluate = _Evaluator(sim_set, path, workers, cfg.objective)
+    try:
+        if cfg.method == "grid":
+            trials = evaluate(grid_candidates(space, cfg.grid_points))
+        elif cfg.method == "bayes":
+            trials = _bayes_search(space, evaluate, cfg, batch=max(1, workers))
+        else:
+            raise ValueError(f"未知搜索方法：{cfg.method}（可选 grid / bayes）")
+    finally:
+        evaluate.close()
+
+    trials.sort(key=lambda t: -t.score)
+    return TuningReport(
+        method=cfg.method,
+        n_trials=len(trials),
+        n_cards=sim_set.n_cards,
+        n_seeds=sim_set.n_seeds,
+        default=evaluate_params(sim_set, {}, cfg.objective),
+        best=trials[0],
+        trials=trials,
+    )
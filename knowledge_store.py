@@ -10,6 +10,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from profiling import profiled
+
 DB_PATH = Path(__file__).resolve().parent / "data" / "knowledge.db"
 
 
@@ -99,9 +101,46 @@ def init_schema(conn: sqlite3.Connection | None = None) -> None:
             delta REAL,
             confidence TEXT,
             cross_os TEXT,
-            created_at TEXT
+            created_at TEXT,
+            os TEXT DEFAULT 'all'
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS element_stats (
+            vertical TEXT,
+            element_type TEXT,
+            element_value TEXT,
+            os TEXT,
+            n INTEGER,
+            ipm_mean REAL,
+            ipm_m2 REAL,
+            cpi_mean REAL,
+            cpi_m2 REAL,
+            pos_count INTEGER,
+            neg_count INTEGER,
+            updated_at TEXT,
+            PRIMARY KEY (vertical, element_type, element_value, os)
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS metrics_hourly (
+            card_id TEXT,
+            variant_id TEXT,
+            os TEXT,
+            hour INTEGER,
+            impressions INTEGER,
+            clicks INTEGER,
+            installs INTEGER,
+            spend REAL,
+            early_events INTEGER,
+            early_revenue REAL,
+            PRIMARY KEY (card_id, variant_id, os, hour)
         )
     """)
+    # 旧库迁移：element_scores 增加 os 列（历史行视为 all）
+    cols = {row[1] for row in c.execute("PRAGMA table_info(element_scores)").fetchall()}
+    if "os" not in cols:
+        c.execute("ALTER TABLE element_scores ADD COLUMN os TEXT DEFAULT 'all'")
     c.execute("""
         CREATE TABLE IF NOT EXISTS decisions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -137,6 +176,36 @@ def _next_exp_id() -> str:
         conn.close()
 
 
+def _per_os_element_scores(metrics: list[Any], variants: list[Any]) -> list[tuple[str, list[Any]]]:
+    """各端单独的元素贡献（相对该端均值），供 element_stats 按 OS 累计"""
+    if not metrics or not variants:
+        return []
+    from pydantic import ValidationError
+
+    from element_matrix import compute_element_scores_sparse
+    from eval_schemas import Variant
+
+    typed = []
+    for v in variants:
+        if isinstance(v, dict):
+            # 写入路径接受 dict 形式的变体；校验不过的跳过，不影响其余统计
+            try:
+                v = Variant.model_validate(v)
+            except ValidationError:
+                continue
+        if hasattr(v, "variant_id"):
+            typed.append(v)
+    if not typed:
+        return []
+    by_os: dict[str, list[Any]] = {}
+    for m in metrics:
+        os_ = m.get("os", "") if isinstance(m, dict) else getattr(m, "os", "")
+        if os_:
+            by_os.setdefault(os_, []).append(m)
+    return [(os_, compute_element_scores_sparse(ms, variants=typed)) for os_, ms in by_os.items()]
+
+
+@profiled("knowledge_store.write")
 def write_experiment(
     card: Any,
     variants: list[Any],
@@ -223,15 +292,25 @@ def write_experiment(
                 VALUES (?,?,?,?,?,?,?)
             """, (exp_id, "all", ft, ps, na, json.dumps(detail_dict, ensure_ascii=False), now))
 
-        for s in element_scores or []:
-            obj = s if hasattr(s, "element_type") else type("S", (), s)()
-            ipm_d = getattr(obj, "avg_IPM_delta_vs_card_mean", 0) or getattr(obj, "avg_ipm_delta", 0)
-            cpi_d = getattr(obj, "avg_CPI_delta_vs_card_mean", 0) or getattr(obj, "avg_cpi_delta", 0)
-            c.execute("""
-                INSERT INTO element_scores (exp_id, element_type, element_value, metric, delta, confidence, cross_os, created_at)
-                VALUES (?,?,?,?,?,?,?,?)
-            """, (exp_id, getattr(obj, "element_type", ""), getattr(obj, "element_value", ""),
-                  "IPM", ipm_d, getattr(obj, "confidence_level", ""), getattr(obj, "cross_os_consistency", ""), now))
+        # 元素贡献：卡片整体（os=all）+ 各端单独计算，IPM/CPI 各一行；同时增量更新 element_stats
+        observations: list[tuple[str, str, str, float, float]] = []
+        for os_scope, scores in [("all", element_scores or [])] + _per_os_element_scores(metrics, variants):
+            for s in scores:
+                obj = s if hasattr(s, "element_type") else type("S", (), s)()
+                et, ev = getattr(obj, "element_type", ""), getattr(obj, "element_value", "")
+                ipm_d = getattr(obj, "avg_IPM_delta_vs_card_mean", 0) or getattr(obj, "avg_ipm_delta", 0)
+                cpi_d = getattr(obj, "avg_CPI_delta_vs_card_mean", 0) or getattr(obj, "avg_cpi_delta", 0)
+                for metric, delta in (("IPM", ipm_d), ("CPI", cpi_d)):
+                    c.execute("""
+                        INSERT INTO element_scores (exp_id, element_type, element_value, metric, delta, confidence, cross_os, os, created_at)
+                        VALUES (?,?,?,?,?,?,?,?,?)
+                    """, (exp_id, et, ev, metric, delta, getattr(obj, "confidence_level", ""),
+                          getattr(obj, "cross_os_consistency", ""), os_scope, now))
+                observations.append((os_scope, et, ev, ipm_d, cpi_d))
+
+        from element_leaderboard import record_element_observations
+
+        record_element_observations(conn, getattr(card, "vertical", ""), observations)
 
         d = decision_summary or {}
         risk = d.get("risk", "")
@@ -248,6 +327,7 @@ def write_experiment(
     return exp_id
 
 
+@profiled("knowledge_store.query")
 def query_review(
     vertical: str | None = None,
     channel: str | None = None,
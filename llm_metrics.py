@@ -0,0 +1,452 @@
+"""
+LLM 调用遥测：OpenRouter 每次调用的模型、用途、耗时、token、费用、重试、JSON 解析失败、提示缓存命中。
+
+- record_call / record_parse_failure / record_variants：openrouter_client 与 app 在调用点上报
+- 进程内聚合（计数器 + 耗时直方图），prometheus_text() 只含本进程的调用
+- 本地 SQLite 账本（data/llm_ledger.db，LLM_LEDGER_PATH 覆盖，LLM_LEDGER=0 关闭）逐条落盘，
+  跨进程 / 重启后用 ledger_summary() 算吞吐、p95 耗时、每个生成 / 评审变体的成本；
+  ledger_prometheus_text() 从账本重建同一组 Prometheus 序列（api /metrics 用它，调用发生在 Streamlit 进程里）；
+  写明细时在同一事务里累加 llm_rollup 汇总表，抓取只读汇总行，开销与账本条数无关
+
+「缓存命中」指 OpenRouter 返回的 usage.prompt_tokens_details.cached_tokens > 0（提供方提示缓存）。
+费用优先取 usage.cost（请求时带 usage.include）；缺失时按 OPENROUTER_PRICE_PROMPT / OPENROUTER_PRICE_COMPLETION
+（美元 / 百万 token）估算，都没有则记 0。
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from profiling import Histogram, format_labels, histogram_lines
+
+LEDGER_PATH = Path(os.getenv("LLM_LEDGER_PATH", "") or Path(__file__).resolve().parent / "data" / "llm_ledger.db")
+LEDGER_ENABLED = os.getenv("LLM_LEDGER", "1").strip().lower() not in ("0", "false", "off")
+
+# LLM 调用为秒级，桶上限放到 2 分钟（httpx 超时 120s）
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+
+
+@dataclass
+class LLMCall:
+    """一次 chat completions 请求"""
+
+    model: str
+    purpose: str
+    status: str  # ok / empty / http_error / error
+    latency_s: float
+    attempt: int = 0  # 0 = 首次请求，>0 = 解析失败后的重试
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: float = 0.0
+    error: str = ""
+    ts: float = 0.0
+
+    @property
+    def cache_hit(self) -> bool:
+        return self.cached_tokens > 0
+
+
+def usage_from_response(data: dict[str, Any], model: str) -> dict[str, Any]:
+    """从 OpenRouter 响应体提取 token / 费用字段；model 记请求时的模型名，与解析失败计数同一标签"""
+    usage = data.get("usage") or {}
+    details = usage.get("prompt_tokens_details") or {}
+    prompt = int(usage.get("prompt_tokens") or 0)
+    completion = int(usage.get("completion_tokens") or 0)
+    cost = usage.get("cost")
+    if cost is None:
+        cost = _estimate_cost(prompt, completion)
+    return {
+        "model": model,
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "cached_tokens": int(details.get("cached_tokens") or 0),
+        "cost_usd": float(cost or 0.0),
+    }
+
+
+def _estimate_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    try:
+        p = float(os.getenv("OPENROUTER_PRICE_PROMPT", "") or 0)
+        c = float(os.getenv("OPENROUTER_PRICE_COMPLETION", "") or 0)
+    except ValueError:
+        return 0.0
+    return (prompt_tokens * p + completion_tokens * c) / 1e6
+
+
+# -------- 进程内聚合 --------
+
+
+class _Series:
+    __slots__ = ("requests", "retries", "parse_failures", "prompt_tokens", "completion_tokens",
+                 "cached_tokens", "cache_hits", "cost_usd", "latency")
+
+    def __init__(self) -> None:
+        self.requests: dict[str, int] = {}
+        self.retries = 0
+        self.parse_failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.cache_hits = 0
+        self.cost_usd = 0.0
+        self.latency = Histogram(LATENCY_BUCKETS)
+
+
+_LOCK = threading.Lock()
+_SERIES: dict[tuple[str, str], _Series] = {}
+_VARIANTS: dict[str, int] = {}
+
+
+def _series(model: str, purpose: str) -> _Series:
+    s = _SERIES.get((model, purpose))
+    if s is None:
+        s = _SERIES[(model, purpose)] = _Series()
+    return s
+
+
+def record_call(call: LLMCall) -> None:
+    """上报一次请求（成功或失败都要报），同时写账本"""
+    call.ts = call.ts or time.time()
+    with _LOCK:
+        s = _series(call.model, call.purpose)
+        s.requests[call.status] = s.requests.get(call.status, 0) + 1
+        s.retries += call.attempt > 0
+        s.prompt_tokens += call.prompt_tokens
+        s.completion_tokens += call.completion_tokens
+        s.cached_tokens += call.cached_tokens
+        s.cache_hits += call.cache_hit
+        s.cost_usd += call.cost_usd
+        s.latency.observe(call.latency_s)
+    labels = (call.model, call.purpose, call.status)
+    _ledger_insert("llm_calls", {**asdict(call), "cache_hit": int(call.cache_hit)}, [
+        ("requests", *labels, 1),
+        ("retries", *labels, int(call.attempt > 0)),
+        ("prompt_tokens", *labels, call.prompt_tokens),
+        ("completion_tokens", *labels, call.completion_tokens),
+        ("cached_tokens", *labels, call.cached_tokens),
+        ("cache_hits", *labels, int(call.cache_hit)),
+        ("cost_usd", *labels, call.cost_usd),
+        ("latency_sum", *labels, call.latency_s),
+        (f"latency_bucket_{bisect_left(LATENCY_BUCKETS, call.latency_s)}", *labels, 1),
+    ])
+
+
+def record_parse_failure(model: str, purpose: str, *, attempt: int, final: bool) -> None:
+    """chat_completion_json 解析失败（final=True 表示已放弃，不再重试）"""
+    ts = time.time()
+    with _LOCK:
+        _series(model, purpose).parse_failures += 1
+    _ledger_insert(
+        "llm_parse_failures",
+        {"ts": ts, "model": model, "purpose": purpose, "attempt": attempt, "final": int(final)},
+        [("parse_failures", model, purpose, "", 1)],
+    )
+
+
+def record_variants(purpose: str, n: int) -> None:
+    """一次生成 / 评审产出的变体数，用于算每变体成本"""
+    if n <= 0:
+        return
+    with _LOCK:
+        _VARIANTS[purpose] = _VARIANTS.get(purpose, 0) + n
+    _ledger_insert("llm_variants", {"ts": time.time(), "purpose": purpose, "n_variants": n}, [("variants", "", purpose, "", n)])
+
+
+def reset() -> None:
+    with _LOCK:
+        _SERIES.clear()
+        _VARIANTS.clear()
+
+
+def snapshot() -> dict[str, Any]:
+    """进程内聚合的 JSON 视图（p95 按直方图估计）"""
+    with _LOCK:
+        series = []
+        for (model, purpose), s in sorted(_SERIES.items()):
+            series.append({
+                "model": model,
+                "purpose": purpose,
+                "requests": dict(s.requests),
+                "retries": s.retries,
+                "parse_failures": s.parse_failures,
+                "prompt_tokens": s.prompt_tokens,
+                "completion_tokens": s.completion_tokens,
+                "cache_hits": s.cache_hits,
+                "cost_usd": round(s.cost_usd, 6),
+                "p50_s": round(s.latency.quantile(0.5), 3),
+                "p95_s": round(s.latency.quantile(0.95), 3),
+            })
+        return {"series": series, "variants": dict(_VARIANTS)}
+
+
+def _format_prometheus(series: dict[tuple[str, str], _Series], variants: dict[str, int]) -> str:
+    counters = [
+        ("llm_retries_total", "Requests that were retries after a JSON parse failure.", lambda s: s.retries),
+        ("llm_json_parse_failures_total", "Responses that failed JSON parsing.", lambda s: s.parse_failures),
+        ("llm_prompt_tokens_total", "Prompt tokens reported by the provider.", lambda s: s.prompt_tokens),
+        ("llm_completion_tokens_total", "Completion tokens reported by the provider.", lambda s: s.completion_tokens),
+        ("llm_cached_prompt_tokens_total", "Prompt tokens served from the provider prompt cache.", lambda s: s.cached_tokens),
+        ("llm_cache_hits_total", "Requests with at least one cached prompt token.", lambda s: s.cache_hits),
+        ("llm_cost_usd_total", "Cost in USD.", lambda s: round(s.cost_usd, 9)),
+    ]
+    items = sorted(series.items())
+    lines = ["# HELP llm_requests_total LLM chat completion requests.", "# TYPE llm_requests_total counter"]
+    for (model, purpose), s in items:
+        for status, n in sorted(s.requests.items()):
+            lines.append(f"llm_requests_total{{{format_labels({'model': model, 'purpose': purpose, 'status': status})}}} {n}")
+    for metric, help_text, get in counters:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for (model, purpose), s in items:
+            lines.append(f"{metric}{{{format_labels({'model': model, 'purpose': purpose})}}} {get(s)}")
+    metric = "llm_request_duration_seconds"
+    lines += [f"# HELP {metric} LLM request latency in seconds.", f"# TYPE {metric} histogram"]
+    for (model, purpose), s in items:
+        lines += histogram_lines(metric, {"model": model, "purpose": purpose}, s.latency)
+    lines += ["# HELP llm_variants_total Variants generated or reviewed.", "# TYPE llm_variants_total counter"]
+    for purpose, n in sorted(variants.items()):
+        lines.append(f"llm_variants_total{{{format_labels({'purpose': purpose})}}} {n}")
+    return "\n".join(lines) + "\n"
+
+
+def prometheus_text() -> str:
+    """Prometheus 文本格式（仅本进程）：计数器按 (model, purpose) 打标签，耗时为直方图"""
+    with _LOCK:
+        return _format_prometheus(_SERIES, _VARIANTS)
+
+
+# -------- SQLite 账本 --------
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS llm_calls (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL, model TEXT, purpose TEXT, status TEXT, attempt INTEGER,
+        latency_s REAL, prompt_tokens INTEGER, completion_tokens INTEGER, cached_tokens INTEGER,
+        cache_hit INTEGER, cost_usd REAL, error TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_llm_calls_ts ON llm_calls(ts)",
+    """
+    CREATE TABLE IF NOT EXISTS llm_parse_failures (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL, model TEXT, purpose TEXT, attempt INTEGER, final INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS llm_variants (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL, purpose TEXT, n_variants INTEGER
+    )
+    """,
+)
+# 汇总行：series 为计数器名（latency_bucket_<i> 为第 i 个耗时桶，末桶 = +Inf），value 只增不减
+_ROLLUP_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS llm_rollup (
+        series TEXT, model TEXT, purpose TEXT, status TEXT, value REAL,
+        PRIMARY KEY (series, model, purpose, status)
+    )
+"""
+_ROLLUP_UPSERT = (
+    "INSERT INTO llm_rollup (series, model, purpose, status, value) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(series, model, purpose, status) DO UPDATE SET value = value + excluded.value"
+)
+_ROLLUP_CALL_SERIES = (
+    ("requests", "COUNT(*)"),
+    ("retries", "SUM(attempt > 0)"),
+    ("prompt_tokens", "SUM(prompt_tokens)"),
+    ("completion_tokens", "SUM(completion_tokens)"),
+    ("cached_tokens", "SUM(cached_tokens)"),
+    ("cache_hits", "SUM(cache_hit)"),
+    ("cost_usd", "SUM(cost_usd)"),
+    ("latency_sum", "SUM(latency_s)"),
+)
+_LEDGER_LOCK = threading.Lock()
+_ledger_ready: set[str] = set()
+
+
+def ledger_available(path: Path | None = None) -> bool:
+    """账本开启且文件已存在（读接口据此返回空结果，不会顺手建库）"""
+    return LEDGER_ENABLED and Path(path or LEDGER_PATH).exists()
+
+
+def _get_conn(path: Path | None = None) -> sqlite3.Connection:
+    path = Path(path or LEDGER_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=10.0)
+    conn.row_factory = sqlite3.Row
+    if str(path) not in _ledger_ready:
+        conn.execute("PRAGMA journal_mode=WAL")
+        for stmt in _SCHEMA:
+            conn.execute(stmt)
+        conn.execute(_ROLLUP_SCHEMA)
+        conn.commit()
+        _backfill_rollup(conn)
+        _ledger_ready.add(str(path))
+    return conn
+
+
+def _backfill_rollup(conn: sqlite3.Connection) -> None:
+    """汇总表为空而明细非空（旧账本）时，从明细一次性补齐；BEGIN IMMEDIATE 防止多进程重复补"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        empty = conn.execute("SELECT 1 FROM llm_rollup LIMIT 1").fetchone() is None
+        if empty:
+            for series, expr in _ROLLUP_CALL_SERIES:
+                conn.execute(
+                    "INSERT INTO llm_rollup (series, model, purpose, status, value) "
+                    f"SELECT ?, model, purpose, status, {expr} FROM llm_calls GROUP BY model, purpose, status",
+                    (series,),
+                )
+            cases = " ".join(f"WHEN latency_s <= ? THEN {i}" for i in range(len(LATENCY_BUCKETS)))
+            conn.execute(
+                "INSERT INTO llm_rollup (series, model, purpose, status, value) "
+                "SELECT 'latency_bucket_' || b, model, purpose, status, COUNT(*) FROM ("
+                f"SELECT model, purpose, status, CASE {cases} ELSE {len(LATENCY_BUCKETS)} END AS b FROM llm_calls"
+                ") GROUP BY model, purpose, status, b",
+                LATENCY_BUCKETS,
+            )
+            conn.execute(
+                "INSERT INTO llm_rollup (series, model, purpose, status, value) "
+                "SELECT 'parse_failures', model, purpose, '', COUNT(*) FROM llm_parse_failures GROUP BY model, purpose"
+            )
+            conn.execute(
+                "INSERT INTO llm_rollup (series, model, purpose, status, value) "
+                "SELECT 'variants', '', purpose, '', SUM(n_variants) FROM llm_variants GROUP BY purpose"
+            )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def _ledger_insert(table: str, row: dict[str, Any], rollup: list[tuple[Any, ...]] = ()) -> None:
+    """写一条明细，并在同一事务里累加 llm_rollup"""
+    if not LEDGER_ENABLED:
+        return
+    cols = ", ".join(row)
+    marks = ", ".join("?" for _ in row)
+    try:
+        with _LEDGER_LOCK:
+            conn = _get_conn()
+            try:
+                conn.execute(f"INSERT INTO {table} ({cols}) VALUES ({marks})", list(row.values()))
+                conn.executemany(_ROLLUP_UPSERT, rollup)
+                conn.commit()
+            finally:
+                conn.close()
+    except sqlite3.Error:
+        # 账本写失败不影响业务调用
+        pass
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def ledger_summary(*, since: float | None = None, path: Path | None = None) -> dict[str, Any]:
+    """
+    账本汇总（精确分位数）：按用途给出请求数、吞吐（次/分钟）、p50/p95 耗时、token、缓存命中率、
+    解析失败、费用，以及每个生成 / 评审变体的成本。since 为 unix 时间戳下限。
+    账本关闭（LLM_LEDGER=0）或尚未生成时返回空字典。
+    """
+    if not ledger_available(path):
+        return {}
+    since = since or 0.0
+    conn = _get_conn(path)
+    try:
+        calls = conn.execute(
+            "SELECT purpose, status, attempt, latency_s, prompt_tokens, completion_tokens, cache_hit, cost_usd, ts "
+            "FROM llm_calls WHERE ts >= ? ORDER BY ts",
+            (since,),
+        ).fetchall()
+        failures = dict(conn.execute(
+            "SELECT purpose, COUNT(*) FROM llm_parse_failures WHERE ts >= ? GROUP BY purpose", (since,)
+        ).fetchall())
+        variants = dict(conn.execute(
+            "SELECT purpose, SUM(n_variants) FROM llm_variants WHERE ts >= ? GROUP BY purpose", (since,)
+        ).fetchall())
+    finally:
+        conn.close()
+
+    by_purpose: dict[str, list[sqlite3.Row]] = {}
+    for row in calls:
+        by_purpose.setdefault(row["purpose"], []).append(row)
+    out: dict[str, Any] = {}
+    for purpose in sorted(set(by_purpose) | set(variants)):
+        rows = by_purpose.get(purpose, [])
+        latencies = sorted(r["latency_s"] for r in rows)
+        span_min = (rows[-1]["ts"] - rows[0]["ts"]) / 60 if len(rows) > 1 else 0.0
+        cost = sum(r["cost_usd"] for r in rows)
+        n_variants = int(variants.get(purpose) or 0)
+        out[purpose] = {
+            "requests": len(rows),
+            "errors": sum(r["status"] != "ok" for r in rows),
+            "retries": sum(r["attempt"] > 0 for r in rows),
+            "parse_failures": int(failures.get(purpose) or 0),
+            "throughput_per_min": round(len(rows) / span_min, 3) if span_min else None,
+            "p50_s": round(_percentile(latencies, 0.5), 3),
+            "p95_s": round(_percentile(latencies, 0.95), 3),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in rows),
+            "completion_tokens": sum(r["completion_tokens"] for r in rows),
+            "cache_hit_rate": round(sum(r["cache_hit"] for r in rows) / len(rows), 4) if rows else 0.0,
+            "cost_usd": round(cost, 6),
+            "variants": n_variants,
+            "cost_per_variant_usd": round(cost / n_variants, 6) if n_variants else None,
+        }
+    return out
+
+
+def _series_from_row(series: dict[tuple[str, str], _Series], model: str, purpose: str) -> _Series:
+    s = series.get((model, purpose))
+    if s is None:
+        s = series[(model, purpose)] = _Series()
+    return s
+
+
+def ledger_prometheus_text(path: Path | None = None) -> str:
+    """
+    从账本重建 prometheus_text() 的全部序列（所有进程、重启后累计）；只读 llm_rollup 汇总行。
+    账本关闭时退回本进程聚合，尚未生成时输出空序列。
+    """
+    if not LEDGER_ENABLED:
+        return prometheus_text()
+    series: dict[tuple[str, str], _Series] = {}
+    variants: dict[str, int] = {}
+    if ledger_available(path):
+        conn = _get_conn(path)
+        try:
+            rows = conn.execute("SELECT series, model, purpose, status, value FROM llm_rollup").fetchall()
+        finally:
+            conn.close()
+        for name, model, purpose, status, value in rows:
+            if name == "variants":
+                variants[purpose] = variants.get(purpose, 0) + int(value)
+                continue
+            s = series.get((model, purpose))
+            if s is None:
+                s = series[(model, purpose)] = _Series()
+            if name == "requests":
+                s.requests[status] = s.requests.get(status, 0) + int(value)
+            elif name.startswith("latency_bucket_"):
+                i = min(int(name.rsplit("_", 1)[1]), len(LATENCY_BUCKETS))
+                s.latency.buckets[i] += int(value)
+                s.latency.count += int(value)
+            elif name == "latency_sum":
+                s.latency.total += value
+            elif name == "cost_usd":
+                s.cost_usd += value
+            elif name in ("retries", "parse_failures", "prompt_tokens", "completion_tokens", "cached_tokens", "cache_hits"):
+                setattr(s, name, getattr(s, name) + int(value))
+    return _format_prometheus(series, variants)
@@ -0,0 +1,313 @@
+"""
+小时级指标时序库：每个 (card, variant, os) 一条按小时对齐的稠密序列 + 前缀和，
+任意时间段的汇总 = 两次前缀和相减（O(1)），Validate Gate 的窗口输入按需生成，O(窗口数)。
+
+- 写入：add(card, variant, os, ts, impressions=…, …)，按时间顺序追加时前缀和 O(1) 增量维护；
+  乱序写入只把前缀和标脏，下次查询时从最早的脏位置重算
+- 窗口：tumbling（T1/T2/… 首尾相接）、sliding（固定长度按步长滑动）、spans（任意区间）
+- validate_inputs / evaluate_validate：直接产出 evaluate_validate_gate 的参数与结果
+- 持久化：knowledge_store 的 metrics_hourly 表（save_to_db / load_from_db）
+
+os 传 "all" 时查询合并全部 OS 的序列。
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Any, Iterable
+
+from validate_gate import ValidateGateConfig, ValidateGateResult, WindowMetrics, evaluate_validate_gate
+
+FIELDS = ("impressions", "clicks", "installs", "spend", "early_events", "early_revenue")
+INT_FIELDS = frozenset(("impressions", "clicks", "installs", "early_events"))
+HOUR = 3600
+OS_ALL = "all"
+
+SeriesKey = tuple[str, str, str]  # (card_id, variant_id, os)
+Span = tuple[int, int]  # [start_hour, end_hour)，小时为 epoch 小时序号
+
+
+def hour_of(ts: float) -> int:
+    return int(math.floor(float(ts) / HOUR))
+
+
+@dataclass
+class _Series:
+    """稠密小时序列：values[f][i] 为 start + i 小时的值，prefix[f][i] 为前 i 小时之和"""
+
+    start: int
+    values: dict[str, list[float]] = field(default_factory=lambda: {f: [] for f in FIELDS})
+    prefix: dict[str, list[float]] = field(default_factory=lambda: {f: [0.0] for f in FIELDS})
+    dirty_from: int | None = None  # 前缀和需从该下标起重算
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.values[FIELDS[0]])
+
+    def add(self, hour: int, amounts: dict[str, float]) -> None:
+        if hour < self.start:
+            pad = self.start - hour
+            for f in FIELDS:
+                self.values[f][:0] = [0.0] * pad
+            self.start = hour
+            self.dirty_from = 0
+        i = hour - self.start
+        n = len(self.values[FIELDS[0]])
+        if i >= n:
+            grow = i + 1 - n
+            for f in FIELDS:
+                self.values[f].extend([0.0] * grow)
+                if self.dirty_from is None:
+                    last = self.prefix[f][-1]
+                    self.prefix[f].extend([last] * grow)
+        for f in FIELDS:
+            self.values[f][i] += amounts.get(f, 0.0)
+        if self.dirty_from is None and i == len(self.values[FIELDS[0]]) - 1:
+            # 追加到末尾：只改最后一个前缀和
+            for f in FIELDS:
+                self.prefix[f][i + 1] = self.prefix[f][i] + self.values[f][i]
+        else:
+            self.dirty_from = i if self.dirty_from is None else min(self.dirty_from, i)
+
+    def _ensure_prefix(self) -> None:
+        """只重算 dirty_from 之后的前缀和：prefix[:dirty_from + 1] 只依赖未改动的值"""
+        d = self.dirty_from
+        if d is None:
+            return
+        for f in FIELDS:
+            p = self.prefix[f]
+            base = p[d]
+            del p[d:]
+            p.extend(accumulate(self.values[f][d:], initial=base))
+        self.dirty_from = None
+
+    def sum(self, start: int, end: int) -> dict[str, float]:
+        """[start, end) 小时之和，越界部分按 0"""
+        self._ensure_prefix()
+        lo = min(max(start - self.start, 0), self.end - self.start)
+        hi = min(max(end - self.start, 0), self.end - self.start)
+        if hi <= lo:
+            return {f: 0.0 for f in FIELDS}
+        return {f: self.prefix[f][hi] - self.prefix[f][lo] for f in FIELDS}
+
+
+def to_window_metrics(window_id: str, totals: dict[str, float]) -> WindowMetrics:
+    imp = int(round(totals["impressions"]))
+    inst = int(round(totals["installs"]))
+    spend = round(totals["spend"], 2)
+    revenue = round(totals["early_revenue"], 2)
+    return WindowMetrics(
+        window_id=window_id,
+        impressions=imp,
+        clicks=int(round(totals["clicks"])),
+        installs=inst,
+        spend=spend,
+        early_events=int(round(totals["early_events"])),
+        early_revenue=revenue,
+        ipm=round(inst / imp * 1000, 2) if imp else 0.0,
+        cpi=round(spend / inst, 2) if inst else 0.0,
+        early_roas=round(revenue / spend, 4) if spend > 0 else 0.0,
+    )
+
+
+class HourlyMetricsStore:
+    """按 (card, variant, os) 存小时序列，窗口汇总走前缀和"""
+
+    def __init__(self) -> None:
+        self._series: dict[SeriesKey, _Series] = {}
+        self._by_variant: dict[tuple[str, str], list[str]] = {}  # (card, variant) -> os 列表
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def keys(self) -> list[SeriesKey]:
+        return list(self._series)
+
+    # ---- 写入 ----
+
+    def add(self, card_id: str, variant_id: str, os: str, ts: float, **amounts: float) -> None:
+        """ts 为 epoch 秒；amounts 取 FIELDS 中的字段（增量）"""
+        self.add_hour(card_id, variant_id, os, hour_of(ts), amounts)
+
+    def add_hour(self, card_id: str, variant_id: str, os: str, hour: int, amounts: dict[str, float]) -> None:
+        key = (card_id, variant_id, os)
+        s = self._series.get(key)
+        if s is None:
+            s = self._series[key] = _Series(start=hour)
+            self._by_variant.setdefault((card_id, variant_id), []).append(os)
+        s.add(hour, amounts)
+
+    def add_metrics(self, card_id: str, ts: float, m: Any) -> None:
+        """吃入一条 SimulatedMetrics / WindowMetrics 形状的小时汇总（需有 variant_id、os）"""
+        self.add(
+            card_id,
+            getattr(m, "variant_id"),
+            getattr(m, "os"),
+            ts,
+            **{f: float(getattr(m, f, 0) or 0) for f in FIELDS},
+        )
+
+    # ---- 查询 ----
+
+    def _series_for(self, card_id: str, variant_id: str, os: str) -> list[_Series]:
+        if os == OS_ALL:
+            return [self._series[(card_id, variant_id, o)] for o in self._by_variant.get((card_id, variant_id), [])]
+        s = self._series.get((card_id, variant_id, os))
+        return [s] if s is not None else []
+
+    def extent(self, card_id: str, variant_id: str, os: str = OS_ALL) -> Span | None:
+        """有数据的小时范围 [start, end)"""
+        ss = self._series_for(card_id, variant_id, os)
+        if not ss:
+            return None
+        return min(s.start for s in ss), max(s.end for s in ss)
+
+    def total(self, card_id: str, variant_id: str, os: str, start: int, end: int) -> dict[str, float]:
+        out = {f: 0.0 for f in FIELDS}
+        for s in self._series_for(card_id, variant_id, os):
+            part = s.sum(start, end)
+            for f in FIELDS:
+                out[f] += part[f]
+        return out
+
+    def windows(
+        self,
+        card_id: str,
+        variant_id: str,
+        spans: Iterable[Span],
+        *,
+        os: str = OS_ALL,
+        names: Iterable[str] | None = None,
+    ) -> list[WindowMetrics]:
+        spans = list(spans)
+        labels = list(names) if names is not None else [f"T{i + 1}" for i in range(len(spans))]
+        return [
+            to_window_metrics(label, self.total(card_id, variant_id, os, a, b))
+            for label, (a, b) in zip(labels, spans)
+        ]
+
+    def tumbling(
+        self,
+        card_id: str,
+        variant_id: str,
+        size_hours: int,
+        *,
+        os: str = OS_ALL,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> list[WindowMetrics]:
+        """首尾相接的 T1/T2/…；默认覆盖全部数据，最后一个窗口可能不满"""
+        return self.windows(card_id, variant_id, self.tumbling_spans(card_id, variant_id, size_hours, os=os, start=start, end=end), os=os)
+
+    def tumbling_spans(self, card_id: str, variant_id: str, size_hours: int, *, os: str = OS_ALL, start: int | None = None, end: int | None = None) -> list[Span]:
+        ext = self.extent(card_id, variant_id, os)
+        if ext is None or size_hours <= 0:
+            return []
+        a = ext[0] if start is None else start
+        b = ext[1] if end is None else end
+        return [(t, min(t + size_hours, b)) for t in range(a, b, size_hours)]
+
+    def sliding(
+        self,
+        card_id: str,
+        variant_id: str,
+        size_hours: int,
+        step_hours: int,
+        *,
+        os: str = OS_ALL,
+    ) -> list[WindowMetrics]:
+        """长度 size_hours、步长 step_hours 的滑动窗口（只保留完整窗口）"""
+        ext = self.extent(card_id, variant_id, os)
+        if ext is None or size_hours <= 0 or step_hours <= 0:
+            return []
+        spans = [(t, t + size_hours) for t in range(ext[0], ext[1] - size_hours + 1, step_hours)]
+        return self.windows(card_id, variant_id, spans, os=os, names=[f"S{i + 1}" for i in range(len(spans))])
+
+    def validate_inputs(
+        self,
+        card_id: str,
+        variant_id: str,
+        *,
+        n_windows: int = 2,
+        window_hours: int | None = None,
+        os: str = OS_ALL,
+        expand_variant_id: str | None = None,
+    ) -> tuple[list[WindowMetrics], WindowMetrics | None]:
+        """
+        取最近 n_windows 个首尾相接的窗口（window_hours 为空时把全部数据均分），
+        expand_variant_id 给出轻扩人群序列时，按同一时间段汇总为 expand_segment。
+        """
+        ext = self.extent(card_id, variant_id, os)
+        if ext is None or n_windows <= 0:
+            return [], None
+        a, b = ext
+        size = window_hours or max(1, math.ceil((b - a) / n_windows))
+        start = max(a, b - size * n_windows)
+        spans = [(t, min(t + size, b)) for t in range(start, b, size)][-n_windows:]
+        windows = self.windows(card_id, variant_id, spans, os=os, names=[f"window_{i + 1}" for i in range(len(spans))])
+        expand = None
+        if expand_variant_id:
+            totals = self.total(card_id, expand_variant_id, os, spans[0][0], spans[-1][1])
+            if totals["impressions"] > 0:
+                expand = to_window_metrics("expand_segment", totals)
+        return windows, expand
+
+    def evaluate_validate(
+        self,
+        card_id: str,
+        variant_id: str,
+        *,
+        config: ValidateGateConfig | None = None,
+        **kw: Any,
+    ) -> ValidateGateResult:
+        windows, expand = self.validate_inputs(card_id, variant_id, **kw)
+        return evaluate_validate_gate(windows, expand, config=config)
+
+    # ---- 持久化 ----
+
+    def save_to_db(self, conn: Any | None = None) -> int:
+        """写入 knowledge_store.metrics_hourly（同键覆盖），返回行数"""
+        import knowledge_store
+
+        own = conn is None
+        conn = conn or knowledge_store._get_conn()
+        try:
+            knowledge_store.init_schema(conn)
+            rows = []
+            for (card, vid, os), s in self._series.items():
+                for i in range(s.end - s.start):
+                    vals = [s.values[f][i] for f in FIELDS]
+                    if any(vals):
+                        rows.append((card, vid, os, s.start + i, *vals))
+            conn.executemany(
+                f"INSERT OR REPLACE INTO metrics_hourly (card_id, variant_id, os, hour, {', '.join(FIELDS)}) "
+                f"VALUES (?,?,?,?,{','.join('?' * len(FIELDS))})",
+                rows,
+            )
+            conn.commit()
+            return len(rows)
+        finally:
+            if own:
+                conn.close()
+
+    @classmethod
+    def load_from_db(cls, card_id: str | None = None, conn: Any | None = None) -> "HourlyMetricsStore":
+        import knowledge_store
+
+        own = conn is None
+        conn = conn or knowledge_store._get_conn()
+        try:
+            knowledge_store.init_schema(conn)
+            sql = f"SELECT card_id, variant_id, os, hour, {', '.join(FIELDS)} FROM metrics_hourly"
+            args: tuple = ()
+            if card_id:
+                sql += " WHERE card_id=?"
+                args = (card_id,)
+            store = cls()
+            for r in conn.execute(sql + " ORDER BY card_id, variant_id, os, hour", args):
+                store.add_hour(r[0], r[1], r[2], int(r[3]), dict(zip(FIELDS, r[4:])))
+            return store
+        finally:
+            if own:
+                conn.close()
@@ -1,13 +1,243 @@
 """
 OFAAT（One Factor At A Time）变体生成器。
 从 hook/sell_point/cta/asset 候选池生成变体，每个变体仅改一个元素。
+
+紧凑表示：OFAAT 变体与基线只差一个字段，CompactOfaatVariants 只存
+（改动字段码, 候选池下标）两个定长数组，按需再物化为 Variant；百万级变体也只占数 MB。
 """
 from __future__ import annotations
 
-from typing import Any
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Any, Iterator
 
 from eval_schemas import AssetVariables, Variant
 
+ASSET_KEYS = ("subtitle_template", "bgm", "rhythm", "shot_template")
+DEFAULT_ASSET_VALUES = {
+    "subtitle_template": "大字+高亮关键词",
+    "bgm": "电子/节奏感",
+    "rhythm": "快切，3秒一镜",
+    "shot_template": "游戏画面+字幕叠加",
+}
+EXPRESSION_TEMPLATE = "5镜头"
+
+# 改动字段码：0 基线，1 hook，2 sell_point，3 cta，4.. 对应 ASSET_KEYS
+FIELD_BASELINE = 0
+FIELD_HOOK = 1
+FIELD_SELL_POINT = 2
+FIELD_CTA = 3
+FIELD_ASSET0 = 4
+
+
+def _clean(values: list[str] | None) -> tuple[str, ...]:
+    return tuple(sys.intern(str(x).strip()) for x in (values or []) if x and str(x).strip())
+
+
+def _clip(s: str, width: int) -> str:
+    return f"{s[:width]}{'…' if len(s) > width else ''}"
+
+
+@dataclass(frozen=True)
+class OfaatPools:
+    """清洗后的候选池（字符串已驻留）；各池下标 0 为基线值"""
+
+    parent_card_id: str
+    hooks: tuple[str, ...]
+    sell_points: tuple[str, ...]
+    ctas: tuple[str, ...]
+    assets: dict[str, tuple[str, ...]]  # ASSET_KEYS -> 候选（可为空）
+    default_asset: AssetVariables
+
+    @classmethod
+    def build(
+        cls,
+        parent_card_id: str,
+        hook_types: list[str],
+        sell_points: list[str],
+        ctas: list[str],
+        asset_pool: dict[str, list[str]] | None = None,
+    ) -> "OfaatPools":
+        asset_pool = asset_pool or {}
+        ap = {k: tuple(sys.intern(x.strip()) for x in asset_pool.get(k, []) if x) for k in ASSET_KEYS}
+        # 默认资产（取各池首个，否则用默认）
+        default_asset = AssetVariables(**{k: ap[k][0] if ap[k] else DEFAULT_ASSET_VALUES[k] for k in ASSET_KEYS})
+        return cls(
+            parent_card_id=parent_card_id,
+            hooks=_clean(hook_types) or ("",),
+            sell_points=_clean(sell_points) or ("",),
+            ctas=_clean(ctas) or ("",),
+            assets=ap,
+            default_asset=default_asset,
+        )
+
+    def pool(self, code: int) -> tuple[str, ...]:
+        if code == FIELD_HOOK:
+            return self.hooks
+        if code == FIELD_SELL_POINT:
+            return self.sell_points
+        if code == FIELD_CTA:
+            return self.ctas
+        return self.assets[ASSET_KEYS[code - FIELD_ASSET0]]
+
+
+def iter_ofaat_deltas(pools: OfaatPools, n: int) -> Iterator[tuple[int, int]]:
+    """
+    按 OFAAT 规则依次产出 (改动字段码, 候选池下标)，首项为基线 (0, 0)。
+    规则：先轮完 hook，再 sell_point、cta，最后各素材变量轮流取下一个候选。
+    """
+    if n <= 0:
+        return
+    yield FIELD_BASELINE, 0
+    count = 1
+    for code in (FIELD_HOOK, FIELD_SELL_POINT, FIELD_CTA):
+        for idx in range(1, len(pools.pool(code))):
+            if count >= n:
+                return
+            yield code, idx
+            count += 1
+    asset_codes = [FIELD_ASSET0 + i for i, k in enumerate(ASSET_KEYS) if len(pools.assets[k]) > 1]
+    next_idx = {c: 1 for c in asset_codes}
+    while count < n and asset_codes:
+        for code in list(asset_codes):
+            if count >= n:
+                return
+            if next_idx[code] < len(pools.pool(code)):
+                yield code, next_idx[code]
+                next_idx[code] += 1
+                count += 1
+        asset_codes = [c for c in asset_codes if next_idx[c] < len(pools.pool(c))]
+
+
+class CompactOfaatVariants:
+    """
+    OFAAT 变体的紧凑序列：基线 + 每个变体一个 (字段码, 候选下标) 差量。
+    支持 len / 下标 / 迭代；取值时才物化为 Variant（不缓存，调用方按需持有）。
+    """
+
+    __slots__ = ("pools", "fields", "value_ids", "_baseline_desc")
+
+    def __init__(self, pools: OfaatPools, fields: array | None = None, value_ids: array | None = None) -> None:
+        self.pools = pools
+        self.fields = fields if fields is not None else array("B")
+        self.value_ids = value_ids if value_ids is not None else array("I")
+
+    @classmethod
+    def generate(cls, pools: OfaatPools, n: int = 12) -> "CompactOfaatVariants":
+        batch = cls(pools)
+        for code, idx in iter_ofaat_deltas(pools, n):
+            batch.fields.append(code)
+            batch.value_ids.append(idx)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def __iter__(self) -> Iterator[Variant]:
+        for i in range(len(self.fields)):
+            yield self.materialize(i)
+
+    def __getitem__(self, i: int) -> Variant:
+        if i < 0:
+            i += len(self.fields)
+        if not 0 <= i < len(self.fields):
+            raise IndexError(i)
+        return self.materialize(i)
+
+    @property
+    def nbytes(self) -> int:
+        """差量数组占用的字节数（不含共享的候选池）"""
+        return self.fields.itemsize * len(self.fields) + self.value_ids.itemsize * len(self.value_ids)
+
+    @staticmethod
+    def variant_id(i: int) -> str:
+        return f"v{i + 1:03d}"
+
+    def delta(self, i: int) -> tuple[str, str]:
+        """第 i 个变体的 (改动字段名, 新值)；基线为 ("", "")"""
+        code = self.fields[i]
+        if code == FIELD_BASELINE:
+            return "", ""
+        name = {FIELD_HOOK: "hook_type", FIELD_SELL_POINT: "sell_point", FIELD_CTA: "cta"}.get(code)
+        return name or ASSET_KEYS[code - FIELD_ASSET0], self.pools.pool(code)[self.value_ids[i]]
+
+    def materialize(self, i: int) -> Variant:
+        p = self.pools
+        code = self.fields[i]
+        val = p.pool(code)[self.value_ids[i]] if code != FIELD_BASELINE else ""
+        hook, sell, cta = p.hooks[0], p.sell_points[0], p.ctas[0]
+        asset = p.default_asset
+        if code == FIELD_BASELINE:
+            changed_field, delta_desc = "", "基线"
+        elif code == FIELD_HOOK:
+            changed_field, delta_desc = "hook_type", f"Hook: {hook} -> {val}"
+            hook = val
+        elif code == FIELD_SELL_POINT:
+            changed_field, delta_desc = "sell_point", f"卖点: {_clip(sell, 20)} -> {_clip(val, 20)}"
+            sell = val
+        elif code == FIELD_CTA:
+            changed_field, delta_desc = "cta", f"CTA: {cta} -> {val}"
+            cta = val
+        else:
+            key = ASSET_KEYS[code - FIELD_ASSET0]
+            old_val = getattr(asset, key)
+            asset = asset.model_copy(update={key: val})
+            changed_field, delta_desc = "asset_var", f"素材({key}): {_clip(old_val, 16)} -> {_clip(val, 16)}"
+        return Variant(
+            variant_id=self.variant_id(i),
+            parent_card_id=p.parent_card_id,
+            hook_type=hook,
+            sell_point=sell,
+            cta_type=cta,
+            expression_template=EXPRESSION_TEMPLATE,
+            asset_variables=asset,
+            why_you_expression=sell,
+            why_now_expression=sell,
+            changed_field=changed_field,
+            delta_desc=delta_desc,
+        )
+
+    def to_variants(self) -> list[Variant]:
+        return list(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        p = self.pools
+        return {
+            "parent_card_id": p.parent_card_id,
+            "hooks": list(p.hooks),
+            "sell_points": list(p.sell_points),
+            "ctas": list(p.ctas),
+            "assets": {k: list(v) for k, v in p.assets.items()},
+            "fields": self.fields.tolist(),
+            "value_ids": self.value_ids.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CompactOfaatVariants":
+        pools = OfaatPools.build(
+            data.get("parent_card_id", ""),
+            data.get("hooks", []),
+            data.get("sell_points", []),
+            data.get("ctas", []),
+            data.get("assets", {}),
+        )
+        return cls(pools, array("B", data.get("fields", [])), array("I", data.get("value_ids", [])))
+
+
+def compact_ofaat_variants(
+    parent_card_id: str,
+    hook_types: list[str],
+    sell_points: list[str],
+    ctas: list[str],
+    *,
+    n: int = 12,
+    asset_pool: dict[str, list[str]] | None = None,
+) -> CompactOfaatVariants:
+    """generate_ofaat_variants 的紧凑版：参数相同，物化结果逐个相同"""
+    pools = OfaatPools.build(parent_card_id, hook_types, sell_points, ctas, asset_pool)
+    return CompactOfaatVariants.generate(pools, n)
+
 
 def generate_ofaat_variants(
     parent_card_id: str,
@@ -30,177 +260,8 @@ def generate_ofaat_variants(
     - asset_pool: 可选，{"subtitle_template": [...], "bgm": [...], "rhythm": [...], "shot_template": [...]}
 
     规则：基线为各池首个；后续变体轮流改 hook/sell_point/cta/asset 中一个，保证 OFAAT。
+    大批量时用 compact_ofaat_variants，按需物化。
     """
-    hook_types = [h.strip() for h in hook_types if h and str(h).strip()]
-    sell_points = [s.strip() for s in sell_points if s and str(s).strip()]
-    ctas = [c.strip() for c in ctas if c and str(c).strip()]
-
-    if not hook_types:
-        hook_types = [""]
-    if not sell_points:
-        sell_points = [""]
-    if not ctas:
-        ctas = [""]
-
-    asset_pool = asset_pool or {}
-    ap = {
-        "subtitle_template": [x.strip() for x in asset_pool.get("subtitle_template", []) if x],
-        "bgm": [x.strip() for x in asset_pool.get("bgm", []) if x],
-        "rhythm": [x.strip() for x in asset_pool.get("rhythm", []) if x],
-        "shot_template": [x.strip() for x in asset_pool.get("shot_template", []) if x],
-    }
-    # 默认资产（取各池首个，否则用默认）
-    default_asset = AssetVariables(
-        subtitle_template=ap["subtitle_template"][0] if ap["subtitle_template"] else "大字+高亮关键词",
-        bgm=ap["bgm"][0] if ap["bgm"] else "电子/节奏感",
-        rhythm=ap["rhythm"][0] if ap["rhythm"] else "快切，3秒一镜",
-        shot_template=ap["shot_template"][0] if ap["shot_template"] else "游戏画面+字幕叠加",
-    )
-
-    baseline_hook = hook_types[0]
-    baseline_sell = sell_points[0]
-    baseline_cta = ctas[0]
-
-    variants: list[Variant] = []
-    vid = 1
-
-    def make_asset(
-        sub: str | None = None,
-        bgm: str | None = None,
-        rh: str | None = None,
-        shot: str | None = None,
-    ) -> AssetVariables:
-        return AssetVariables(
-            subtitle_template=sub if sub is not None else default_asset.subtitle_template,
-            bgm=bgm if bgm is not None else default_asset.bgm,
-            rhythm=rh if rh is not None else default_asset.rhythm,
-            shot_template=shot if shot is not None else default_asset.shot_template,
-        )
-
-    # 基线（v001）
-    variants.append(
-        Variant(
-            variant_id="v001",
-            parent_card_id=parent_card_id,
-            hook_type=baseline_hook,
-            sell_point=baseline_sell,
-            cta_type=baseline_cta,
-            expression_template="5镜头",
-            asset_variables=default_asset,
-            why_you_expression=baseline_sell,
-            why_now_expression=baseline_sell,
-            changed_field="",
-            delta_desc="基线",
-        )
-    )
-    vid += 1
-
-    # OFAAT：轮流改 hook / sell_point / cta / asset
-    hook_idx = 1
-    sell_idx = 1
-    cta_idx = 1
-    asset_keys = [k for k, v in ap.items() if len(v) > 1]
-    asset_key_idx = 0
-    asset_val_idx = {k: 1 for k in asset_keys}
-
-    while len(variants) < n:
-        variant_id = f"v{vid:03d}"
-
-        # 轮转：优先 hook -> sell_point -> cta -> asset
-        if hook_idx < len(hook_types):
-            new_hook = hook_types[hook_idx]
-            v = Variant(
-                variant_id=variant_id,
-                parent_card_id=parent_card_id,
-                hook_type=new_hook,
-                sell_point=baseline_sell,
-                cta_type=baseline_cta,
-                expression_template="5镜头",
-                asset_variables=default_asset,
-                why_you_expression=baseline_sell,
-                why_now_expression=baseline_sell,
-                changed_field="hook_type",
-                delta_desc=f"Hook: {baseline_hook} -> {new_hook}",
-            )
-            variants.append(v)
-            hook_idx += 1
-        elif sell_idx < len(sell_points):
-            new_sell = sell_points[sell_idx]
-            v = Variant(
-                variant_id=variant_id,
-                parent_card_id=parent_card_id,
-                hook_type=baseline_hook,
-                sell_point=new_sell,
-                cta_type=baseline_cta,
-                expression_template="5镜头",
-                asset_variables=default_asset,
-                why_you_expression=new_sell,
-                why_now_expression=new_sell,
-                changed_field="sell_point",
-                delta_desc=f"卖点: {baseline_sell[:20]}{'…' if len(baseline_sell) > 20 else ''} -> {new_sell[:20]}{'…' if len(new_sell) > 20 else ''}",
-            )
-            variants.append(v)
-            sell_idx += 1
-        elif cta_idx < len(ctas):
-            new_cta = ctas[cta_idx]
-            v = Variant(
-                variant_id=variant_id,
-                parent_card_id=parent_card_id,
-                hook_type=baseline_hook,
-                sell_point=baseline_sell,
-                cta_type=new_cta,
-                expression_template="5镜头",
-                asset_variables=default_asset,
-                why_you_expression=baseline_sell,
-                why_now_expression=baseline_sell,
-                changed_field="cta",
-                delta_desc=f"CTA: {baseline_cta} -> {new_cta}",
-            )
-            variants.append(v)
-            cta_idx += 1
-        elif asset_keys:
-            any_added = False
-            for _ in range(len(asset_keys)):
-                key = asset_keys[asset_key_idx % len(asset_keys)]
-                vals = ap[key]
-                idx = asset_val_idx.get(key, 1)
-                if idx < len(vals):
-                    val = vals[idx]
-                    kw: dict[str, str] = {}
-                    if key == "subtitle_template":
-                        kw["sub"] = val
-                    elif key == "bgm":
-                        kw["bgm"] = val
-                    elif key == "rhythm":
-                        kw["rh"] = val
-                    elif key == "shot_template":
-                        kw["shot"] = val
-                    asset = make_asset(**kw) if kw else default_asset
-                    old_val = getattr(default_asset, key, "") if hasattr(default_asset, key) else (ap[key][0] if ap[key] else "")
-                    v = Variant(
-                        variant_id=variant_id,
-                        parent_card_id=parent_card_id,
-                        hook_type=baseline_hook,
-                        sell_point=baseline_sell,
-                        cta_type=baseline_cta,
-                        expression_template="5镜头",
-                        asset_variables=asset,
-                        why_you_expression=baseline_sell,
-                        why_now_expression=baseline_sell,
-                        changed_field="asset_var",
-                        delta_desc=f"素材({key}): {str(old_val)[:16]}{'…' if len(str(old_val)) > 16 else ''} -> {str(val)[:16]}{'…' if len(str(val)) > 16 else ''}",
-                    )
-                    variants.append(v)
-                    asset_val_idx[key] = idx + 1
-                    asset_key_idx += 1
-                    any_added = True
-                    break
-                asset_key_idx += 1
-            if not any_added:
-                break
-        else:
-            break
-
-        vid += 1
-
-    return variants[:n]
+    return compact_ofaat_variants(
+        parent_card_id, hook_types, sell_points, ctas, n=n, asset_pool=asset_pool
+    ).to_variants()
@@ -3,9 +3,14 @@ from __future__ import annotations
 
 import json
 import os
+import time
 from typing import Any, Tuple, Union
 
 import httpx
+
+from llm_metrics import LLMCall, record_call, record_parse_failure, usage_from_response
+from profiling import profiled
+
 # 本地可用 .env，云端依赖环境变量
 try:
     from dotenv import load_dotenv
@@ -43,15 +48,28 @@ def _get_model() -> str:
     return os.getenv("OPENROUTER_MODEL", "openai/gpt-4o-mini")
 
 
+@profiled("openrouter.chat")
+def _message_content(data: Any) -> str:
+    """choices[0].message.content；choices 缺失、为空或结构不符时返回空串（按 empty 记录）"""
+    choices = data.get("choices") if isinstance(data, dict) else None
+    first = choices[0] if isinstance(choices, list) and choices else None
+    message = first.get("message") if isinstance(first, dict) else None
+    content = message.get("content") if isinstance(message, dict) else None
+    return content if isinstance(content, str) else ""
+
+
 def chat_completion(
     messages: list[dict[str, str]],
     *,
     model: str | None = None,
     temperature: float = 0.7,
     max_tokens: int = 4096,
+    purpose: str = "chat",
+    attempt: int = 0,
 ) -> str:
     """
     调用 OpenRouter chat completions API，返回 assistant 的 content 文本。
+    每次请求的耗时 / token / 费用 / 状态上报 llm_metrics（purpose 区分生成、评审等用途，attempt 为重试序号）。
     """
     api_key = _get_api_key()
     model = model or _get_model()
@@ -67,14 +85,25 @@ def chat_completion(
         "messages": messages,
         "temperature": temperature,
         "max_tokens": max_tokens,
+        "usage": {"include": True},
     }
 
-    with httpx.Client(timeout=120.0) as client:
-        resp = client.post(url, headers=headers, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
-
-    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    t0 = time.perf_counter()
+    try:
+        with httpx.Client(timeout=120.0) as client:
+            resp = client.post(url, headers=headers, json=payload)
+            resp.raise_for_status()
+            data = resp.json()
+    except Exception as e:
+        status = "http_error" if isinstance(e, httpx.HTTPError) else "error"
+        record_call(LLMCall(model=model, purpose=purpose, status=status, latency_s=time.perf_counter() - t0,
+                            attempt=attempt, error=str(e)[:500]))
+        raise
+    latency = time.perf_counter() - t0
+
+    content = _message_content(data)
+    record_call(LLMCall(purpose=purpose, status="ok" if content else "empty", latency_s=latency, attempt=attempt,
+                        **usage_from_response(data if isinstance(data, dict) else {}, model)))
     if not content:
         raise ValueError("OpenRouter 返回空内容")
     return content.strip()
@@ -117,6 +146,7 @@ def _extract_json_text(content: str) -> str:
 JsonType = Union[dict[str, Any], list[Any]]
 
 
+@profiled("openrouter.chat_json")
 def chat_completion_json(
     messages: list[dict[str, str]],
     *,
@@ -125,6 +155,7 @@ def chat_completion_json(
     max_tokens: int = 4096,
     retry_on_parse_error: bool = True,
     return_raw: bool = False,
+    purpose: str = "chat",
 ) -> Union[JsonType, Tuple[JsonType, str]]:
     """
     调用 chat_completion，解析返回为 JSON。
@@ -132,12 +163,16 @@ def chat_completion_json(
     - 若 json.loads 失败且 retry_on_parse_error=True，则重试一次并附上「请只输出合法JSON」提示；
     - 重试后仍失败则抛出 JsonParseError。
     - return_raw=True 时返回 (parsed_json, raw_content) 方便在 UI 显示 Raw Output
+    - purpose 透传给 llm_metrics（如 generate / review / experiment），解析失败也按用途计数
     """
+    model = model or _get_model()
     msgs = messages
     last_raw = ""
 
     for attempt in range(2):
-        content = chat_completion(msgs, model=model, temperature=temperature, max_tokens=max_tokens)
+        content = chat_completion(
+            msgs, model=model, temperature=temperature, max_tokens=max_tokens, purpose=purpose, attempt=attempt
+        )
         last_raw = content
 
         json_text = _extract_json_text(content)
@@ -147,7 +182,9 @@ def chat_completion_json(
             return (parsed, content) if return_raw else parsed
 
         except json.JSONDecodeError as e:
-            if attempt == 0 and retry_on_parse_error:
+            will_retry = attempt == 0 and retry_on_parse_error
+            record_parse_failure(model, purpose, attempt=attempt, final=not will_retry)
+            if will_retry:
                 msgs = list(msgs) + [{"role": "user", "content": RETRY_MESSAGE}]
                 continue
 
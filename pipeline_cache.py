@@ -0,0 +1,152 @@
+"""
+决策看板 / 评测集的 Streamlit 缓存层。
+
+- 决策看板：st.cache_data，按 (vertical, card 版本, vertical_config 版本, 变体指纹) 显式取 key，
+  跨 session、跨 rerun 复用；返回值为副本，session 内改动互不影响
+- 评测集快照：st.cache_resource，按 (生成参数, vertical_config 版本) 只缓存 snapshot_id，
+  数据落盘为内存映射的列式快照（eval_snapshots），多个 session 共享；
+  session 里只存 id，看明细时按卡片下标从快照还原单条记录
+- 两类缓存都有 max_entries 上限（LRU 淘汰）；侧边栏「重新计算」清空全部缓存
+- 缓存未命中时，用 session 内按 (vertical, card_id) 保存的 DecisionBoardPipeline 增量计算，
+  只改了一个变体时只重跑该变体的模拟与所在 OS 的门禁
+- 本模块在页面启动时就被导入，计算模块（decision_pipeline 等）放到函数内按需导入
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import TYPE_CHECKING, Any
+
+import streamlit as st
+
+from vertical_config import get_config_version
+
+if TYPE_CHECKING:
+    from decision_pipeline import DecisionBoardPipeline
+    from eval_schemas import StrategyCard, Variant
+
+BOARD_CACHE_MAX_ENTRIES = 128
+EVAL_SET_CACHE_MAX_ENTRIES = 8
+PIPELINE_SESSION_KEY = "decision_pipelines"
+
+
+# -------- 显式 key --------
+
+
+def _digest(payload: Any) -> str:
+    blob = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def card_cache_key(card: StrategyCard) -> str:
+    """card 版本 key：card_id@version + 内容哈希（覆盖 sample 覆写、动机桶切换等）"""
+    return f"{card.card_id}@{card.version}:{_digest(card.model_dump())}"
+
+
+def variants_cache_key(variants: list[Variant]) -> str:
+    """变体指纹：按内容而非对象 id，重新生成出同样的变体可命中缓存"""
+    return _digest([v.model_dump() for v in variants])
+
+
+# -------- 决策看板 --------
+
+
+@st.cache_data(max_entries=BOARD_CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_board(
+    vertical: str,
+    card_key: str,
+    config_version: str,
+    variants_key: str,
+    _card: StrategyCard,
+    _variants: list[Variant],
+    _pipeline: DecisionBoardPipeline | None = None,
+) -> dict[str, Any]:
+    # 下划线参数不参与哈希，key 完全由前 4 个参数决定
+    from decision_pipeline import build_decision_board
+
+    return build_decision_board(_card, _variants, vertical=vertical, pipeline=_pipeline)
+
+
+def session_pipeline(vertical: str, card_id: str) -> DecisionBoardPipeline:
+    """当前 session 内 (vertical, card_id) 对应的增量计算引擎"""
+    from decision_pipeline import DecisionBoardPipeline
+
+    engines = st.session_state.setdefault(PIPELINE_SESSION_KEY, {})
+    key = (vertical, card_id)
+    if key not in engines:
+        engines[key] = DecisionBoardPipeline()
+    return engines[key]
+
+
+def cached_decision_board(
+    card: StrategyCard,
+    variants: list[Variant],
+    *,
+    vertical: str,
+) -> dict[str, Any]:
+    """build_decision_board 的缓存版本"""
+    return _cached_board(
+        vertical,
+        card_cache_key(card),
+        get_config_version(),
+        variants_cache_key(variants),
+        card,
+        variants,
+        session_pipeline(vertical, card.card_id),
+    )
+
+
+# -------- 评测集 --------
+
+
+def _snapshot_exists(snapshot_id: str) -> bool:
+    # 快照目录可能已被 prune_snapshots 淘汰，此时缓存的 id 作废并重新生成
+    from eval_snapshots import snapshot_exists
+
+    return snapshot_exists(snapshot_id)
+
+
+@st.cache_resource(max_entries=EVAL_SET_CACHE_MAX_ENTRIES, show_spinner=False, validate=_snapshot_exists)
+def _cached_eval_snapshot(n_cards: int, variants_per_card: int, config_version: str) -> str:
+    from eval_set_generator import generate_eval_set
+    from eval_snapshots import create_snapshot
+
+    return create_snapshot(generate_eval_set(n_cards=n_cards, variants_per_card=variants_per_card))
+
+
+@st.cache_resource(max_entries=EVAL_SET_CACHE_MAX_ENTRIES, show_spinner=False, validate=_snapshot_exists)
+def _cached_sampled_eval_snapshot(n: int, seed: str, variants_per_card: int, config_version: str) -> str:
+    from eval_set_generator import generate_eval_set_from_cards
+    from eval_snapshots import create_snapshot
+    from evalset_sampler import sample_structure_evalset
+
+    evalset = sample_structure_evalset(N=n, seed=seed)
+    return create_snapshot(generate_eval_set_from_cards(evalset.cards, variants_per_card=variants_per_card))
+
+
+def cached_eval_snapshot(n_cards: int, variants_per_card: int = 12) -> str:
+    """生成评测集并落成快照，返回 snapshot_id（records 不常驻内存）"""
+    return _cached_eval_snapshot(int(n_cards), int(variants_per_card), get_config_version())
+
+
+def cached_sampled_eval_snapshot(n: int = 80, *, seed: str = "evalset", variants_per_card: int = 12) -> str:
+    """分层抽样评测集的快照版本，返回 snapshot_id"""
+    return _cached_sampled_eval_snapshot(int(n), seed, int(variants_per_card), get_config_version())
+
+
+# -------- 控制 --------
+
+
+def clear_pipeline_caches() -> None:
+    """清空看板与评测集缓存（下一次 rerun 全量重算）"""
+    _cached_board.clear()
+    _cached_eval_snapshot.clear()
+    _cached_sampled_eval_snapshot.clear()
+    st.session_state.pop(PIPELINE_SESSION_KEY, None)
+
+
+def render_recompute_control(key: str = "pipeline_recompute") -> None:
+    """侧边栏「重新计算」按钮"""
+    if st.button("♻️ 重新计算", key=key, help="清空计算缓存并重新跑模拟/门禁/评分"):
+        clear_pipeline_caches()
+        st.rerun()
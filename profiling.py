@@ -0,0 +1,362 @@
+"""
+流水线分阶段计时：span 上下文管理器 / profiled 装饰器，关闭时近乎零开销。
+
+- 默认关闭：span() 返回共享的空对象，profiled 包装只多一次全局变量判断
+- enable()（或环境变量 PIPELINE_PROFILE=1 / trace）后按阶段名聚合直方图（Prometheus 风格累计桶）
+- enable(trace=True) 额外保留最近 TRACE_MAX_EVENTS 个事件，可导出 Chrome trace（chrome://tracing / Perfetto）
+- capture()：只收集当前线程在 with 块内的 span（Streamlit 每个 session 的 rerun 在自己的线程里），
+  不依赖全局开关，用于页面内「本次 rerun 各阶段耗时」面板
+- 导出：stats() / write_json()、chrome_trace() / write_chrome_trace()、prometheus_text()
+
+阶段名约定：simulate、gate.explore、gate.validate、scoring.*、element_scores、suggestions、
+diagnosis、knowledge_store.*、openrouter.*；嵌套 span 的 self_ms 扣除了子 span 耗时。
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# 秒；与 Prometheus 客户端默认桶同量级，向下补到 100µs
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TRACE_MAX_EVENTS = 100_000
+METRIC_NAME = "pipeline_stage_seconds"
+
+_ENABLED = False
+_TRACE = False
+_ACTIVE = 0  # _ENABLED + 打开中的 capture 数；为 0 时 span 直接短路
+_capture_count = 0
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+_HIST: dict[str, "Histogram"] = {}
+_EVENTS: deque = deque(maxlen=TRACE_MAX_EVENTS)
+_PID = os.getpid()
+_T0_NS = time.perf_counter_ns()
+
+
+class Histogram:
+    """秒级耗时直方图（非累计桶计数 + count/sum/min/max）；调用方负责加锁"""
+
+    __slots__ = ("bounds", "count", "total", "min", "max", "buckets")
+
+    def __init__(self, bounds: tuple[float, ...] = BUCKETS) -> None:
+        self.bounds = bounds
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(bounds) + 1)  # 最后一格为 +Inf
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        for i, le in enumerate(self.bounds):
+            if seconds <= le:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def quantile(self, q: float) -> float:
+        """按桶线性插值估计分位数（同 Prometheus histogram_quantile），结果夹在 [min, max]"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lo = 0.0
+        for i, n in enumerate(self.buckets):
+            hi = self.bounds[i] if i < len(self.bounds) else self.max
+            if n and seen + n >= rank:
+                est = lo + (hi - lo) * (rank - seen) / n
+                return min(max(est, self.min), self.max)
+            seen += n
+            lo = hi
+        return self.max
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """[(le, 累计计数), ...]，末项 le=+Inf"""
+        out, acc = [], 0
+        for le, n in zip([*self.bounds, "+Inf"], self.buckets):
+            acc += n
+            out.append((str(le), acc))
+        return out
+
+
+# -------- 开关 --------
+
+
+def _refresh_active() -> None:
+    global _ACTIVE
+    _ACTIVE = int(_ENABLED) + _capture_count
+
+
+def enable(*, trace: bool = False) -> None:
+    """打开全局聚合；trace=True 时同时记录 Chrome trace 事件"""
+    global _ENABLED, _TRACE
+    with _LOCK:
+        _ENABLED = True
+        _TRACE = trace
+        _refresh_active()
+
+
+def disable() -> None:
+    global _ENABLED, _TRACE
+    with _LOCK:
+        _ENABLED = False
+        _TRACE = False
+        _refresh_active()
+
+
+def is_enabled() -> bool:
+    return _ENABLED
+
+
+def reset() -> None:
+    """清空已聚合的直方图与 trace 事件"""
+    with _LOCK:
+        _HIST.clear()
+        _EVENTS.clear()
+
+
+# -------- span --------
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "t0", "children")
+
+    def __init__(self, name: str, args: dict[str, Any] | None) -> None:
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        stack = getattr(_LOCAL, "stack", None)
+        if stack is None:
+            stack = _LOCAL.stack = []
+        stack.append(self)
+        self.children = 0
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        dur = time.perf_counter_ns() - self.t0
+        stack = _LOCAL.stack
+        stack.pop()
+        if stack:
+            stack[-1].children += dur
+        _record(self.name, self.t0, dur, dur - self.children, self.args)
+
+
+def _record(name: str, t0: int, dur: int, self_ns: int, args: dict[str, Any] | None) -> None:
+    captures = getattr(_LOCAL, "captures", None)
+    if captures:
+        for c in captures:
+            c._add(name, dur, self_ns)
+    if not _ENABLED:
+        return
+    with _LOCK:
+        h = _HIST.get(name)
+        if h is None:
+            h = _HIST[name] = Histogram()
+        h.observe(dur / 1e9)
+        if _TRACE:
+            _EVENTS.append((name, t0, dur, threading.get_ident(), args))
+
+
+def span(name: str, **args: Any) -> Any:
+    """with span("simulate", n=12): ...；关闭时返回共享空对象"""
+    if not _ACTIVE:
+        return _NOOP
+    return _Span(name, args or None)
+
+
+def profiled(name: str | None = None) -> Callable[[F], F]:
+    """函数级 span；name 缺省为函数 __qualname__"""
+
+    def deco(fn: F) -> F:
+        stage = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*a: Any, **kw: Any) -> Any:
+            if not _ACTIVE:
+                return fn(*a, **kw)
+            with _Span(stage, None):
+                return fn(*a, **kw)
+
+        return wrapper  # type: ignore[return-value]
+
+    return deco
+
+
+# -------- 单次 rerun 收集 --------
+
+
+class StageTimings:
+    """capture() 收集到的各阶段耗时（当前线程）"""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, list[float]] = {}  # name → [次数, 总 ns, 自身 ns, 最大 ns]
+        self.wall_ns = 0
+
+    def _add(self, name: str, dur: int, self_ns: int) -> None:
+        s = self.stages.get(name)
+        if s is None:
+            self.stages[name] = [1, dur, self_ns, dur]
+        else:
+            s[0] += 1
+            s[1] += dur
+            s[2] += self_ns
+            s[3] = max(s[3], dur)
+
+    def rows(self) -> list[dict[str, Any]]:
+        """按自身耗时降序的表格行"""
+        out = [
+            {
+                "stage": name,
+                "calls": int(n),
+                "total_ms": round(total / 1e6, 2),
+                "self_ms": round(own / 1e6, 2),
+                "max_ms": round(mx / 1e6, 2),
+            }
+            for name, (n, total, own, mx) in self.stages.items()
+        ]
+        return sorted(out, key=lambda r: -r["self_ms"])
+
+    @property
+    def wall_ms(self) -> float:
+        return self.wall_ns / 1e6
+
+
+@contextmanager
+def capture() -> Iterator[StageTimings]:
+    """收集 with 块内当前线程的所有 span（不影响全局聚合）"""
+    global _capture_count
+    timings = StageTimings()
+    captures = getattr(_LOCAL, "captures", None)
+    if captures is None:
+        captures = _LOCAL.captures = []
+    captures.append(timings)
+    with _LOCK:
+        _capture_count += 1
+        _refresh_active()
+    t0 = time.perf_counter_ns()
+    try:
+        yield timings
+    finally:
+        timings.wall_ns = time.perf_counter_ns() - t0
+        captures.remove(timings)
+        with _LOCK:
+            _capture_count -= 1
+            _refresh_active()
+
+
+# -------- 导出 --------
+
+
+def stats() -> dict[str, dict[str, Any]]:
+    """{阶段: {count, total_s, mean_ms, min_ms, max_ms, p50_ms, p95_ms, p99_ms, buckets}}"""
+    with _LOCK:
+        out: dict[str, dict[str, Any]] = {}
+        for name, h in sorted(_HIST.items()):
+            out[name] = {
+                "count": h.count,
+                "total_s": round(h.total, 6),
+                "mean_ms": round(h.total / h.count * 1000, 3),
+                "min_ms": round(h.min * 1000, 3),
+                "max_ms": round(h.max * 1000, 3),
+                "p50_ms": round(h.quantile(0.5) * 1000, 3),
+                "p95_ms": round(h.quantile(0.95) * 1000, 3),
+                "p99_ms": round(h.quantile(0.99) * 1000, 3),
+                "buckets": dict(h.cumulative()),
+            }
+    return out
+
+
+def write_json(path: str | Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stats(), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def chrome_trace() -> dict[str, Any]:
+    """Chrome trace event 格式（ph=X 完整事件，时间单位 µs）"""
+    with _LOCK:
+        events = list(_EVENTS)
+    trace = []
+    for name, t0, dur, tid, args in events:
+        ev = {
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": (t0 - _T0_NS) / 1000,
+            "dur": dur / 1000,
+            "pid": _PID,
+            "tid": tid,
+        }
+        if args:
+            ev["args"] = {k: v if isinstance(v, (int, float, str, bool)) else str(v) for k, v in args.items()}
+        trace.append(ev)
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path: str | Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(), f, ensure_ascii=False)
+    return path
+
+
+def label_value(value: Any) -> str:
+    """Prometheus 标签值转义"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict[str, Any], **extra: Any) -> str:
+    items = {**labels, **extra}
+    return ",".join(f'{k}="{label_value(v)}"' for k, v in items.items())
+
+
+def histogram_lines(metric: str, labels: dict[str, Any], hist: Histogram) -> list[str]:
+    """一个直方图序列的 Prometheus 文本行（_bucket / _sum / _count）"""
+    lines = [f"{metric}_bucket{{{format_labels(labels, le=le)}}} {n}" for le, n in hist.cumulative()]
+    lines.append(f"{metric}_sum{{{format_labels(labels)}}} {hist.total:.9g}")
+    lines.append(f"{metric}_count{{{format_labels(labels)}}} {hist.count}")
+    return lines
+
+
+def prometheus_text(metric: str = METRIC_NAME) -> str:
+    """Prometheus 文本格式（histogram，stage 标签）"""
+    lines = [f"# HELP {metric} Pipeline stage latency in seconds.", f"# TYPE {metric} histogram"]
+    with _LOCK:
+        for name, h in sorted(_HIST.items()):
+            lines.extend(histogram_lines(metric, {"stage": name}, h))
+    return "\n".join(lines) + "\n"
+
+
+_env = os.getenv("PIPELINE_PROFILE", "").strip().lower()
+if _env in ("1", "true", "on", "trace"):
+    enable(trace=_env == "trace")
@@ -0,0 +1,61 @@
+"""
+老虎机预算分配示例：Top-Two Thompson vs 固定 min_spend + Explore Gate 的花费与选对率。
+"""
+import json
+from pathlib import Path
+
+from bandit_allocator import BanditAllocator, BanditConfig, MetricsEnvironment, compare_with_gate, run_bandit
+from ofaat_generator import generate_ofaat_variants
+from simulate_metrics import simulate_metrics
+
+try:
+    from path_config import SAMPLES_DIR
+except ImportError:
+    SAMPLES_DIR = Path(__file__).resolve().parent / "samples"
+OUTPUT_PATH = SAMPLES_DIR / "bandit_example_output.json"
+
+
+def main() -> None:
+    variants = generate_ofaat_variants(
+        "sc_bandit_demo",
+        ["反差", "冲突", "结果先行", "痛点", "爽点"],
+        ["上手快爽点前置", "福利多登录即送", "三分钟一局", "零氪也能赢"],
+        ["立即下载", "领福利", "马上开玩"],
+        n=12,
+    )
+    baseline = simulate_metrics(variants[0], "Android", baseline=True)
+    candidates = variants[1:]
+
+    # 1. 单次分配过程
+    cfg = BanditConfig(objective="composite", seed=7)
+    env = MetricsEnvironment(candidates, "Android", seed=7)
+    result = run_bandit(
+        BanditAllocator([v.variant_id for v in candidates], baseline=baseline, config=cfg),
+        env,
+        max_budget=len(candidates) * 500,
+    )
+    print("=" * 80)
+    print(f"赢家 {result.winner}（P(最优)={result.winner_p_best:.1%}），花费 {result.total_spend:.0f}，{result.stop_reason}")
+    print(f"{'variant':<8} {'spend':>8} {'IPM':>8} {'CPI':>8} {'P(best)':>8} {'P(>base)':>9}")
+    for a in sorted(result.arms, key=lambda x: -x.p_best):
+        print(f"{a.variant_id:<8} {a.spend:>8.0f} {a.ipm_mean:>8.2f} {a.cpi_mean:>8.2f} {a.p_best:>8.1%} {a.p_beat_baseline or 0:>9.1%}")
+
+    # 2. 多次模拟对比
+    comparisons = {obj: compare_with_gate(variants, trials=20, config=BanditConfig(objective=obj)) for obj in ("composite", "ipm", "cpi")}
+    print("=" * 80)
+    print(f"{'objective':<10} {'gate_spend':>10} {'bandit':>8} {'saved':>7} {'bandit_ok':>9} {'gate_ok':>8}")
+    for obj, c in comparisons.items():
+        print(f"{obj:<10} {c.gate_spend:>10.0f} {c.bandit_spend_mean:>8.0f} {c.spend_saved_pct:>6.1f}% "
+              f"{c.bandit_correct_rate:>9.0%} {c.gate_correct_rate:>8.0%}")
+
+    SAMPLES_DIR.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(
+            {"run": result.model_dump(), "comparisons": {k: v.model_dump() for k, v in comparisons.items()}},
+            f, ensure_ascii=False, indent=2,
+        )
+    print(f"\n已写入: {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""
+性能基准：python run_benchmarks.py [名称 ...]，不带参数时跑全部。
+每个基准打印一张表，结果同时写入 samples/benchmark_output.json。
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+try:
+    from path_config import SAMPLES_DIR
+except ImportError:
+    SAMPLES_DIR = Path(__file__).resolve().parent / "samples"
+
+BENCHMARKS: dict[str, Callable[[], list[dict[str, Any]]]] = {}
+
+
+def benchmark(name: str):
+    """注册基准函数：返回若干行 dict，每行一组参数的测量结果"""
+    def deco(fn: Callable[[], list[dict[str, Any]]]):
+        BENCHMARKS[name] = fn
+        return fn
+    return deco
+
+
+def _best_of(fn: Callable[[], Any], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _print_table(name: str, rows: list[dict[str, Any]]) -> None:
+    print(f"\n== {name} ==")
+    if not rows:
+        return
+    cols = list(rows[0])
+    widths = [max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in cols]
+    print("  ".join(c.rjust(w) for c, w in zip(cols, widths)))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).rjust(w) for c, w in zip(cols, widths)))
+
+
+# -------- 基准 --------
+
+
+def _make_variants(n: int) -> list[Any]:
+    from eval_schemas import Variant
+
+    hooks = ("反差", "冲突", "结果先行", "痛点", "爽点")
+    ctas = ("立即下载", "现在试试", "立即下单")
+    return [
+        Variant(
+            variant_id=f"v{i:05d}",
+            parent_card_id="bench",
+            hook_type=hooks[i % len(hooks)],
+            sell_point=f"卖点{i % 7}",
+            cta_type=ctas[i % len(ctas)],
+        )
+        for i in range(n)
+    ]
+
+
+def _make_cohort(n: int) -> list[Any]:
+    from simulate_metrics import simulate_metrics
+
+    out = []
+    for i, v in enumerate(_make_variants(n)):
+        for os in ("iOS", "Android"):
+            out.append(simulate_metrics(v, os, baseline=i == 0))
+    return out
+
+
+@benchmark("variant_scores")
+def bench_variant_scores() -> list[dict[str, Any]]:
+    """整组 variant_score：compute_variant_scores（O(N)）vs 逐条 compute_variant_score（O(N²)）"""
+    from scoring_eval import compute_variant_score, compute_variant_scores
+
+    rows = []
+    for n in (100, 250, 500, 1000, 2000, 5000):
+        cohort = _make_cohort(n)
+        t_new = _best_of(lambda: compute_variant_scores(cohort))
+        row: dict[str, Any] = {
+            "variants": n,
+            "rows": len(cohort),
+            "batch_ms": round(t_new * 1000, 2),
+            "batch_us_per_row": round(t_new * 1e6 / len(cohort), 2),
+        }
+        if n <= 1000:
+            t_old = _best_of(
+                lambda: [compute_variant_score(m, cohort, os=m.os) for m in cohort], repeat=1
+            )
+            row["per_row_ms"] = round(t_old * 1000, 1)
+            row["speedup"] = f"{t_old / t_new:.0f}x"
+        else:
+            row["per_row_ms"] = "-"
+            row["speedup"] = "-"
+        rows.append(row)
+    return rows
+
+
+@benchmark("streaming_scorer")
+def bench_streaming_scorer() -> list[dict[str, Any]]:
+    """StreamingVariantScorer：每行 update / score 的耗时不随已吃入行数增长"""
+    from scoring_eval import StreamingVariantScorer
+
+    cohort = _make_cohort(5000)
+    rows = []
+    for kind in ("minmax", "zscore", "winsorized", "percentile"):
+        scorer = StreamingVariantScorer(kind)
+        row: dict[str, Any] = {"normalizer": kind}
+        done = 0
+        for n in (1000, 4000, 10000):
+            batch = cohort[done:n]
+            t0 = time.perf_counter()
+            scorer.update_many(batch)
+            row[f"update_us@{n}"] = round((time.perf_counter() - t0) * 1e6 / len(batch), 2)
+            done = n
+        t0 = time.perf_counter()
+        for m in cohort[:2000]:
+            scorer.score(m)
+        row["score_us"] = round((time.perf_counter() - t0) * 1e6 / 2000, 2)
+        rows.append(row)
+    return rows
+
+
+@benchmark("element_scores")
+def bench_element_scores() -> list[dict[str, Any]]:
+    """元素贡献：逐元素列表聚合 vs 稀疏关联矩阵（同一输出）"""
+    from element_matrix import compute_element_scores_sparse
+    from element_scores import compute_element_scores
+    from eval_schemas import decompose_variant_to_element_tags
+
+    rows = []
+    for n in (100, 1000, 5000, 20000):
+        cohort = _make_cohort(n)
+        variants = _make_variants(n)
+        tags = {v.variant_id: decompose_variant_to_element_tags(v) for v in variants}
+        t_loop = _best_of(lambda: compute_element_scores(cohort, tags), repeat=1 if n > 5000 else 3)
+        t_sparse = _best_of(lambda: compute_element_scores_sparse(cohort, tags), repeat=1 if n > 5000 else 3)
+        rows.append({
+            "rows": len(cohort),
+            "loop_ms": round(t_loop * 1000, 1),
+            "sparse_ms": round(t_sparse * 1000, 1),
+            "speedup": f"{t_loop / t_sparse:.1f}x",
+        })
+    return rows
+
+
+@benchmark("decompose")
+def bench_decompose() -> list[dict[str, Any]]:
+    """元素拆解：每次新建 ElementTag vs 按内容键缓存（重复调用 / 大量同内容变体）"""
+    from element_index import clear_cache, element_tags
+    from eval_schemas import decompose_variant_to_element_tags
+
+    rows = []
+    for n in (1000, 10000, 50000):
+        variants = _make_variants(n)
+        t_plain = _best_of(lambda: [decompose_variant_to_element_tags(v) for v in variants])
+        clear_cache()
+        t0 = time.perf_counter()
+        for v in variants:
+            element_tags(v)
+        t_cold = time.perf_counter() - t0
+        t_warm = _best_of(lambda: [element_tags(v) for v in variants])
+        rows.append({
+            "variants": n,
+            "plain_ms": round(t_plain * 1000, 1),
+            "cached_cold_ms": round(t_cold * 1000, 1),
+            "cached_warm_ms": round(t_warm * 1000, 1),
+            "speedup_warm": f"{t_plain / t_warm:.1f}x",
+        })
+    return rows
+
+
+@benchmark("ofaat_compact")
+def bench_ofaat_compact() -> list[dict[str, Any]]:
+    """OFAAT：全量 Variant 列表 vs 紧凑差量表示（生成耗时与常驻内存）"""
+    import tracemalloc
+
+    from ofaat_generator import compact_ofaat_variants
+
+    rows = []
+    for n in (10000, 100000):
+        pools = ([f"h{i}" for i in range(n // 2)], [f"s{i}" for i in range(n // 2)], ["立即下载", "现在试试"])
+        row: dict[str, Any] = {"variants": n}
+        for label, fn in (
+            ("list", lambda: compact_ofaat_variants("bench", *pools, n=n).to_variants()),
+            ("compact", lambda: compact_ofaat_variants("bench", *pools, n=n)),
+        ):
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            obj = fn()
+            row[f"{label}_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            row[f"{label}_mb"] = round(tracemalloc.get_traced_memory()[0] / 1e6, 2)
+            tracemalloc.stop()
+            del obj
+        rows.append(row)
+    return rows
+
+
+@benchmark("timeseries_windows")
+def bench_timeseries_windows() -> list[dict[str, Any]]:
+    """Validate 窗口：按原始小时行重扫 vs 前缀和（HourlyMetricsStore）"""
+    from metrics_timeseries import FIELDS, HourlyMetricsStore, to_window_metrics
+
+    rows = []
+    for days in (7, 30, 180):
+        store = HourlyMetricsStore()
+        raw = []
+        for h in range(days * 24):
+            for os in ("iOS", "Android"):
+                amt = {"impressions": 1000 + h % 97, "clicks": 15, "installs": 20 + h % 7, "spend": 50.0}
+                store.add_hour("bench", "v001", os, h, amt)
+                raw.append((h, amt))
+
+        def rescan() -> list[Any]:
+            out = []
+            for i, t in enumerate(range(0, days * 24, 24)):
+                tot = {f: 0.0 for f in FIELDS}
+                for h, amt in raw:
+                    if t <= h < t + 24:
+                        for f, v in amt.items():
+                            tot[f] += v
+                out.append(to_window_metrics(f"T{i + 1}", tot))
+            return out
+
+        t_scan = _best_of(rescan, repeat=1 if days > 30 else 3)
+        t_prefix = _best_of(lambda: store.tumbling("bench", "v001", 24))
+        rows.append({
+            "hours": days * 24,
+            "windows": days,
+            "rescan_ms": round(t_scan * 1000, 2),
+            "prefix_ms": round(t_prefix * 1000, 2),
+            "speedup": f"{t_scan / t_prefix:.0f}x",
+        })
+    return rows
+
+
+@benchmark("validate_batch")
+def bench_validate_batch() -> list[dict[str, Any]]:
+    """Validate Gate：逐卡 evaluate_validate_gate vs cards × windows 张量批量（只取状态）"""
+    import random
+
+    from validate_batch import ValidateTensor, evaluate_validate_gate_batch
+    from validate_gate import WindowMetrics, evaluate_validate_gate
+
+    rng = random.Random(0)
+
+    def window(wid: str) -> WindowMetrics:
+        imp = rng.randint(5000, 50000)
+        inst = rng.randint(20, 300)
+        spend = round(rng.uniform(50, 500), 2)
+        return WindowMetrics(
+            window_id=wid, impressions=imp, installs=inst, spend=spend,
+            early_events=rng.randint(0, 50), ipm=round(inst / imp * 1000, 2),
+            cpi=round(spend / inst, 2), early_roas=round(rng.uniform(0, 1), 4),
+        )
+
+    rows = []
+    for n in (1000, 10000, 50000):
+        cards = [([window(f"window_{j + 1}") for j in range(3)], window("expand_segment")) for _ in range(n)]
+        tensor = ValidateTensor.from_cards(cards)
+        t_scalar = _best_of(lambda: [evaluate_validate_gate(ws, le).validate_status for ws, le in cards], repeat=1)
+        t_batch = _best_of(lambda: evaluate_validate_gate_batch(tensor).status)
+        rows.append({
+            "cards": n,
+            "scalar_ms": round(t_scalar * 1000, 1),
+            "batch_ms": round(t_batch * 1000, 2),
+            "speedup": f"{t_scalar / t_batch:.0f}x",
+        })
+    return rows
+
+
+IMPORT_TARGETS = ("app_demo", "pipeline_cache", "decision_pipeline", "eval_set_generator", "api.main")
+
+
+def _import_times(module: str) -> tuple[float, list[tuple[int, str]]]:
+    """子进程里 python -X importtime -c "import <module>"，返回 (累计 µs, [(自身 µs, 模块), ...])"""
+    import os
+    import subprocess
+
+    root = Path(__file__).resolve().parent
+    env = {**os.environ, "APP_WARMUP": "0", "PYTHONPATH": str(root)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root, env=env, capture_output=True, text=True, check=True,
+    )
+    cumulative = 0.0
+    selfs: list[tuple[int, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cum, name = line[len("import time:"):].split("|")
+        selfs.append((int(own), name.strip()))
+        if name.strip() == module:
+            cumulative = int(cum)
+    return cumulative, selfs
+
+
+_FIRST_RENDER_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+t0 = time.perf_counter()
+at.run()
+t1 = time.perf_counter()
+at.run()
+t2 = time.perf_counter()
+print(json.dumps({"first": t1 - t0, "rerun": t2 - t1, "exceptions": len(at.exception)}))
+"""
+
+
+def _first_render(warmup: bool) -> dict[str, Any]:
+    """子进程里用 AppTest 跑 streamlit_app.py：首次完整 rerun（含视图内按需导入）与第二次 rerun 的耗时"""
+    import os
+    import subprocess
+
+    root = Path(__file__).resolve().parent
+    env = {**os.environ, "APP_WARMUP": "1" if warmup else "0", "PYTHONPATH": str(root)}
+    proc = subprocess.run(
+        [sys.executable, "-c", _FIRST_RENDER_SCRIPT, str(root / "streamlit_app.py")],
+        cwd=root, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+@benchmark("import_time")
+def bench_import_time() -> list[dict[str, Any]]:
+    """
+    冷启动耗时：各入口模块的导入（-X importtime，每个目标取 3 次最小值；repo_ms 只计仓库内模块的自身耗时），
+    以及 AppTest 首次完整 rerun（first_run_ms，按需导入的成本落在这里）与第二次 rerun（rerun_ms），
+    分别在关闭 / 开启后台预热时测量。延迟导入缩短的是入口导入，首次渲染仍要付出计算模块的导入成本。
+    """
+    root = Path(__file__).resolve().parent
+    local = {p.stem for p in root.glob("*.py")} | {"api", "ui"}
+    rows = []
+    for module in IMPORT_TARGETS:
+        runs = [_import_times(module) for _ in range(3)]
+        cumulative, selfs = min(runs, key=lambda r: r[0])
+        repo = [(us, name) for us, name in selfs if name.split(".")[0] in local]
+        top = sorted(repo, reverse=True)[:3]
+        rows.append({
+            "module": module,
+            "total_ms": round(cumulative / 1000, 1),
+            "repo_ms": round(sum(us for us, _ in repo) / 1000, 1),
+            "repo_modules": len(repo),
+            "top_self": ", ".join(f"{name} {us / 1000:.1f}" for us, name in top),
+            "first_run_ms": "",
+            "rerun_ms": "",
+        })
+    for warmup in (False, True):
+        runs = [_first_render(warmup) for _ in range(3)]
+        best = min(runs, key=lambda r: r["first"])
+        rows.append({
+            "module": f"streamlit_app (AppTest, warmup={'on' if warmup else 'off'})",
+            "first_run_ms": round(best["first"] * 1000, 1),
+            "rerun_ms": round(best["rerun"] * 1000, 1),
+            "top_self": f"{best['exceptions']} exceptions" if best["exceptions"] else "",
+        })
+    return rows
+
+
+# -------- 入口 --------
+
+
+def main(argv: list[str]) -> int:
+    names = argv or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(f"未知基准：{', '.join(unknown)}；可选：{', '.join(BENCHMARKS)}")
+        return 2
+    results: dict[str, list[dict[str, Any]]] = {}
+    for name in names:
+        results[name] = BENCHMARKS[name]()
+        _print_table(name, results[name])
+    SAMPLES_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = SAMPLES_DIR / "benchmark_output.json"
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n已写入 {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,54 @@
+"""
+DOE 示例：同一组候选池分别用 OFAAT 与 正交表 / 部分因子 生成变体，
+模拟投放后一次性估计主效应与两两交互。
+"""
+import json
+from pathlib import Path
+
+from doe_generator import design_size, estimate_effects, generate_design_variants
+from ofaat_generator import generate_ofaat_variants
+from simulate_metrics import simulate_metrics
+
+try:
+    from path_config import SAMPLES_DIR
+except ImportError:
+    SAMPLES_DIR = Path(__file__).resolve().parent / "samples"
+OUTPUT_PATH = SAMPLES_DIR / "doe_example_output.json"
+
+HOOKS = ["反差", "冲突", "结果先行", "痛点"]
+SELL_POINTS = ["上手快爽点前置", "福利多登录即送", "三分钟一局", "关卡多不重样"]
+CTAS = ["立即下载", "领福利"]
+ASSET_POOL = {"bgm": ["电子/节奏感", "轻松休闲"]}
+
+
+def main() -> None:
+    ofaat = generate_ofaat_variants("sc_doe_demo", HOOKS, SELL_POINTS, CTAS, n=50, asset_pool=ASSET_POOL)
+    print(f"OFAAT：{len(ofaat)} 个变体，只能估计主效应")
+
+    output = {"description": "DOE 主效应 + 交互估计", "designs": {}}
+    for design in ("oa", "fractional", "full"):
+        variants = generate_design_variants("sc_doe_demo", HOOKS, SELL_POINTS, CTAS, design=design, asset_pool=ASSET_POOL)
+        metrics = [
+            simulate_metrics(v, os, baseline=(i == 0))
+            for i, v in enumerate(variants)
+            for os in ("iOS", "Android")
+        ]
+        report = estimate_effects(variants, metrics, metric="ipm", interactions=design == "full")
+        levels = [len(HOOKS), len(SELL_POINTS), len(CTAS), len(ASSET_POOL["bgm"])]
+        print("=" * 80)
+        print(f"{design}: 设计 {design_size(design, levels)} 次 / 去重后 {len(variants)} 个变体, "
+              f"n_obs={report.n_obs}, R²={report.r2}, 残差自由度={report.residual_dof}")
+        print(f"{'term':<48} {'estimate':>9} {'se':>8} {'n':>4}")
+        for e in sorted(report.effects, key=lambda x: -abs(x.estimate))[:8]:
+            se = f"{e.std_error:.3f}" if e.std_error is not None else "-"
+            print(f"{e.term[:48]:<48} {e.estimate:>+9.3f} {se:>8} {e.support:>4}")
+        output["designs"][design] = {"n_variants": len(variants), "report": report.model_dump()}
+
+    SAMPLES_DIR.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"\n已写入: {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+事件流接入示例：用模拟投放生成小时级事件 JSONL，分两批接入，第二批只刷新变动的键。
+"""
+import json
+import random
+import time
+from pathlib import Path
+
+from bandit_allocator import MetricsEnvironment
+from event_ingest import StreamIngestor
+from ofaat_generator import generate_ofaat_variants
+
+try:
+    from path_config import SAMPLES_DIR
+except ImportError:
+    SAMPLES_DIR = Path(__file__).resolve().parent / "samples"
+EVENTS_PATH = SAMPLES_DIR / "event_stream_example.jsonl"
+CHECKPOINT_PATH = SAMPLES_DIR / "event_ingest_checkpoint.json"
+
+T0 = 1718000000  # 2024-06-10 06:13 UTC
+
+
+def _write_events(path: Path, cards: list[str], hours: range, mode: str) -> int:
+    rng = random.Random(hours.start)
+    n = 0
+    with open(path, mode, encoding="utf-8") as f:
+        for card in cards:
+            variants = generate_ofaat_variants(card, ["反差", "冲突", "结果先行", "痛点"], ["上手快", "福利多", "三分钟"], ["立即下载", "领福利"], n=8)
+            for os in ("iOS", "Android"):
+                env = MetricsEnvironment(variants, os, seed=hours.start + len(card))
+                for hour in hours:
+                    for i, v in enumerate(variants):
+                        m = env.observe(v.variant_id, 60 if i == 0 else 20)
+                        base = {"ts": T0 + hour * 3600 + rng.randint(0, 3599), "card_id": card,
+                                "variant_id": v.variant_id, "os": os, "baseline": i == 0}
+                        for kind, count in (("impression", m.impressions), ("click", m.clicks), ("install", m.installs)):
+                            f.write(json.dumps({**base, "event": kind, "count": count}) + "\n")
+                        f.write(json.dumps({**base, "event": "spend", "value": m.spend}) + "\n")
+                        n += 4
+    return n
+
+
+def main() -> None:
+    SAMPLES_DIR.mkdir(parents=True, exist_ok=True)
+    CHECKPOINT_PATH.unlink(missing_ok=True)
+    cards = [f"sc_stream_{i:02d}" for i in range(10)]
+    _write_events(EVENTS_PATH, cards, range(0, 48), "w")
+
+    ing = StreamIngestor(window_seconds=86400, checkpoint_path=CHECKPOINT_PATH, checkpoint_every=20000)
+    t0 = time.perf_counter()
+    n = ing.ingest_file(EVENTS_PATH)
+    stats = ing.refresh()
+    print(f"第 1 批：{n} 个事件，{time.perf_counter() - t0:.2f}s，刷新 {stats}")
+
+    # 第 2 批：只有两张卡片有新数据
+    _write_events(EVENTS_PATH, cards[:2], range(48, 50), "a")
+    t0 = time.perf_counter()
+    n = ing.ingest_file(EVENTS_PATH)
+    stats = ing.refresh()
+    print(f"第 2 批：{n} 个事件，{time.perf_counter() - t0:.3f}s，刷新 {stats}")
+    ing.save_checkpoint()
+
+    print("=" * 80)
+    for (card, os), res in sorted(ing.explore_results.items())[:6]:
+        print(f"{card:<14} {os:<8} explore={res.gate_status:<12} eligible={res.eligible_variants}")
+    for (card, vid), res in sorted(ing.validate_results.items())[:4]:
+        print(f"{card:<14} {vid:<8} validate={res.validate_status}  windows={len(res.detail_rows)}")
+    print(f"\n检查点: {CHECKPOINT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
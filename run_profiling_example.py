@@ -0,0 +1,47 @@
+"""
+分阶段计时示例：打开 profiling，跑一次评测集生成 + 决策看板，
+打印各阶段直方图摘要，并导出 JSON / Chrome trace / Prometheus 文本。
+"""
+from pathlib import Path
+
+import profiling
+from decision_pipeline import build_decision_board
+from eval_schemas import StrategyCard, Variant
+from eval_set_generator import generate_eval_set
+
+try:
+    from path_config import SAMPLES_DIR
+except ImportError:
+    SAMPLES_DIR = Path(__file__).resolve().parent / "samples"
+OUTPUT_PATH = SAMPLES_DIR / "profiling_example_output.json"
+TRACE_PATH = SAMPLES_DIR / "profiling_example_trace.json"
+PROM_PATH = SAMPLES_DIR / "profiling_example_metrics.prom"
+
+
+def main() -> None:
+    profiling.enable(trace=True)
+    records = generate_eval_set(n_cards=60, variants_per_card=12)
+
+    r = records[0]
+    card = StrategyCard.model_validate(r.card.model_dump())
+    variants = [Variant.model_validate(v.model_dump()) for v in r.variants]
+    with profiling.capture() as timings:
+        build_decision_board(card, variants, vertical=card.vertical)
+
+    print("=" * 80)
+    print(f"{'阶段':<24} {'次数':>6} {'均值(ms)':>10} {'p95(ms)':>10} {'最大(ms)':>10}")
+    for name, s in profiling.stats().items():
+        print(f"{name:<24} {s['count']:>6} {s['mean_ms']:>10.3f} {s['p95_ms']:>10.3f} {s['max_ms']:>10.3f}")
+
+    print(f"\n单次决策看板（{timings.wall_ms:.1f}ms）：")
+    for row in timings.rows():
+        print(f"  {row['stage']:<24} ×{row['calls']:<4} 自身 {row['self_ms']:>8.2f}ms  含子阶段 {row['total_ms']:>8.2f}ms")
+
+    profiling.write_json(OUTPUT_PATH)
+    profiling.write_chrome_trace(TRACE_PATH)
+    PROM_PATH.write_text(profiling.prometheus_text(), encoding="utf-8")
+    print(f"\n已写入: {OUTPUT_PATH}\n        {TRACE_PATH}（chrome://tracing 打开）\n        {PROM_PATH}")
+
+
+if __name__ == "__main__":
+    main()
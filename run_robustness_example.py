@@ -0,0 +1,46 @@
+"""
+Gate 稳健性示例：对评测集每张卡片做 K=1000 次重模拟，看结论有多「脆」、误晋级率多高。
+"""
+import json
+import time
+from pathlib import Path
+
+from eval_set_generator import generate_eval_set
+from gate_robustness import RobustnessConfig, eval_set_robustness
+
+try:
+    from path_config import SAMPLES_DIR
+except ImportError:
+    SAMPLES_DIR = Path(__file__).resolve().parent / "samples"
+OUTPUT_PATH = SAMPLES_DIR / "robustness_example_output.json"
+
+
+def main() -> None:
+    records = generate_eval_set(n_cards=40, variants_per_card=12)
+    cfg = RobustnessConfig(n_seeds=1000)
+    t0 = time.perf_counter()
+    report = eval_set_robustness(records, config=cfg)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 80)
+    print(f"{report.n_cards} 张卡片 × {report.n_seeds} 个种子，用时 {elapsed:.2f}s")
+    print(f"平均决策稳定度 {report.mean_stability:.1%}，不稳定变体×OS {report.unstable_variants} 个，"
+          f"误晋级率 {report.false_promotion_rate:.1%}")
+    print(f"\n{'card_id':<16} {'iOS PASS':>9} {'Android PASS':>13} {'E[晋级]':>8} {'误晋级率':>8}")
+    for c in report.cards[:10]:
+        print(f"{c.card_id:<16} {c.gate_pass_prob['iOS']:>9.1%} {c.gate_pass_prob['Android']:>13.1%} "
+              f"{c.expected_promotions:>8.2f} {c.false_promotion_rate:>8.1%}")
+
+    fragile = sorted(((c.card_id, v) for c in report.cards for v in c.variants), key=lambda cv: cv[1].stability)[:5]
+    print("\n最不稳定的变体：")
+    for card_id, v in fragile:
+        print(f"  {card_id:<16} {v.variant_id:<6} {v.os:<8} PASS 概率 {v.explore_pass_prob:.1%}  质量比 {v.quality_ratio:.3f}")
+
+    SAMPLES_DIR.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report.model_dump(), f, ensure_ascii=False, indent=2)
+    print(f"\n已写入: {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+序贯 Explore Gate 示例：每步给未决变体各投 50 美元，显著即停；单变体上限与固定方案相同（min_spend），
+对比花费与提前决断的变体数。
+"""
+import json
+from pathlib import Path
+
+from bandit_allocator import MetricsEnvironment
+from explore_gate import ExploreGateConfig
+from ofaat_generator import generate_ofaat_variants
+from sequential_gate import ArmCounts, SequentialExploreGate
+
+try:
+    from path_config import SAMPLES_DIR
+except ImportError:
+    SAMPLES_DIR = Path(__file__).resolve().parent / "samples"
+OUTPUT_PATH = SAMPLES_DIR / "sequential_gate_example_output.json"
+
+STEP_SPEND = 50.0
+MAX_STEPS = int(ExploreGateConfig().min_spend // STEP_SPEND)
+
+
+def main() -> None:
+    variants = generate_ofaat_variants(
+        "sc_seq_demo",
+        ["反差", "冲突", "结果先行", "痛点", "爽点"],
+        ["上手快爽点前置", "福利多登录即送", "三分钟一局", "零氪也能赢"],
+        ["立即下载", "领福利", "马上开玩"],
+        n=12,
+    )
+    env = MetricsEnvironment(variants, "Android", seed=1)
+    # 基线：历史累计 1 万美元
+    baseline = ArmCounts()
+    for _ in range(20):
+        baseline.add_metrics(env.observe(variants[0].variant_id, 500))
+
+    gate = SequentialExploreGate(baseline)
+    active = [v.variant_id for v in variants[1:]]
+    spent = 0.0
+    for step in range(MAX_STEPS):
+        if not active:
+            break
+        gate.observe([env.observe(vid, STEP_SPEND) for vid in active])
+        spent += STEP_SPEND * len(active)
+        active = gate.active_variants()
+
+    result = gate.result({"os": "Android"})
+    fixed = len(variants[1:]) * ExploreGateConfig().min_spend
+    print("=" * 80)
+    decided = sum(1 for st in result.variant_details.values() if st != "INSUFFICIENT")
+    print(f"gate_status={result.gate_status}，序贯花费 {spent:.0f}（固定 min_spend 方案 {fixed:.0f}），"
+          f"已决断 {decided}/{len(result.variant_details)} 个变体")
+    for vid in gate.variants:
+        r = gate.evaluate_variant(vid)
+        outcomes = " ".join(f"{m.metric}:{m.outcome}" for m in r.metrics)
+        print(f"{vid:<6} {r.status:<13} spend={r.spend:>7.0f}  {outcomes}")
+
+    SAMPLES_DIR.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "spent": spent,
+                "fixed_min_spend_total": fixed,
+                "gate": result.model_dump(),
+                "variants": [gate.evaluate_variant(vid).model_dump() for vid in gate.variants],
+            },
+            f, ensure_ascii=False, indent=2,
+        )
+    print(f"\n已写入: {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
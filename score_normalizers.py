@@ -0,0 +1,314 @@
+"""
+variant_score 归一化器：可增量更新（每条指标 O(1)），可序列化后跨批次复用。
+
+- minmax：运行中的 min / max，与原 min-max 归一化一致（对离群值敏感）
+- winsorized：按 P² 分位数草图截尾（默认 5%~95%）后再 min-max
+- zscore：Welford 在线均值/方差，z 分数经正态 CDF 映射到 0~1
+- percentile：P² 直方图草图估计分位秩（对离群值稳健）
+
+scale(x) 统一返回 0~1（越大越好），调用方对「越低越好」的指标取 1 - scale(x)。
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, ClassVar
+
+
+class Normalizer:
+    """归一化器基类：update 增量吃数，scale 输出 0~1"""
+
+    kind: ClassVar[str] = ""
+
+    def update(self, x: float) -> None:
+        raise NotImplementedError
+
+    def scale(self, x: float) -> float:
+        raise NotImplementedError
+
+    def percent(self, x: float, higher_is_better: bool = True) -> float:
+        """0~100 分；higher_is_better=False 时反向"""
+        s = self.scale(x)
+        return 100.0 * (s if higher_is_better else 1.0 - s)
+
+    def to_dict(self) -> dict[str, Any]:
+        raise NotImplementedError
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Normalizer":
+        raise NotImplementedError
+
+
+# -------- P² 直方图草图 --------
+
+
+class P2Histogram:
+    """
+    P² 算法的多分位扩展（Jain & Chlamtac）：用 b+1 个标记近似 0, 1/b, …, 1 分位点。
+    每次 update 只移动常数个标记，内存 O(b)；样本数 ≤ b 时退化为精确有序表。
+    """
+
+    def __init__(self, bins: int = 20) -> None:
+        if bins < 2:
+            raise ValueError("bins 至少为 2")
+        self.bins = bins
+        self.count = 0
+        self.heights: list[float] = []  # 标记高度 q_i
+        self.positions: list[float] = []  # 标记位置 n_i（1-based）
+
+    def update(self, x: float) -> None:
+        x = float(x)
+        self.count += 1
+        b = self.bins
+        q, n = self.heights, self.positions
+        if self.count <= b + 1:
+            # 初始化阶段：保持有序，位置即秩
+            lo, hi = 0, len(q)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if q[mid] <= x:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            q.insert(lo, x)
+            self.positions = [float(i + 1) for i in range(len(q))]
+            return
+
+        # 1. 定位单元 k 并更新端点
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[b]:
+            q[b] = x
+            k = b - 1
+        else:
+            k = 0
+            while k < b - 1 and x >= q[k + 1]:
+                k += 1
+        # 2. k 之后的标记位置后移
+        for i in range(k + 1, b + 1):
+            n[i] += 1
+        # 3. 向期望位置调整中间标记
+        step = (self.count - 1) / b
+        for i in range(1, b):
+            d = 1 + step * i - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                qp = self._parabolic(i, s)
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                q[i] = qp
+                n[i] += s
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _fractions(self) -> list[float]:
+        if len(self.positions) < 2:
+            return [0.5] * len(self.positions)
+        span = self.positions[-1] - self.positions[0]
+        return [(p - self.positions[0]) / span for p in self.positions]
+
+    def cdf(self, x: float) -> float:
+        """x 的近似分位秩（0~1），标记间线性插值"""
+        q = self.heights
+        if not q or q[0] == q[-1]:
+            return 0.5
+        if x <= q[0]:
+            return 0.0
+        if x >= q[-1]:
+            return 1.0
+        fr = self._fractions()
+        for i in range(1, len(q)):
+            if x < q[i]:
+                lo, hi = q[i - 1], q[i]
+                t = (x - lo) / (hi - lo) if hi > lo else 0.0
+                return fr[i - 1] + t * (fr[i] - fr[i - 1])
+        return 1.0
+
+    def quantile(self, p: float) -> float:
+        """p 分位点的近似值"""
+        q = self.heights
+        if not q:
+            return 0.0
+        p = min(1.0, max(0.0, p))
+        fr = self._fractions()
+        for i in range(1, len(q)):
+            if p <= fr[i]:
+                span = fr[i] - fr[i - 1]
+                t = (p - fr[i - 1]) / span if span > 0 else 0.0
+                return q[i - 1] + t * (q[i] - q[i - 1])
+        return q[-1]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"bins": self.bins, "count": self.count, "heights": list(self.heights), "positions": list(self.positions)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "P2Histogram":
+        h = cls(bins=int(data.get("bins", 20)))
+        h.count = int(data.get("count", 0))
+        h.heights = [float(x) for x in data.get("heights", [])]
+        h.positions = [float(x) for x in data.get("positions", [])]
+        return h
+
+
+# -------- 归一化器 --------
+
+
+class MinMaxNormalizer(Normalizer):
+    """运行中的 min-max；hi <= lo 时返回 0.5（与 compute_variant_score 的 50 分一致）"""
+
+    kind = "minmax"
+
+    def __init__(self) -> None:
+        self.lo = math.inf
+        self.hi = -math.inf
+
+    def update(self, x: float) -> None:
+        if x < self.lo:
+            self.lo = x
+        if x > self.hi:
+            self.hi = x
+
+    def scale(self, x: float) -> float:
+        if self.hi <= self.lo:
+            return 0.5
+        return (x - self.lo) / (self.hi - self.lo)
+
+    def percent(self, x: float, higher_is_better: bool = True) -> float:
+        # 与 scoring_eval._norm_high / _norm_low 的浮点运算顺序一致
+        if self.hi <= self.lo:
+            return 50.0
+        if higher_is_better:
+            return 100.0 * (x - self.lo) / (self.hi - self.lo)
+        return 100.0 * (self.hi - x) / (self.hi - self.lo)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"kind": self.kind, "lo": self.lo, "hi": self.hi}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "MinMaxNormalizer":
+        n = cls()
+        n.lo = float(data.get("lo", math.inf))
+        n.hi = float(data.get("hi", -math.inf))
+        return n
+
+
+class WinsorizedMinMaxNormalizer(Normalizer):
+    """截尾 min-max：超出 [lower_q, upper_q] 分位的值先夹到边界，单个离群值不会压扁其余样本"""
+
+    kind = "winsorized"
+
+    def __init__(self, lower_q: float = 0.05, upper_q: float = 0.95, bins: int = 20) -> None:
+        if not 0.0 <= lower_q < upper_q <= 1.0:
+            raise ValueError("需满足 0 <= lower_q < upper_q <= 1")
+        self.lower_q = lower_q
+        self.upper_q = upper_q
+        self.sketch = P2Histogram(bins=bins)
+
+    def update(self, x: float) -> None:
+        self.sketch.update(x)
+
+    def scale(self, x: float) -> float:
+        lo = self.sketch.quantile(self.lower_q)
+        hi = self.sketch.quantile(self.upper_q)
+        if hi <= lo:
+            return 0.5
+        return (min(hi, max(lo, x)) - lo) / (hi - lo)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"kind": self.kind, "lower_q": self.lower_q, "upper_q": self.upper_q, "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "WinsorizedMinMaxNormalizer":
+        sketch = P2Histogram.from_dict(data.get("sketch", {}))
+        n = cls(float(data.get("lower_q", 0.05)), float(data.get("upper_q", 0.95)), bins=sketch.bins)
+        n.sketch = sketch
+        return n
+
+
+class ZScoreNormalizer(Normalizer):
+    """Welford 在线均值/方差；scale = Φ(z)，方差为 0 时返回 0.5"""
+
+    kind = "zscore"
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def scale(self, x: float) -> float:
+        sd = self.std
+        if sd <= 0:
+            return 0.5
+        z = (x - self.mean) / sd
+        return 0.5 * (1.0 + math.erf(z / math.sqrt(2.0)))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"kind": self.kind, "count": self.count, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ZScoreNormalizer":
+        n = cls()
+        n.count = int(data.get("count", 0))
+        n.mean = float(data.get("mean", 0.0))
+        n.m2 = float(data.get("m2", 0.0))
+        return n
+
+
+class PercentileNormalizer(Normalizer):
+    """分位秩归一化：scale = 近似 CDF(x)，只看排序位置，不受离群值幅度影响"""
+
+    kind = "percentile"
+
+    def __init__(self, bins: int = 20) -> None:
+        self.sketch = P2Histogram(bins=bins)
+
+    def update(self, x: float) -> None:
+        self.sketch.update(x)
+
+    def scale(self, x: float) -> float:
+        return self.sketch.cdf(x)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"kind": self.kind, "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "PercentileNormalizer":
+        sketch = P2Histogram.from_dict(data.get("sketch", {}))
+        n = cls(bins=sketch.bins)
+        n.sketch = sketch
+        return n
+
+
+NORMALIZERS: dict[str, type[Normalizer]] = {
+    cls.kind: cls
+    for cls in (MinMaxNormalizer, WinsorizedMinMaxNormalizer, ZScoreNormalizer, PercentileNormalizer)
+}
+
+
+def make_normalizer(kind: str, **kwargs: Any) -> Normalizer:
+    """按名称创建归一化器：minmax / winsorized / zscore / percentile"""
+    if kind not in NORMALIZERS:
+        raise ValueError(f"未知归一化方式：{kind}，可选 {', '.join(NORMALIZERS)}")
+    return NORMALIZERS[kind](**kwargs)
+
+
+def normalizer_from_dict(data: dict[str, Any]) -> Normalizer:
+    kind = data.get("kind", "")
+    if kind not in NORMALIZERS:
+        raise ValueError(f"未知归一化方式：{kind}")
+    return NORMALIZERS[kind].from_dict(data)
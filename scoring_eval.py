@@ -4,8 +4,12 @@
 """
 from __future__ import annotations
 
-from typing import Any
+import json
+from pathlib import Path
+from typing import Any, Iterable
 
+from profiling import profiled
+from score_normalizers import Normalizer, make_normalizer, normalizer_from_dict
 from simulate_metrics import SimulatedMetrics
 from vertical_config import get_metric_weights, use_refund_risk
 
@@ -24,6 +28,70 @@ def _get_weights(os: str, vertical: str) -> dict[str, float]:
     return w
 
 
+def _norm_high(val: float, lo: float, hi: float) -> float:
+    if hi <= lo:
+        return 50.0
+    return 100.0 * (val - lo) / (hi - lo)
+
+
+def _norm_low(val: float, lo: float, hi: float) -> float:
+    if hi <= lo:
+        return 50.0
+    return 100.0 * (hi - val) / (hi - lo)
+
+
+def _cohort_bounds(cohort: list[SimulatedMetrics]) -> tuple[float, ...]:
+    """一次扫描求 (min_ipm, max_ipm, min_cpi, max_cpi, min_roas, max_roas, min_ctr, max_ctr)"""
+    first = cohort[0]
+    min_ipm = max_ipm = first.ipm
+    min_cpi = max_cpi = first.cpi
+    min_roas = max_roas = first.early_roas
+    min_ctr = max_ctr = first.ctr
+    for x in cohort:
+        if x.ipm < min_ipm:
+            min_ipm = x.ipm
+        elif x.ipm > max_ipm:
+            max_ipm = x.ipm
+        if x.cpi < min_cpi:
+            min_cpi = x.cpi
+        elif x.cpi > max_cpi:
+            max_cpi = x.cpi
+        if x.early_roas < min_roas:
+            min_roas = x.early_roas
+        elif x.early_roas > max_roas:
+            max_roas = x.early_roas
+        if x.ctr < min_ctr:
+            min_ctr = x.ctr
+        elif x.ctr > max_ctr:
+            max_ctr = x.ctr
+    return min_ipm, max_ipm, min_cpi, max_cpi, min_roas, max_roas, min_ctr, max_ctr
+
+
+def _score_with_bounds(
+    m: SimulatedMetrics,
+    bounds: tuple[float, ...],
+    w: dict[str, float],
+    refund: bool,
+) -> float:
+    min_ipm, max_ipm, min_cpi, max_cpi, min_roas, max_roas, min_ctr, max_ctr = bounds
+    norm_ipm = _norm_high(m.ipm, min_ipm, max_ipm)
+    norm_cpi = _norm_low(m.cpi, min_cpi, max_cpi)
+    norm_roas = _norm_high(m.early_roas, min_roas, max_roas)
+    norm_ctr = _norm_high(m.ctr, min_ctr, max_ctr) if w.get("ctr", 0) > 0 else 0.0
+
+    score = (
+        w.get("ipm", 0.4) * norm_ipm
+        + w.get("cpi", 0.35) * norm_cpi
+        + w.get("early_roas", 0.25) * norm_roas
+        + w.get("ctr", 0) * norm_ctr
+    )
+    # 电商：退款风险扣分
+    if refund:
+        rr = getattr(m, "refund_risk", 0) or 0
+        score -= rr * 15
+    return round(min(100.0, max(0.0, score)), 1)
+
+
 def compute_variant_score(
     metric: SimulatedMetrics | dict,
     cohort: list[SimulatedMetrics | dict],
@@ -41,7 +109,7 @@ def compute_variant_score(
     - os, vertical: 用于选取权重
     - weights: 可覆盖，{ipm, cpi, early_roas} 权重
 
-    输出：0~100 分
+    输出：0~100 分。对整组打分请用 compute_variant_scores（归一化边界只算一次）。
     """
     m = SimulatedMetrics.model_validate(metric) if isinstance(metric, dict) else metric
     cohort_parsed = [
@@ -51,43 +119,145 @@ def compute_variant_score(
     if not same_os:
         same_os = cohort_parsed
 
-    ipms = [x.ipm for x in same_os]
-    cpis = [x.cpi for x in same_os]
-    roas_list = [x.early_roas for x in same_os]
-    ctrs = [x.ctr for x in same_os]
-
     w = weights or _get_weights(m.os, vertical)
-    min_ipm, max_ipm = min(ipms), max(ipms)
-    min_cpi, max_cpi = min(cpis), max(cpis)
-    min_roas, max_roas = min(roas_list), max(roas_list)
-    min_ctr, max_ctr = min(ctrs), max(ctrs)
+    return _score_with_bounds(m, _cohort_bounds(same_os), w, use_refund_risk(vertical))
 
-    def _norm_high(val: float, lo: float, hi: float) -> float:
-        if hi <= lo:
-            return 50.0
-        return 100.0 * (val - lo) / (hi - lo)
 
-    def _norm_low(val: float, lo: float, hi: float) -> float:
-        if hi <= lo:
-            return 50.0
-        return 100.0 * (hi - val) / (hi - lo)
+@profiled("scoring.variants")
+def compute_variant_scores(
+    cohort: list[SimulatedMetrics | dict],
+    *,
+    vertical: str = "casual_game",
+    weights: dict[str, float] | None = None,
+    normalizer: str = "minmax",
+) -> dict[tuple[str, str], float]:
+    """
+    对整组指标一次性打分：按 OS 分组，每组只求一次 min-max 边界，再逐条线性打分。
+    结果与对每条调用 compute_variant_score(m, cohort, os=m.os) 一致，复杂度 O(N)。
+    normalizer 取 winsorized / zscore / percentile 时改用 StreamingVariantScorer 的稳健归一化。
 
-    norm_ipm = _norm_high(m.ipm, min_ipm, max_ipm)
-    norm_cpi = _norm_low(m.cpi, min_cpi, max_cpi)
-    norm_roas = _norm_high(m.early_roas, min_roas, max_roas)
-    norm_ctr = _norm_high(m.ctr, min_ctr, max_ctr) if w.get("ctr", 0) > 0 else 0.0
+    输出：(variant_id, os) -> 0~100 分（同一 (variant_id, os) 出现多次时取最后一条）
+    """
+    parsed = [SimulatedMetrics.model_validate(x) if isinstance(x, dict) else x for x in cohort]
+    if normalizer != "minmax":
+        scorer = StreamingVariantScorer(normalizer, vertical=vertical, weights=weights)
+        scorer.update_many(parsed)
+        return {(m.variant_id, m.os): scorer.score(m) for m in parsed}
+    by_os: dict[str, list[SimulatedMetrics]] = {}
+    for m in parsed:
+        by_os.setdefault(m.os, []).append(m)
 
-    score = (
-        w.get("ipm", 0.4) * norm_ipm
-        + w.get("cpi", 0.35) * norm_cpi
-        + w.get("early_roas", 0.25) * norm_roas
-        + w.get("ctr", 0) * norm_ctr
-    )
-    # 电商：退款风险扣分
-    if use_refund_risk(vertical):
-        rr = getattr(m, "refund_risk", 0) or 0
-        score -= rr * 15
-    return round(min(100.0, max(0.0, score)), 1)
+    refund = use_refund_risk(vertical)
+    scores: dict[tuple[str, str], float] = {}
+    for os, members in by_os.items():
+        bounds = _cohort_bounds(members)
+        w = weights or _get_weights(os, vertical)
+        for m in members:
+            scores[(m.variant_id, os)] = _score_with_bounds(m, bounds, w, refund)
+    return scores
+
+
+# 参与归一化的指标及方向（True = 越高越好）
+SCORE_METRICS: tuple[tuple[str, bool], ...] = (
+    ("ipm", True),
+    ("cpi", False),
+    ("early_roas", True),
+    ("ctr", True),
+)
+
+
+class StreamingVariantScorer:
+    """
+    增量 variant_score：每个 OS × 指标维护一个归一化器，新指标行 update 为 O(1)，
+    打分只读归一化器状态，不回扫历史。状态可 save / load，跨批次复用。
+
+    normalizer="minmax" 时与 compute_variant_score 对同一 cohort 的结果一致。
+    """
+
+    def __init__(
+        self,
+        normalizer: str = "percentile",
+        *,
+        vertical: str = "casual_game",
+        weights: dict[str, float] | None = None,
+        **normalizer_kwargs: Any,
+    ) -> None:
+        make_normalizer(normalizer, **normalizer_kwargs)  # 提前校验名称与参数
+        self.normalizer = normalizer
+        self.normalizer_kwargs = normalizer_kwargs
+        self.vertical = vertical
+        self.weights = weights
+        self._norms: dict[str, dict[str, Normalizer]] = {}
+
+    def _for_os(self, os: str) -> dict[str, Normalizer]:
+        norms = self._norms.get(os)
+        if norms is None:
+            norms = {k: make_normalizer(self.normalizer, **self.normalizer_kwargs) for k, _ in SCORE_METRICS}
+            self._norms[os] = norms
+        return norms
+
+    def update(self, metric: SimulatedMetrics | dict) -> None:
+        m = SimulatedMetrics.model_validate(metric) if isinstance(metric, dict) else metric
+        norms = self._for_os(m.os)
+        for key, _ in SCORE_METRICS:
+            norms[key].update(getattr(m, key))
+
+    def update_many(self, metrics: Iterable[SimulatedMetrics | dict]) -> None:
+        for m in metrics:
+            self.update(m)
+
+    def score(self, metric: SimulatedMetrics | dict) -> float:
+        """按当前归一化器状态给单条指标打分（0~100）；该 OS 尚无数据时各项按 50 分计"""
+        m = SimulatedMetrics.model_validate(metric) if isinstance(metric, dict) else metric
+        norms = self._for_os(m.os)
+        w = self.weights or _get_weights(m.os, self.vertical)
+        norm = {key: norms[key].percent(getattr(m, key), higher) for key, higher in SCORE_METRICS}
+        if not w.get("ctr", 0) > 0:
+            norm["ctr"] = 0.0
+        score = (
+            w.get("ipm", 0.4) * norm["ipm"]
+            + w.get("cpi", 0.35) * norm["cpi"]
+            + w.get("early_roas", 0.25) * norm["early_roas"]
+            + w.get("ctr", 0) * norm["ctr"]
+        )
+        if use_refund_risk(self.vertical):
+            rr = getattr(m, "refund_risk", 0) or 0
+            score -= rr * 15
+        return round(min(100.0, max(0.0, score)), 1)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "normalizer": self.normalizer,
+            "normalizer_kwargs": self.normalizer_kwargs,
+            "vertical": self.vertical,
+            "weights": self.weights,
+            "state": {os: {k: n.to_dict() for k, n in norms.items()} for os, norms in self._norms.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "StreamingVariantScorer":
+        scorer = cls(
+            data.get("normalizer", "percentile"),
+            vertical=data.get("vertical", "casual_game"),
+            weights=data.get("weights"),
+            **(data.get("normalizer_kwargs") or {}),
+        )
+        scorer._norms = {
+            os: {k: normalizer_from_dict(d) for k, d in norms.items()}
+            for os, norms in (data.get("state") or {}).items()
+        }
+        return scorer
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "StreamingVariantScorer":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
 
 
 def compute_element_normalized_score(
@@ -107,6 +277,7 @@ def compute_element_normalized_score(
     return round(min(100.0, max(-100.0, contrib)), 1)
 
 
+@profiled("scoring.card")
 def compute_card_score(
     eligible_variants: list[str],
     variant_scores: dict[str, float],
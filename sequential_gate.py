@@ -0,0 +1,365 @@
+"""
+序贯检验版 Explore / Validate Gate：数据边到边判，显著即停，不因反复查看而抬高假阳性。
+
+mSPRT（混合序贯概率比检验，正态混合 N(0, τ²)）：
+    Λ = sqrt(V / (V + τ²)) · exp(τ² θ̂² / (2V(V + τ²)))
+θ̂ 为变体与基线的差，V 为其方差；Λ ≥ 1/α 即拒绝 H0，always-valid p = min(1/Λ)，
+对应的置信序列：θ̂ ± sqrt(V(V + τ²)/τ² · (2·ln(1/α) + ln((V + τ²)/V)))。
+
+- CTR / IPM：按二项比例（clicks / impressions、installs / impressions），θ 为比例差
+- CPI：对数尺度 θ = ln CPI_v - ln CPI_b，安装数按 Poisson 近似 V = 1/installs_v + 1/installs_b
+
+SequentialExploreGate 的 variant_details 与 evaluate_explore_gate 同口径（未决 = INSUFFICIENT），
+结果经 summarize_explore_gate 汇总成 ExploreGateResult。
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+from pydantic import BaseModel, Field
+
+from explore_gate import ExploreGateResult, summarize_explore_gate
+from simulate_metrics import SimulatedMetrics
+from validate_gate import ValidateGateConfig, WindowMetrics
+
+SEQ_METRICS = ("ctr", "ipm", "cpi")
+HIGHER_IS_BETTER = {"ctr": True, "ipm": True, "cpi": False}
+
+
+# -------- 配置 --------
+
+
+@dataclass
+class SequentialConfig:
+    """序贯检验配置"""
+
+    alpha: float = 0.05
+    tau_rel: float = 0.10  # 混合分布尺度：预期效应约为基线的 10%
+    min_better_metrics: int = 2
+    metrics: tuple[str, ...] = SEQ_METRICS
+    bonferroni: bool = True  # 每个变体的 α 在各指标间均分
+    min_impressions: int = 1000  # 正态近似成立前不下结论
+    min_installs: int = 10
+
+
+# -------- 计数与检验 --------
+
+
+@dataclass
+class ArmCounts:
+    """累计计数（可由增量 SimulatedMetrics / WindowMetrics / 事件计数累加）"""
+
+    impressions: int = 0
+    clicks: int = 0
+    installs: int = 0
+    spend: float = 0.0
+
+    def add(self, impressions: int = 0, clicks: int = 0, installs: int = 0, spend: float = 0.0) -> None:
+        self.impressions += int(impressions)
+        self.clicks += int(clicks)
+        self.installs += int(installs)
+        self.spend += float(spend)
+
+    def add_metrics(self, m: Any) -> None:
+        self.add(
+            getattr(m, "impressions", 0) or 0,
+            getattr(m, "clicks", 0) or 0,
+            getattr(m, "installs", 0) or 0,
+            getattr(m, "spend", 0.0) or 0.0,
+        )
+
+    def estimate(self, metric: str) -> tuple[float, float]:
+        """(估计值, 估计量方差)；cpi 在对数尺度"""
+        if metric == "cpi":
+            if self.installs <= 0 or self.spend <= 0:
+                return 0.0, math.inf
+            return math.log(self.spend / self.installs), 1.0 / self.installs
+        k = self.clicks if metric == "ctr" else self.installs
+        n = self.impressions
+        if n <= 0:
+            return 0.0, math.inf
+        p = k / n
+        # 0 / 1 边界时用 (k+0.5)/(n+1) 的方差，避免 V=0
+        pv = (k + 0.5) / (n + 1)
+        return p, pv * (1 - pv) / n
+
+
+def msprt(theta_hat: float, v: float, tau2: float, alpha: float) -> tuple[float, float, float]:
+    """返回 (似然比 Λ, 置信序列下界, 上界)"""
+    if not math.isfinite(v) or v <= 0 or tau2 <= 0:
+        return 1.0, -math.inf, math.inf
+    s = v + tau2
+    log_lam = 0.5 * math.log(v / s) + tau2 * theta_hat * theta_hat / (2 * v * s)
+    half = math.sqrt(v * s / tau2 * (2 * math.log(1 / alpha) + math.log(s / v)))
+    lam = math.exp(min(log_lam, 700.0))
+    return lam, theta_hat - half, theta_hat + half
+
+
+# -------- 输出 --------
+
+
+class SequentialMetricResult(BaseModel):
+    """单个指标的序贯检验状态"""
+
+    metric: str
+    variant_value: float
+    baseline_value: float
+    lift: float = Field(..., description="相对基线的变化（cpi 为 CPI_v/CPI_b - 1）")
+    ci: tuple[float, float] = Field(..., description="θ 的置信序列（ctr/ipm 为比例差，cpi 为对数差）")
+    p_value: float = Field(..., description="always-valid p 值（运行最小值）")
+    outcome: str = Field(..., description="win / loss / undecided")
+
+
+class SequentialVariantResult(BaseModel):
+    variant_id: str
+    status: str = Field(..., description="PASS / FAIL / INSUFFICIENT（继续投放）")
+    impressions: int
+    installs: int
+    spend: float
+    metrics: list[SequentialMetricResult] = Field(default_factory=list)
+    reason: str = ""
+
+
+def _display_value(metric: str, c: ArmCounts) -> float:
+    if metric == "ctr":
+        return round(c.clicks / c.impressions, 6) if c.impressions else 0.0
+    if metric == "ipm":
+        return round(c.installs / c.impressions * 1000, 2) if c.impressions else 0.0
+    return round(c.spend / c.installs, 2) if c.installs else 0.0
+
+
+# -------- Explore Gate --------
+
+
+@dataclass
+class _VariantState:
+    counts: ArmCounts = field(default_factory=ArmCounts)
+    p_min: dict[str, float] = field(default_factory=dict)
+    status: str = "INSUFFICIENT"
+    result: SequentialVariantResult | None = None
+
+
+class SequentialExploreGate:
+    """
+    增量序贯 Explore Gate（单个 OS）。
+        gate = SequentialExploreGate(baseline_metrics)
+        gate.observe(增量 SimulatedMetrics)   # 可多次，随数据到达
+        gate.result(context)                  # -> ExploreGateResult
+    PASS / FAIL 一旦出现即锁定（停止该变体的投放不影响有效性）。
+    """
+
+    def __init__(
+        self,
+        baseline: SimulatedMetrics | dict | ArmCounts | None = None,
+        *,
+        config: SequentialConfig | None = None,
+    ) -> None:
+        self.config = config or SequentialConfig()
+        self.baseline = ArmCounts()
+        if isinstance(baseline, ArmCounts):
+            self.baseline = baseline
+        elif baseline is not None:
+            self.observe_baseline(baseline)
+        self.variants: dict[str, _VariantState] = {}
+
+    def observe_baseline(self, m: SimulatedMetrics | dict) -> None:
+        obj = SimulatedMetrics.model_validate(m) if isinstance(m, dict) else m
+        self.baseline.add_metrics(obj)
+
+    def observe(self, increments: Iterable[SimulatedMetrics | dict] | SimulatedMetrics | dict) -> set[str]:
+        """吃入增量指标，返回状态有变化的 variant_id"""
+        if isinstance(increments, (dict, SimulatedMetrics)):
+            increments = [increments]
+        touched: set[str] = set()
+        for m in increments:
+            obj = SimulatedMetrics.model_validate(m) if isinstance(m, dict) else m
+            if obj.baseline:
+                self.baseline.add_metrics(obj)
+                continue
+            self.observe_counts(obj.variant_id, obj.impressions, obj.clicks, obj.installs, obj.spend)
+            touched.add(obj.variant_id)
+        changed = set()
+        for vid in touched:
+            before = self.variants[vid].status
+            if self.evaluate_variant(vid).status != before:
+                changed.add(vid)
+        return changed
+
+    def observe_counts(self, variant_id: str, impressions: int = 0, clicks: int = 0, installs: int = 0, spend: float = 0.0) -> None:
+        st = self.variants.setdefault(variant_id, _VariantState())
+        if st.status == "INSUFFICIENT":
+            st.counts.add(impressions, clicks, installs, spend)
+
+    def active_variants(self) -> list[str]:
+        """仍需继续投放（未决）的变体"""
+        return [vid for vid, st in self.variants.items() if st.status == "INSUFFICIENT"]
+
+    def evaluate_variant(self, variant_id: str) -> SequentialVariantResult:
+        cfg = self.config
+        st = self.variants.setdefault(variant_id, _VariantState())
+        if st.status != "INSUFFICIENT" and st.result is not None:
+            return st.result
+        c, b = st.counts, self.baseline
+        alpha = cfg.alpha / len(cfg.metrics) if cfg.bonferroni and cfg.metrics else cfg.alpha
+        results: list[SequentialMetricResult] = []
+        wins = losses = 0
+        ready = c.impressions >= cfg.min_impressions and c.installs >= cfg.min_installs
+        for metric in cfg.metrics:
+            ev, vv = c.estimate(metric)
+            eb, vb = b.estimate(metric)
+            theta = ev - eb
+            tau = cfg.tau_rel if metric == "cpi" else cfg.tau_rel * max(eb, 1e-9)
+            lam, lo, hi = msprt(theta, vv + vb, tau * tau, alpha)
+            p = min(st.p_min.get(metric, 1.0), 1.0 / lam if lam > 0 else 1.0)
+            st.p_min[metric] = p
+            better = (lo > 0) if HIGHER_IS_BETTER[metric] else (hi < 0)
+            worse = (hi < 0) if HIGHER_IS_BETTER[metric] else (lo > 0)
+            outcome = "undecided"
+            if ready and better:
+                outcome, wins = "win", wins + 1
+            elif ready and worse:
+                outcome, losses = "loss", losses + 1
+            vd, bd = _display_value(metric, c), _display_value(metric, b)
+            results.append(
+                SequentialMetricResult(
+                    metric=metric,
+                    variant_value=vd,
+                    baseline_value=bd,
+                    lift=round(vd / bd - 1, 4) if bd else 0.0,
+                    ci=(round(lo, 6), round(hi, 6)),
+                    p_value=round(p, 6),
+                    outcome=outcome,
+                )
+            )
+        need = cfg.min_better_metrics
+        if wins >= need:
+            status, reason = "PASS", f"{variant_id}: {wins} 个指标显著优于 baseline（序贯检验 α={cfg.alpha}），提前通过"
+        elif len(cfg.metrics) - losses < need:
+            status, reason = "FAIL", f"{variant_id}: {losses} 个指标显著劣于 baseline，已不可能达到 {need} 个，提前淘汰"
+        elif not ready:
+            status, reason = "INSUFFICIENT", f"{variant_id}: 样本不足（曝光 {c.impressions}、安装 {c.installs}），继续投放"
+        else:
+            status, reason = "INSUFFICIENT", f"{variant_id}: 尚未显著（胜 {wins} / 负 {losses}），继续投放"
+        st.status = status
+        st.result = SequentialVariantResult(
+            variant_id=variant_id,
+            status=status,
+            impressions=c.impressions,
+            installs=c.installs,
+            spend=round(c.spend, 2),
+            metrics=results,
+            reason=reason,
+        )
+        return st.result
+
+    def result(self, context: dict[str, Any] | None = None) -> ExploreGateResult:
+        context = {**(context or {}), "mode": "sequential", "alpha": self.config.alpha}
+        details: dict[str, str] = {}
+        eligible: list[str] = []
+        reasons: list[str] = []
+        for vid in self.variants:
+            r = self.evaluate_variant(vid)
+            details[vid] = r.status
+            reasons.append(r.reason)
+            if r.status == "PASS":
+                eligible.append(vid)
+        if not details:
+            return ExploreGateResult(gate_status="FAIL", reasons=["无待评测变体"], context=context)
+        return summarize_explore_gate(details, eligible, reasons, context)
+
+
+# -------- Validate Gate --------
+
+
+class SequentialValidateResult(BaseModel):
+    validate_status: str = Field(..., description="PASS / FAIL / CONTINUE")
+    reference: WindowMetrics
+    current: WindowMetrics
+    ipm_drop_ci: tuple[float, float] = Field(..., description="(IPM_ref·(1-容忍) - IPM_cur) 的置信序列，每千次曝光")
+    cpi_increase_ci: tuple[float, float] = Field(..., description="ln(CPI_cur/CPI_ref) 的置信序列")
+    risk_notes: list[str] = Field(default_factory=list)
+
+
+class SequentialValidateMonitor:
+    """
+    用首个窗口作参照，对后续流量持续检验：
+    - IPM 跌幅显著超过 ipm_drop_max_pct 或 CPI 涨幅显著超过 cpi_increase_max_pct → FAIL
+    - 两者都显著在容忍范围内 → PASS
+    不再需要凑齐固定数量的窗口。
+    """
+
+    def __init__(
+        self,
+        reference: WindowMetrics | dict,
+        *,
+        config: ValidateGateConfig | None = None,
+        seq_config: SequentialConfig | None = None,
+    ) -> None:
+        self.config = config or ValidateGateConfig()
+        self.seq = seq_config or SequentialConfig()
+        ref = WindowMetrics.model_validate(reference) if isinstance(reference, dict) else reference
+        self.reference = ArmCounts()
+        self.reference.add_metrics(ref)
+        self.current = ArmCounts()
+        self.status = "CONTINUE"
+        self._notes: list[str] = []
+
+    def observe(self, m: Any) -> str:
+        if self.status == "CONTINUE":
+            self.current.add_metrics(m)
+        return self.evaluate().validate_status
+
+    def evaluate(self) -> SequentialValidateResult:
+        cfg, seq = self.config, self.seq
+        alpha = seq.alpha / 2 if seq.bonferroni else seq.alpha
+        r, c = self.reference, self.current
+        # IPM：θ = p_ref·(1 - 容忍) - p_cur，θ 显著 > 0 即跌幅超限
+        pr, vr = r.estimate("ipm")
+        pc, vc = c.estimate("ipm")
+        keep = 1 - cfg.ipm_drop_max_pct
+        theta_ipm = pr * keep - pc
+        _, ipm_lo, ipm_hi = msprt(theta_ipm, vr * keep * keep + vc, (seq.tau_rel * max(pr, 1e-9)) ** 2, alpha)
+        # CPI：θ = ln(CPI_cur / CPI_ref)，与 ln(1 + 容忍) 比较
+        lr, wr = r.estimate("cpi")
+        lc, wc = c.estimate("cpi")
+        limit = math.log(1 + cfg.cpi_increase_max_pct)
+        _, cpi_lo, cpi_hi = msprt((lc - lr) - limit, wr + wc, seq.tau_rel ** 2, alpha)
+        ready = c.impressions >= seq.min_impressions and c.installs >= seq.min_installs
+        status = self.status
+        notes: list[str] = [] if status == "CONTINUE" else list(self._notes)
+        if status == "CONTINUE" and ready:
+            if ipm_lo > 0:
+                notes.append(f"IPM 跌幅显著超过 {cfg.ipm_drop_max_pct:.0%}")
+            if cpi_lo > 0:
+                notes.append(f"CPI 涨幅显著超过 {cfg.cpi_increase_max_pct:.0%}")
+            if notes:
+                status = "FAIL"
+            elif ipm_hi < 0 and cpi_hi < 0:
+                status = "PASS"
+                notes.append("IPM 跌幅与 CPI 涨幅均显著在容忍范围内，可加量")
+        if status == "CONTINUE":
+            notes.append("尚未显著，继续观察" if ready else "样本不足，继续观察")
+        self.status = status
+        self._notes = notes
+        return SequentialValidateResult(
+            validate_status=status,
+            reference=_to_window("reference", r),
+            current=_to_window("current", c),
+            ipm_drop_ci=(round(ipm_lo * 1000, 4), round(ipm_hi * 1000, 4)),
+            cpi_increase_ci=(round(cpi_lo + limit, 6), round(cpi_hi + limit, 6)),
+            risk_notes=notes,
+        )
+
+
+def _to_window(window_id: str, c: ArmCounts) -> WindowMetrics:
+    return WindowMetrics(
+        window_id=window_id,
+        impressions=c.impressions,
+        clicks=c.clicks,
+        installs=c.installs,
+        spend=round(c.spend, 2),
+        ipm=_display_value("ipm", c),
+        cpi=_display_value("cpi", c),
+    )
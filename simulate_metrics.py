@@ -11,6 +11,8 @@ from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
+from profiling import profiled
+
 
 OS = Literal["iOS", "Android"]
 
@@ -129,6 +131,7 @@ def _add_noise(value: float, noise_pct: float, rng: random.Random) -> float:
     return max(value * 0.5, value + delta)
 
 
+@profiled("simulate")
 def simulate_metrics(
     variant: Any,
     os: OS,
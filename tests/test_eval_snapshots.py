@@ -0,0 +1,37 @@
+"""eval_snapshots 的进程内缓存与清理"""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import eval_snapshots  # noqa: E402
+from eval_set_generator import generate_eval_set  # noqa: E402
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    monkeypatch.setattr(eval_snapshots, "SNAPSHOT_MAX_COUNT", 2)
+    monkeypatch.setattr(eval_snapshots, "OPEN_MAX_SNAPSHOTS", 3)
+    eval_snapshots.close_snapshots()
+    yield tmp_path
+    eval_snapshots.close_snapshots()
+
+
+def test_create_and_open_cycles_stay_bounded(root):
+    ids = []
+    for i in range(5):
+        sid = eval_snapshots.create_snapshot(generate_eval_set(n_cards=2 + i, variants_per_card=3), root=root)
+        snap = eval_snapshots.open_snapshot(sid, root=root)
+        assert len(snap) == 2 + i
+        ids.append(sid)
+
+    on_disk = eval_snapshots.list_snapshots(root=root)
+    assert len(on_disk) == 2
+    assert ids[-1] in on_disk
+    assert len(eval_snapshots._OPEN) <= 3
+    # 留在进程内缓存里的快照目录都还在
+    assert all(Path(k).exists() for k in eval_snapshots._OPEN)
+    assert eval_snapshots.open_snapshot(ids[-1], root=root)[0].card.card_id
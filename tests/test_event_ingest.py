@@ -0,0 +1,49 @@
+"""event_ingest：坏数据行不中断文件接入"""
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from event_ingest import StreamIngestor  # noqa: E402
+
+
+def _event(**kw):
+    return {"ts": 1718000000, "card_id": "sc_t", "variant_id": "v001", "os": "iOS", "event": "install", **kw}
+
+
+def test_malformed_rows_are_skipped_mid_file(tmp_path):
+    path = tmp_path / "events.jsonl"
+    rows = [
+        _event(count=2),
+        _event(count="x"),
+        _event(event="spend", value="n/a"),
+        _event(ts="yesterday"),
+        _event(event="spend", value="inf"),
+        _event(count=0),
+        _event(count=3),
+    ]
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n", encoding="utf-8")
+
+    ing = StreamIngestor()
+    assert ing.ingest_file(path) == 3
+    assert ing.offsets[str(path.resolve())] == path.stat().st_size
+    agg = ing.aggs[("sc_t", "v001", "iOS", "2024-06-10T00:00")]
+    assert agg.installs == 5
+    assert agg.spend == 0.0
+
+
+def test_malformed_csv_row(tmp_path):
+    path = tmp_path / "events.csv"
+    path.write_text(
+        "ts,card_id,variant_id,os,event,count,value\n"
+        "1718000000,sc_t,v001,Android,click,,\n"
+        "1718000000,sc_t,v001,Android,click,abc,\n"
+        "1718000000,sc_t,v001,Android,spend,,12.5\n",
+        encoding="utf-8",
+    )
+    ing = StreamIngestor()
+    assert ing.ingest_file(path) == 2
+    agg = ing.aggs[("sc_t", "v001", "Android", "2024-06-10T00:00")]
+    assert (agg.clicks, agg.spend) == (1, 12.5)
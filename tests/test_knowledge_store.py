@@ -0,0 +1,55 @@
+"""knowledge_store 写入路径"""
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import knowledge_store  # noqa: E402
+from eval_schemas import StrategyCard  # noqa: E402
+from ofaat_generator import generate_ofaat_variants  # noqa: E402
+from simulate_metrics import simulate_metrics  # noqa: E402
+
+try:
+    from path_config import SAMPLES_DIR
+except ImportError:
+    SAMPLES_DIR = ROOT / "samples"
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = tmp_path / "knowledge.db"
+    monkeypatch.setattr(knowledge_store, "DB_PATH", path)
+    return path
+
+
+def test_write_experiment_accepts_dict_variants(db_path):
+    card = StrategyCard.model_validate(
+        json.loads((SAMPLES_DIR / "eval_strategy_card_casual_game.json").read_text(encoding="utf-8"))
+    )
+    models = generate_ofaat_variants(
+        card.card_id, ["反差", "冲突", "结果先行"], ["上手快爽点前置", "福利多登录即送"], ["立即下载", "领福利"], n=8
+    )
+    metrics = [
+        simulate_metrics(v, os, baseline=(i == 0)).model_dump()
+        for i, v in enumerate(models)
+        for os in ("iOS", "Android")
+    ]
+    variants = [v.model_dump() for v in models]
+
+    exp_id = knowledge_store.write_experiment(
+        card, variants, metrics, None, None, None, None, [], {"next_step": "继续观察"}
+    )
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        n_metrics = conn.execute("SELECT COUNT(*) FROM variant_metrics WHERE exp_id = ?", (exp_id,)).fetchone()[0]
+        per_os = {r[0] for r in conn.execute("SELECT DISTINCT os FROM element_scores WHERE exp_id = ?", (exp_id,))}
+    finally:
+        conn.close()
+    assert n_metrics == len(metrics)
+    assert per_os == {"iOS", "Android"}
@@ -0,0 +1,61 @@
+"""llm_metrics：账本重建的 Prometheus 序列与进程内聚合一致"""
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import llm_metrics  # noqa: E402
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_metrics, "LEDGER_PATH", tmp_path / "ledger.db")
+    monkeypatch.setattr(llm_metrics, "LEDGER_ENABLED", True)
+    llm_metrics.reset()
+    yield tmp_path / "ledger.db"
+    llm_metrics.reset()
+
+
+def test_ledger_prometheus_matches_in_process(ledger):
+    assert llm_metrics.ledger_summary() == {}
+    assert not ledger.exists()
+    for i in range(40):
+        llm_metrics.record_call(llm_metrics.LLMCall(
+            model="m/a" if i % 3 else "m/b", purpose="generate" if i % 2 else "review",
+            status="ok" if i % 7 else "http_error", latency_s=0.2 * i, attempt=i % 2,
+            prompt_tokens=100, completion_tokens=20, cached_tokens=50 * (i % 2), cost_usd=0.001,
+        ))
+    llm_metrics.record_parse_failure("m/a", "review", attempt=0, final=False)
+    llm_metrics.record_variants("generate", 12)
+    expected = llm_metrics.prometheus_text()
+    assert llm_metrics.ledger_prometheus_text() == expected
+
+    # 旧账本没有汇总表：首次连接时从明细补齐
+    conn = sqlite3.connect(str(ledger))
+    conn.execute("DROP TABLE llm_rollup")
+    conn.commit()
+    conn.close()
+    llm_metrics._ledger_ready.clear()
+    assert llm_metrics.ledger_prometheus_text() == expected
+
+
+def test_empty_choices_is_recorded(ledger, monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    import openrouter_client
+
+    class _Resp:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"choices": [], "usage": {"prompt_tokens": 5}}
+
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    monkeypatch.setattr(httpx.Client, "post", lambda self, *a, **kw: _Resp())
+    with pytest.raises(ValueError):
+        openrouter_client.chat_completion([{"role": "user", "content": "hi"}], model="m/a", purpose="generate")
+    assert llm_metrics.snapshot()["series"][0]["requests"] == {"empty": 1}
@@ -0,0 +1,300 @@
+"""
+Validate Gate 的批量向量化实现：cards × windows 指标张量一次算完全部卡片的稳定性信号。
+
+与 validate_gate.evaluate_validate_gate 逐卡结果一致（状态、风险提示、稳定性指标、明细行）：
+- 求和沿窗口轴逐列累加（窗口数很小），与 Python sum 的顺序、浮点结果相同
+- 变长窗口用掩码补齐；「仅 impressions>0 / installs>0 / spend>0 的窗口参与」用稳定排序压实到前部
+- ValidateGateResult / ValidateDetailRow 按需构建（result(i)），批量场景只看数组即可
+
+numpy 不可用时回退为逐卡调用 evaluate_validate_gate。
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy 随 streamlit 安装
+    np = None
+
+from profiling import profiled
+from validate_gate import (
+    ValidateDetailRow,
+    ValidateGateConfig,
+    ValidateGateResult,
+    ValidateStabilityMetrics,
+    WindowMetrics,
+    _parse_metrics,
+    evaluate_validate_gate,
+)
+
+WINDOW_FIELDS = ("impressions", "installs", "spend", "early_events", "ipm", "cpi", "early_roas")
+EXPAND_FIELDS = ("impressions", "spend", "ipm", "cpi", "early_roas")
+
+
+@dataclass
+class ValidateTensor:
+    """
+    补齐后的输入：windows[f] 形状 (C, W)，n_windows 为每张卡的真实窗口数；
+    expand[f] 形状 (C,)，has_expand 标记是否提供轻扩人群。
+    """
+
+    windows: dict[str, Any]
+    n_windows: Any  # int[C]
+    window_ids: list[list[str]]
+    expand: dict[str, Any]
+    has_expand: Any  # bool[C]
+
+    @property
+    def n_cards(self) -> int:
+        return len(self.window_ids)
+
+    @classmethod
+    def from_cards(
+        cls,
+        cards: Sequence[tuple[Sequence[WindowMetrics | dict], WindowMetrics | dict | None]],
+    ) -> "ValidateTensor":
+        """cards: 每张卡 (windowed_metrics, light_expansion_metrics)，与 evaluate_validate_gate 入参相同"""
+        parsed = [([_parse_metrics(w) for w in ws], _parse_metrics(le) if le else None) for ws, le in cards]
+        C = len(parsed)
+        W = max((len(ws) for ws, _ in parsed), default=0)
+        windows = {f: np.zeros((C, W), dtype=np.float64) for f in WINDOW_FIELDS}
+        expand = {f: np.zeros(C, dtype=np.float64) for f in EXPAND_FIELDS}
+        n_windows = np.zeros(C, dtype=np.int64)
+        has_expand = np.zeros(C, dtype=bool)
+        window_ids: list[list[str]] = []
+        for i, (ws, le) in enumerate(parsed):
+            n_windows[i] = len(ws)
+            window_ids.append([w.window_id for w in ws])
+            for j, w in enumerate(ws):
+                for f in WINDOW_FIELDS:
+                    windows[f][i, j] = getattr(w, f)
+            if le is not None:
+                has_expand[i] = True
+                for f in EXPAND_FIELDS:
+                    expand[f][i] = getattr(le, f)
+        return cls(windows, n_windows, window_ids, expand, has_expand)
+
+
+def _seq_sum(x: Any, mask: Any) -> Any:
+    """沿窗口轴按顺序累加（与 Python sum 同序），被掩码的位置跳过"""
+    acc = np.zeros(x.shape[0], dtype=np.float64)
+    for j in range(x.shape[1]):
+        acc = np.where(mask[:, j], acc + x[:, j], acc)
+    return acc
+
+
+def _compact(x: Any, mask: Any) -> tuple[Any, Any]:
+    """把掩码为真的元素按原顺序移到前部，返回 (压实后的值, 每行个数)"""
+    order = np.argsort(~mask, axis=1, kind="stable")
+    return np.take_along_axis(x, order, axis=1), mask.sum(axis=1)
+
+
+def _safe_div(a: Any, b: Any) -> Any:
+    return np.divide(a, b, out=np.zeros_like(a, dtype=np.float64), where=b != 0)
+
+
+@dataclass
+class BatchValidateResult:
+    """全部卡片的紧凑结果数组；result(i) 构建与标量版一致的 ValidateGateResult"""
+
+    tensor: ValidateTensor
+    config: ValidateGateConfig
+    status: Any  # str[C]：PASS / FAIL
+    fail_count: Any
+    too_few_windows: Any  # bool[C]：窗口 < 2
+    no_ipm: Any  # bool[C]：无有效 IPM
+    ipm_cv: Any
+    ipm_drop: Any
+    cpi_increase: Any
+    learning_iterations: Any
+    flags: dict[str, Any]  # 各规则是否触发，bool[C]
+
+    def __len__(self) -> int:
+        return self.tensor.n_cards
+
+    def statuses(self) -> list[str]:
+        return [str(s) for s in self.status]
+
+    def detail_rows(self, i: int) -> list[ValidateDetailRow]:
+        t = self.tensor
+        w = t.windows
+        rows = [
+            ValidateDetailRow(
+                window_id=wid,
+                ipm=round(float(w["ipm"][i, j]), 2),
+                cpi=round(float(w["cpi"][i, j]), 2),
+                early_roas=round(float(w["early_roas"][i, j]), 4),
+                impressions=int(w["impressions"][i, j]),
+                spend=float(w["spend"][i, j]),
+            )
+            for j, wid in enumerate(t.window_ids[i])
+        ]
+        if t.has_expand[i]:
+            e = t.expand
+            rows.append(
+                ValidateDetailRow(
+                    window_id="expand_segment",
+                    ipm=round(float(e["ipm"][i]), 2),
+                    cpi=round(float(e["cpi"][i]), 2),
+                    early_roas=round(float(e["early_roas"][i]), 4),
+                    impressions=int(e["impressions"][i]),
+                    spend=float(e["spend"][i]),
+                )
+            )
+        return rows
+
+    def result(self, i: int) -> ValidateGateResult:
+        cfg = self.config
+        if self.too_few_windows[i]:
+            return ValidateGateResult(
+                validate_status="FAIL",
+                risk_notes=["时间窗口不足，需 ≥2 个窗口方能验证稳定性"],
+                scale_recommendation={"scale_up_step": "暂不加量", "stop_loss": "待补足窗口后再评估"},
+            )
+        if self.no_ipm[i]:
+            return ValidateGateResult(
+                validate_status="FAIL",
+                risk_notes=["无有效 IPM 数据"],
+                scale_recommendation={"scale_up_step": "-", "stop_loss": "-"},
+            )
+        fl = {k: bool(v[i]) for k, v in self.flags.items()}
+        notes_by_flag = (
+            ("cv", "IPM 波动过大，结构稳定性存疑"),
+            ("drop", "IPM 回撤超出可接受范围，可能 Hook 依赖强刺激"),
+            ("cpi", "CPI 回撤，成本抬升明显"),
+            ("direction", "early_event 与 early_ROAS 方向不一致，转化质量存疑"),
+            ("le_ipm", "轻扩人群 IPM 明显劣化，Why now 可能虚高"),
+            ("le_cpi", "轻扩人群 CPI 抬升过大"),
+            ("note_cv", "IPM 波动过大，建议延长观察窗口"),
+            ("note_drop", "IPM 回撤明显，可能 Hook 依赖强刺激"),
+            ("note_cpi", "CPI 抬升过快，需关注人群质量"),
+        )
+        risk_notes = [text for key, text in notes_by_flag if fl[key]]
+        fail_count = int(self.fail_count[i])
+        status = str(self.status[i])
+        if status == "PASS":
+            scale_up_pct = "20%"
+            stop_loss_line = f"CPI 较首窗口涨幅 >{int(cfg.cpi_increase_max_pct*100)}% 或 IPM 跌幅 >{int(cfg.ipm_drop_max_pct*100)}%"
+        else:
+            scale_up_pct = "10%" if fail_count <= 1 else "暂不加量"
+            stop_loss_line = "收紧止损：CPI +15% 或 IPM -20% 即停"
+        return ValidateGateResult(
+            validate_status=status,
+            risk_notes=risk_notes if risk_notes else ["无显著风险"],
+            scale_recommendation={
+                "scale_up_step": f"建议加量步长 {scale_up_pct}",
+                "stop_loss": stop_loss_line,
+            },
+            detail_rows=self.detail_rows(i),
+            stability_metrics=ValidateStabilityMetrics(
+                ipm_cv=round(float(self.ipm_cv[i]), 4),
+                ipm_drop_pct=round(float(self.ipm_drop[i]) * 100, 2),
+                cpi_increase_pct=round(float(self.cpi_increase[i]) * 100, 2),
+                learning_iterations=min(5, int(self.learning_iterations[i])),
+            ),
+        )
+
+    def results(self) -> list[ValidateGateResult]:
+        return [self.result(i) for i in range(len(self))]
+
+
+@profiled("gate.validate_batch")
+def evaluate_validate_gate_batch(
+    data: ValidateTensor | Sequence[tuple[Sequence[WindowMetrics | dict], WindowMetrics | dict | None]],
+    *,
+    config: ValidateGateConfig | None = None,
+) -> BatchValidateResult | list[ValidateGateResult]:
+    """
+    多卡片 Validate Gate。data 为 ValidateTensor 或 [(windowed_metrics, light_expansion_metrics), ...]。
+    numpy 不可用时返回逐卡 ValidateGateResult 列表。
+    """
+    cfg = config or ValidateGateConfig()
+    if np is None:
+        if isinstance(data, ValidateTensor):
+            raise RuntimeError("ValidateTensor 需要 numpy")
+        return [evaluate_validate_gate(list(ws), le, config=cfg) for ws, le in data]
+    t = data if isinstance(data, ValidateTensor) else ValidateTensor.from_cards(data)
+    w, e = t.windows, t.expand
+    C, W = w["ipm"].shape
+    valid = np.arange(W)[None, :] < t.n_windows[:, None]
+
+    too_few = t.n_windows < 2
+    ipm_mask = valid & (w["impressions"] > 0)
+    cpi_mask = valid & (w["installs"] > 0)
+    roas_mask = valid & (w["spend"] > 0)
+    n_ipm = ipm_mask.sum(axis=1)
+    n_cpi = cpi_mask.sum(axis=1)
+    no_ipm = ~too_few & (n_ipm == 0)
+    ok = ~too_few & ~no_ipm
+
+    # 1. IPM 波动 / 回撤
+    mean_ipm = _safe_div(_seq_sum(w["ipm"], ipm_mask), n_ipm)
+    dev = _seq_sum((w["ipm"] - mean_ipm[:, None]) ** 2, ipm_mask)
+    ipm_cv = _safe_div(np.power(dev, 0.5), mean_ipm)
+    ipms, _ = _compact(w["ipm"], ipm_mask)
+    ipm_first = ipms[:, 0] if W else np.zeros(C)
+    ipm_min = np.where(ipm_mask, w["ipm"], np.inf).min(axis=1) if W else np.zeros(C)
+    ipm_drop = _safe_div(ipm_first - np.where(n_ipm > 0, ipm_min, 0.0), ipm_first)
+
+    # 2. CPI 回撤
+    cpis, _ = _compact(w["cpi"], cpi_mask)
+    cpi_first = np.where(n_cpi > 0, cpis[:, 0] if W else 0.0, 0.0)
+    cpi_max = np.where(n_cpi > 0, np.where(cpi_mask, w["cpi"], -np.inf).max(axis=1) if W else 0.0, 0.0)
+    cpi_increase = _safe_div(cpi_max - cpi_first, cpi_first)
+    mean_cpi = _safe_div(_seq_sum(w["cpi"], cpi_mask), n_cpi)
+
+    # 3. early_event / early_ROAS 方向一致（early_events 用全部窗口，ROAS 只用 spend>0 的窗口）
+    ev = w["early_events"]
+    roas, n_roas = _compact(w["early_roas"], roas_mask)
+    n_ev = t.n_windows
+    total = np.minimum(n_ev - 1, n_roas - 1)
+    matches = np.zeros(C, dtype=np.int64)
+    for j in range(1, W):
+        ev_dir = ev[:, j] >= ev[:, j - 1]
+        roas_dir = roas[:, j] >= roas[:, j - 1]
+        matches += ((ev_dir == roas_dir) & (j <= total)).astype(np.int64)
+    direction = (n_ev >= 2) & (n_roas >= 2) & (total > 0) & (_safe_div(matches.astype(np.float64), total) < 0.5)
+
+    # 4. 轻扩人群
+    has_le = t.has_expand
+    le_ipm_drop = _safe_div(mean_ipm - e["ipm"], mean_ipm)
+    le_cpi_inc = _safe_div(e["cpi"] - mean_cpi, mean_cpi)
+    le_ipm = has_le & (mean_ipm != 0) & (e["ipm"] > 0) & (le_ipm_drop > cfg.light_expansion_ipm_drop_max)
+    le_cpi = has_le & (mean_cpi != 0) & (e["cpi"] > 0) & (le_cpi_inc > cfg.light_expansion_cpi_increase_max)
+
+    flags = {
+        "cv": ipm_cv > cfg.ipm_cv_max,
+        "drop": ipm_drop > cfg.ipm_drop_max_pct,
+        "cpi": cpi_increase > cfg.cpi_increase_max_pct,
+        "direction": direction,
+        "le_ipm": le_ipm,
+        "le_cpi": le_cpi,
+    }
+    fail_count = sum(v.astype(np.int64) for v in flags.values())
+    flags["note_cv"] = ipm_cv > 0.4
+    flags["note_drop"] = (ipm_drop > 0.25) & ~flags["drop"]
+    flags["note_cpi"] = cpi_increase > 0.2
+    flags = {k: v & ok for k, v in flags.items()}
+
+    learning = (
+        (ipm_cv > 0.3).astype(np.int64)
+        + (ipm_drop > 0.2)
+        + (cpi_increase > 0.15)
+        + (has_le & (mean_ipm != 0) & (e["ipm"] < mean_ipm * 0.85))
+    )
+    status = np.where(ok & (fail_count == 0), "PASS", "FAIL")
+    return BatchValidateResult(
+        tensor=t,
+        config=cfg,
+        status=status,
+        fail_count=np.where(ok, fail_count, 0),
+        too_few_windows=too_few,
+        no_ipm=no_ipm,
+        ipm_cv=np.where(ok, ipm_cv, 0.0),
+        ipm_drop=np.where(ok, ipm_drop, 0.0),
+        cpi_increase=np.where(ok, cpi_increase, 0.0),
+        learning_iterations=np.where(ok, learning, 0),
+        flags=flags,
+    )
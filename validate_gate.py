@@ -9,6 +9,8 @@ from typing import Any
 
 from pydantic import BaseModel, Field
 
+from profiling import profiled
+
 
 # -------- 输入结构 --------
 
@@ -96,6 +98,7 @@ def _parse_metrics(m: Any) -> WindowMetrics:
     return m
 
 
+@profiled("gate.validate")
 def evaluate_validate_gate(
     windowed_metrics: list[WindowMetrics | dict],
     light_expansion_metrics: WindowMetrics | dict | None = None,
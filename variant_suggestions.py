@@ -5,15 +5,18 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any
+from typing import Any, Mapping
 
 from pydantic import BaseModel, Field
 
+from element_index import variant_tags_map
+from element_leaderboard import rank_by_evidence
 from element_scores import ElementScore
-from eval_schemas import Variant, decompose_variant_to_element_tags
+from eval_schemas import Variant
 from explore_gate import ExploreGateResult
+from profiling import profiled
 from simulate_metrics import SimulatedMetrics
-from vertical_config import get_pool, get_why_now_pool, get_why_you_phrase_list, get_sell_point_options
+from vertical_config import get_vertical_view
 
 # element_type -> 层级（策略/表达/行动/素材）
 _LAYER_MAP = {
@@ -108,34 +111,38 @@ def _get_candidates(
     n: int = 3,
     vertical: str = "casual_game",
 ) -> list[str]:
-    """从候选池取 2-3 个替代值。优先使用 vertical_config 语料（严禁跨行业词）。"""
+    """
+    从候选池取 2-3 个替代值。优先使用 vertical_config 语料（严禁跨行业词）。
+    知识库有跨卡片证据时按 evidence_score 排序，否则保持语料顺序。
+    """
+    view = get_vertical_view(vertical)
     if element_type == "why_you":
-        lst = get_why_you_phrase_list(vertical)
+        lst = view.why_you_phrase_list
     elif element_type == "why_now":
-        lst = get_why_now_pool(vertical)
+        lst = view.why_now_pool
     elif element_type in ("hook", "sell_point", "cta"):
         key = "hook_type" if element_type == "hook" else element_type
-        raw = get_pool(vertical, key) or []
-        lst = [str(x) for x in raw] if isinstance(raw, list) else []
+        raw = view.pool(key)
+        lst = [str(x) for x in raw] if isinstance(raw, tuple) else []
     else:
         lst = []
     if lst:
         others = [x for x in lst if str(x).strip() != str(current_value).strip()]
-        return others[:n]
+        return rank_by_evidence(vertical, element_type, others)[:n]
     if element_type == "asset":
         # asset: 从 vertical_config corpus.asset_var 或 pool 取
         parts = current_value.split("=", 1)
         if len(parts) == 2:
             k, v = parts[0], parts[1]
-            sub = get_pool(vertical, "asset_var")
-            if not isinstance(sub, dict):
+            sub = view.pool("asset_var")
+            if not isinstance(sub, Mapping):
                 sub = pool.get("asset_var", {}) or {}
-            lst = sub.get(k, []) if isinstance(sub, dict) else []
-            if isinstance(lst, list):
+            lst = sub.get(k, []) if isinstance(sub, Mapping) else []
+            if isinstance(lst, (list, tuple)):
                 others = [x for x in lst if str(x).strip() != str(v).strip()]
             else:
                 others = []
-            return others[:n]
+            return rank_by_evidence(vertical, "asset", others, value_prefix=f"{k}=")[:n]
         return []
     return []
 
@@ -165,6 +172,7 @@ def _cross_os_consistent(
     return len(os_set) >= 2
 
 
+@profiled("suggestions")
 def next_variant_suggestions(
     element_scores: list[ElementScore | dict],
     gate_result: ExploreGateResult | dict | None = None,
@@ -196,7 +204,7 @@ def next_variant_suggestions(
         return r
 
     if variant_to_tags is None and variants:
-        variant_to_tags = {v.variant_id: decompose_variant_to_element_tags(v) for v in variants}
+        variant_to_tags = variant_tags_map(variants)
     variant_to_tags = variant_to_tags or {}
 
     # 优先使用 diagnosis 处方
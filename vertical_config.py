@@ -1,12 +1,21 @@
 """
 Vertical 语料决定器：ecommerce / casual_game 两套词库。
 bucket（桶）与 phrase（具体短语）分离，保证 pydantic 校验不崩。
+
+编译视图：vertical_config.json 解析后一次性编译为只读的 CompiledVerticalConfig，
+每个 vertical 预先算好扁平候选池、桶 -> 短语、补齐默认值的权重。
+文件在磁盘上变化时整体重建并原子替换；version 为内容哈希，可作下游缓存 key。
 """
 from __future__ import annotations
 
+import hashlib
 import json
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Mapping
 
 try:
     from path_config import SAMPLES_DIR
@@ -14,95 +23,286 @@ except ImportError:
     SAMPLES_DIR = Path(__file__).resolve().parent.parent.parent / "samples"
 CONFIG_PATH = SAMPLES_DIR / "vertical_config.json"
 
-_config: dict[str, Any] | None = None
 _VERTICALS = ("ecommerce", "casual_game")
 
 # 通用桶（Literal 校验用）
 WHY_YOU_BUCKETS = ("更省钱", "更省事", "更强效果", "更匹配我", "更安全可信", "更好体验", "其他")
 WHY_NOW_BUCKETS = ("限时稀缺", "节点事件", "痛点升高", "机会出现", "社会驱动", "损失厌恶", "即时替代", "其他")
 
+_DEFAULT_METRIC_WEIGHTS = {"ipm": 0.4, "cpi": 0.35, "early_roas": 0.25}
+_DEFAULT_STRONG_STIMULUS_PENALTY = 3.0
+
+# 两次 stat 检查之间的最小间隔（秒），避免在逐卡循环里反复触发系统调用
+RELOAD_CHECK_INTERVAL = 1.0
+
 
 def _normalize_vertical(v: str) -> str:
     v = (v or "casual_game").lower().strip()
     return v if v in _VERTICALS else "casual_game"
 
 
+# -------- 编译视图 --------
+
+
+def _freeze(obj: Any) -> Any:
+    """递归冻结：dict -> MappingProxyType，list -> tuple"""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(x) for x in obj)
+    return obj
+
+
+def _thaw(obj: Any) -> Any:
+    """_freeze 的逆操作：供兼容接口返回可变副本"""
+    if isinstance(obj, Mapping):
+        return {k: _thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return [_thaw(x) for x in obj]
+    return obj
+
+
+@dataclass(frozen=True)
+class VerticalView:
+    """单个 vertical 的只读预计算视图"""
+
+    vertical: str
+    corpus: Mapping[str, Any]
+    why_you_phrases: Mapping[str, tuple[str, ...]]  # 桶 -> 短语（按 WHY_YOU_BUCKETS 顺序）
+    why_now_phrases: Mapping[str, tuple[str, ...]]  # 桶 -> 短语（按 WHY_NOW_BUCKETS 顺序）
+    why_you_phrase_list: tuple[str, ...]  # 扁平 Why you 候选池，空时为 ("其他",)
+    why_now_pool: tuple[str, ...]  # 扁平 Why now 候选池，空时为 ("其他",)
+    why_you_options: tuple[tuple[str, str], ...]
+    sell_point_options: tuple[str, ...]
+    root_cause_gaps: tuple[str, ...]
+    sample_strategy_card: Mapping[str, Any]
+    metric_weights: Mapping[str, Any]  # 已补默认值（含 ctr）
+    why_now_strong_stimulus_penalty: float
+    why_now_strong_triggers: tuple[str, ...]
+    use_refund_risk: bool
+    early_roas_as_proxy: bool
+
+    def pool(self, key: str) -> Any:
+        """corpus[key] 的只读视图，缺失时为空 tuple"""
+        return self.corpus.get(key) or ()
+
+
+@dataclass(frozen=True)
+class CompiledVerticalConfig:
+    """vertical_config.json 的编译结果：原始配置 + 各 vertical 视图 + 版本戳"""
+
+    version: str  # 内容哈希前 12 位；无配置文件时为 "empty"
+    raw: Mapping[str, Any]
+    why_you_buckets: tuple[str, ...]
+    why_now_buckets: tuple[str, ...]
+    verticals: Mapping[str, VerticalView]
+    source_signature: tuple[int, int] | None = None  # (mtime_ns, size)，用于热加载判断
+
+    def view(self, vertical: str) -> VerticalView:
+        return self.verticals[_normalize_vertical(vertical)]
+
+
+def _bucket_phrases(raw: Mapping[str, Any], buckets: tuple[str, ...]) -> Mapping[str, tuple[str, ...]]:
+    raw = raw or {}
+    return MappingProxyType({b: tuple(raw.get(b, ())) for b in buckets})
+
+
+def _flatten(phrases: Mapping[str, tuple[str, ...]]) -> tuple[str, ...]:
+    flat = tuple(p for lst in phrases.values() for p in lst)
+    return flat if flat else ("其他",)
+
+
+def _compile_vertical(cfg: Mapping[str, Any], vertical: str) -> VerticalView:
+    corpus = cfg.get("corpus", {}).get(vertical) or MappingProxyType({})
+    why_you = _bucket_phrases(corpus.get("why_you_phrases"), WHY_YOU_BUCKETS)
+    why_now = _bucket_phrases(corpus.get("why_now_phrases"), WHY_NOW_BUCKETS)
+
+    options = tuple((b, why_you[b][0] if why_you[b] else b) for b in WHY_YOU_BUCKETS)
+
+    raw_weights = cfg.get("metric_weights", {}).get(vertical)
+    weights = dict(raw_weights if raw_weights is not None else _DEFAULT_METRIC_WEIGHTS)
+    weights.setdefault("ctr", weights.get("ipm", 0.4) * 0.5)
+    flags = raw_weights or {}
+
+    rules = cfg.get("risk_rules", {}).get(vertical) or {}
+    gaps = corpus.get("root_cause_gap", ())
+
+    return VerticalView(
+        vertical=vertical,
+        corpus=corpus,
+        why_you_phrases=why_you,
+        why_now_phrases=why_now,
+        why_you_phrase_list=_flatten(why_you),
+        why_now_pool=_flatten(why_now),
+        why_you_options=options if options else (("其他", "其他"),),
+        sell_point_options=tuple(corpus.get("sell_point") or ()),
+        root_cause_gaps=tuple(gaps) if isinstance(gaps, tuple) else (),
+        sample_strategy_card=cfg.get("sample_strategy_card", {}).get(vertical, MappingProxyType({})),
+        metric_weights=MappingProxyType(weights),
+        why_now_strong_stimulus_penalty=float(
+            rules.get("why_now_strong_stimulus_penalty", _DEFAULT_STRONG_STIMULUS_PENALTY)
+        ),
+        why_now_strong_triggers=tuple(rules.get("why_now_strong_triggers", ())),
+        use_refund_risk=bool(flags.get("use_refund_risk", False)),
+        early_roas_as_proxy=bool(flags.get("early_roas_as_proxy", True)),
+    )
+
+
+def compile_vertical_config(
+    raw: dict[str, Any],
+    *,
+    version: str = "",
+    source_signature: tuple[int, int] | None = None,
+) -> CompiledVerticalConfig:
+    """将原始配置 dict 编译为只读视图；version 缺省时按内容哈希生成"""
+    if not version:
+        blob = json.dumps(raw, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        version = hashlib.sha256(blob).hexdigest()[:12] if raw else "empty"
+    cfg = _freeze(raw)
+    return CompiledVerticalConfig(
+        version=version,
+        raw=cfg,
+        why_you_buckets=tuple(cfg.get("why_you_buckets", WHY_YOU_BUCKETS)),
+        why_now_buckets=tuple(cfg.get("why_now_buckets", WHY_NOW_BUCKETS)),
+        verticals=MappingProxyType({v: _compile_vertical(cfg, v) for v in _VERTICALS}),
+        source_signature=source_signature,
+    )
+
+
+# -------- 加载与热更新 --------
+
+_compiled: CompiledVerticalConfig | None = None
+_compiled_lock = threading.Lock()
+_last_check = 0.0
+
+
+def _stat_signature(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load_from_disk(current: CompiledVerticalConfig | None) -> CompiledVerticalConfig:
+    """读取磁盘并编译；内容未变时只刷新签名，解析失败时沿用旧配置"""
+    sig = _stat_signature(CONFIG_PATH)
+    if sig is None:
+        return compile_vertical_config({})
+    try:
+        data = CONFIG_PATH.read_bytes()
+        version = hashlib.sha256(data).hexdigest()[:12]
+        if current is not None and current.version == version:
+            return CompiledVerticalConfig(
+                version=current.version,
+                raw=current.raw,
+                why_you_buckets=current.why_you_buckets,
+                why_now_buckets=current.why_now_buckets,
+                verticals=current.verticals,
+                source_signature=sig,
+            )
+        raw = json.loads(data.decode("utf-8"))
+    except (OSError, ValueError):
+        # 写入中途被读到半截文件：保留旧视图，下次检查再试
+        if current is not None:
+            return current
+        raise
+    return compile_vertical_config(raw, version=version, source_signature=sig)
+
+
+def get_compiled_config(*, check_reload: bool = True) -> CompiledVerticalConfig:
+    """
+    获取当前编译视图。
+
+    - 首次调用时从 CONFIG_PATH 加载
+    - check_reload=True 时最多每 RELOAD_CHECK_INTERVAL 秒 stat 一次文件，
+      (mtime, size) 变化则重建并整体替换（读者拿到的始终是完整的一份视图）
+    """
+    global _compiled, _last_check
+    cur = _compiled
+    if cur is not None:
+        if not check_reload:
+            return cur
+        now = time.monotonic()
+        if now - _last_check < RELOAD_CHECK_INTERVAL:
+            return cur
+        _last_check = now
+        if _stat_signature(CONFIG_PATH) == cur.source_signature:
+            return cur
+    with _compiled_lock:
+        if _compiled is cur or _compiled is None:
+            _compiled = _load_from_disk(_compiled)
+            _last_check = time.monotonic()
+        return _compiled
+
+
+def reload_vertical_config() -> CompiledVerticalConfig:
+    """强制重新读取 vertical_config.json（忽略检查间隔）"""
+    global _compiled, _last_check
+    with _compiled_lock:
+        _compiled = _load_from_disk(_compiled)
+        _last_check = time.monotonic()
+        return _compiled
+
+
+def get_config_version() -> str:
+    """当前配置版本戳（内容哈希），供下游缓存作 key"""
+    return get_compiled_config().version
+
+
+def get_vertical_view(vertical: str) -> VerticalView:
+    """取单个 vertical 的只读预计算视图（逐卡循环中优先使用）"""
+    return get_compiled_config().view(vertical)
+
+
+# -------- 兼容接口（返回可变副本） --------
+
+
 def load_vertical_config() -> dict[str, Any]:
-    global _config
-    if _config is None:
-        if CONFIG_PATH.exists():
-            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-                _config = json.load(f)
-        else:
-            _config = {}
-    return _config
+    return _thaw(get_compiled_config().raw)
 
 
 def get_corpus(vertical: str) -> dict[str, Any]:
-    cfg = load_vertical_config()
-    corpus = cfg.get("corpus", {})
-    return dict(corpus.get(_normalize_vertical(vertical), {}))
+    return _thaw(get_vertical_view(vertical).corpus)
 
 
 def get_why_you_buckets() -> list[str]:
     """通用 Why you 桶"""
-    cfg = load_vertical_config()
-    return list(cfg.get("why_you_buckets", WHY_YOU_BUCKETS))
+    return list(get_compiled_config().why_you_buckets)
 
 
 def get_why_now_buckets() -> list[str]:
     """通用 Why now 桶"""
-    cfg = load_vertical_config()
-    return list(cfg.get("why_now_buckets", WHY_NOW_BUCKETS))
+    return list(get_compiled_config().why_now_buckets)
 
 
 def get_why_you_phrases(vertical: str) -> dict[str, list[str]]:
     """获取 Why you 桶 -> 短语列表。key=桶名，value=该桶下的具体短语"""
-    c = get_corpus(vertical)
-    phrases = c.get("why_you_phrases") or {}
-    result: dict[str, list[str]] = {}
-    for bucket in WHY_YOU_BUCKETS:
-        result[bucket] = list(phrases.get(bucket, []))
-    return result
+    return {b: list(ph) for b, ph in get_vertical_view(vertical).why_you_phrases.items()}
 
 
 def get_why_now_phrases(vertical: str) -> dict[str, list[str]]:
     """获取 Why now 桶 -> 短语列表"""
-    c = get_corpus(vertical)
-    phrases = c.get("why_now_phrases") or {}
-    result: dict[str, list[str]] = {}
-    for bucket in WHY_NOW_BUCKETS:
-        result[bucket] = list(phrases.get(bucket, []))
-    return result
+    return {b: list(ph) for b, ph in get_vertical_view(vertical).why_now_phrases.items()}
 
 
 def get_sell_point_options(vertical: str) -> list[str]:
     """获取 sell_point 候选（Why you + Why now 组合展示用）"""
-    c = get_corpus(vertical)
-    return list(c.get("sell_point") or [])
+    return list(get_vertical_view(vertical).sell_point_options)
 
 
 def get_why_you_options(vertical: str) -> list[tuple[str, str]]:
     """兼容：返回 [(bucket, phrase), ...]，phrase 取该桶下首个或桶名"""
-    phrases_map = get_why_you_phrases(vertical)
-    result: list[tuple[str, str]] = []
-    for bucket in WHY_YOU_BUCKETS:
-        ph_list = phrases_map.get(bucket, [])
-        phrase = ph_list[0] if ph_list else bucket
-        result.append((bucket, phrase))
-    return result if result else [("其他", "其他")]
+    return list(get_vertical_view(vertical).why_you_options)
 
 
 def get_sample_strategy_card(vertical: str) -> dict[str, Any]:
-    cfg = load_vertical_config()
-    samples = cfg.get("sample_strategy_card", {})
-    return dict(samples.get(_normalize_vertical(vertical), {}))
+    return _thaw(get_vertical_view(vertical).sample_strategy_card)
 
 
 def get_root_cause_gap(vertical: str, index: int = 0) -> str:
-    c = get_corpus(vertical)
-    gaps = c.get("root_cause_gap", [])
-    if isinstance(gaps, list) and gaps:
+    gaps = get_vertical_view(vertical).root_cause_gaps
+    if gaps:
         return gaps[index % len(gaps)]
     return ""
 
@@ -114,54 +314,33 @@ def get_why_you_examples(vertical: str) -> dict[str, list[str]]:
 
 def get_why_now_pool(vertical: str) -> list[str]:
     """获取 Why now 短语候选池（扁平列表）"""
-    phrases_map = get_why_now_phrases(vertical)
-    result: list[str] = []
-    for ph_list in phrases_map.values():
-        result.extend(ph_list)
-    return result if result else ["其他"]
+    return list(get_vertical_view(vertical).why_now_pool)
 
 
 def get_why_you_phrase_list(vertical: str) -> list[str]:
     """获取 Why you 短语候选池（扁平列表）"""
-    phrases_map = get_why_you_phrases(vertical)
-    result: list[str] = []
-    for ph_list in phrases_map.values():
-        result.extend(ph_list)
-    return result if result else ["其他"]
+    return list(get_vertical_view(vertical).why_you_phrase_list)
 
 
 def get_pool(vertical: str, key: str) -> list[str] | list[dict] | dict[str, list[str]]:
-    c = get_corpus(vertical)
-    return c.get(key) or []
+    return _thaw(get_vertical_view(vertical).pool(key)) or []
 
 
 def get_metric_weights(vertical: str, os: str = "") -> dict[str, float]:
-    cfg = load_vertical_config()
-    weights = cfg.get("metric_weights", {})
-    w = dict(weights.get(_normalize_vertical(vertical), {"ipm": 0.4, "cpi": 0.35, "early_roas": 0.25}))
-    w.setdefault("ctr", w.get("ipm", 0.4) * 0.5)
-    return w
+    return dict(get_vertical_view(vertical).metric_weights)
 
 
 def get_why_now_strong_stimulus_penalty(vertical: str) -> float:
-    cfg = load_vertical_config()
-    rules = cfg.get("risk_rules", {})
-    return float(rules.get(_normalize_vertical(vertical), {}).get("why_now_strong_stimulus_penalty", 3.0))
+    return get_vertical_view(vertical).why_now_strong_stimulus_penalty
 
 
 def get_why_now_strong_triggers(vertical: str) -> list[str]:
-    cfg = load_vertical_config()
-    rules = cfg.get("risk_rules", {})
-    return list(rules.get(_normalize_vertical(vertical), {}).get("why_now_strong_triggers", []))
+    return list(get_vertical_view(vertical).why_now_strong_triggers)
 
 
 def use_refund_risk(vertical: str) -> bool:
-    cfg = load_vertical_config()
-    w = cfg.get("metric_weights", {}).get(_normalize_vertical(vertical), {})
-    return bool(w.get("use_refund_risk", False))
+    return get_vertical_view(vertical).use_refund_risk
 
 
 def early_roas_as_proxy(vertical: str) -> bool:
-    cfg = load_vertical_config()
-    w = cfg.get("metric_weights", {}).get(_normalize_vertical(vertical), {})
-    return bool(w.get("early_roas_as_proxy", True))
+    return get_vertical_view(vertical).early_roas_as_proxy
@@ -0,0 +1,134 @@
+"""
+Streamlit 入口的后台预热：页面先用轻量模块渲染外框，计算模块在后台线程里导入。
+
+- start_warmup()：每个进程只启动一次（守护线程），APP_WARMUP=0 关闭；app_demo 在首次渲染结束后才调用
+- 步骤：编译 vertical_config（各行业视图 + 语料）→ 导入计算模块（pydantic 模型随之构建）
+  → 补建未完成的模型 schema → 用 samples 里的卡片 / 变体做一次校验，把校验器与文件缓存热起来
+- 视图里按需 import 时若预热已完成则直接命中 sys.modules；未完成时由 import 锁等待同一模块，不会重复构建
+- 预热若与 rerun 同时进行会争用 GIL（run_benchmarks.py import_time 可见），因此不在首次渲染前启动；
+  收益在于首次渲染之后、用户切换视图 / 再次操作时模块已就绪
+- warmup_status()：各步骤耗时与错误，供健康检查页展示（导入失败会记录在这里）
+"""
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+try:
+    from path_config import SAMPLES_DIR
+except ImportError:
+    SAMPLES_DIR = Path(__file__).resolve().parent / "samples"
+
+# 按依赖顺序：先底层模型与门禁，再上层流水线
+WARM_MODULES = (
+    "eval_schemas",
+    "simulate_metrics",
+    "explore_gate",
+    "validate_gate",
+    "scoring_eval",
+    "element_index",
+    "element_scores",
+    "variant_suggestions",
+    "diagnosis",
+    "decision_summary",
+    "decision_pipeline",
+    "ofaat_generator",
+    "eval_set_generator",
+)
+WARM_VERTICALS = ("casual_game", "ecommerce")
+
+_LOCK = threading.Lock()
+_THREAD: threading.Thread | None = None
+_STATUS: dict[str, Any] = {"state": "idle", "steps": {}, "errors": {}, "total_ms": 0.0}
+
+
+def _step(name: str, fn) -> None:
+    t0 = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:  # 预热失败不影响页面，视图里按需导入时会再次抛出
+        _STATUS["errors"][name] = f"{type(e).__name__}: {e}"
+    finally:
+        _STATUS["steps"][name] = round((time.perf_counter() - t0) * 1000, 1)
+
+
+def _warm_config() -> None:
+    from vertical_config import get_compiled_config, get_corpus, get_vertical_view
+
+    get_compiled_config()
+    for v in WARM_VERTICALS:
+        get_vertical_view(v)
+        get_corpus(v)
+
+
+def _rebuild_models(modules: tuple[str, ...]) -> None:
+    from pydantic import BaseModel
+
+    for name in modules:
+        mod = sys.modules.get(name)
+        for obj in vars(mod).values() if mod else ():
+            if isinstance(obj, type) and issubclass(obj, BaseModel) and obj is not BaseModel:
+                if not getattr(obj, "__pydantic_complete__", True):
+                    obj.model_rebuild()
+
+
+def _validate_samples() -> None:
+    from eval_schemas import StrategyCard, Variant
+
+    for v in WARM_VERTICALS:
+        card_path = SAMPLES_DIR / f"eval_strategy_card_{v}.json"
+        variant_path = SAMPLES_DIR / f"eval_variants_{v}.json"
+        if card_path.exists():
+            StrategyCard.model_validate(json.loads(card_path.read_text(encoding="utf-8")))
+        if variant_path.exists():
+            for x in json.loads(variant_path.read_text(encoding="utf-8")):
+                Variant.model_validate(x)
+
+
+def _run(modules: tuple[str, ...]) -> None:
+    t0 = time.perf_counter()
+    _STATUS["state"] = "running"
+    _step("config", _warm_config)
+    for name in modules:
+        _step(f"import {name}", lambda n=name: importlib.import_module(n))
+    _step("model_rebuild", lambda: _rebuild_models(modules))
+    _step("samples", _validate_samples)
+    _STATUS["total_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    _STATUS["state"] = "failed" if _STATUS["errors"] else "done"
+
+
+def start_warmup(modules: tuple[str, ...] = WARM_MODULES) -> threading.Thread | None:
+    """启动后台预热（幂等）；APP_WARMUP=0 时不启动，返回 None"""
+    global _THREAD
+    if os.getenv("APP_WARMUP", "1").strip().lower() in ("0", "false", "off"):
+        return None
+    with _LOCK:
+        if _THREAD is None:
+            _STATUS["state"] = "pending"
+            _THREAD = threading.Thread(target=_run, args=(modules,), name="app-warmup", daemon=True)
+            _THREAD.start()
+    return _THREAD
+
+
+def wait_warm(timeout: float | None = None) -> bool:
+    """等待预热结束；未启动时立即返回 False"""
+    t = _THREAD
+    if t is None:
+        return False
+    t.join(timeout)
+    return not t.is_alive()
+
+
+def warmup_status() -> dict[str, Any]:
+    return {
+        "state": _STATUS["state"],
+        "total_ms": _STATUS["total_ms"],
+        "steps": dict(_STATUS["steps"]),
+        "errors": dict(_STATUS["errors"]),
+    }